@@ -51,6 +51,11 @@ from typing import Any
 import pyodbc
 from openpyxl import load_workbook
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import crm_db  # noqa: E402
+import crm_mirror  # noqa: E402
+
 
 # ============================================================
 # 1. SQL SERVER CONNECTION STRING
@@ -784,7 +789,7 @@ def main() -> int:
     audit: list[dict[str, Any]] = []
     summary: Counter[str] = Counter()
 
-    connection = pyodbc.connect(
+    connection = crm_db.connect(
         CONNECTION_STRING,
         autocommit=False,
     )
@@ -795,7 +800,11 @@ def main() -> int:
         # ----------------------------------------------------
         # A. MATCH OR CREATE SESSIONS
         # ----------------------------------------------------
-        existing_sessions = fetch_existing_sessions(cursor)
+        # Lookups read from the local mirror, refreshed through this
+        # transaction's cursor first (see crm_mirror.py).
+        existing_sessions = fetch_existing_sessions(
+            crm_mirror.lookup_cursor(cursor, "Sessions", "SessionAttendance")
+        )
         resolved_session_ids: dict[str, int] = {}
 
         for row in session_rows:
@@ -849,8 +858,9 @@ def main() -> int:
         # ----------------------------------------------------
         # B. MATCH PARTICIPANTS
         # ----------------------------------------------------
-        participants_by_card, full_by_name = fetch_full_participants(cursor)
-        lite_by_membership, lite_by_name = fetch_lite_members(cursor)
+        people_lookups = crm_mirror.lookup_cursor(cursor, "Participants", "LiteMembers")
+        participants_by_card, full_by_name = fetch_full_participants(people_lookups)
+        lite_by_membership, lite_by_name = fetch_lite_members(people_lookups)
 
         resolved_members: dict[str, dict[str, Any]] = {}
 
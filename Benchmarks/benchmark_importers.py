@@ -0,0 +1,443 @@
+"""
+Throughput benchmark for the register importers.
+
+For each importer this script generates a synthetic workbook (see
+generate_registers.py), then runs the importer in a fresh process against
+the local SQLite stand-in (crm_db, CRM_BACKEND=local) and times two phases
+separately:
+
+* parse     - reading the workbook into the importer's parsed rows
+* database  - sessions, members and attendance written to an empty local
+              database, using the parse phase's rows so Excel is not read twice
+
+For every phase it reports rows per second and the peak RSS of the importer
+process so far. The process is fresh for each importer, so its peak memory
+comes from that importer alone. The database phase always uses the local
+backend, never the live CRM. Paths that need SQL Server (the ARCC session
+MERGE and the Mens plan-then-apply temp table) fall back to their per-row
+versions.
+
+Results are written as JSON; --sql-profile adds each importer's top SQL
+statement templates from crm_db's profiler. Pass --baseline with an earlier results file to
+compare against it; a phase that got slower by more than
+REGRESSION_THRESHOLD is flagged and the script exits with status 1.
+
+Usage:
+
+    python Benchmarks/benchmark_importers.py --sheets 7 --sessions 40 --attendees 15
+    python Benchmarks/benchmark_importers.py --baseline Benchmarks/results/benchmark_20261016_101500.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import importlib.util
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+try:
+    import resource
+except ModuleNotFoundError:
+    resource = None  # type: ignore[assignment]
+
+try:
+    import psutil
+except ModuleNotFoundError:
+    psutil = None  # type: ignore[assignment]
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import crm_db  # noqa: E402
+import import_state  # noqa: E402
+from generate_registers import (  # noqa: E402
+    DEFAULT_SEED,
+    generate_arcc,
+    generate_calthorpe,
+    generate_mens,
+    generate_tennis,
+)
+
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+IMPORTERS = ["tennis", "mens", "arcc", "calthorpe"]
+
+DEFAULT_SHEETS = 4
+DEFAULT_SESSIONS = 20
+DEFAULT_ATTENDEES = 10
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+# A phase counts as a regression when its rows per second drop by more than this.
+REGRESSION_THRESHOLD = 0.10
+
+IMPORTER_SCRIPTS = {
+    "tennis": REPO_ROOT / "Tennis" / "tennis.py",
+    "mens": REPO_ROOT / "Sessioninsert" / "import_mens_sessions_2026.py",
+    "arcc": REPO_ROOT / "Sessioninsert" / "import_arcc_2025_exercise_register.py",
+    "calthorpe": REPO_ROOT / "Calthorpe Migrations" / "migrate_calthorpe_2025_26_to_crm_v2.py",
+}
+
+
+# ============================================================
+# MEASUREMENT
+# ============================================================
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident memory of this process so far, or None if it cannot be read."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+    if psutil is not None:
+        memory = psutil.Process().memory_info()
+        # peak_wset is the Windows peak working set.
+        return round(getattr(memory, "peak_wset", memory.rss) / (1024 * 1024), 1)
+
+    return None
+
+
+def measure(
+    phases: dict[str, dict[str, Any]],
+    name: str,
+    func: Callable[[], Any],
+    rows: int | Callable[[Any], int],
+) -> Any:
+    """Run func as phase name; rows is the row count, or a function of func's result that gives it."""
+    started = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - started
+    row_count = rows(result) if callable(rows) else rows
+
+    phases[name] = {
+        "seconds": round(seconds, 4),
+        "rows": row_count,
+        "rows_per_second": round(row_count / seconds, 1) if seconds > 0 else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    return result
+
+
+def load_script(name: str, path: Path) -> Any:
+    """Import a script by path; the importers live in folders that are not packages."""
+    spec = importlib.util.spec_from_file_location(f"benchmark_{name}", path)
+    module = importlib.util.module_from_spec(spec)
+    # dataclasses look the module up in sys.modules while the script is executing.
+    sys.modules[spec.name] = module
+    sys.path.insert(0, str(path.parent))
+    spec.loader.exec_module(module)
+    return module
+
+
+# ============================================================
+# IMPORTER RUNS (one fresh process each)
+# ============================================================
+
+def run_tennis(workdir: Path, phases: dict[str, dict[str, Any]]) -> None:
+    tennis = load_script("tennis", IMPORTER_SCRIPTS["tennis"])
+    tennis.INPUT_FILE = workdir / "tennis.xlsx"
+    tennis.USE_REGISTER_CACHE = False
+    tennis.PIPELINE_PARSE = False
+
+    batches = measure(
+        phases,
+        "parse",
+        lambda: list(tennis.iter_register_batches(tennis.INPUT_FILE)),
+        lambda parsed: sum(len(batch) for _sheet, batch in parsed),
+    )
+
+    # Replay the parsed batches so the database phase does not read Excel again.
+    tennis.iter_register_batches = lambda _input_file, _import_state=None: iter(batches)
+    measure(phases, "database", lambda: tennis.main(workers=1, incremental=False), phases["parse"]["rows"])
+
+
+def run_mens(workdir: Path, phases: dict[str, dict[str, Any]]) -> None:
+    mens = load_script("mens", IMPORTER_SCRIPTS["mens"])
+
+    parsed_rows, _stats = measure(
+        phases,
+        "parse",
+        lambda: mens.parse_workbook(workdir / "mens.xlsx"),
+        lambda parsed: len(parsed[0]),
+    )
+
+    # The default plan-then-apply path stages sessions in a #temp table, which needs SQL Server.
+    measure(
+        phases,
+        "database",
+        lambda: mens.import_into_database_row_by_row(parsed_rows, apply_changes=True),
+        len(parsed_rows),
+    )
+
+
+def run_arcc(workdir: Path, phases: dict[str, dict[str, Any]]) -> None:
+    arcc = load_script("arcc", IMPORTER_SCRIPTS["arcc"])
+    arcc.BULK_SESSION_UPSERT = False
+
+    parsed_rows, _counter, _issues = measure(
+        phases,
+        "parse",
+        lambda: arcc.parse_workbook(workdir / "arcc.xlsx"),
+        lambda parsed: len(parsed[0]),
+    )
+
+    measure(
+        phases,
+        "database",
+        lambda: arcc.import_into_database(parsed_rows, apply_changes=True),
+        len(parsed_rows),
+    )
+
+
+def run_calthorpe(workdir: Path, phases: dict[str, dict[str, Any]]) -> None:
+    calthorpe = load_script("calthorpe", IMPORTER_SCRIPTS["calthorpe"])
+    calthorpe.SESSIONS_FILE = str(workdir / "Calthorpe_CRM_Sessions_Staging.xlsx")
+    calthorpe.PARTICIPANTS_FILE = str(workdir / "Calthorpe_CRM_Participants_Attendance_Staging.xlsx")
+    calthorpe.COMMIT_CHANGES = True
+    calthorpe.CHECKPOINTED_COMMITS = False
+
+    sheet_sources = {
+        "Sessions": Path(calthorpe.SESSIONS_FILE),
+        "Participants": Path(calthorpe.PARTICIPANTS_FILE),
+        "Attendance": Path(calthorpe.PARTICIPANTS_FILE),
+    }
+
+    sheets = measure(
+        phases,
+        "parse",
+        lambda: {name: calthorpe.read_sheet(path, name) for name, path in sheet_sources.items()},
+        lambda parsed: sum(len(sheet_rows) for sheet_rows in parsed.values()),
+    )
+
+    # The migration refuses to run unless the staging totals match these.
+    calthorpe.EXPECTED_SESSIONS = len(sheets["Sessions"])
+    calthorpe.EXPECTED_PARTICIPANTS = len(sheets["Participants"])
+    calthorpe.EXPECTED_ATTENDANCE = len(sheets["Attendance"])
+    calthorpe.read_sheet = lambda _path, sheet_name: sheets[sheet_name]
+
+    measure(phases, "database", calthorpe.main, phases["parse"]["rows"])
+
+
+IMPORTER_RUNS: dict[str, Callable[[Path, dict[str, dict[str, Any]]], None]] = {
+    "tennis": run_tennis,
+    "mens": run_mens,
+    "arcc": run_arcc,
+    "calthorpe": run_calthorpe,
+}
+
+
+def run_importer_in_child(importer: str, workdir: str, sql_profile: bool = False) -> dict[str, Any]:
+    """Entry point of the benchmark child process; importer output goes to <workdir>/<importer>.log."""
+    workdir_path = Path(workdir)
+
+    crm_db.CRM_BACKEND = "local"
+    crm_db.SQL_PROFILE = sql_profile
+    crm_db.LOCAL_DATABASE_FILE = workdir_path / f"{importer}_crm.sqlite3"
+    import_state.DEFAULT_STATE_FILE = workdir_path / f"{importer}_import_state.sqlite3"
+    os.environ["CRM_SQL_CONNECTION_STRING"] = "local benchmark"
+    os.chdir(workdir_path)
+
+    phases: dict[str, dict[str, Any]] = {}
+    result: dict[str, Any] = {"phases": phases}
+
+    with open(workdir_path / f"{importer}.log", "w", encoding="utf-8") as log, \
+            contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        try:
+            IMPORTER_RUNS[importer](workdir_path, phases)
+        except Exception as exc:
+            traceback.print_exc()
+            result["error"] = f"{type(exc).__name__}: {exc}"
+
+    if sql_profile:
+        result["sql_profile"] = crm_db.SQL_PROFILER.as_dict(crm_db.SQL_PROFILE_TOP_N)
+
+    return result
+
+
+# ============================================================
+# GENERATION / REPORTING
+# ============================================================
+
+def generate_inputs(importer: str, workdir: Path, sizes: dict[str, int]) -> int:
+    """Write the importer's synthetic workbook(s); returns the number of source rows."""
+    if importer == "tennis":
+        return generate_tennis(workdir / "tennis.xlsx", **sizes)
+    if importer == "mens":
+        return generate_mens(workdir / "mens.xlsx", **sizes)
+    if importer == "arcc":
+        return generate_arcc(workdir / "arcc.xlsx", **sizes)
+
+    return sum(
+        generate_calthorpe(
+            workdir / "Calthorpe_CRM_Sessions_Staging.xlsx",
+            workdir / "Calthorpe_CRM_Participants_Attendance_Staging.xlsx",
+            **sizes,
+        )
+    )
+
+
+def git_commit() -> Optional[str]:
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    return output.stdout.strip() or None
+
+
+def print_results(results: dict[str, Any]) -> None:
+    print()
+    print(f"{'Importer':10} {'Phase':9} {'Rows':>8} {'Seconds':>9} {'Rows/s':>10} {'Peak RSS MB':>12}")
+    print("-" * 62)
+
+    for importer, result in results["importers"].items():
+        if "error" in result:
+            print(f"{importer:10} FAILED: {result['error']}")
+
+        for phase, values in result["phases"].items():
+            print(
+                f"{importer:10} {phase:9} {values['rows']:>8} {values['seconds']:>9.3f} "
+                f"{values['rows_per_second'] or 0:>10.1f} {values['peak_rss_mb'] or 0:>12.1f}"
+            )
+
+
+def compare_with_baseline(results: dict[str, Any], baseline: dict[str, Any]) -> list[str]:
+    """Print rows/s changes against the baseline; returns the regressed importer/phase names."""
+    regressions: list[str] = []
+
+    if baseline.get("sizes") != results["sizes"]:
+        print(f"\nWarning: baseline sizes {baseline.get('sizes')} differ from this run {results['sizes']}.")
+
+    print(f"\nCompared with {baseline.get('git_commit') or 'baseline'} ({baseline.get('created_at')})")
+    print("-" * 62)
+
+    for importer, result in results["importers"].items():
+        base_phases = baseline.get("importers", {}).get(importer, {}).get("phases", {})
+
+        for phase, values in result["phases"].items():
+            before = base_phases.get(phase, {}).get("rows_per_second")
+            after = values["rows_per_second"]
+
+            if not before or not after:
+                continue
+
+            change = (after - before) / before
+            flag = ""
+
+            if change < -REGRESSION_THRESHOLD:
+                flag = "  REGRESSION"
+                regressions.append(f"{importer}/{phase}")
+
+            print(f"{importer:10} {phase:9} {before:>10.1f} -> {after:>10.1f} rows/s ({change:+.1%}){flag}")
+
+    return regressions
+
+
+# ============================================================
+# COMMAND-LINE ENTRY POINT
+# ============================================================
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark register importer throughput on synthetic workbooks.")
+    parser.add_argument("--importers", nargs="+", choices=IMPORTERS, default=IMPORTERS)
+    parser.add_argument("--sheets", type=int, default=DEFAULT_SHEETS)
+    parser.add_argument("--sessions", type=int, default=DEFAULT_SESSIONS, help="Sessions per sheet.")
+    parser.add_argument("--attendees", type=int, default=DEFAULT_ATTENDEES, help="Attendees per session.")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help=f"Results JSON. Default: {RESULTS_DIR}/benchmark_<timestamp>.json",
+    )
+    parser.add_argument("--baseline", type=Path, default=None, help="Earlier results JSON to compare against.")
+    parser.add_argument(
+        "--sql-profile",
+        action="store_true",
+        help="Add each importer's top SQL statement templates (crm_db SQL profile) to the results.",
+    )
+    parser.add_argument(
+        "--keep-workdir",
+        action="store_true",
+        help="Keep the generated workbooks, local databases and importer logs.",
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    sizes = {"sheets": args.sheets, "sessions": args.sessions, "attendees": args.attendees, "seed": args.seed}
+    created_at = datetime.now().replace(microsecond=0)
+
+    results: dict[str, Any] = {
+        "created_at": created_at.isoformat(),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "backend": "local",
+        "sizes": sizes,
+        "importers": {},
+    }
+
+    workdir = Path(tempfile.mkdtemp(prefix="register_benchmark_"))
+    context = multiprocessing.get_context("spawn")
+
+    try:
+        for importer in args.importers:
+            print(f"Generating {importer} workbook ({args.sheets} sheets x {args.sessions} sessions x {args.attendees} attendees)")
+            source_rows = generate_inputs(importer, workdir, sizes)
+
+            print(f"Running {importer} ...")
+            with context.Pool(1) as pool:
+                result = pool.apply(run_importer_in_child, (importer, str(workdir), args.sql_profile))
+
+            results["importers"][importer] = {"source_rows": source_rows, **result}
+    finally:
+        if args.keep_workdir:
+            print(f"\nWorkbooks, databases and importer logs kept in {workdir}")
+        else:
+            for path in workdir.iterdir():
+                path.unlink()
+            workdir.rmdir()
+
+    print_results(results)
+
+    output = args.output or RESULTS_DIR / f"benchmark_{created_at:%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    print(f"\nResults written to {output}")
+
+    regressions: list[str] = []
+    if args.baseline:
+        regressions = compare_with_baseline(results, json.loads(args.baseline.read_text(encoding="utf-8")))
+
+    if any("error" in result for result in results["importers"].values()):
+        return 1
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,503 @@
+"""
+Synthetic register workbooks for benchmarking the importers.
+
+Each generator writes a workbook in the layout its importer expects, filled
+with made-up people, so the importers can be timed at any size without real
+participant data:
+
+* tennis     - Tennis/tennis.py: one sheet per venue, a header row and 16
+               columns, one row per attendee per session
+* mens       - Sessioninsert/import_mens_sessions_2026.py: one sheet per
+               SHEET_CONFIG entry, session details on the first row of each
+               session and carried forward on the rows below
+* arcc       - Sessioninsert/import_arcc_2025_exercise_register.py: activity
+               sheets with one dated column per session and one row per
+               participant, attendance marked "yes"
+* calthorpe  - Calthorpe Migrations/migrate_calthorpe_2025_26_to_crm_v2.py:
+               the Sessions staging workbook and the Participants/Attendance
+               staging workbook
+
+Sizes are sheets x sessions x attendees. For tennis and mens that is the
+number of register rows; for arcc, attendees is the number of participant
+rows per sheet, each marked present at roughly ATTENDANCE_RATE of the
+sessions; for calthorpe, sheets x sessions is the number of staged sessions.
+
+Cell values mix the formats found in the real registers (datetime and text
+dates, several time-range spellings, cards as numbers and text, LITE members
+with no card), and the same seed always produces the same workbook.
+
+Usage:
+
+    python Benchmarks/generate_registers.py tennis --sheets 7 --sessions 50 --attendees 12 --output tennis.xlsx
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from openpyxl import Workbook
+
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+DEFAULT_SEED = 2025
+
+# Share of people in a pool with no Saheli card (imported as LITE members).
+LITE_MEMBER_RATE = 0.25
+
+# Chance that an ARCC participant is marked present at a session.
+ATTENDANCE_RATE = 0.6
+
+# Chance that a date cell is written as dd/mm/yyyy text instead of a date.
+TEXT_DATE_RATE = 0.1
+
+FIRST_NAMES = [
+    "Aisha", "Amina", "Bushra", "Farah", "Fatima", "Hina", "Jasmin", "Kiran",
+    "Layla", "Maryam", "Nadia", "Nazia", "Parveen", "Rubina", "Sadia", "Samina",
+    "Shabana", "Shazia", "Tahira", "Yasmin", "Zainab", "Zara", "Ali", "Bilal",
+    "Hamza", "Imran", "Khalid", "Omar", "Tariq", "Usman", "Margaret", "Patricia",
+]
+
+LAST_NAMES = [
+    "Ahmed", "Akhtar", "Ali", "Begum", "Bibi", "Butt", "Chaudhry", "Hussain",
+    "Iqbal", "Javed", "Khan", "Mahmood", "Malik", "Mirza", "Patel", "Qureshi",
+    "Rashid", "Rehman", "Shah", "Sheikh", "Siddiqui", "Smith", "Jones", "Taylor",
+]
+
+RELATIONS = ["husband", "wife", "daughter", "son", "sister", "brother", "friend"]
+RISK_LEVELS = ["Low", "Medium", "High", None]
+
+# (start hour, start minute, duration in minutes) for generated sessions.
+SESSION_SLOTS = [(9, 30, 60), (10, 0, 60), (10, 0, 45), (11, 0, 60), (12, 30, 60), (18, 0, 60)]
+
+TENNIS_SHEETS = ["Calthorpe", "Cannon Hill", "Handsworth", "Wardend", "Parkfield", "Heathmount", "St Albans"]
+
+MENS_SHEETS = [
+    "Men's Multisport Calthorpe",
+    "Men's Circuit ARCC",
+    "Men's Exercise ARCC",
+    "Over 50's Health Club ARCC",
+    "Lunch Club",
+    "Digital Skills",
+    "Mens Walk",
+]
+
+ARCC_SHEETS = [
+    "Chair Based Exercise", "Chair Pilates", "Yoga", "Circuit", "Pilates",
+    "Body Conditioning", "Strength & Stretch", "Walk & Talk", "Salsa", "Crochet",
+]
+
+# The ARCC importer only reads 2025 dates from at most 300 columns.
+ARCC_YEAR = 2025
+ARCC_FIRST_SESSION_COLUMN = 7
+ARCC_MAX_SESSIONS = 300 - ARCC_FIRST_SESSION_COLUMN + 1
+
+CALTHORPE_VENUE = "Calthorpe Wellbeing Hub"
+CALTHORPE_ACTIVITIES = ["Aerobics", "Arts", "Chair Based Exercise", "Zumba", "Yoga", "Strength and Stretch"]
+CALTHORPE_FIRST_DATE = date(2025, 11, 3)
+CALTHORPE_LAST_DATE = date(2026, 6, 9)
+
+CALTHORPE_SESSION_HEADERS = [
+    "ImportSessionKey", "Frequency", "Category", "SubCategory", "ActivityCategory", "VenueName",
+    "ActivityName", "Notes", "IsRecurringWeekly", "DayOfWeek", "SessionDate", "ArrivalTime",
+    "StartTime", "EndTime", "Capacity", "IsBookingRequired", "IsCancelled", "AssignedStaffId",
+    "SessionProviderId", "SourceStatus", "SourceFiles", "SourceSheets", "SourceRows",
+    "AttendanceRowsInSource", "ExistingSessionId", "MatchStatus", "ReviewNotes",
+]
+
+CALTHORPE_PARTICIPANT_HEADERS = [
+    "SourceParticipantKey", "ExpectedMemberKind", "SaheliCardNumber", "SourceName", "NormalisedName",
+    "FirstName", "LastName", "ProposedMembershipId", "ActivitiesAttended", "FirstAttendanceDate",
+    "LastAttendanceDate", "AttendanceCount", "RiskStratification", "EmergencyName", "EmergencyPhone",
+    "ProfileSourceRows", "MatchedParticipantId", "MatchedLiteMemberId", "MatchedMembershipId",
+    "MatchStatus", "ReviewNotes",
+]
+
+CALTHORPE_ATTENDANCE_HEADERS = [
+    "ImportAttendanceKey", "ImportSessionKey", "SourceParticipantKey", "ExpectedMemberKind",
+    "SaheliCardNumber", "MemberName", "VenueName", "ActivityName", "SessionDate", "SessionDay",
+    "SessionMonth", "SessionStartTime", "SessionEndTime", "Attended", "RiskStratification",
+    "EmergencyName", "EmergencyPhone", "SourceWorkbook", "SourceSheet", "SourceRow",
+    "SourceActivityLabel", "SourceTimeText", "DateCorrection", "ExistingSessionId",
+    "ExistingAttendanceId", "MatchStatus", "ReviewNotes",
+]
+
+
+# ============================================================
+# PEOPLE AND SESSIONS
+# ============================================================
+
+@dataclass(frozen=True)
+class Person:
+    card: Optional[int]
+    first_name: str
+    last_name: str
+    emergency_name: str
+    emergency_phone: str
+    risk: Optional[str]
+    date_of_birth: date
+    postcode: str
+
+    @property
+    def name(self) -> str:
+        return f"{self.first_name} {self.last_name}"
+
+
+@dataclass(frozen=True)
+class Slot:
+    session_date: date
+    start: datetime
+    end: datetime
+
+
+def make_people(rng: random.Random, count: int, first_card: int = 100) -> list[Person]:
+    people: list[Person] = []
+
+    for index in range(count):
+        first_name = rng.choice(FIRST_NAMES)
+        # A numeric suffix keeps names unique without needing a huge name list.
+        last_name = f"{rng.choice(LAST_NAMES)}{'' if index < len(LAST_NAMES) else f'-{index}'}"
+        people.append(
+            Person(
+                card=None if rng.random() < LITE_MEMBER_RATE else first_card + index,
+                first_name=first_name,
+                last_name=last_name,
+                emergency_name=f"{rng.choice(RELATIONS)} - {rng.choice(FIRST_NAMES)} {last_name}",
+                emergency_phone=f"07{rng.randrange(100000000, 999999999)}",
+                risk=rng.choice(RISK_LEVELS),
+                date_of_birth=date(rng.randrange(1940, 2000), rng.randrange(1, 13), rng.randrange(1, 29)),
+                postcode=f"B{rng.randrange(1, 45)} {rng.randrange(1, 10)}{rng.choice('ABDEFGHJLNPQRSTUWXYZ')}{rng.choice('ABDEFGHJLNPQRSTUWXYZ')}",
+            )
+        )
+
+    return people
+
+
+def make_slots(rng: random.Random, count: int, first_date: date, last_date: date) -> list[Slot]:
+    """count sessions spread evenly from first_date to last_date, one time slot per sheet."""
+    hour, minute, duration = rng.choice(SESSION_SLOTS)
+    span_days = max((last_date - first_date).days, 0)
+    slots: list[Slot] = []
+
+    for index in range(count):
+        session_date = first_date + timedelta(days=(index * span_days) // max(count, 1))
+        start = datetime.combine(session_date, datetime.min.time()).replace(hour=hour, minute=minute)
+        slots.append(Slot(session_date, start, start + timedelta(minutes=duration)))
+
+    return slots
+
+
+def clock_text(value: datetime, with_suffix: bool = True) -> str:
+    hour = value.hour % 12 or 12
+    minutes = f".{value.minute:02d}" if value.minute else ""
+    suffix = ("am" if value.hour < 12 else "pm") if with_suffix else ""
+    return f"{hour}{minutes}{suffix}"
+
+
+def time_range_text(rng: random.Random, slot: Slot) -> str:
+    """One of the time-range spellings seen in the registers."""
+    return rng.choice([
+        f"{clock_text(slot.start)}-{clock_text(slot.end)}",
+        f"{clock_text(slot.start)} - {clock_text(slot.end)}",
+        f"{clock_text(slot.start, False)}-{clock_text(slot.end)}",
+        f"{slot.start:%H:%M} - {slot.end:%H:%M}",
+    ])
+
+
+def date_cell(rng: random.Random, value: date) -> Any:
+    if rng.random() < TEXT_DATE_RATE:
+        return value.strftime("%d/%m/%Y")
+    return datetime.combine(value, datetime.min.time())
+
+
+def card_cell(rng: random.Random, person: Person) -> Any:
+    if person.card is None:
+        return None
+    return person.card if rng.random() < 0.8 else str(person.card)
+
+
+def pick_attendees(rng: random.Random, people: list[Person], count: int) -> list[Person]:
+    return rng.sample(people, min(count, len(people)))
+
+
+# ============================================================
+# GENERATORS
+# ============================================================
+
+def generate_tennis(path: Path, *, sheets: int, sessions: int, attendees: int, seed: int = DEFAULT_SEED) -> int:
+    rng = random.Random(seed)
+    people = make_people(rng, max(attendees * 3, 10))
+    workbook = Workbook(write_only=True)
+    rows_written = 0
+
+    for sheet_index in range(sheets):
+        base_name = TENNIS_SHEETS[sheet_index % len(TENNIS_SHEETS)]
+        sheet_name = base_name if sheet_index < len(TENNIS_SHEETS) else f"{base_name} {sheet_index // len(TENNIS_SHEETS) + 1}"
+        worksheet = workbook.create_sheet(sheet_name)
+        worksheet.append([
+            "Session", "Day", "Date", "Month", "Time", "Saheli Card Number", "Name",
+            "Emergency Contact Name", "Emergency Number", "Risk Stratification", "Health Condition",
+            "DOB", "Post Code", "Ethnicity", "Sexual Orientation", "New Participants",
+        ])
+
+        for slot in make_slots(rng, sessions, date(2025, 1, 6), date(2025, 12, 15)):
+            time_text = time_range_text(rng, slot)
+
+            for person in pick_attendees(rng, people, attendees):
+                worksheet.append([
+                    "Tennis",
+                    slot.session_date.strftime("%A"),
+                    date_cell(rng, slot.session_date),
+                    slot.session_date.strftime("%B"),
+                    time_text,
+                    card_cell(rng, person),
+                    person.name,
+                    person.emergency_name,
+                    person.emergency_phone,
+                    person.risk,
+                    None,
+                    person.date_of_birth.strftime("%d/%m/%Y"),
+                    person.postcode,
+                    None,
+                    None,
+                    None,
+                ])
+                rows_written += 1
+
+    workbook.save(path)
+    return rows_written
+
+
+def generate_mens(path: Path, *, sheets: int, sessions: int, attendees: int, seed: int = DEFAULT_SEED) -> int:
+    if sheets > len(MENS_SHEETS):
+        print(f"Mens register has {len(MENS_SHEETS)} configured worksheets; generating {len(MENS_SHEETS)}, not {sheets}.")
+
+    rng = random.Random(seed)
+    people = make_people(rng, max(attendees * 3, 10))
+    workbook = Workbook(write_only=True)
+    rows_written = 0
+
+    for sheet_name in MENS_SHEETS[:sheets]:
+        worksheet = workbook.create_sheet(sheet_name)
+        worksheet.append([
+            "Session", "Day", "Date", "Month", "Time", "Saheli Card Number", "Name",
+            "Emergency Contact Name", "Emergency Number", "Risk Stratification",
+        ])
+
+        for slot in make_slots(rng, sessions, date(2026, 1, 5), date(2026, 12, 14)):
+            time_text = time_range_text(rng, slot)
+
+            # Session details appear on the first row only and are carried forward.
+            for position, person in enumerate(pick_attendees(rng, people, attendees)):
+                session_cells = (
+                    [sheet_name, slot.session_date.strftime("%A"), date_cell(rng, slot.session_date),
+                     slot.session_date.strftime("%B"), time_text]
+                    if position == 0
+                    else [None, None, None, None, None]
+                )
+                worksheet.append([
+                    *session_cells,
+                    card_cell(rng, person),
+                    person.name,
+                    person.emergency_name,
+                    person.emergency_phone,
+                    person.risk,
+                ])
+                rows_written += 1
+
+    workbook.save(path)
+    return rows_written
+
+
+def generate_arcc(path: Path, *, sheets: int, sessions: int, attendees: int, seed: int = DEFAULT_SEED) -> int:
+    if sessions > ARCC_MAX_SESSIONS:
+        print(f"ARCC sheets hold at most {ARCC_MAX_SESSIONS} session columns; generating {ARCC_MAX_SESSIONS}, not {sessions}.")
+        sessions = ARCC_MAX_SESSIONS
+
+    rng = random.Random(seed)
+    people = make_people(rng, attendees * max(sheets, 1))
+    workbook = Workbook(write_only=True)
+    markers_written = 0
+
+    for sheet_index in range(sheets):
+        base_name = ARCC_SHEETS[sheet_index % len(ARCC_SHEETS)]
+        sheet_name = base_name if sheet_index < len(ARCC_SHEETS) else f"{base_name} {sheet_index // len(ARCC_SHEETS) + 1}"
+        worksheet = workbook.create_sheet(sheet_name)
+        slots = make_slots(rng, sessions, date(ARCC_YEAR, 1, 6), date(ARCC_YEAR, 12, 15))
+
+        worksheet.append([f"{sheet_name} register {ARCC_YEAR}"])
+        worksheet.append([
+            "Sessions attended", "Saheli Card Number", "Name", "Gender", "D.O.B", "Emergency Contact Name",
+            *(datetime.combine(slot.session_date, datetime.min.time()) for slot in slots),
+        ])
+
+        for person in people[sheet_index * attendees:(sheet_index + 1) * attendees]:
+            marks = ["yes" if rng.random() < ATTENDANCE_RATE else None for _slot in slots]
+            markers_written += sum(1 for mark in marks if mark)
+            worksheet.append([
+                sum(1 for mark in marks if mark),
+                card_cell(rng, person),
+                person.name,
+                "Female",
+                person.date_of_birth.strftime("%d/%m/%Y"),
+                person.emergency_name,
+                *marks,
+            ])
+
+    workbook.save(path)
+    return markers_written
+
+
+def calthorpe_session_key(activity: str, slot: Slot) -> str:
+    return f"CALTHORPE|{activity.upper()}|{slot.session_date.isoformat()}|{slot.start:%H%M}|{slot.end:%H%M}"
+
+
+def generate_calthorpe(
+    sessions_path: Path,
+    participants_path: Path,
+    *,
+    sheets: int,
+    sessions: int,
+    attendees: int,
+    seed: int = DEFAULT_SEED,
+) -> tuple[int, int, int]:
+    """Write both staging workbooks; returns (sessions, participants, attendance rows)."""
+    rng = random.Random(seed)
+    people = make_people(rng, max(attendees * 3, 10), first_card=1000)
+
+    def participant_key(person: Person) -> str:
+        return f"CARD:{person.card}" if person.card is not None else f"NAME:{person.name.upper()}"
+
+    session_rows: list[list[Any]] = []
+    attendance_rows: list[list[Any]] = []
+    attended_by: dict[str, list[tuple[str, date]]] = {}
+    seen_keys: set[str] = set()
+
+    for sheet_index in range(sheets):
+        activity = CALTHORPE_ACTIVITIES[sheet_index % len(CALTHORPE_ACTIVITIES)]
+
+        for slot in make_slots(rng, sessions, CALTHORPE_FIRST_DATE, CALTHORPE_LAST_DATE):
+            session_key = calthorpe_session_key(activity, slot)
+            if session_key in seen_keys:
+                continue
+            seen_keys.add(session_key)
+
+            group = pick_attendees(rng, people, attendees)
+            session_rows.append([
+                session_key, "WEEKLY", "Fitness", None, "Fitness", CALTHORPE_VENUE, activity,
+                "Synthetic benchmark session", 0, None, datetime.combine(slot.session_date, datetime.min.time()),
+                None, f"{slot.start:%H:%M:%S}", f"{slot.end:%H:%M:%S}", None, 0, 0, None, None,
+                "DELIVERED", "synthetic.xlsx", activity, len(group), len(group), None, "TO_MATCH", None,
+            ])
+
+            for row_number, person in enumerate(group, start=2):
+                key = participant_key(person)
+                attended_by.setdefault(key, []).append((activity, slot.session_date))
+                attendance_rows.append([
+                    f"{session_key}|{key}", session_key, key, "FULL" if person.card is not None else "LITE",
+                    None if person.card is None else str(person.card), person.name, CALTHORPE_VENUE, activity,
+                    datetime.combine(slot.session_date, datetime.min.time()), slot.session_date.strftime("%A"),
+                    slot.session_date.strftime("%B"), f"{slot.start:%H:%M:%S}", f"{slot.end:%H:%M:%S}", 1,
+                    person.risk, person.emergency_name, person.emergency_phone, "synthetic.xlsx", activity,
+                    row_number, activity, time_range_text(rng, slot), None, None, None, "TO_MATCH", None,
+                ])
+
+    participant_rows: list[list[Any]] = []
+
+    for index, person in enumerate(people):
+        key = participant_key(person)
+        visits = attended_by.get(key)
+        if not visits:
+            continue
+
+        is_full = person.card is not None
+        participant_rows.append([
+            key, "FULL" if is_full else "LITE", str(person.card) if is_full else None,
+            None if is_full else person.name, None if is_full else person.name.upper(),
+            None if is_full else person.first_name, None if is_full else person.last_name,
+            None if is_full else f"CAL-BENCH-{index:05d}",
+            ", ".join(sorted({activity for activity, _day in visits})),
+            datetime.combine(min(day for _activity, day in visits), datetime.min.time()),
+            datetime.combine(max(day for _activity, day in visits), datetime.min.time()),
+            len(visits), person.risk, person.emergency_name, person.emergency_phone,
+            "synthetic.xlsx", None, None, None, "TO_MATCH", None,
+        ])
+
+    write_sheets(sessions_path, {"Sessions": (CALTHORPE_SESSION_HEADERS, session_rows)})
+    write_sheets(
+        participants_path,
+        {
+            "Participants": (CALTHORPE_PARTICIPANT_HEADERS, participant_rows),
+            "Attendance": (CALTHORPE_ATTENDANCE_HEADERS, attendance_rows),
+        },
+    )
+
+    return len(session_rows), len(participant_rows), len(attendance_rows)
+
+
+def write_sheets(path: Path, sheets: dict[str, tuple[list[str], list[list[Any]]]]) -> None:
+    workbook = Workbook(write_only=True)
+
+    for sheet_name, (headers, rows) in sheets.items():
+        worksheet = workbook.create_sheet(sheet_name)
+        worksheet.append(headers)
+        for row in rows:
+            worksheet.append(row)
+
+    workbook.save(path)
+
+
+GENERATORS: dict[str, Callable[..., Any]] = {
+    "tennis": generate_tennis,
+    "mens": generate_mens,
+    "arcc": generate_arcc,
+}
+
+
+# ============================================================
+# COMMAND-LINE ENTRY POINT
+# ============================================================
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Write a synthetic register workbook for benchmarking an importer.")
+    parser.add_argument("register", choices=[*GENERATORS, "calthorpe"])
+    parser.add_argument("--sheets", type=int, default=4)
+    parser.add_argument("--sessions", type=int, default=20, help="Sessions per sheet.")
+    parser.add_argument("--attendees", type=int, default=10, help="Attendees per session (participant rows for arcc).")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument(
+        "--output",
+        type=Path,
+        required=True,
+        help="Workbook path. For calthorpe, the folder for both staging workbooks.",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    sizes = {"sheets": args.sheets, "sessions": args.sessions, "attendees": args.attendees, "seed": args.seed}
+
+    if args.register == "calthorpe":
+        args.output.mkdir(parents=True, exist_ok=True)
+        counts = generate_calthorpe(
+            args.output / "Calthorpe_CRM_Sessions_Staging.xlsx",
+            args.output / "Calthorpe_CRM_Participants_Attendance_Staging.xlsx",
+            **sizes,
+        )
+        print(f"Wrote {counts[0]} sessions, {counts[1]} participants, {counts[2]} attendance rows to {args.output}")
+        return
+
+    rows = GENERATORS[args.register](args.output, **sizes)
+    print(f"Wrote {rows} attendance rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
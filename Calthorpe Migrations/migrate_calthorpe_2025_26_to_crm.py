@@ -36,6 +36,11 @@ from typing import Any
 import pyodbc
 from openpyxl import load_workbook
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import crm_db  # noqa: E402
+import crm_mirror  # noqa: E402
+
 
 # ============================================================
 # 1. SQL SERVER CONNECTION STRING
@@ -1097,7 +1102,7 @@ def main() -> int:
     audit: list[dict[str, Any]] = []
     summary: Counter[str] = Counter()
 
-    connection = pyodbc.connect(
+    connection = crm_db.connect(
         CONNECTION_STRING,
         autocommit=False,
     )
@@ -1124,11 +1129,18 @@ def main() -> int:
                 f"{length_text}"
             )
 
+        # Read from the local mirror, refreshed with this run's
+        # changes (see crm_mirror.py).
+        people_lookups = crm_mirror.lookup_cursor(
+            cursor,
+            "Participants",
+            "LiteMembers",
+        )
         participants_by_card, full_by_name = (
-            fetch_full_participants(cursor)
+            fetch_full_participants(people_lookups)
         )
         lite_by_membership, lite_by_name = (
-            fetch_lite_members(cursor)
+            fetch_lite_members(people_lookups)
         )
 
         # ----------------------------------------------------
@@ -1210,7 +1222,11 @@ def main() -> int:
         # B. MATCH OR CREATE SESSIONS
         # ----------------------------------------------------
         existing_sessions = fetch_existing_sessions(
-            cursor
+            crm_mirror.lookup_cursor(
+                cursor,
+                "Sessions",
+                "SessionAttendance",
+            )
         )
 
         resolved_session_ids: dict[str, int] = {}
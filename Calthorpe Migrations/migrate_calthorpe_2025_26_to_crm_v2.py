@@ -27,22 +27,38 @@ This V2 script also resolves the previously unmatched records:
 Keep COMMIT_CHANGES = False for the first V2 run.
 Set COMMIT_CHANGES = True only after the V2 preview shows no unresolved
 attendance records.
+
+Checkpointed commits:
+    With CHECKPOINTED_COMMITS = True (and COMMIT_CHANGES = True) each phase
+    commits every CHECKPOINT_CHUNK_SIZE staging rows and records progress in
+    CHECKPOINT_FILE. If the connection drops, run the script again: it
+    resumes after the last committed chunk. Delete the checkpoint file to
+    start again from the beginning.
 """
 
 from __future__ import annotations
 
 import csv
+import hashlib
+import json
+import os
 import re
 import sys
 import uuid
 from collections import Counter, defaultdict
 from datetime import date, datetime, time
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
 
 import pyodbc
 from openpyxl import load_workbook
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import crm_db  # noqa: E402
+import crm_mirror  # noqa: E402
+from person_matching import PersonIndex  # noqa: E402
+
 
 # ============================================================
 # 1. SQL SERVER CONNECTION STRING
@@ -97,6 +113,13 @@ MATCH_UNIQUE_FULL_NAME = True
 # for that source identity instead.
 CREATE_AMBIGUOUS_NAME_AS_LITE = True
 
+# A cardless source name with no exact LITE or FULL match is compared with
+# existing LiteMembers by close spelling (see person_matching.py). One clear
+# match whose emergency phone also agrees is linked (MATCHED_LITE_FUZZY);
+# other near misses are left unresolved as REVIEW_LITE_FUZZY with the
+# candidates in the audit.
+FUZZY_LITE_MATCHING = True
+
 # Optional application user ID for LiteMembers.CreatedByUserId.
 CREATED_BY_USER_ID: int | None = None
 
@@ -107,6 +130,15 @@ EXPECTED_ATTENDANCE = 3598
 REPORT_START = date(2025, 11, 3)
 REPORT_END = date(2026, 6, 9)
 
+# Commit each phase (sessions, participants, attendance) in chunks instead of
+# one transaction for the whole run, so a dropped connection loses at most one
+# chunk and locks are released as the run progresses. Ignored in preview mode.
+CHECKPOINTED_COMMITS = False
+CHECKPOINT_CHUNK_SIZE = 100
+
+# Written next to the staging files and removed when the migration completes.
+CHECKPOINT_FILE = "calthorpe_2025_26_migration_checkpoint.json"
+
 
 # ============================================================
 # 3. TEXT, DATE AND TIME HELPERS
@@ -626,6 +658,23 @@ def fetch_lite_members(
     return by_membership, by_name
 
 
+def build_lite_index(
+    lite_by_name: dict[str, list[dict[str, Any]]],
+) -> PersonIndex:
+    index = PersonIndex()
+
+    for items in lite_by_name.values():
+        for item in items:
+            index.add(
+                item,
+                item["name"],
+                item.get("emergency_phone"),
+                item.get("postcode"),
+            )
+
+    return index
+
+
 # ============================================================
 # 7. AUDIT
 # ============================================================
@@ -1110,7 +1159,169 @@ def insert_attendance(
 
 
 # ============================================================
-# 9. MAIN MIGRATION
+# 9. CHECKPOINTS
+# ============================================================
+
+CHECKPOINT_PHASES = ("sessions", "participants", "attendance")
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+class MigrationCheckpoint:
+    """
+    Progress of a checkpointed run, saved after every committed chunk.
+
+    For each phase the file holds how many staging rows are committed, plus
+    the session and participant resolutions, audit rows and summary counts
+    at that point. A resumed run restores them and carries on with the next
+    chunk.
+
+    If the run stopped between a commit and the file write, that chunk is
+    processed again. This is safe: sessions are matched on their exact key,
+    participants on card number or their deterministic MembershipId, and
+    attendance on session and member. So the rows behind each
+    ImportSessionKey / ImportAttendanceKey are found, not inserted twice.
+
+    When disabled, rows() yields every row and never commits.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        staging_hashes: dict[str, str],
+        enabled: bool,
+    ) -> None:
+        self.path = path
+        self.enabled = enabled
+        self.state: dict[str, Any] = {
+            "staging_hashes": staging_hashes,
+            "rows_committed": {
+                phase: 0 for phase in CHECKPOINT_PHASES
+            },
+            "resolved_session_ids": {},
+            "resolved_members": {},
+            "audit": [],
+            "summary": {},
+        }
+        self.resumed = False
+
+        if not enabled or not path.exists():
+            return
+
+        with path.open(encoding="utf-8") as handle:
+            saved = json.load(handle)
+
+        if saved.get("staging_hashes") != staging_hashes:
+            raise RuntimeError(
+                "The staging files changed since the checkpoint "
+                f"{path} was written. Delete it to start the "
+                "migration again from the beginning."
+            )
+
+        self.state = saved
+        self.resumed = True
+
+    def restore(
+        self,
+        audit: list[dict[str, Any]],
+        summary: Counter[str],
+        resolved_session_ids: dict[str, int],
+        resolved_members: dict[str, dict[str, Any]],
+    ) -> None:
+        """
+        Load the saved progress into the run's collections (in place) and
+        keep references to them for the snapshots taken at each commit.
+        """
+        if self.resumed:
+            audit[:] = self.state["audit"]
+            summary.clear()
+            summary.update(self.state["summary"])
+            resolved_session_ids.update(
+                self.state["resolved_session_ids"]
+            )
+            resolved_members.update(
+                self.state["resolved_members"]
+            )
+
+        self._audit = audit
+        self._summary = summary
+        self._resolved_session_ids = resolved_session_ids
+        self._resolved_members = resolved_members
+
+    def rows(
+        self,
+        connection: pyodbc.Connection,
+        phase: str,
+        rows: list[dict[str, Any]],
+    ) -> Iterator[dict[str, Any]]:
+        """
+        Yield the rows of a phase that are not committed yet, committing
+        after every CHECKPOINT_CHUNK_SIZE rows and after the last one.
+
+        The commit runs when the loop asks for the next row, so a row whose
+        processing raises is never committed.
+        """
+        if not self.enabled:
+            yield from rows
+            return
+
+        start = self.state["rows_committed"][phase]
+
+        if start:
+            print(
+                f"Resuming {phase} after {start} of "
+                f"{len(rows)} committed rows."
+            )
+
+        for index in range(start, len(rows)):
+            yield rows[index]
+
+            rows_done = index + 1
+
+            if (
+                rows_done % CHECKPOINT_CHUNK_SIZE == 0
+                or rows_done == len(rows)
+            ):
+                connection.commit()
+                self.save(phase, rows_done)
+                print(
+                    f"Committed {phase} rows "
+                    f"{rows_done}/{len(rows)}."
+                )
+
+    def save(self, phase: str, rows_done: int) -> None:
+        self.state["rows_committed"][phase] = rows_done
+        self.state["resolved_session_ids"] = self._resolved_session_ids
+        self.state["resolved_members"] = self._resolved_members
+        self.state["audit"] = self._audit
+        self.state["summary"] = dict(self._summary)
+
+        temp_path = self.path.with_name(
+            f"{self.path.name}.{os.getpid()}.tmp"
+        )
+
+        with temp_path.open("w", encoding="utf-8") as handle:
+            # Dates and uniqueidentifiers are stored as text; only the
+            # IDs, card numbers and names are used after a resume.
+            json.dump(self.state, handle, default=str)
+
+        os.replace(temp_path, self.path)
+
+    def finish(self) -> None:
+        if self.enabled and self.path.exists():
+            self.path.unlink()
+
+
+# ============================================================
+# 10. MAIN MIGRATION
 # ============================================================
 
 def main() -> int:
@@ -1183,7 +1394,16 @@ def main() -> int:
     audit: list[dict[str, Any]] = []
     summary: Counter[str] = Counter()
 
-    connection = pyodbc.connect(
+    checkpoint = MigrationCheckpoint(
+        base_folder / CHECKPOINT_FILE,
+        {
+            "sessions": file_sha256(sessions_path),
+            "participants": file_sha256(participants_path),
+        },
+        enabled=CHECKPOINTED_COMMITS and COMMIT_CHANGES,
+    )
+
+    connection = crm_db.connect(
         CONNECTION_STRING,
         autocommit=False,
     )
@@ -1210,11 +1430,21 @@ def main() -> int:
                 f"{length_text}"
             )
 
+        # Read from the local mirror, refreshed with this run's
+        # changes (see crm_mirror.py).
+        people_lookups = crm_mirror.lookup_cursor(
+            cursor,
+            "Participants",
+            "LiteMembers",
+        )
         participants_by_card, full_by_name = (
-            fetch_full_participants(cursor)
+            fetch_full_participants(people_lookups)
         )
         lite_by_membership, lite_by_name = (
-            fetch_lite_members(cursor)
+            fetch_lite_members(people_lookups)
+        )
+        lite_index = build_lite_index(
+            lite_by_name
         )
 
         # ----------------------------------------------------
@@ -1306,16 +1536,37 @@ def main() -> int:
         else:
             print("No preflight problems detected.")
 
+        resolved_session_ids: dict[str, int] = {}
+        resolved_members: dict[
+            str,
+            dict[str, Any],
+        ] = {}
+
+        # A resumed run replaces this run's preflight results with the
+        # audit and summary saved at the last committed chunk.
+        checkpoint.restore(
+            audit,
+            summary,
+            resolved_session_ids,
+            resolved_members,
+        )
+
         # ----------------------------------------------------
         # B. MATCH OR CREATE SESSIONS
         # ----------------------------------------------------
         existing_sessions = fetch_existing_sessions(
-            cursor
+            crm_mirror.lookup_cursor(
+                cursor,
+                "Sessions",
+                "SessionAttendance",
+            )
         )
 
-        resolved_session_ids: dict[str, int] = {}
-
-        for row in session_rows:
+        for row in checkpoint.rows(
+            connection,
+            "sessions",
+            session_rows,
+        ):
             import_key = clean_text(
                 row["ImportSessionKey"]
             )
@@ -1383,12 +1634,11 @@ def main() -> int:
         # ----------------------------------------------------
         # C. MATCH OR CREATE PARTICIPANTS
         # ----------------------------------------------------
-        resolved_members: dict[
-            str,
-            dict[str, Any],
-        ] = {}
-
-        for row in participant_rows:
+        for row in checkpoint.rows(
+            connection,
+            "participants",
+            participant_rows,
+        ):
             source_key = clean_text(
                 row["SourceParticipantKey"]
             )
@@ -1475,6 +1725,17 @@ def main() -> int:
                         source_name_key,
                         [],
                     )
+                    fuzzy_lite = (
+                        lite_index.match(
+                            row.get("SourceName")
+                            or row.get("NormalisedName"),
+                            row.get("EmergencyPhone"),
+                        )
+                        if FUZZY_LITE_MATCHING
+                        and not lite_candidates
+                        and not full_candidates
+                        else None
+                    )
 
                     if len(lite_candidates) == 1:
                         member = {
@@ -1524,6 +1785,10 @@ def main() -> int:
                         lite_by_name[
                             source_name_key
                         ].append(member)
+                        lite_index.add(
+                            member,
+                            member["name"],
+                        )
 
                         details = (
                             f"{len(full_candidates)} FULL participants "
@@ -1547,6 +1812,31 @@ def main() -> int:
                             "participants have the same name."
                         )
 
+                    elif (
+                        fuzzy_lite is not None
+                        and fuzzy_lite.decision == "linked"
+                    ):
+                        member = {
+                            "kind": "LITE",
+                            **fuzzy_lite.record,
+                        }
+                        action = "MATCHED_LITE_FUZZY"
+                        details = (
+                            "Linked to the only LiteMember with a close "
+                            f"name: {fuzzy_lite.describe(1)}."
+                        )
+
+                    elif (
+                        fuzzy_lite is not None
+                        and fuzzy_lite.decision == "review"
+                    ):
+                        action = "REVIEW_LITE_FUZZY"
+                        details = (
+                            "Possible existing LiteMembers: "
+                            f"{fuzzy_lite.describe()}. "
+                            "Not linked automatically."
+                        )
+
                     elif CREATE_MISSING_LITE_MEMBERS:
                         member = create_lite_member(
                             cursor,
@@ -1562,6 +1852,10 @@ def main() -> int:
                         lite_by_name[
                             source_name_key
                         ].append(member)
+                        lite_index.add(
+                            member,
+                            member["name"],
+                        )
 
                     else:
                         action = "NEW_LITE_REQUIRED"
@@ -1648,7 +1942,11 @@ def main() -> int:
         # ----------------------------------------------------
         # E. INSERT ONLY MISSING ATTENDANCE
         # ----------------------------------------------------
-        for row in attendance_rows:
+        for row in checkpoint.rows(
+            connection,
+            "attendance",
+            attendance_rows,
+        ):
             attendance_key = clean_text(
                 row["ImportAttendanceKey"]
             )
@@ -1771,12 +2069,22 @@ def main() -> int:
         if COMMIT_CHANGES:
             connection.commit()
             mode = "COMMITTED"
+            checkpoint.finish()
         else:
             connection.rollback()
             mode = "PREVIEW_ROLLED_BACK"
 
     except Exception:
         connection.rollback()
+
+        if checkpoint.enabled:
+            print(
+                "Only the current chunk was rolled back. Run the "
+                "script again to resume from the checkpoint: "
+                f"{checkpoint.path}",
+                file=sys.stderr,
+            )
+
         raise
 
     finally:
@@ -1793,6 +2101,14 @@ def main() -> int:
     print("CALTHORPE 2025/26 CRM MIGRATION")
     print("=" * 68)
     print("Mode:", mode)
+
+    if checkpoint.enabled:
+        print(
+            "Commits:",
+            f"chunks of {CHECKPOINT_CHUNK_SIZE} rows per phase",
+            "(resumed from checkpoint)" if checkpoint.resumed else "",
+        )
+
     print("Sessions file:", sessions_path)
     print("Participants file:", participants_path)
     print("Audit file:", audit_path)
@@ -1819,7 +2135,9 @@ def main() -> int:
 
 if __name__ == "__main__":
     try:
-        raise SystemExit(main())
+        # Re-run after a transient Azure SQL fault; with CHECKPOINTED_COMMITS
+        # the retry resumes after the last committed phase.
+        raise SystemExit(crm_db.retry_transient(main))
     except Exception as error:
         print()
         print(
@@ -9,10 +9,15 @@ import plotly.io as pio
 from sqlalchemy import create_engine
 import pyodbc
 from urllib.parse import quote_plus
+from pathlib import Path
 import os
+import sys
 import warnings
 warnings.filterwarnings('ignore')
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import crm_db  # noqa: E402
+
 
 # ============================================
 # VISUAL THEME (CSS-LIKE STYLING)
@@ -97,6 +102,7 @@ def get_db_connection():
 
     engine = create_engine(
         f"mssql+pyodbc:///?odbc_connect={quote_plus(odbc_str)}",
+        creator=lambda: crm_db.raw_connect(odbc_str),
         pool_pre_ping=True,
     )
     return engine
@@ -8,6 +8,9 @@ from typing import Optional, Dict, Tuple
 import pandas as pd
 import pyodbc
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import crm_db  # noqa: E402
+
 # =========================
 # CONFIG
 # =========================
@@ -248,7 +251,7 @@ def get_connection() -> pyodbc.Connection:
             f"PWD={PASSWORD};"
         )
 
-    return pyodbc.connect(conn_str)
+    return crm_db.connect(conn_str)
 
 
 def ensure_email_column_exists(cursor: pyodbc.Cursor) -> None:
@@ -36,6 +36,13 @@ from datetime import datetime
 import pandas as pd
 import pyodbc
 import os
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import crm_db  # noqa: E402
+import crm_mirror  # noqa: E402
+import bulk_load  # noqa: E402
 
 # =========================
 # CONFIG
@@ -385,10 +392,9 @@ def insert_rows(cursor, table_name, rows, columns):
 
     data = [tuple(r.get(c) for c in columns) for r in rows]
 
-    cursor.fast_executemany = True
     try:
-        cursor.executemany(sql, data)
-        return len(rows)
+        # Large loads go as one table-valued parameter; see bulk_load.py.
+        return bulk_load.bulk_insert(cursor, f"dbo.[{table_name}]", columns, data)
     except Exception as bulk_err:
         print(f"\n[DEBUG] Bulk insert failed for {table_name}. Trying row-by-row...")
         print(f"[DEBUG] Bulk error: {bulk_err}")
@@ -960,7 +966,7 @@ def main():
 
     print("\n=== SQL CONNECT & INSERT ===")
     try:
-        conn = pyodbc.connect(get_connection_string())
+        conn = crm_db.connect(get_connection_string())
     except pyodbc.Error as ex:
         db = resolve_db_config()
         auth_mode = "Windows Integrated Authentication" if db["use_windows_auth"] else "SQL Authentication"
@@ -989,7 +995,7 @@ def main():
         )
 
         # 2) ParticipantEmergencyContacts
-        saheli_to_pid = fetch_participant_id_map(cur)
+        saheli_to_pid = fetch_participant_id_map(crm_mirror.lookup_cursor(cur, "Participants"))
         emergency_rows = build_emergency_contacts_from_reg(df_reg, saheli_to_pid)
 
         insert_if_missing(
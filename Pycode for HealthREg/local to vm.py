@@ -1,5 +1,17 @@
-import pyodbc
+import argparse
+import sys
+import time as timer
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
+from pathlib import Path
+
+import pyodbc
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import crm_db  # noqa: E402
 
 # ==========================================
 # CONFIG
@@ -26,6 +38,74 @@ TARGET_CONN_STR = (
 
 BATCH_SIZE = 500
 
+# "replicate": every table in REPLICATED_TABLES, parents before children,
+#              independent tables at the same time, changed rows found by
+#              comparing per-chunk hash aggregates on both sides.
+# "delta":     SessionAttendance only. Read the target's high-water marks
+#              once, select only newer or changed source rows and upsert them
+#              in batches (a few round trips for a routine sync).
+# "full":      SessionAttendance only. Walk every source row and check the
+#              target for each AttendanceId (one round trip per row; inserts
+#              only, never updates).
+SYNC_MODE = "replicate"
+
+# Tables copied by "replicate", plus every table whose name starts with one
+# of REPLICATED_TABLE_PREFIXES. Tables missing on either side are skipped.
+REPLICATED_TABLES = [
+    "Participants",
+    "ParticipantEmergencyContacts",
+    "LiteMembers",
+    "Sessions",
+    "SessionAttendance",
+    "FundingProjects",
+]
+REPLICATED_TABLE_PREFIXES = ["Assessment"]
+
+# Parents that are not declared as foreign keys on the target. Declared
+# foreign keys are read from sys.foreign_keys and always respected.
+DEPENDS_ON = {
+    "ParticipantEmergencyContacts": ["Participants"],
+    "SessionAttendance": ["Sessions", "Participants", "LiteMembers"],
+    "Assessment_Master": ["Participants"],
+}
+# Every other Assessment* table hangs off Assessment_Master.
+ASSESSMENT_MASTER_TABLE = "Assessment_Master"
+
+# Tables copied at the same time, each on its own pair of connections.
+PARALLEL_TABLES = 4
+
+# Rows per chunk for integer keys (key ranges); tables with other keys
+# (e.g. uniqueidentifier) are split into HASH_BUCKETS chunks by CHECKSUM(key).
+CHUNK_ROWS = 2000
+HASH_BUCKETS = 256
+
+SOURCE_COLUMNS = [
+    "AttendanceId",
+    "SessionId",
+    "ParticipantId",
+    "SessionName",
+    "SessionDay",
+    "SessionDate",
+    "SessionMonth",
+    "SessionStartTime",
+    "SessionEndTime",
+    "SaheliCardNumber",
+    "RiskStratification",
+    "Attended",
+    "CheckInTime",
+    "CheckOutTime",
+    "Notes",
+    "CreatedAtUtc",
+    "UpdatedAtUtc",
+    "AttendanceMemberKind",
+    "LiteMemberId",
+    "MemberDisplayId",
+    "MemberName",
+    "Phone",
+    "EmergencyName",
+    "EmergencyPhone",
+]
+
 SOURCE_SELECT_SQL = """
 SELECT
     AttendanceId,
@@ -96,6 +176,70 @@ VALUES
 )
 """
 
+# Highest AttendanceId and newest change already on the target.
+TARGET_HIGH_WATER_SQL = """
+SELECT
+    ISNULL(MAX(AttendanceId), 0) AS MaxAttendanceId,
+    MAX(UpdatedAtUtc) AS MaxUpdatedAtUtc
+FROM dbo.SessionAttendance;
+"""
+
+# New rows, plus existing rows changed at or after the target's newest change.
+SOURCE_DELTA_SQL = SOURCE_SELECT_SQL.replace(
+    "FROM dbo.SessionAttendance\n",
+    "FROM dbo.SessionAttendance\nWHERE AttendanceId > ?\n   OR UpdatedAtUtc >= ?\n",
+)
+
+# Staging table shaped like the source select; CAST drops the IDENTITY
+# property SELECT INTO would otherwise copy.
+TARGET_CREATE_STAGING_SQL = """
+SELECT TOP 0
+    CAST(AttendanceId AS int) AS AttendanceId,
+    {columns}
+INTO #AttendanceDelta
+FROM dbo.SessionAttendance;
+""".format(columns=",\n    ".join(SOURCE_COLUMNS[1:]))
+
+TARGET_STAGE_SQL = """
+INSERT INTO #AttendanceDelta ({columns})
+VALUES ({placeholders});
+""".format(
+    columns=", ".join(SOURCE_COLUMNS),
+    placeholders=", ".join("?" for _ in SOURCE_COLUMNS),
+)
+
+TARGET_APPLY_STAGING_SQL = """
+SET NOCOUNT ON;
+
+DECLARE @updated int, @inserted int;
+
+UPDATE t
+SET {assignments}
+FROM dbo.SessionAttendance t
+INNER JOIN #AttendanceDelta d
+    ON d.AttendanceId = t.AttendanceId;
+
+SET @updated = @@ROWCOUNT;
+
+INSERT INTO dbo.SessionAttendance ({columns})
+SELECT {columns}
+FROM #AttendanceDelta d
+WHERE NOT EXISTS (
+    SELECT 1
+    FROM dbo.SessionAttendance t
+    WHERE t.AttendanceId = d.AttendanceId
+);
+
+SET @inserted = @@ROWCOUNT;
+
+TRUNCATE TABLE #AttendanceDelta;
+
+SELECT @updated AS UpdatedRows, @inserted AS InsertedRows;
+""".format(
+    assignments=",\n    ".join(f"{column} = d.{column}" for column in SOURCE_COLUMNS[1:]),
+    columns=", ".join(SOURCE_COLUMNS),
+)
+
 def log(message: str) -> None:
     print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {message}")
 
@@ -108,7 +252,432 @@ def test_connection(conn_str: str, name: str) -> None:
     cur.close()
     conn.close()
 
-def main():
+def row_values(row) -> tuple:
+    return tuple(getattr(row, column) for column in SOURCE_COLUMNS)
+
+def sync_delta(source_cursor, target_conn, target_cursor) -> None:
+    log("Reading target high-water marks...")
+    marks = target_cursor.execute(TARGET_HIGH_WATER_SQL).fetchone()
+    max_attendance_id = int(marks.MaxAttendanceId)
+    max_updated_at = marks.MaxUpdatedAtUtc or datetime(1900, 1, 1)
+    log(f"Target MAX(AttendanceId) = {max_attendance_id}, MAX(UpdatedAtUtc) = {marks.MaxUpdatedAtUtc}")
+
+    target_cursor.execute(TARGET_CREATE_STAGING_SQL)
+
+    log("Reading new and changed source rows...")
+    source_cursor.execute(SOURCE_DELTA_SQL, max_attendance_id, max_updated_at)
+
+    processed_count = 0
+    inserted_count = 0
+    updated_count = 0
+
+    while True:
+        rows = source_cursor.fetchmany(BATCH_SIZE)
+        if not rows:
+            break
+
+        target_cursor.executemany(TARGET_STAGE_SQL, [row_values(row) for row in rows])
+        result = target_cursor.execute(TARGET_APPLY_STAGING_SQL).fetchone()
+        target_conn.commit()
+
+        processed_count += len(rows)
+        inserted_count += int(result.InsertedRows or 0)
+        updated_count += int(result.UpdatedRows or 0)
+        log(f"Committed batch: {result.InsertedRows} inserted, {result.UpdatedRows} updated.")
+
+    log("Delta sync completed.")
+    log(f"Total changed source rows: {processed_count}")
+    log(f"Total inserted: {inserted_count}")
+    log(f"Total updated: {updated_count}")
+
+# ==========================================
+# REPLICATION
+# ==========================================
+# Each table is split into chunks by key. Both sides compute, per chunk,
+# COUNT(*) and two aggregates of a per-row HASHBYTES over the shared columns
+# (serialised with FOR XML so every type hashes the same way on both
+# servers). Only chunks whose aggregates differ are drilled into: the row
+# hashes of that chunk are compared and just the new or changed source rows
+# are staged with fast_executemany and upserted in one batch. Rows that only
+# exist on the target are counted, never deleted. A column whose type differs
+# between the servers hashes differently, so its rows are re-sent every run.
+
+INTEGER_TYPES = {"int", "bigint", "smallint", "tinyint"}
+
+TABLE_NAMES_SQL = "SELECT name FROM sys.tables WHERE schema_id = SCHEMA_ID('dbo');"
+
+COLUMNS_SQL = """
+SELECT
+    c.name AS ColumnName,
+    ty.name AS TypeName,
+    c.is_computed AS IsComputed,
+    c.is_identity AS IsIdentity
+FROM sys.columns c
+INNER JOIN sys.types ty
+    ON ty.user_type_id = c.user_type_id
+WHERE c.object_id = OBJECT_ID(?)
+ORDER BY c.column_id;
+"""
+
+PRIMARY_KEY_SQL = """
+SELECT c.name AS ColumnName
+FROM sys.indexes i
+INNER JOIN sys.index_columns ic
+    ON ic.object_id = i.object_id
+   AND ic.index_id = i.index_id
+INNER JOIN sys.columns c
+    ON c.object_id = ic.object_id
+   AND c.column_id = ic.column_id
+WHERE i.object_id = OBJECT_ID(?)
+  AND i.is_primary_key = 1
+ORDER BY ic.key_ordinal;
+"""
+
+FOREIGN_KEYS_SQL = """
+SELECT
+    OBJECT_NAME(parent_object_id) AS ChildTable,
+    OBJECT_NAME(referenced_object_id) AS ParentTable
+FROM sys.foreign_keys;
+"""
+
+@dataclass
+class ReplicatedTable:
+    name: str
+    key: str
+    columns: list
+    column_types: dict
+    identity_columns: set
+    depends_on: set = field(default_factory=set)
+
+    @property
+    def integer_key(self) -> bool:
+        return self.column_types[self.key] in INTEGER_TYPES
+
+    @property
+    def qualified(self) -> str:
+        return f"dbo.[{self.name}]"
+
+@dataclass
+class TableResult:
+    name: str
+    chunks: int = 0
+    mismatched_chunks: int = 0
+    inserted: int = 0
+    updated: int = 0
+    target_only: int = 0
+    seconds: float = 0.0
+
+def fetch_columns(cursor, table_name: str) -> list:
+    return cursor.execute(COLUMNS_SQL, f"dbo.[{table_name}]").fetchall()
+
+def describe_table(source_cursor, target_cursor, table_name: str):
+    """ReplicatedTable for one table, or None (with a log line) if it cannot be replicated."""
+    source_columns = {row.ColumnName.lower() for row in fetch_columns(source_cursor, table_name) if not row.IsComputed}
+    target_columns = [
+        row for row in fetch_columns(target_cursor, table_name)
+        if not row.IsComputed and row.TypeName not in {"timestamp", "rowversion"}
+    ]
+    columns = [row for row in target_columns if row.ColumnName.lower() in source_columns]
+
+    key_columns = [row.ColumnName for row in target_cursor.execute(PRIMARY_KEY_SQL, f"dbo.[{table_name}]").fetchall()]
+    if not key_columns:
+        key_columns = [row.ColumnName for row in columns if row.IsIdentity]
+
+    if len(key_columns) != 1:
+        log(f"[{table_name}] Skipped: needs a single-column primary key or identity column.")
+        return None
+
+    key = key_columns[0]
+    key_row = next((row for row in columns if row.ColumnName == key), None)
+    if key_row is None:
+        log(f"[{table_name}] Skipped: key column {key} is missing on the source.")
+        return None
+
+    return ReplicatedTable(
+        name=table_name,
+        key=key,
+        columns=[row.ColumnName for row in columns],
+        column_types={row.ColumnName: row.TypeName for row in columns},
+        identity_columns={row.ColumnName for row in columns if row.IsIdentity},
+    )
+
+def plan_replication(source_cursor, target_cursor, only=None) -> list:
+    """Replicable tables grouped into levels; every parent is in an earlier level."""
+    source_tables = {row.name for row in source_cursor.execute(TABLE_NAMES_SQL).fetchall()}
+    target_tables = {row.name for row in target_cursor.execute(TABLE_NAMES_SQL).fetchall()}
+    wanted = set(REPLICATED_TABLES) | {
+        name for name in target_tables
+        if any(name.startswith(prefix) for prefix in REPLICATED_TABLE_PREFIXES)
+    }
+    if only:
+        wanted &= set(only)
+
+    for name in sorted(wanted - (source_tables & target_tables)):
+        log(f"[{name}] Skipped: not present on both source and target.")
+
+    tables = {}
+    for name in sorted(wanted & source_tables & target_tables):
+        table = describe_table(source_cursor, target_cursor, name)
+        if table is not None:
+            tables[name] = table
+
+    parents = defaultdict(set)
+    for row in target_cursor.execute(FOREIGN_KEYS_SQL).fetchall():
+        parents[row.ChildTable].add(row.ParentTable)
+    for child, declared in DEPENDS_ON.items():
+        parents[child].update(declared)
+    for name in tables:
+        if name.startswith("Assessment") and name != ASSESSMENT_MASTER_TABLE:
+            parents[name].add(ASSESSMENT_MASTER_TABLE)
+
+    for name, table in tables.items():
+        table.depends_on = {parent for parent in parents[name] if parent in tables and parent != name}
+
+    levels = []
+    placed = set()
+    while len(placed) < len(tables):
+        level = [
+            table for name, table in sorted(tables.items())
+            if name not in placed and table.depends_on <= placed
+        ]
+        if not level:
+            raise RuntimeError(
+                "Foreign keys form a cycle between: " + ", ".join(sorted(set(tables) - placed))
+            )
+        levels.append(level)
+        placed.update(table.name for table in level)
+
+    return levels
+
+def row_hash_sql(table: ReplicatedTable) -> str:
+    columns = ", ".join(f"t.[{column}]" for column in table.columns)
+    return f"HASHBYTES('SHA2_256', (SELECT {columns} FOR XML RAW, BINARY BASE64))"
+
+def bucket_sql(table: ReplicatedTable) -> str:
+    if table.integer_key:
+        return f"t.[{table.key}] / {CHUNK_ROWS}"
+    return f"ABS(CAST(CHECKSUM(t.[{table.key}]) AS bigint)) % {HASH_BUCKETS}"
+
+def chunk_filter(table: ReplicatedTable, bucket: int) -> tuple:
+    """WHERE clause and parameters selecting one chunk, as a key range where possible."""
+    if not table.integer_key:
+        return f"{bucket_sql(table)} = ?", [bucket]
+
+    # Integer division truncates towards zero, so bucket 0 also holds -CHUNK_ROWS < key < 0.
+    if bucket > 0:
+        low, high = bucket * CHUNK_ROWS, (bucket + 1) * CHUNK_ROWS
+    elif bucket == 0:
+        low, high = -CHUNK_ROWS + 1, CHUNK_ROWS
+    else:
+        low, high = (bucket - 1) * CHUNK_ROWS + 1, bucket * CHUNK_ROWS + 1
+    return f"t.[{table.key}] >= ? AND t.[{table.key}] < ?", [low, high]
+
+def fetch_chunk_summaries(cursor, table: ReplicatedTable) -> dict:
+    sql = f"""
+    SELECT
+        Bucket,
+        COUNT(*) AS TotalRows,
+        CHECKSUM_AGG(CHECKSUM(RowHash)) AS ChunkChecksum,
+        SUM(CAST(CHECKSUM(RowHash) AS bigint)) AS ChunkSum
+    FROM (
+        SELECT {bucket_sql(table)} AS Bucket, {row_hash_sql(table)} AS RowHash
+        FROM {table.qualified} t
+    ) x
+    GROUP BY Bucket;
+    """
+    return {
+        int(row.Bucket): (int(row.TotalRows), row.ChunkChecksum, row.ChunkSum)
+        for row in cursor.execute(sql).fetchall()
+    }
+
+def key_value(table: ReplicatedTable, value):
+    return value if table.integer_key else str(value).upper()
+
+def changed_rows_in_chunk(source_cursor, target_cursor, table: ReplicatedTable, bucket: int) -> tuple:
+    """(source rows that are new or differ on the target, number of target-only keys)."""
+    where, params = chunk_filter(table, bucket)
+    columns = ", ".join(f"t.[{column}]" for column in table.columns)
+
+    target_hashes = {
+        key_value(table, row.RowKey): row.RowHash
+        for row in target_cursor.execute(
+            f"SELECT t.[{table.key}] AS RowKey, {row_hash_sql(table)} AS RowHash FROM {table.qualified} t WHERE {where};",
+            *params,
+        ).fetchall()
+    }
+
+    changed = []
+    seen = set()
+    key_position = table.columns.index(table.key)
+
+    for row in source_cursor.execute(
+        f"SELECT {columns}, {row_hash_sql(table)} AS RowHash FROM {table.qualified} t WHERE {where};",
+        *params,
+    ).fetchall():
+        key = key_value(table, row[key_position])
+        seen.add(key)
+        if target_hashes.get(key) != row.RowHash:
+            changed.append(tuple(row)[:len(table.columns)])
+
+    return changed, len(set(target_hashes) - seen)
+
+def staging_sql(table: ReplicatedTable) -> tuple:
+    """(create staging table, insert into it, apply it to the target) for one table."""
+    # CAST drops the IDENTITY property SELECT INTO would otherwise copy.
+    select_columns = ",\n    ".join(
+        f"CAST([{column}] AS {table.column_types[column]}) AS [{column}]"
+        if column in table.identity_columns else f"[{column}]"
+        for column in table.columns
+    )
+    # A pooled connection may still hold the staging table of a table that failed.
+    create = (
+        "IF OBJECT_ID('tempdb..#ReplicaStage') IS NOT NULL DROP TABLE #ReplicaStage;\n"
+        f"SELECT TOP 0\n    {select_columns}\nINTO #ReplicaStage\nFROM {table.qualified};"
+    )
+
+    column_list = ", ".join(f"[{column}]" for column in table.columns)
+    insert = f"INSERT INTO #ReplicaStage ({column_list}) VALUES ({', '.join('?' for _ in table.columns)});"
+
+    assignments = ",\n    ".join(
+        f"[{column}] = s.[{column}]"
+        for column in table.columns
+        if column != table.key and column not in table.identity_columns
+    )
+    update = (
+        f"UPDATE t\nSET {assignments}\nFROM {table.qualified} t\n"
+        f"INNER JOIN #ReplicaStage s\n    ON s.[{table.key}] = t.[{table.key}];\n\nSET @updated = @@ROWCOUNT;"
+        if assignments else "SET @updated = 0;"
+    )
+    identity_on = f"SET IDENTITY_INSERT {table.qualified} ON;" if table.identity_columns else ""
+    identity_off = f"SET IDENTITY_INSERT {table.qualified} OFF;" if table.identity_columns else ""
+
+    apply = f"""
+SET NOCOUNT ON;
+
+DECLARE @updated int, @inserted int;
+
+{update}
+
+{identity_on}
+INSERT INTO {table.qualified} ({column_list})
+SELECT {column_list}
+FROM #ReplicaStage s
+WHERE NOT EXISTS (
+    SELECT 1
+    FROM {table.qualified} t
+    WHERE t.[{table.key}] = s.[{table.key}]
+);
+
+SET @inserted = @@ROWCOUNT;
+{identity_off}
+
+TRUNCATE TABLE #ReplicaStage;
+
+SELECT @updated AS UpdatedRows, @inserted AS InsertedRows;
+"""
+    return create, insert, apply
+
+def connection_pools() -> tuple:
+    """Source and target pools, one connection per table copied at the same time."""
+    return (
+        crm_db.get_pool(SOURCE_CONN_STR, size=PARALLEL_TABLES),
+        crm_db.get_pool(TARGET_CONN_STR, size=PARALLEL_TABLES),
+    )
+
+def replicate_table(table: ReplicatedTable) -> TableResult:
+    result = TableResult(table.name)
+    started = timer.perf_counter()
+
+    source_pool, target_pool = connection_pools()
+
+    # The pools roll back whatever a failed table left uncommitted.
+    with source_pool.connection() as source_conn, target_pool.connection() as target_conn:
+        target_conn.autocommit = False
+
+        source_cursor = source_conn.cursor()
+        target_cursor = target_conn.cursor()
+        target_cursor.fast_executemany = True
+
+        source_chunks = fetch_chunk_summaries(source_cursor, table)
+        target_chunks = fetch_chunk_summaries(target_cursor, table)
+        result.chunks = len(source_chunks)
+
+        mismatched = sorted(
+            bucket for bucket in set(source_chunks) | set(target_chunks)
+            if source_chunks.get(bucket) != target_chunks.get(bucket)
+        )
+        result.mismatched_chunks = len(mismatched)
+        log(f"[{table.name}] {len(source_chunks)} chunk(s), {len(mismatched)} differ.")
+
+        if mismatched:
+            create_sql, stage_sql, apply_sql = staging_sql(table)
+            target_cursor.execute(create_sql)
+
+        for bucket in mismatched:
+            if bucket not in source_chunks:
+                result.target_only += target_chunks[bucket][0]
+                continue
+
+            changed, target_only = changed_rows_in_chunk(source_cursor, target_cursor, table, bucket)
+            result.target_only += target_only
+
+            for start in range(0, len(changed), BATCH_SIZE):
+                target_cursor.executemany(stage_sql, changed[start:start + BATCH_SIZE])
+                counts = target_cursor.execute(apply_sql).fetchone()
+                result.inserted += int(counts.InsertedRows or 0)
+                result.updated += int(counts.UpdatedRows or 0)
+
+            target_conn.commit()
+
+        if mismatched:
+            # Pooled connections outlive the table, so the staging table must not.
+            target_cursor.execute("DROP TABLE #ReplicaStage;")
+            target_conn.commit()
+
+    result.seconds = timer.perf_counter() - started
+    log(
+        f"[{table.name}] {result.inserted} inserted, {result.updated} updated, "
+        f"{result.target_only} only on target, {result.seconds:.1f}s."
+    )
+    return result
+
+def replicate(only=None) -> list:
+    source_pool, target_pool = connection_pools()
+    with source_pool.connection() as source_conn, target_pool.connection() as target_conn:
+        levels = plan_replication(source_conn.cursor(), target_conn.cursor(), only)
+
+    results = []
+    for number, level in enumerate(levels, start=1):
+        log(f"Level {number}: " + ", ".join(table.name for table in level))
+        # A failed table stops the run here, before any of its children are copied.
+        with ThreadPoolExecutor(max_workers=PARALLEL_TABLES) as pool:
+            results.extend(pool.map(replicate_table, level))
+
+    log("Replication completed.")
+    for result in results:
+        log(
+            f"  {result.name:34} chunks {result.mismatched_chunks}/{result.chunks} differed, "
+            f"inserted {result.inserted}, updated {result.updated}, only on target {result.target_only}"
+        )
+    return results
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Copy CRM tables from the local database to the VM.")
+    parser.add_argument(
+        "--mode",
+        choices=["replicate", "delta", "full"],
+        default=SYNC_MODE,
+        help=f"Default: {SYNC_MODE}",
+    )
+    parser.add_argument(
+        "--tables",
+        nargs="+",
+        default=None,
+        help="With --mode replicate, only these tables (parents are not added automatically).",
+    )
+    return parser.parse_args()
+
+def main(mode: str = SYNC_MODE, tables=None):
     inserted_count = 0
     skipped_count = 0
     processed_count = 0
@@ -119,6 +688,10 @@ def main():
     log("Testing target connection...")
     test_connection(TARGET_CONN_STR, "Target")
 
+    if mode == "replicate":
+        replicate(tables)
+        return
+
     log("Opening source connection...")
     source_conn = pyodbc.connect(SOURCE_CONN_STR)
     source_cursor = source_conn.cursor()
@@ -131,6 +704,15 @@ def main():
     # Speeds up executemany
     target_cursor.fast_executemany = True
 
+    if mode == "delta":
+        sync_delta(source_cursor, target_conn, target_cursor)
+
+        source_cursor.close()
+        source_conn.close()
+        target_cursor.close()
+        target_conn.close()
+        return
+
     log("Reading source rows...")
     source_cursor.execute(SOURCE_SELECT_SQL)
 
@@ -152,32 +734,7 @@ def main():
                 skipped_count += 1
                 continue
 
-            batch_to_insert.append((
-                row.AttendanceId,
-                row.SessionId,
-                row.ParticipantId,
-                row.SessionName,
-                row.SessionDay,
-                row.SessionDate,
-                row.SessionMonth,
-                row.SessionStartTime,
-                row.SessionEndTime,
-                row.SaheliCardNumber,
-                row.RiskStratification,
-                row.Attended,
-                row.CheckInTime,
-                row.CheckOutTime,
-                row.Notes,
-                row.CreatedAtUtc,
-                row.UpdatedAtUtc,
-                row.AttendanceMemberKind,
-                row.LiteMemberId,
-                row.MemberDisplayId,
-                row.MemberName,
-                row.Phone,
-                row.EmergencyName,
-                row.EmergencyPhone
-            ))
+            batch_to_insert.append(row_values(row))
 
         if batch_to_insert:
             target_cursor.executemany(TARGET_INSERT_SQL, batch_to_insert)
@@ -199,4 +756,5 @@ def main():
     target_conn.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    args = parse_args()
+    main(args.mode, args.tables)
\ No newline at end of file
@@ -5,7 +5,7 @@
 #   - REG_OUTPUT_FILE (Registrations_Cleaned.xlsx)
 #   - HEALTH_OUTPUT_FILE (Healthassessments_Prepared.xlsx)
 #
-# Compares against SQL Server tables and:
+# Stages each table's rows in a #temp table and, server-side:
 #   - INSERTS missing rows
 #   - UPDATES existing rows if any compared field is different
 #   - SKIPS unchanged rows
@@ -34,9 +34,15 @@
 
 from pathlib import Path
 import re
-from datetime import datetime, date
+from datetime import datetime
+import sys
 import pandas as pd
-import pyodbc
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import crm_db  # noqa: E402
+import crm_mirror  # noqa: E402
+import bulk_load  # noqa: E402
 
 # =========================
 # CONFIG
@@ -340,10 +346,9 @@ def insert_rows(cursor, table_name, rows, columns):
 
     data = [tuple(r.get(c) for c in columns) for r in rows]
 
-    cursor.fast_executemany = True
     try:
-        cursor.executemany(sql, data)
-        return len(rows)
+        # Large loads go as one table-valued parameter; see bulk_load.py.
+        return bulk_load.bulk_insert(cursor, f"dbo.[{table_name}]", columns, data)
     except Exception:
         if not DEBUG_ROW_FALLBACK:
             raise
@@ -367,98 +372,106 @@ def insert_rows(cursor, table_name, rows, columns):
 
 
 # =========================
-# NEW: COMPARE + UPDATE HELPERS
+# SET-BASED COMPARE + UPSERT
 # =========================
-def normalize_for_compare(v):
-    """
-    Normalize Python/SQL values so comparisons are reliable.
-    Avoid false mismatches (e.g., 1 vs 1.0, datetime vs date, whitespace).
-    """
-    if v is None:
-        return None
-
-    try:
-        if pd.isna(v):
-            return None
-    except Exception:
-        pass
-
-    # Datetime -> strip microseconds for safe compare
-    if isinstance(v, datetime):
-        return v.replace(microsecond=0)
-
-    # date stays date
-    if isinstance(v, date) and not isinstance(v, datetime):
-        return v
-
-    # floats -> rounded
-    if isinstance(v, float):
-        try:
-            if pd.isna(v):
-                return None
-        except Exception:
-            pass
-        return round(v, 6)
-
-    # bool/int
-    if isinstance(v, bool):
-        return int(v)
-    if isinstance(v, int):
-        return v
-
-    # strings -> trim and blank as None
-    if isinstance(v, str):
-        s = v.strip()
-        return s if s != "" else None
-
-    return v
-
-
-def values_different(a, b):
-    return normalize_for_compare(a) != normalize_for_compare(b)
-
-
-def sql_existing_rows(cursor, table_name, select_cols, key_cols):
-    """
-    Returns dict:
-      { (key_tuple): {col: value, ...} }
-    """
-    col_sql = ", ".join([f"[{c}]" for c in select_cols])
-    sql = f"SELECT {col_sql} FROM dbo.[{table_name}]"
-    cursor.execute(sql)
-
-    rows = cursor.fetchall()
-    out = {}
-
-    for r in rows:
-        row_dict = {}
-        for i, c in enumerate(select_cols):
-            row_dict[c] = r[i]
-
-        key = tuple(row_dict[k] for k in key_cols)
-        out[key] = row_dict
+# Incoming rows are staged into #UpsertStage (shaped like the target table)
+# and compared server-side, so a run costs the size of the batch rather than
+# a full SELECT of every target table.
 
-    return out
+COLUMN_TYPES_SQL = """
+SELECT COLUMN_NAME, DATA_TYPE
+FROM INFORMATION_SCHEMA.COLUMNS
+WHERE TABLE_SCHEMA = 'dbo' AND TABLE_NAME = ?
+"""
 
 
-def update_rows(cursor, table_name, rows, key_cols, update_cols):
+def compare_expr(alias, column, data_type):
     """
-    Row-by-row update (WHERE on key cols, SET non-key cols)
+    Column as compared for change detection, matching the old Python compare:
+    strings trimmed with blank as NULL and compared case-sensitively (a binary
+    collation, so "fatima begum" -> "Fatima Begum" is an update), floats
+    rounded, datetimes to the second.
     """
-    if not rows:
-        return 0
-
-    set_sql = ", ".join([f"[{c}] = ?" for c in update_cols])
-    where_sql = " AND ".join([f"[{k}] = ?" for k in key_cols])
-    sql = f"UPDATE dbo.[{table_name}] SET {set_sql} WHERE {where_sql}"
-
-    updated = 0
-    cursor.fast_executemany = False  # safer for updates
-    for r in rows:
-        params = [r.get(c) for c in update_cols] + [r.get(k) for k in key_cols]
-        cursor.execute(sql, params)
-        updated += 1
-    return updated
+    ref = f"{alias}.[{column}]"
+    if data_type in {"char", "varchar", "nchar", "nvarchar"}:
+        return f"NULLIF(LTRIM(RTRIM({ref})), '') COLLATE Latin1_General_BIN2"
+    if data_type in {"float", "real"}:
+        return f"ROUND({ref}, 6)"
+    if data_type in {"datetime", "datetime2", "smalldatetime"}:
+        return f"CAST({ref} AS datetime2(0))"
+    return ref
+
+
+def upsert_sql(table_name, key_cols, all_insert_cols, column_types):
+    """(create staging table, apply it to the target, changed-columns debug query)."""
+    col_sql = ", ".join([f"[{c}]" for c in all_insert_cols])
+    non_key_cols = [c for c in all_insert_cols if c not in key_cols]
+    join_sql = " AND ".join([f"t.[{k}] = s.[{k}]" for k in key_cols])
+
+    def changed(cols):
+        source = ", ".join(compare_expr("s", c, column_types.get(c)) for c in cols)
+        target = ", ".join(compare_expr("t", c, column_types.get(c)) for c in cols)
+        # EXCEPT treats NULL = NULL as equal, unlike <>.
+        return f"EXISTS (SELECT {source} EXCEPT SELECT {target})"
+
+    create = f"""
+IF OBJECT_ID('tempdb..#UpsertStage') IS NOT NULL
+    DROP TABLE #UpsertStage;
+
+SELECT TOP 0 {col_sql}
+INTO #UpsertStage
+FROM dbo.[{table_name}];
+"""
+
+    if non_key_cols:
+        assignments = ",\n    ".join([f"[{c}] = s.[{c}]" for c in non_key_cols])
+        update = f"""
+UPDATE t
+SET {assignments}
+FROM dbo.[{table_name}] t
+INNER JOIN #UpsertStage s
+    ON {join_sql}
+WHERE {changed(non_key_cols)};
+
+SET @updated = @@ROWCOUNT;
+"""
+    else:
+        update = "SET @updated = 0;"
+
+    apply = f"""
+SET NOCOUNT ON;
+
+DECLARE @updated int, @inserted int;
+
+{update}
+
+INSERT INTO dbo.[{table_name}] ({col_sql})
+SELECT {col_sql}
+FROM #UpsertStage s
+WHERE NOT EXISTS (
+    SELECT 1
+    FROM dbo.[{table_name}] t
+    WHERE {join_sql}
+);
+
+SET @inserted = @@ROWCOUNT;
+
+DROP TABLE #UpsertStage;
+
+SELECT @updated AS UpdatedRows, @inserted AS InsertedRows;
+"""
+
+    flags = ",\n    ".join(
+        [f"CASE WHEN {changed([c])} THEN 1 ELSE 0 END AS [{c}]" for c in non_key_cols]
+    )
+    debug = f"""
+SELECT {", ".join([f"s.[{k}]" for k in key_cols])}{"," if flags else ""}
+    {flags}
+FROM #UpsertStage s
+INNER JOIN dbo.[{table_name}] t
+    ON {join_sql}
+"""
+    return create, apply, debug
 
 
 def upsert_by_compare(cursor, table_name, rows, key_cols, all_insert_cols):
@@ -474,40 +487,37 @@ def upsert_by_compare(cursor, table_name, rows, key_cols, all_insert_cols):
 
     unique_rows = _dedupe_row_dicts(rows, key_cols)
 
-    existing_map = sql_existing_rows(cursor, table_name, all_insert_cols, key_cols)
-
-    to_insert = []
-    to_update = []
-    unchanged = 0
-
-    non_key_cols = [c for c in all_insert_cols if c not in key_cols]
-
-    for src in unique_rows:
-        key = tuple(src.get(k) for k in key_cols)
-        db_row = existing_map.get(key)
-
-        if db_row is None:
-            to_insert.append(src)
-            continue
-
-        changed_cols = []
-        for c in non_key_cols:
-            if values_different(src.get(c), db_row.get(c)):
-                changed_cols.append(c)
+    column_types = {
+        name: str(data_type).lower()
+        for name, data_type in cursor.execute(COLUMN_TYPES_SQL, table_name).fetchall()
+    }
+    create_sql, apply_sql, debug_sql = upsert_sql(table_name, key_cols, all_insert_cols, column_types)
+
+    cursor.execute(create_sql)
+    bulk_load.bulk_insert(
+        cursor,
+        "#UpsertStage",
+        all_insert_cols,
+        [tuple(r.get(c) for c in all_insert_cols) for r in unique_rows],
+        like=f"dbo.[{table_name}]",
+    )
 
-        if changed_cols:
-            if DEBUG_SHOW_CHANGED_COLUMNS:
+    if DEBUG_SHOW_CHANGED_COLUMNS:
+        non_key_cols = [c for c in all_insert_cols if c not in key_cols]
+        for r in cursor.execute(debug_sql).fetchall():
+            changed_cols = [c for i, c in enumerate(non_key_cols) if r[len(key_cols) + i]]
+            if changed_cols:
+                key = tuple(r[:len(key_cols)])
                 print(f"[DEBUG] {table_name} key={key} changed columns: {changed_cols}")
-            to_update.append(src)
-        else:
-            unchanged += 1
 
-    inserted = insert_rows(cursor, table_name, to_insert, all_insert_cols)
-    updated = update_rows(cursor, table_name, to_update, key_cols, non_key_cols)
+    counts = cursor.execute(apply_sql).fetchone()
+    inserted = int(counts.InsertedRows or 0)
+    updated = int(counts.UpdatedRows or 0)
+    unchanged = len(unique_rows) - inserted - updated
 
     print(
         f"[{table_name}] Source: {len(rows)} | Unique: {len(unique_rows)} | "
-        f"New: {len(to_insert)} | Updated: {updated} | Unchanged: {unchanged}"
+        f"New: {inserted} | Updated: {updated} | Unchanged: {unchanged}"
     )
     return {"inserted": inserted, "updated": updated, "unchanged": unchanged}
 
@@ -1105,7 +1115,7 @@ def main():
     rows_wem = build_wemwbs_rows(dfh, hm)
 
     print("\n=== SQL CONNECT & UPSERT (COMPARE + UPDATE) ===")
-    conn = pyodbc.connect(SQL_CONN_STR)
+    conn = crm_db.connect(SQL_CONN_STR)
     conn.autocommit = False
     cur = conn.cursor()
 
@@ -1125,7 +1135,7 @@ def main():
         )
 
         # 2) ParticipantEmergencyContacts (after Participants so ParticipantID map exists)
-        saheli_to_pid = fetch_participant_id_map(cur)
+        saheli_to_pid = fetch_participant_id_map(crm_mirror.lookup_cursor(cur, "Participants"))
         emergency_rows = build_emergency_contacts_from_reg(df_reg, saheli_to_pid)
 
         upsert_by_compare(
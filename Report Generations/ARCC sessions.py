@@ -1,11 +1,14 @@
 from __future__ import annotations
 
+import argparse
 import os
 import re
+import sys
 import uuid
-from datetime import datetime, date, timedelta, timezone
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, date, timezone
 from pathlib import Path
-from typing import Any, Optional, Tuple
+from typing import Any, Iterator, Optional, Tuple
 from collections import defaultdict
 
 import pandas as pd
@@ -13,6 +16,20 @@ import pyodbc
 import openpyxl
 from openpyxl.utils import get_column_letter
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from register_parsing import (  # noqa: E402
+    DMY_DATE_RE,
+    WHITESPACE_RE,
+    describe_unparsed_dates,
+    expand_compact_clock,
+    memoised,
+    normalise_date_column,
+    parse_clock,
+    parse_column,
+)
+import id_allocator  # noqa: E402
+
 
 # ============================================================
 # CONFIG
@@ -43,6 +60,13 @@ SKIP_SHEETS = {
 REUSE_EXISTING_SESSIONS = True
 SKIP_DUPLICATE_ATTENDANCE = True
 
+# Check duplicates for a whole sheet in one round trip (temp table + joined query)
+# instead of one attendance_exists query per row.
+BATCH_DUPLICATE_CHECK = True
+
+# Sheets parsed in parallel worker processes (1 = parse in this process). Override with --workers.
+SHEET_WORKERS = 1
+
 DEFAULT_VENUE_NAME = "Alum Rock Community Centre"
 DEFAULT_FREQUENCY = "WEEKLY"
 DEFAULT_CATEGORY = "Fitness"
@@ -135,27 +159,14 @@ def normalise_header(value: Any) -> str:
     return text.strip()
 
 
-def excel_date_to_date(value: Any) -> Optional[date]:
-    value = clean_value(value)
+def date_cell_text(text: str) -> Optional[str]:
+    """Clean a text Date cell before the dayfirst parse (typed dates and Excel serials never get here)."""
+    cleaned = clean_value(text)
 
-    if value is None:
+    if cleaned is None:
         return None
 
-    if isinstance(value, datetime):
-        return value.date()
-
-    if isinstance(value, date):
-        return value
-
-    if isinstance(value, (int, float)) and not isinstance(value, bool):
-        return (datetime(1899, 12, 30) + timedelta(days=int(value))).date()
-
-    parsed = pd.to_datetime(str(value).strip(), dayfirst=True, errors="coerce")
-
-    if pd.isna(parsed):
-        return None
-
-    return parsed.date()
+    return cleaned.strip()
 
 
 def normalise_day(value: Any, fallback_date: Optional[date]) -> Optional[str]:
@@ -240,6 +251,16 @@ def time_string_to_minutes(value: str) -> int:
     return int(parts[0]) * 60 + int(parts[1])
 
 
+# First time in a range ("09:30 - 10:30", "9.30 to 10.30") or embedded in text.
+TIME_RANGE_RE = re.compile(
+    r"(\d{1,2}(?::|\.)?\d{0,2}\s*(?:am|pm)?)"
+    r"\s*(?:-|–|—|to)\s*"
+    r"(\d{1,2}(?::|\.)?\d{0,2}\s*(?:am|pm)?)"
+)
+EMBEDDED_TIME_RE = re.compile(r"(\d{1,2}(?::|\.)?\d{0,2}\s*(?:am|pm)?)")
+
+
+@memoised()
 def parse_single_time(value: Any) -> Optional[str]:
     value = clean_value(value)
 
@@ -267,10 +288,10 @@ def parse_single_time(value: Any) -> Optional[str]:
         return None
 
     # Avoid parsing dates as times.
-    if re.search(r"\d{1,2}[/-]\d{1,2}[/-]\d{2,4}", text):
+    if DMY_DATE_RE.search(text):
         return None
 
-    text = re.sub(r"\s+", " ", text)
+    text = WHITESPACE_RE.sub(" ", text)
 
     # Normalise a.m. / p.m. before changing dots.
     text = (
@@ -285,25 +306,17 @@ def parse_single_time(value: Any) -> Optional[str]:
 
     # If a range exists, take only the first time.
     # Examples: 09:30 - 10:30, 9.30 to 10.30, 12.15 p.m. - 1.15 p.m.
-    range_match = re.search(
-        r"(\d{1,2}(?::|\.)?\d{0,2}\s*(?:am|pm)?)"
-        r"\s*(?:-|–|—|to)\s*"
-        r"(\d{1,2}(?::|\.)?\d{0,2}\s*(?:am|pm)?)",
-        text,
-    )
+    range_match = TIME_RANGE_RE.search(text)
 
     if range_match:
         text = range_match.group(1)
     else:
-        embedded = re.search(
-            r"(\d{1,2}(?::|\.)?\d{0,2}\s*(?:am|pm)?)",
-            text,
-        )
+        embedded = EMBEDDED_TIME_RE.search(text)
         if embedded:
             text = embedded.group(1)
 
     text = text.strip()
-    text = re.sub(r"\s+", "", text)
+    text = WHITESPACE_RE.sub("", text)
 
     suffix = None
 
@@ -318,29 +331,7 @@ def parse_single_time(value: Any) -> Optional[str]:
     text = text.replace(".", ":")
 
     # 1230 -> 12:30, 930 -> 9:30
-    if ":" not in text and text.isdigit():
-        if len(text) == 4:
-            text = f"{text[:2]}:{text[2:]}"
-        elif len(text) == 3:
-            text = f"{text[0]}:{text[1:]}"
-
-    match = re.match(r"^(\d{1,2})(?::(\d{1,2}))?$", text)
-
-    if not match:
-        return None
-
-    hour = int(match.group(1))
-    minute = int(match.group(2) or 0)
-
-    if suffix == "pm" and hour != 12:
-        hour += 12
-    elif suffix == "am" and hour == 12:
-        hour = 0
-
-    if not (0 <= hour <= 23 and 0 <= minute <= 59):
-        return None
-
-    return f"{hour:02d}:{minute:02d}:00"
+    return parse_clock(expand_compact_clock(text), suffix)
 
 
 def make_end_time(start_time: Optional[str]) -> Optional[str]:
@@ -496,6 +487,256 @@ def build_attendance_notes(
     return "; ".join(note_parts)
 
 
+# ============================================================
+# SHEET PARSING
+# ============================================================
+
+def open_register_workbook(input_file: Path) -> tuple[pd.ExcelFile, Any]:
+    excel = pd.ExcelFile(input_file)
+    # Also open with openpyxl (data_only) for merged-cell lookup and richer cell inspection
+    workbook = openpyxl.load_workbook(input_file, data_only=True)
+    return excel, workbook
+
+
+def parse_register_sheet(excel: pd.ExcelFile, workbook: Any, sheet_name: str) -> dict:
+    """
+    Parse one sheet into carried-forward attendance rows without touching SQL.
+
+    Returns plain dicts/lists only so the result can be sent back from a
+    worker process. Log lines are collected in "messages" and printed by
+    main() in sheet order.
+    """
+    source_sheet_name = sheet_name.strip()
+    sheet_activity_name = normalise_activity_from_sheet(source_sheet_name)
+
+    parsed_sheet = {
+        "sheet": source_sheet_name,
+        "messages": [],
+        "rows": [],
+        "rows_skipped_missing_carried_datetime": 0,
+        "invalid_time_rows": 0,
+    }
+    messages = parsed_sheet["messages"]
+
+    df = excel.parse(sheet_name, header=0, dtype=object)
+
+    # worksheet for merged-cell lookups
+    try:
+        ws = workbook[sheet_name]
+    except Exception:
+        ws = None
+
+    if df.empty:
+        return parsed_sheet
+
+    col_map = get_sheet_column_map(df)
+
+    required_cols = ["session", "date", "time", "card"]
+
+    if any(col_map.get(col) is None for col in required_cols):
+        messages.append(f"Skipping sheet because required columns are missing: {source_sheet_name}")
+        messages.append(f"Column map: {col_map}")
+        return parsed_sheet
+
+    current_session_name = None
+    current_day = None
+    current_date = None
+    current_month = None
+    current_start_time = None
+    current_end_time = None
+    current_raw_time = None
+    missing_time_debug_count = 0
+
+    # Dates and times are parsed per column, each distinct string once.
+    parsed_dates, unparsed_dates = normalise_date_column(df[col_map["date"]], prepare_text=date_cell_text)
+    parsed_start_times = parse_column(df[col_map["time"]], parse_single_time)
+
+    if unparsed_dates:
+        messages.append(
+            f"Warning: Date not recognised on sheet {source_sheet_name}: "
+            f"{describe_unparsed_dates(unparsed_dates)}"
+        )
+
+    for idx, row in df.iterrows():
+        source_row = int(idx) + 2
+
+        raw_session = clean_text(get_row_value(row, col_map["session"]))
+        raw_day = clean_text(get_row_value(row, col_map["day"]))
+        raw_date = parsed_dates[idx]
+        raw_month = clean_text(get_row_value(row, col_map["month"]))
+        # First attempt: value from the explicit time column
+        raw_time_value = get_row_value(row, col_map["time"])
+        raw_time_text = clean_text(raw_time_value)
+        parsed_start_time = parsed_start_times[idx]
+
+        # If pandas did not read the merged Time cell, get the merged-cell value
+        # directly from openpyxl using the actual Time column.
+        if not parsed_start_time and ws is not None and col_map["time"] in df.columns:
+            time_col_index = list(df.columns).index(col_map["time"]) + 1
+            merged_time_value = get_cell_value_from_ws(ws, source_row, time_col_index)
+
+            if merged_time_value is not None:
+                parsed_start_time = parse_single_time(merged_time_value)
+                raw_time_text = clean_text(merged_time_value) or str(merged_time_value)
+
+        # If no time detected but sheet has configured default, use it
+        if not parsed_start_time and DEFAULT_SESSION_TIMES_BY_SHEET.get(source_sheet_name):
+            parsed_start_time = parse_single_time(DEFAULT_SESSION_TIMES_BY_SHEET[source_sheet_name])
+            raw_time_text = DEFAULT_SESSION_TIMES_BY_SHEET[source_sheet_name]
+
+        # IMPORTANT: define participant fields before any skip/debug checks
+        raw_card_value = get_row_value(row, col_map["card"])
+        raw_name_value = get_row_value(row, col_map["name"])
+
+        # Alum Rock Community Centre workbook has grouped rows.
+        # Session/date/time appear once at the top, then following participant rows are blank.
+        if raw_session:
+            current_session_name = raw_session
+
+        if raw_day:
+            current_day = raw_day
+
+        if raw_date:
+            current_date = raw_date
+
+        if raw_month:
+            current_month = raw_month
+
+        if parsed_start_time:
+            current_start_time = parsed_start_time
+            current_end_time = make_end_time(parsed_start_time)
+            current_raw_time = raw_time_text
+
+        # Diagnostic: if date is present but time is missing, for the first 20 occurrences per sheet
+        if current_date is not None and current_start_time is None and missing_time_debug_count < 20:
+            # collect non-empty cells for this row and previous row
+            row_vals = []
+            prev_vals = []
+            for col_index, col_name in enumerate(df.columns, start=1):
+                v = get_row_value(row, col_name)
+                if v is None and ws is not None:
+                    v = get_cell_value_from_ws(ws, source_row, col_index)
+                if v is not None:
+                    row_vals.append((col_index, col_name, v))
+
+                # previous row
+                prev_row_idx = max(1, source_row - 1)
+                pv = None
+                if ws is not None:
+                    pv = get_cell_value_from_ws(ws, prev_row_idx, col_index)
+                if pv is not None:
+                    prev_vals.append((col_index, col_name, pv))
+
+            messages.append("DEBUG missing time context:")
+            messages.append(f"Sheet={source_sheet_name} Row={source_row}")
+            messages.append(f"CurrentDate={current_date} CurrentTime={current_start_time}")
+            messages.append("Row values: " + ", ".join([f"{chr(64+c)}{source_row}={v}" for c,_,v in row_vals]))
+            messages.append("Previous row values: " + ", ".join([f"{chr(64+c)}{source_row-1}={v}" for c,_,v in prev_vals]))
+            missing_time_debug_count += 1
+
+        session_date = current_date
+        start_time = current_start_time
+        end_time = current_end_time
+
+        if not sheet_activity_name or not session_date or not start_time or not end_time:
+            parsed_sheet["rows_skipped_missing_carried_datetime"] += 1
+
+            # If the row is completely blank (no card, no name, no time/session), don't spam logs
+            if not raw_card_value and not raw_name_value and not raw_session and not raw_time_text:
+                continue
+
+            messages.append(
+                " ".join(
+                    [
+                        "Skipping row due to missing carried date/time:",
+                        f"Sheet={source_sheet_name}",
+                        f"Row={source_row}",
+                        f"RawSession={raw_session}",
+                        f"CurrentDate={session_date}",
+                        f"CurrentTime={start_time}",
+                        f"RawCard={clean_text(raw_card_value)}",
+                        f"RawName={clean_text(raw_name_value)}",
+                    ]
+                )
+            )
+            continue
+
+        if end_time <= start_time:
+            parsed_sheet["invalid_time_rows"] += 1
+            continue
+
+        parsed_sheet["rows"].append(
+            {
+                "source_row": source_row,
+                "raw_session": raw_session,
+                "activity_name": sheet_activity_name,
+                "session_date": session_date,
+                "day_of_week": normalise_day(current_day, session_date),
+                "session_month": month_name(current_month, session_date),
+                "start_time": start_time,
+                "end_time": end_time,
+                "raw_time": current_raw_time,
+                "raw_card_value": raw_card_value,
+                "raw_name_value": raw_name_value,
+                "raw_emergency_name": get_row_value(row, col_map["emergency_name"]),
+                "raw_emergency_phone": get_row_value(row, col_map["emergency_phone"]),
+                "raw_risk": get_row_value(row, col_map["risk"]),
+                "raw_disability": get_row_value(row, col_map["disability"]),
+            }
+        )
+
+    return parsed_sheet
+
+
+# Each pool worker opens the workbook once and keeps it for every sheet it is given.
+_worker_workbook: Optional[tuple[pd.ExcelFile, Any]] = None
+
+
+def _init_sheet_worker(input_file: str) -> None:
+    global _worker_workbook
+    _worker_workbook = open_register_workbook(Path(input_file))
+
+
+def _parse_sheet_in_worker(sheet_name: str) -> dict:
+    excel, workbook = _worker_workbook
+    return parse_register_sheet(excel, workbook, sheet_name)
+
+
+def iter_parsed_sheets(input_file: Path, workers: int = 1) -> Iterator[dict]:
+    """
+    Yield parsed sheets in workbook order.
+
+    With workers > 1 the sheets are parsed in a process pool. Results are
+    still yielded in (sheet, row) order, so the database stage sees exactly
+    the same sequence as a single-process run.
+    """
+    if workers <= 1:
+        excel, workbook = open_register_workbook(input_file)
+
+        for sheet_name in excel.sheet_names:
+            if sheet_name.strip() in SKIP_SHEETS:
+                continue
+            yield parse_register_sheet(excel, workbook, sheet_name)
+        return
+
+    names_workbook = openpyxl.load_workbook(input_file, read_only=True)
+    try:
+        sheet_names = [name for name in names_workbook.sheetnames if name.strip() not in SKIP_SHEETS]
+    finally:
+        names_workbook.close()
+
+    if not sheet_names:
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(sheet_names)),
+        initializer=_init_sheet_worker,
+        initargs=(str(input_file),),
+    ) as executor:
+        # map() returns results in submission order, whichever worker finishes first.
+        yield from executor.map(_parse_sheet_in_worker, sheet_names)
+
+
 # ============================================================
 # SQL HELPERS
 # ============================================================
@@ -516,24 +757,6 @@ def is_identity_column(cursor: pyodbc.Cursor, table_name: str, column_name: str)
     return bool(row.is_identity)
 
 
-def get_next_manual_id(cursor: pyodbc.Cursor, table_name: str, column_name: str) -> int:
-    sql = f"SELECT ISNULL(MAX({column_name}), 0) + 1 AS NextId FROM dbo.{table_name};"
-    row = cursor.execute(sql).fetchone()
-    return int(row.NextId)
-
-
-def get_next_lite_display_number(cursor: pyodbc.Cursor) -> int:
-    sql = """
-    SELECT ISNULL(MAX(TRY_CONVERT(int, REPLACE(MemberDisplayId, 'LITE-', ''))), 0) + 1 AS NextLiteNumber
-    FROM dbo.SessionAttendance
-    WHERE AttendanceMemberKind = 'LITE'
-      AND MemberDisplayId LIKE 'LITE-%';
-    """
-
-    row = cursor.execute(sql).fetchone()
-    return int(row.NextLiteNumber)
-
-
 def find_existing_session(
     cursor: pyodbc.Cursor,
     venue_name: str,
@@ -671,7 +894,8 @@ def create_session(
 def update_session_cancelled(cursor: pyodbc.Cursor, session_id: int) -> None:
     sql = """
     UPDATE dbo.Sessions
-    SET IsCancelled = 1
+    SET IsCancelled = 1,
+        UpdatedAtUtc = SYSUTCDATETIME()
     WHERE SessionId = ?;
     """
 
@@ -898,6 +1122,106 @@ def attendance_exists(
     return row is not None
 
 
+def attendance_match_keys(candidate: dict) -> list[tuple]:
+    """
+    Same person-matching rules as attendance_exists, as hashable keys. Card
+    numbers and display ids are stripped and upper-cased, as the database's
+    case-insensitive collation compares them.
+    """
+    session_id = candidate["session_id"]
+    keys = []
+
+    if candidate.get("participant_id"):
+        keys.append((session_id, "ParticipantId", candidate["participant_id"]))
+
+    if candidate.get("saheli_card_number"):
+        keys.append((session_id, "SaheliCardNumber", str(candidate["saheli_card_number"]).strip().upper()))
+
+    if candidate.get("lite_member_id"):
+        keys.append((session_id, "LiteMemberId", str(candidate["lite_member_id"]).upper()))
+
+    if candidate.get("member_display_id"):
+        keys.append((session_id, "MemberDisplayId", str(candidate["member_display_id"]).strip().upper()))
+
+    if candidate.get("member_name"):
+        keys.append((session_id, "MemberName", candidate["member_name"].strip().lower()))
+
+    return keys
+
+
+def find_existing_attendance_batch(cursor: pyodbc.Cursor, candidates: list[dict]) -> set[int]:
+    """
+    Return the positions of candidates that already have a SessionAttendance row.
+
+    All candidates are loaded into a temp table in one executemany and checked with
+    a single joined query, using the same OR rules as attendance_exists.
+    """
+    if not candidates:
+        return set()
+
+    cursor.execute(
+        """
+        IF OBJECT_ID('tempdb..#AttendanceCandidates') IS NOT NULL
+            DROP TABLE #AttendanceCandidates;
+
+        CREATE TABLE #AttendanceCandidates (
+            CandidateNo int NOT NULL PRIMARY KEY,
+            SessionId int NOT NULL,
+            ParticipantId int NULL,
+            SaheliCardNumber nvarchar(100) COLLATE DATABASE_DEFAULT NULL,
+            LiteMemberId nvarchar(64) COLLATE DATABASE_DEFAULT NULL,
+            MemberDisplayId nvarchar(100) COLLATE DATABASE_DEFAULT NULL,
+            MemberName nvarchar(400) COLLATE DATABASE_DEFAULT NULL
+        );
+        """
+    )
+
+    rows = [
+        (
+            position,
+            candidate["session_id"],
+            candidate.get("participant_id") or None,
+            candidate.get("saheli_card_number") or None,
+            str(candidate["lite_member_id"]) if candidate.get("lite_member_id") else None,
+            candidate.get("member_display_id") or None,
+            candidate.get("member_name") or None,
+        )
+        for position, candidate in enumerate(candidates)
+    ]
+
+    cursor.fast_executemany = True
+    cursor.executemany(
+        """
+        INSERT INTO #AttendanceCandidates
+            (CandidateNo, SessionId, ParticipantId, SaheliCardNumber, LiteMemberId, MemberDisplayId, MemberName)
+        VALUES (?, ?, ?, ?, ?, ?, ?);
+        """,
+        rows,
+    )
+    cursor.fast_executemany = False
+
+    sql = """
+    SELECT DISTINCT c.CandidateNo
+    FROM #AttendanceCandidates c
+    JOIN dbo.SessionAttendance sa
+      ON sa.SessionId = c.SessionId
+    WHERE (c.ParticipantId IS NOT NULL AND sa.ParticipantId = c.ParticipantId)
+       OR (c.SaheliCardNumber IS NOT NULL AND sa.SaheliCardNumber = c.SaheliCardNumber)
+       OR (c.LiteMemberId IS NOT NULL AND sa.LiteMemberId = c.LiteMemberId)
+       OR (c.MemberDisplayId IS NOT NULL AND sa.MemberDisplayId = c.MemberDisplayId)
+       OR (
+            c.MemberName IS NOT NULL
+            AND LOWER(LTRIM(RTRIM(ISNULL(sa.MemberName, '')))) = LOWER(LTRIM(RTRIM(c.MemberName)))
+          );
+    """
+
+    existing = {int(row.CandidateNo) for row in cursor.execute(sql).fetchall()}
+
+    cursor.execute("DROP TABLE #AttendanceCandidates;")
+
+    return existing
+
+
 def create_attendance(
     cursor: pyodbc.Cursor,
     attendance_identity: bool,
@@ -1022,7 +1346,7 @@ def create_attendance(
 # MAIN IMPORT
 # ============================================================
 
-def main() -> None:
+def main(workers: int = SHEET_WORKERS) -> None:
     if not INPUT_FILE.exists():
         raise FileNotFoundError(f"Input file not found: {INPUT_FILE}")
 
@@ -1034,10 +1358,6 @@ def main() -> None:
 
     created_at = datetime.now(timezone.utc).replace(microsecond=0, tzinfo=None)
 
-    excel = pd.ExcelFile(INPUT_FILE)
-    # Also open with openpyxl (data_only) for merged-cell lookup and richer cell inspection
-    workbook = openpyxl.load_workbook(INPUT_FILE, data_only=True)
-
     sessions_created = 0
     sessions_reused = 0
     sessions_cancelled = 0
@@ -1069,188 +1389,55 @@ def main() -> None:
             session_identity = is_identity_column(cursor, "Sessions", "SessionId")
             attendance_identity = is_identity_column(cursor, "SessionAttendance", "AttendanceId")
 
-            next_manual_session_id = None
-            next_manual_attendance_id = None
+            session_ids = None
+            attendance_ids = None
 
             if not session_identity:
-                next_manual_session_id = get_next_manual_id(cursor, "Sessions", "SessionId")
-                print(f"SessionId is not IDENTITY. Starting manual SessionId from {next_manual_session_id}")
+                session_ids = id_allocator.session_id_allocator(cursor, connection_string=SQL_CONNECTION_STRING)
+                print(f"SessionId is not IDENTITY. Starting manual SessionId from {session_ids.peek()}")
             else:
                 print("SessionId is IDENTITY. SQL Server will generate SessionId.")
 
             if not attendance_identity:
-                next_manual_attendance_id = get_next_manual_id(cursor, "SessionAttendance", "AttendanceId")
-                print(f"AttendanceId is not IDENTITY. Starting manual AttendanceId from {next_manual_attendance_id}")
+                attendance_ids = id_allocator.attendance_id_allocator(cursor, connection_string=SQL_CONNECTION_STRING)
+                print(f"AttendanceId is not IDENTITY. Starting manual AttendanceId from {attendance_ids.peek()}")
             else:
                 print("AttendanceId is IDENTITY. SQL Server will generate AttendanceId.")
 
-            next_lite_number = get_next_lite_display_number(cursor)
-            print(f"Next LITE MemberDisplayId starts from: LITE-{next_lite_number}")
-
-            for sheet_name in excel.sheet_names:
-                source_sheet_name = sheet_name.strip()
-                sheet_activity_name = normalise_activity_from_sheet(source_sheet_name)
+            lite_numbers = id_allocator.lite_number_allocator(cursor, connection_string=SQL_CONNECTION_STRING)
+            print(f"Next LITE MemberDisplayId starts from: LITE-{lite_numbers.peek()}")
 
-                if source_sheet_name in SKIP_SHEETS:
-                    continue
+            for parsed_sheet in iter_parsed_sheets(INPUT_FILE, workers):
+                source_sheet_name = parsed_sheet["sheet"]
 
                 print(f"Processing sheet: {source_sheet_name}")
 
-                df = pd.read_excel(
-                    INPUT_FILE,
-                    sheet_name=sheet_name,
-                    header=0,
-                    dtype=object,
-                )
-
-                # worksheet for merged-cell lookups
-                try:
-                    ws = workbook[sheet_name]
-                except Exception:
-                    ws = None
-
-                if df.empty:
-                    continue
-
-                col_map = get_sheet_column_map(df)
-
-                required_cols = ["session", "date", "time", "card"]
-
-                if any(col_map.get(col) is None for col in required_cols):
-                    print(f"Skipping sheet because required columns are missing: {source_sheet_name}")
-                    print(f"Column map: {col_map}")
-                    continue
-
-                current_session_name = None
-                current_day = None
-                current_date = None
-                current_month = None
-                current_start_time = None
-                current_end_time = None
-                current_raw_time = None
-
-                for idx, row in df.iterrows():
-                    source_row = int(idx) + 2
-
-                    raw_session = clean_text(get_row_value(row, col_map["session"]))
-                    raw_day = clean_text(get_row_value(row, col_map["day"]))
-                    raw_date = excel_date_to_date(get_row_value(row, col_map["date"]))
-                    raw_month = clean_text(get_row_value(row, col_map["month"]))
-                    # First attempt: value from the explicit time column
-                    raw_time_value = get_row_value(row, col_map["time"])
-                    raw_time_text = clean_text(raw_time_value)
-                    parsed_start_time = parse_single_time(raw_time_value)
-
-                    # If pandas did not read the merged Time cell, get the merged-cell value
-                    # directly from openpyxl using the actual Time column.
-                    if not parsed_start_time and ws is not None and col_map["time"] in df.columns:
-                        time_col_index = list(df.columns).index(col_map["time"]) + 1
-                        merged_time_value = get_cell_value_from_ws(ws, source_row, time_col_index)
-
-                        if merged_time_value is not None:
-                            parsed_start_time = parse_single_time(merged_time_value)
-                            raw_time_text = clean_text(merged_time_value) or str(merged_time_value)
-
-                    # If no time detected but sheet has configured default, use it
-                    if not parsed_start_time and DEFAULT_SESSION_TIMES_BY_SHEET.get(source_sheet_name):
-                        parsed_start_time = parse_single_time(DEFAULT_SESSION_TIMES_BY_SHEET[source_sheet_name])
-                        raw_time_text = DEFAULT_SESSION_TIMES_BY_SHEET[source_sheet_name]
-
-                    # IMPORTANT: define participant fields before any skip/debug checks
-                    raw_card_value = get_row_value(row, col_map["card"])
-                    raw_name_value = get_row_value(row, col_map["name"])
-
-                    # Alum Rock Community Centre workbook has grouped rows.
-                    # Session/date/time appear once at the top, then following participant rows are blank.
-                    if raw_session:
-                        current_session_name = raw_session
-
-                    if raw_day:
-                        current_day = raw_day
-
-                    if raw_date:
-                        current_date = raw_date
-
-                    if raw_month:
-                        current_month = raw_month
-
-                    if parsed_start_time:
-                        current_start_time = parsed_start_time
-                        current_end_time = make_end_time(parsed_start_time)
-                        current_raw_time = raw_time_text
-
-                    # Diagnostic: if date is present but time is missing, for the first 20 occurrences per sheet
-                    if current_date is not None and current_start_time is None:
-                        # Use a per-sheet counter stored in sessions_reused_by_month keys area; use a local debug counter
-                        debug_key = f"_debug_missing_time_{source_sheet_name}"
-                        if debug_key not in locals():
-                            locals()[debug_key] = 0
-                        if locals()[debug_key] < 20:
-                            # collect non-empty cells for this row and previous row
-                            row_vals = []
-                            prev_vals = []
-                            for col_index, col_name in enumerate(df.columns, start=1):
-                                v = get_row_value(row, col_name)
-                                if v is None and ws is not None:
-                                    v = get_cell_value_from_ws(ws, source_row, col_index)
-                                if v is not None:
-                                    row_vals.append((col_index, col_name, v))
-
-                                # previous row
-                                prev_row_idx = max(1, source_row - 1)
-                                pv = None
-                                if ws is not None:
-                                    pv = get_cell_value_from_ws(ws, prev_row_idx, col_index)
-                                if pv is not None:
-                                    prev_vals.append((col_index, col_name, pv))
-
-                            print("DEBUG missing time context:")
-                            print(f"Sheet={source_sheet_name} Row={source_row}")
-                            print(f"CurrentDate={current_date} CurrentTime={current_start_time}")
-                            print("Row values:", ", ".join([f"{chr(64+c)}{source_row}={v}" for c,_,v in row_vals]))
-                            print("Previous row values:", ", ".join([f"{chr(64+c)}{source_row-1}={v}" for c,_,v in prev_vals]))
-                            locals()[debug_key] += 1
-
-                    activity_name = sheet_activity_name
-                    session_date = current_date
-                    day_of_week = normalise_day(current_day, session_date)
-                    session_month = month_name(current_month, session_date)
-                    start_time = current_start_time
-                    end_time = current_end_time
-                    raw_time_for_notes = current_raw_time
-
-                    # raw_card_value and raw_name_value were extracted earlier
-
-                    if not activity_name or not session_date or not start_time or not end_time:
-                        # If the row is completely blank (no card, no name, no time/session), don't spam logs
-                        if not raw_card_value and not raw_name_value and not raw_session and not raw_time_text:
-                            rows_skipped += 1
-                            rows_skipped_missing_carried_datetime += 1
-                            continue
-
-                        rows_skipped += 1
-                        rows_skipped_missing_carried_datetime += 1
-                        print(
-                            "Skipping row due to missing carried date/time:",
-                            f"Sheet={source_sheet_name}",
-                            f"Row={source_row}",
-                            f"RawSession={raw_session}",
-                            f"CurrentDate={session_date}",
-                            f"CurrentTime={start_time}",
-                            f"RawCard={clean_text(raw_card_value)}",
-                            f"RawName={clean_text(raw_name_value)}",
-                        )
-                        continue
-
-                    if end_time <= start_time:
-                        invalid_time_rows += 1
-                        rows_skipped += 1
-                        continue
-
-                    raw_emergency_name = get_row_value(row, col_map["emergency_name"])
-                    raw_emergency_phone = get_row_value(row, col_map["emergency_phone"])
-                    raw_risk = get_row_value(row, col_map["risk"])
-                    raw_disability = get_row_value(row, col_map["disability"])
+                for message in parsed_sheet["messages"]:
+                    print(message)
+
+                rows_skipped += parsed_sheet["rows_skipped_missing_carried_datetime"]
+                rows_skipped += parsed_sheet["invalid_time_rows"]
+                rows_skipped_missing_carried_datetime += parsed_sheet["rows_skipped_missing_carried_datetime"]
+                invalid_time_rows += parsed_sheet["invalid_time_rows"]
+
+                pending_attendance: list[dict] = []
+
+                for parsed in parsed_sheet["rows"]:
+                    source_row = parsed["source_row"]
+                    raw_session = parsed["raw_session"]
+                    activity_name = parsed["activity_name"]
+                    session_date = parsed["session_date"]
+                    day_of_week = parsed["day_of_week"]
+                    session_month = parsed["session_month"]
+                    start_time = parsed["start_time"]
+                    end_time = parsed["end_time"]
+                    raw_time_for_notes = parsed["raw_time"]
+                    raw_card_value = parsed["raw_card_value"]
+                    raw_name_value = parsed["raw_name_value"]
+                    raw_emergency_name = parsed["raw_emergency_name"]
+                    raw_emergency_phone = parsed["raw_emergency_phone"]
+                    raw_risk = parsed["raw_risk"]
+                    raw_disability = parsed["raw_disability"]
 
                     status = row_status(
                         raw_card_value,
@@ -1301,8 +1488,7 @@ def main() -> None:
                             manual_session_id_to_use = None
 
                             if not session_identity:
-                                manual_session_id_to_use = next_manual_session_id
-                                next_manual_session_id += 1
+                                manual_session_id_to_use = session_ids.next()
 
                             session_id = create_session(
                                 cursor=cursor,
@@ -1431,14 +1617,13 @@ def main() -> None:
                             else:
                                 existing_lite = {
                                     "LiteMemberId": str(uuid.uuid4()).upper(),
-                                    "MemberDisplayId": f"LITE-{next_lite_number}",
+                                    "MemberDisplayId": f"LITE-{lite_numbers.next()}",
                                     "MemberName": member_name,
                                     "Phone": None,
                                     "EmergencyName": emergency_name_from_excel,
                                     "EmergencyPhone": emergency_phone_from_excel,
                                 }
 
-                                next_lite_number += 1
                                 lite_created += 1
 
                             lite_member_cache[lite_cache_key] = existing_lite
@@ -1465,6 +1650,36 @@ def main() -> None:
                         rows_skipped_no_name += 1
                         continue
 
+                    if BATCH_DUPLICATE_CHECK:
+                        pending_attendance.append(
+                            {
+                                "source_sheet": source_sheet_name,
+                                "source_row": source_row,
+                                "raw_time": raw_time_for_notes,
+                                "disability": disability,
+                                "original_card_value": original_card_value,
+                                "card_number": card_number,
+                                "session_id": session_id,
+                                "participant_id": participant_id,
+                                "activity_name": activity_name,
+                                "day_of_week": day_of_week,
+                                "session_date": session_date,
+                                "session_month": session_month,
+                                "start_time": start_time,
+                                "end_time": end_time,
+                                "saheli_card_number": saheli_card_number_to_insert,
+                                "risk_stratification": risk_stratification,
+                                "attendance_member_kind": attendance_member_kind,
+                                "lite_member_id": lite_member_id,
+                                "member_display_id": member_display_id,
+                                "member_name": member_name,
+                                "phone": phone,
+                                "emergency_name": emergency_name,
+                                "emergency_phone": emergency_phone,
+                            }
+                        )
+                        continue
+
                     if SKIP_DUPLICATE_ATTENDANCE and attendance_exists(
                         cursor=cursor,
                         session_id=session_id,
@@ -1489,8 +1704,7 @@ def main() -> None:
                     manual_attendance_id_to_use = None
 
                     if not attendance_identity:
-                        manual_attendance_id_to_use = next_manual_attendance_id
-                        next_manual_attendance_id += 1
+                        manual_attendance_id_to_use = attendance_ids.next()
 
                     try:
                         create_attendance(
@@ -1536,6 +1750,87 @@ def main() -> None:
                         )
                         continue
 
+                if not pending_attendance:
+                    continue
+
+                existing_positions = (
+                    find_existing_attendance_batch(cursor, pending_attendance)
+                    if SKIP_DUPLICATE_ATTENDANCE
+                    else set()
+                )
+                seen_keys: set[tuple] = set()
+
+                for position, candidate in enumerate(pending_attendance):
+                    match_keys = attendance_match_keys(candidate)
+
+                    # Rows earlier in this sheet would have been found by attendance_exists
+                    # once inserted, so apply the same rules inside the batch.
+                    if SKIP_DUPLICATE_ATTENDANCE and (
+                        position in existing_positions or any(key in seen_keys for key in match_keys)
+                    ):
+                        attendance_skipped_duplicate += 1
+                        continue
+
+                    notes = build_attendance_notes(
+                        source_sheet=candidate["source_sheet"],
+                        source_row=candidate["source_row"],
+                        raw_time=candidate["raw_time"],
+                        disability=candidate["disability"],
+                        original_card_value=candidate["original_card_value"],
+                        attendance_member_kind=candidate["attendance_member_kind"],
+                    )
+
+                    manual_attendance_id_to_use = None
+
+                    if not attendance_identity:
+                        manual_attendance_id_to_use = attendance_ids.next()
+
+                    try:
+                        create_attendance(
+                            cursor=cursor,
+                            attendance_identity=attendance_identity,
+                            manual_attendance_id=manual_attendance_id_to_use,
+                            session_id=candidate["session_id"],
+                            participant_id=candidate["participant_id"],
+                            activity_name=candidate["activity_name"],
+                            day_of_week=candidate["day_of_week"],
+                            session_date=candidate["session_date"],
+                            session_month=candidate["session_month"],
+                            start_time=candidate["start_time"],
+                            end_time=candidate["end_time"],
+                            saheli_card_number=candidate["saheli_card_number"],
+                            risk_stratification=candidate["risk_stratification"],
+                            notes=notes,
+                            created_at=created_at,
+                            attendance_member_kind=candidate["attendance_member_kind"],
+                            lite_member_id=candidate["lite_member_id"],
+                            member_display_id=candidate["member_display_id"],
+                            member_name=candidate["member_name"],
+                            phone=candidate["phone"],
+                            emergency_name=candidate["emergency_name"],
+                            emergency_phone=candidate["emergency_phone"],
+                        )
+
+                        seen_keys.update(match_keys)
+                        attendance_created += 1
+                        if candidate["attendance_member_kind"] == "FULL":
+                            full_created += 1
+                        session_date = candidate["session_date"]
+                        month_key = candidate["session_month"] or (session_date.strftime("%B") if session_date else "Unknown")
+                        rows_imported_by_month[month_key] += 1
+
+                    except Exception as e:
+                        attendance_failed += 1
+                        print(
+                            f"Warning: Could not insert attendance. "
+                            f"Sheet={candidate['source_sheet']}, Row={candidate['source_row']}, "
+                            f"SessionId={candidate['session_id']}, Kind={candidate['attendance_member_kind']}, "
+                            f"Card={candidate['card_number']}, LiteMemberId={candidate['lite_member_id']}, "
+                            f"DisplayId={candidate['member_display_id']}, Name={candidate['member_name']}, Error={e}"
+                        )
+                        continue
+
+            id_allocator.release_all(session_ids, attendance_ids, lite_numbers)
             conn.commit()
 
         except Exception:
@@ -1574,5 +1869,16 @@ def main() -> None:
     print(f"Rows skipped: {rows_skipped}")
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Import the Alum Rock Community Centre activity register into CRM Sessions and SessionAttendance.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=SHEET_WORKERS,
+        help=f"Number of processes used to parse sheets before the database stage. Default: {SHEET_WORKERS}",
+    )
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(workers=parse_args().workers)
\ No newline at end of file
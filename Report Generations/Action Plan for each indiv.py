@@ -1,11 +1,15 @@
 import re
 import os
+import sys
 from pathlib import Path
 from datetime import datetime
 
 import pyodbc
 from docx import Document
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import crm_db  # noqa: E402
+
 # =========================================================
 # CONFIG
 # =========================================================
@@ -70,7 +74,7 @@ def get_connection_string() -> str:
 
 def get_connection():
     try:
-        return pyodbc.connect(get_connection_string())
+        return crm_db.connect(get_connection_string())
     except pyodbc.Error as ex:
         db = resolve_db_config()
         auth_mode = "Windows Integrated Authentication" if db["use_windows_auth"] else "SQL Authentication"
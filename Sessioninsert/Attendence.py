@@ -1,8 +1,22 @@
+import argparse
 import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
 import pandas as pd
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from register_parsing import (  # noqa: E402
+    COMPACT_CLOCK_TOKEN_RE,
+    ENDS_WITH_AM_PM_RE,
+    HOUR_ONLY_TOKEN_RE,
+    WHITESPACE_RE,
+    memoised,
+    parse_column,
+)
+
 
 MONTH_NAME_TO_NUM = {
     "january": 1,
@@ -32,6 +46,9 @@ ATTENDANCE_MEMBER_KIND = "FULL"   # change only if your DB expects another value
 INNERVA_SESSION_NAME = "Innerva Sessions"
 MIN_SESSION_DATE = datetime(2026, 1, 10).date()
 
+# Sheets parsed in parallel worker processes (1 = no pool). Override with --workers.
+SHEET_WORKERS = 1
+
 
 # =========================
 # SHEET -> SESSION MAPPING
@@ -237,9 +254,9 @@ def parse_session_date(raw_date, raw_month, sheet_name: str, input_file: str):
 def standardize_time_token(token: str) -> str:
     token = token.strip().lower()
     token = token.replace(".", ":")
-    token = re.sub(r"\s+", "", token)
+    token = WHITESPACE_RE.sub("", token)
 
-    if re.fullmatch(r"\d{3,4}(am|pm)?", token):
+    if COMPACT_CLOCK_TOKEN_RE.fullmatch(token):
         suffix = ""
         if token.endswith("am") or token.endswith("pm"):
             suffix = token[-2:]
@@ -250,7 +267,7 @@ def standardize_time_token(token: str) -> str:
             token = f"{token[:2]}:{token[2:]}"
         token += suffix
 
-    if re.fullmatch(r"\d{1,2}(am|pm)?", token):
+    if HOUR_ONLY_TOKEN_RE.fullmatch(token):
         if token.endswith("am") or token.endswith("pm"):
             suffix = token[-2:]
             num = token[:-2]
@@ -331,6 +348,13 @@ def parse_single_time_value(value):
     return parse_single_time(text)
 
 
+EXPLICIT_TIME_RANGE_RE = re.compile(
+    r"(?i)(?:\b\d{1,2}[:.]\d{2}(?::\d{2})?(?:\s*[ap]m)?\b|\b\d{1,2}\s*[ap]m\b)\s*[-–—]\s*(?:\b\d{1,2}[:.]\d{2}(?::\d{2})?(?:\s*[ap]m)?\b|\b\d{1,2}\s*[ap]m\b)"
+)
+TO_SEPARATOR_RE = re.compile(r"\s+to\s+", flags=re.IGNORECASE)
+
+
+@memoised()
 def parse_time_range(value):
     if value is None or pd.isna(value):
         return None, None
@@ -343,11 +367,8 @@ def parse_time_range(value):
 
     # If it is a parseable single timestamp/time (including datetime text), keep it as a single-point time.
     is_explicit_time_range = bool(
-        re.search(
-            r"(?i)(?:\b\d{1,2}[:.]\d{2}(?::\d{2})?(?:\s*[ap]m)?\b|\b\d{1,2}\s*[ap]m\b)\s*[-–—]\s*(?:\b\d{1,2}[:.]\d{2}(?::\d{2})?(?:\s*[ap]m)?\b|\b\d{1,2}\s*[ap]m\b)",
-            text,
-        )
-        or re.search(r"\s+to\s+", lower_text)
+        EXPLICIT_TIME_RANGE_RE.search(text)
+        or TO_SEPARATOR_RE.search(lower_text)
     )
     single_candidate = parse_single_time_value(value)
     if single_candidate is not None and not is_explicit_time_range:
@@ -361,7 +382,7 @@ def parse_time_range(value):
         return None, None
 
     text = text.replace("–", "-").replace("—", "-")
-    text = re.sub(r"\s+to\s+", "-", text, flags=re.IGNORECASE).strip()
+    text = TO_SEPARATOR_RE.sub("-", text).strip()
     parts = [p.strip() for p in text.split("-") if p.strip()]
     if len(parts) < 1:
         return None, None
@@ -379,7 +400,7 @@ def parse_time_range(value):
     left_lower = left.lower()
     right_lower = right.lower()
 
-    if not re.search(r"(am|pm)$", left_lower) and re.search(r"(am|pm)$", right_lower):
+    if not ENDS_WITH_AM_PM_RE.search(left_lower) and ENDS_WITH_AM_PM_RE.search(right_lower):
         suffix = right_lower[-2:]
         left = left + suffix
 
@@ -447,128 +468,192 @@ def is_name_like(value: str | None) -> bool:
 
 
 # =========================
-# MAIN
+# SHEET PARSING
 # =========================
-def build_session_attendance_export(input_file: str, output_file: str):
-    input_path = Path(input_file)
-    if not input_path.exists():
-        raise FileNotFoundError(f"Input file not found: {input_file}")
-
-    xls = pd.ExcelFile(input_path)
+def parse_attendance_sheet(
+    xls: pd.ExcelFile,
+    sheet_name: str,
+    input_file: str,
+    now_utc: str,
+) -> tuple[list[dict], list[str]]:
+    """Return (export rows, warnings) for one sheet, rows in sheet row order."""
     output_rows = []
     warnings = []
-    now_utc = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
 
-    for sheet_name in xls.sheet_names:
-        if not is_attendance_sheet(sheet_name):
+    df = xls.parse(sheet_name)
+
+    if df.empty:
+        return output_rows, warnings
+
+    session_col = find_column(df, ["Activity", "Class", "Session Type", "SessionType"])
+    day_col = find_column(df, ["Day"])
+    date_col, time_col = resolve_date_and_time_columns(df)
+    month_col = find_column(df, ["Month"])
+    induction_col = find_column(df, ["Induction Time", "InductionTime", "Induction"])
+    card_col = find_column(df, ["Saheli Card Number", "SaheliCardNumber", "Card Number", "Saheli Card No", "SaheliCardNo"])
+    name_col = find_column(df, ["Name", "Member Name", "Participant Name"])
+    emergency_name_col = find_column(df, ["Emergency contact Name", "Emergency Name", "EmergencyContactName"])
+    emergency_phone_col = find_column(df, ["Emergency Number", "Emergency Phone", "EmergencyPhone"])
+    risk_col = find_column(df, ["Risk Stratification", "RiskStratification"])
+
+    if not date_col or not time_col:
+        warnings.append(f"Sheet '{sheet_name}' missing required date/time columns.")
+        return output_rows, warnings
+
+    # Fill merged-cell session context values down so row-level filtering/parsing stays accurate.
+    context_cols = [col for col in [session_col, day_col, date_col, month_col, time_col, induction_col] if col]
+    if context_cols:
+        df[context_cols] = df[context_cols].ffill()
+
+    # Registers repeat the same few time strings, so parse each distinct one once.
+    parsed_time_ranges = parse_column(df[time_col], parse_time_range)
+
+    for idx, row in df.iterrows():
+        raw_date_value = row.get(date_col)
+        raw_month_value = row.get(month_col) if month_col else None
+        session_date = parse_session_date(raw_date_value, raw_month_value, sheet_name, input_file)
+        if session_date is None:
+            continue
+
+        if session_date < MIN_SESSION_DATE:
+            continue
+
+        start_time, end_time = parsed_time_ranges[idx]
+        if start_time is None or end_time is None:
+            warnings.append(
+                f"Could not parse time on sheet '{sheet_name}', row {idx + 2}: {row.get(time_col)}"
+            )
             continue
 
-        df = pd.read_excel(input_file, sheet_name=sheet_name)
+        if induction_col and is_excluded_induction(row.get(induction_col)):
+            continue
 
-        if df.empty:
+        raw_session_name = clean_text(row.get(session_col)) if session_col else None
+        session_day = clean_text(row.get(day_col)) if day_col else None
+        session_month = clean_text(row.get(month_col)) if month_col else None
+        raw_card = clean_text(row.get(card_col)) if card_col else None
+        member_name = clean_text(row.get(name_col)) if name_col else None
+        emergency_name = clean_text(row.get(emergency_name_col)) if emergency_name_col else None
+        emergency_phone = clean_text(row.get(emergency_phone_col)) if emergency_phone_col else None
+        risk = clean_text(row.get(risk_col)) if risk_col else None
+
+        # Skip pure empty rows
+        if not any([raw_card, member_name, emergency_name, emergency_phone, risk]):
             continue
 
-        session_col = find_column(df, ["Activity", "Class", "Session Type", "SessionType"])
-        day_col = find_column(df, ["Day"])
-        date_col, time_col = resolve_date_and_time_columns(df)
-        month_col = find_column(df, ["Month"])
-        induction_col = find_column(df, ["Induction Time", "InductionTime", "Induction"])
-        card_col = find_column(df, ["Saheli Card Number", "SaheliCardNumber", "Card Number", "Saheli Card No", "SaheliCardNo"])
-        name_col = find_column(df, ["Name", "Member Name", "Participant Name"])
-        emergency_name_col = find_column(df, ["Emergency contact Name", "Emergency Name", "EmergencyContactName"])
-        emergency_phone_col = find_column(df, ["Emergency Number", "Emergency Phone", "EmergencyPhone"])
-        risk_col = find_column(df, ["Risk Stratification", "RiskStratification"])
-
-        if not date_col or not time_col:
-            warnings.append(f"Sheet '{sheet_name}' missing required date/time columns.")
+        # Skip cancelled rows
+        if raw_card and str(raw_card).strip().lower() in {"cancelled", "canceled"}:
             continue
 
-        # Fill merged-cell session context values down so row-level filtering/parsing stays accurate.
-        context_cols = [col for col in [session_col, day_col, date_col, month_col, time_col, induction_col] if col]
-        if context_cols:
-            df[context_cols] = df[context_cols].ffill()
-
-        for idx, row in df.iterrows():
-            raw_date_value = row.get(date_col)
-            raw_month_value = row.get(month_col) if month_col else None
-            session_date = parse_session_date(raw_date_value, raw_month_value, sheet_name, input_file)
-            if session_date is None:
-                continue
-
-            if session_date < MIN_SESSION_DATE:
-                continue
-
-            start_time, end_time = parse_time_range(row.get(time_col))
-            if start_time is None or end_time is None:
-                warnings.append(
-                    f"Could not parse time on sheet '{sheet_name}', row {idx + 2}: {row.get(time_col)}"
-                )
-                continue
-
-            if induction_col and is_excluded_induction(row.get(induction_col)):
-                continue
-
-            raw_session_name = clean_text(row.get(session_col)) if session_col else None
-            session_day = clean_text(row.get(day_col)) if day_col else None
-            session_month = clean_text(row.get(month_col)) if month_col else None
-            raw_card = clean_text(row.get(card_col)) if card_col else None
-            member_name = clean_text(row.get(name_col)) if name_col else None
-            emergency_name = clean_text(row.get(emergency_name_col)) if emergency_name_col else None
-            emergency_phone = clean_text(row.get(emergency_phone_col)) if emergency_phone_col else None
-            risk = clean_text(row.get(risk_col)) if risk_col else None
-
-            # Skip pure empty rows
-            if not any([raw_card, member_name, emergency_name, emergency_phone, risk]):
-                continue
-
-            # Skip cancelled rows
-            if raw_card and str(raw_card).strip().lower() in {"cancelled", "canceled"}:
-                continue
-
-            # If card column contains a real card number, use it
-            saheli_card_number = normalize_card_number(raw_card) if is_real_card_number(raw_card) else None
-            member_display_id = saheli_card_number
-
-            # If card column contains a name and Name column is blank, use that as member name
-            if not saheli_card_number and is_name_like(raw_card) and not member_name:
-                member_name = raw_card
-
-            # Use emergency number as phone for now
-            phone = emergency_phone
-
-            resolved_session_name = INNERVA_SESSION_NAME
-
-            output_rows.append({
-                "SessionId": None,  # fill later by join
-                "ParticipantId": None,  # fill later by participant lookup
-                "SessionName": resolved_session_name,
-                "SessionDay": session_day,
-                "SessionDate": session_date.strftime("%Y-%m-%d"),
-                "SessionMonth": session_month if session_month else session_date.strftime("%b"),
-                "SessionStartTime": format_time_for_excel(start_time),
-                "SessionEndTime": format_time_for_excel(end_time),
-                "SaheliCardNumber": saheli_card_number,
-                "RiskStratification": risk,
-                "Attended": ATTENDED_DEFAULT,
-                "CheckInTime": None,
-                "CheckOutTime": None,
-                "Notes": NOTES_DEFAULT,
-                "CreatedAtUtc": now_utc,
-                "UpdatedAtUtc": now_utc,
-                "AttendanceMemberKind": ATTENDANCE_MEMBER_KIND,
-                "LiteMemberId": None,
-                "MemberDisplayId": member_display_id,
-                "MemberName": member_name,
-                "Phone": phone,
-                "EmergencyName": emergency_name,
-                "EmergencyPhone": emergency_phone,
-
-                # helper columns for review
-                "SourceSheet": sheet_name,
-                "RawSessionText": raw_session_name,
-                "RawCardValue": raw_card,
-                "NeedsParticipantLookup": 1 if saheli_card_number is None else 0,
-            })
+        # If card column contains a real card number, use it
+        saheli_card_number = normalize_card_number(raw_card) if is_real_card_number(raw_card) else None
+        member_display_id = saheli_card_number
+
+        # If card column contains a name and Name column is blank, use that as member name
+        if not saheli_card_number and is_name_like(raw_card) and not member_name:
+            member_name = raw_card
+
+        # Use emergency number as phone for now
+        phone = emergency_phone
+
+        resolved_session_name = INNERVA_SESSION_NAME
+
+        output_rows.append({
+            "SessionId": None,  # fill later by join
+            "ParticipantId": None,  # fill later by participant lookup
+            "SessionName": resolved_session_name,
+            "SessionDay": session_day,
+            "SessionDate": session_date.strftime("%Y-%m-%d"),
+            "SessionMonth": session_month if session_month else session_date.strftime("%b"),
+            "SessionStartTime": format_time_for_excel(start_time),
+            "SessionEndTime": format_time_for_excel(end_time),
+            "SaheliCardNumber": saheli_card_number,
+            "RiskStratification": risk,
+            "Attended": ATTENDED_DEFAULT,
+            "CheckInTime": None,
+            "CheckOutTime": None,
+            "Notes": NOTES_DEFAULT,
+            "CreatedAtUtc": now_utc,
+            "UpdatedAtUtc": now_utc,
+            "AttendanceMemberKind": ATTENDANCE_MEMBER_KIND,
+            "LiteMemberId": None,
+            "MemberDisplayId": member_display_id,
+            "MemberName": member_name,
+            "Phone": phone,
+            "EmergencyName": emergency_name,
+            "EmergencyPhone": emergency_phone,
+
+            # helper columns for review
+            "SourceSheet": sheet_name,
+            "RawSessionText": raw_session_name,
+            "RawCardValue": raw_card,
+            "NeedsParticipantLookup": 1 if saheli_card_number is None else 0,
+        })
+
+    return output_rows, warnings
+
+
+# Each pool worker opens the workbook once and keeps it for every sheet it is given.
+_worker_state: dict = {}
+
+
+def _init_sheet_worker(input_file: str, now_utc: str) -> None:
+    _worker_state["xls"] = pd.ExcelFile(input_file)
+    _worker_state["input_file"] = input_file
+    _worker_state["now_utc"] = now_utc
+
+
+def _parse_sheet_in_worker(sheet_name: str) -> tuple[list[dict], list[str]]:
+    return parse_attendance_sheet(
+        _worker_state["xls"],
+        sheet_name,
+        _worker_state["input_file"],
+        _worker_state["now_utc"],
+    )
+
+
+def parse_attendance_workbook(input_file: str, now_utc: str, workers: int = 1) -> tuple[list[dict], list[str]]:
+    """
+    Parse every attendance sheet, in a process pool when workers > 1.
+
+    Sheet results are concatenated in workbook order, so the export (and the
+    first-wins duplicate removal below) is the same for any worker count.
+    """
+    xls = pd.ExcelFile(input_file)
+    sheet_names = [name for name in xls.sheet_names if is_attendance_sheet(name)]
+
+    if workers <= 1 or len(sheet_names) <= 1:
+        sheet_results = [
+            parse_attendance_sheet(xls, sheet_name, input_file, now_utc)
+            for sheet_name in sheet_names
+        ]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(sheet_names)),
+            initializer=_init_sheet_worker,
+            initargs=(str(input_file), now_utc),
+        ) as executor:
+            sheet_results = list(executor.map(_parse_sheet_in_worker, sheet_names))
+
+    output_rows = []
+    warnings = []
+    for sheet_rows, sheet_warnings in sheet_results:
+        output_rows.extend(sheet_rows)
+        warnings.extend(sheet_warnings)
+
+    return output_rows, warnings
+
+
+# =========================
+# MAIN
+# =========================
+def build_session_attendance_export(input_file: str, output_file: str, workers: int = SHEET_WORKERS):
+    input_path = Path(input_file)
+    if not input_path.exists():
+        raise FileNotFoundError(f"Input file not found: {input_file}")
+
+    now_utc = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+    output_rows, warnings = parse_attendance_workbook(input_file, now_utc, workers)
 
     result_df = pd.DataFrame(output_rows)
 
@@ -613,5 +698,16 @@ def build_session_attendance_export(input_file: str, output_file: str):
             print(f" ... and {len(warnings) - 20} more")
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Export Innerva booking sheet attendance rows for SessionAttendance.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=SHEET_WORKERS,
+        help=f"Number of processes used to parse sheets. Default: {SHEET_WORKERS}",
+    )
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    build_session_attendance_export(INPUT_FILE, OUTPUT_FILE)
\ No newline at end of file
+    build_session_attendance_export(INPUT_FILE, OUTPUT_FILE, workers=parse_args().workers)
\ No newline at end of file
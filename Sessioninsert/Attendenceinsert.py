@@ -1,7 +1,14 @@
 import pandas as pd
 import pyodbc
 import os
+import sys
 from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import bulk_load  # noqa: E402
+import crm_mirror  # noqa: E402
 
 # =========================
 # CONFIG
@@ -240,37 +247,41 @@ def insert_attendance_imports():
     conn = get_connection()
     cur = conn.cursor()
     cur.fast_executemany = True
-    sessions_lookup = fetch_sessions_lookup(conn) if REQUIRE_SESSION_MATCH else {}
+    sessions_lookup = (
+        fetch_sessions_lookup(crm_mirror.lookup_connection(conn, "Sessions"))
+        if REQUIRE_SESSION_MATCH
+        else {}
+    )
+
+    insert_columns = [
+        "SessionId",
+        "ParticipantId",
+        "SessionName",
+        "SessionDay",
+        "SessionDate",
+        "SessionMonth",
+        "SessionStartTime",
+        "SessionEndTime",
+        "SaheliCardNumber",
+        "RiskStratification",
+        "Attended",
+        "CheckInTime",
+        "CheckOutTime",
+        "Notes",
+        "CreatedAtUtc",
+        "UpdatedAtUtc",
+        "AttendanceMemberKind",
+        "LiteMemberId",
+        "MemberDisplayId",
+        "MemberName",
+        "Phone",
+        "EmergencyName",
+        "EmergencyPhone",
+    ]
 
     insert_sql = f"""
-    INSERT INTO {TABLE_NAME}
-    (
-        SessionId,
-        ParticipantId,
-        SessionName,
-        SessionDay,
-        SessionDate,
-        SessionMonth,
-        SessionStartTime,
-        SessionEndTime,
-        SaheliCardNumber,
-        RiskStratification,
-        Attended,
-        CheckInTime,
-        CheckOutTime,
-        Notes,
-        CreatedAtUtc,
-        UpdatedAtUtc,
-        AttendanceMemberKind,
-        LiteMemberId,
-        MemberDisplayId,
-        MemberName,
-        Phone,
-        EmergencyName,
-        EmergencyPhone
-    )
-    VALUES
-    (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    INSERT INTO {TABLE_NAME} ({", ".join(insert_columns)})
+    VALUES ({", ".join("?" for _ in insert_columns)})
     """
 
     prepared_rows = []
@@ -347,7 +358,7 @@ def insert_attendance_imports():
 
     try:
         if prepared_rows:
-            cur.executemany(insert_sql, [values for values, _ in prepared_rows])
+            bulk_load.bulk_insert(cur, TABLE_NAME, insert_columns, [values for values, _ in prepared_rows])
             conn.commit()
             inserted = len(prepared_rows)
     except pyodbc.Error:
@@ -1,8 +1,22 @@
 import re
+import sys
 from pathlib import Path
 from datetime import datetime, time
 import pandas as pd
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from register_parsing import (  # noqa: E402
+    COMPACT_CLOCK_TOKEN_RE,
+    ENDS_WITH_AM_PM_RE,
+    HOUR_ONLY_TOKEN_RE,
+    WHITESPACE_RE,
+    describe_unparsed_dates,
+    memoised,
+    normalise_date_column,
+    parse_column,
+)
+
 
 # =========================
 # CONFIG
@@ -134,46 +148,21 @@ def clean_text(value):
     return text
 
 
-def excel_date_to_python(value):
-    if pd.isna(value):
-        return None
-
-    if isinstance(value, pd.Timestamp):
-        return value.date()
-
-    if isinstance(value, datetime):
-        return value.date()
-
-    text = str(value).strip()
-    if not text:
-        return None
-
-    date_formats = [
-        "%d/%m/%Y",
-        "%d-%m-%Y",
-        "%Y-%m-%d",
-        "%d/%m/%y",
-        "%d-%m-%y",
-    ]
-
-    for fmt in date_formats:
-        try:
-            return datetime.strptime(text, fmt).date()
-        except ValueError:
-            pass
-
-    parsed = pd.to_datetime(text, dayfirst=True, errors="coerce")
-    if pd.isna(parsed):
-        return None
-    return parsed.date()
+DATE_FORMATS = (
+    "%d/%m/%Y",
+    "%d-%m-%Y",
+    "%Y-%m-%d",
+    "%d/%m/%y",
+    "%d-%m-%y",
+)
 
 
 def standardize_time_token(token: str) -> str:
     token = token.strip().lower()
     token = token.replace(".", ":")
-    token = re.sub(r"\s+", "", token)
+    token = WHITESPACE_RE.sub("", token)
 
-    if re.fullmatch(r"\d{3,4}(am|pm)?", token):
+    if COMPACT_CLOCK_TOKEN_RE.fullmatch(token):
         suffix = ""
         if token.endswith("am") or token.endswith("pm"):
             suffix = token[-2:]
@@ -184,7 +173,7 @@ def standardize_time_token(token: str) -> str:
             token = f"{token[:2]}:{token[2:]}"
         token += suffix
 
-    if re.fullmatch(r"\d{1,2}(am|pm)?", token):
+    if HOUR_ONLY_TOKEN_RE.fullmatch(token):
         if token.endswith("am") or token.endswith("pm"):
             suffix = token[-2:]
             num = token[:-2]
@@ -216,6 +205,7 @@ def parse_single_time(token: str) -> time | None:
     return None
 
 
+@memoised()
 def parse_time_range(value):
     text = clean_text(value)
     if not text:
@@ -230,7 +220,7 @@ def parse_time_range(value):
     left_lower = left.lower()
     right_lower = right.lower()
 
-    if not re.search(r"(am|pm)$", left_lower) and re.search(r"(am|pm)$", right_lower):
+    if not ENDS_WITH_AM_PM_RE.search(left_lower) and ENDS_WITH_AM_PM_RE.search(right_lower):
         suffix = right_lower[-2:]
         left = left + suffix
 
@@ -292,12 +282,23 @@ def build_sessions_export(input_file: str, output_file: str):
             )
             continue
 
+        # Dates and times are parsed per column, each distinct string once.
+        parsed_session_dates, unparsed_dates = normalise_date_column(
+            df[date_col], excel_serials=False, text_formats=DATE_FORMATS, prepare_text=str.strip
+        )
+        parsed_time_ranges = parse_column(df[time_col], parse_time_range)
+
+        if unparsed_dates:
+            warnings.append(
+                f"Sheet '{sheet_name}' has unrecognised dates: {describe_unparsed_dates(unparsed_dates)}"
+            )
+
         for idx, row in df.iterrows():
             if not row_has_session_data(row, date_col, time_col):
                 continue
 
-            session_date = excel_date_to_python(row.get(date_col))
-            start_time, end_time = parse_time_range(row.get(time_col))
+            session_date = parsed_session_dates[idx]
+            start_time, end_time = parsed_time_ranges[idx]
 
             if session_date is None:
                 continue
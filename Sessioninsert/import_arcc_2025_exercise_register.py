@@ -41,6 +41,12 @@ except ModuleNotFoundError:
 
 from openpyxl import load_workbook
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from register_parsing import DASH_TRANSLATION, ISO_DATE_RE, memoised  # noqa: E402
+import crm_db  # noqa: E402
+import id_allocator  # noqa: E402
+
 
 # ============================================================
 # CONFIGURATION
@@ -53,6 +59,10 @@ DEFAULT_VENUE_NAME = "Alum Rock Community Centre"
 REUSE_EXISTING_SESSIONS = True
 SKIP_DUPLICATE_ATTENDANCE = True
 
+# Stage every parsed session into a temp table and resolve them with one MERGE,
+# instead of one find_existing_session / create_session round trip per session.
+BULK_SESSION_UPSERT = True
+
 NULL_TEXT_VALUES = {"", "#N/A", "N/A", "NA", "NONE", "NULL", "NAN", "(BLANK)", "-", "--"}
 YES_VALUES = {"yes", "y", "true", "1", "present", "attended", "✓"}
 
@@ -295,13 +305,23 @@ def parse_date_value(value: Any, *, last_date: Optional[date] = None) -> Optiona
     return parsed
 
 
+ONE_TIME_RE = re.compile(r"^(\d{1,2})(?::(\d{1,2}))?(am|pm)?$")
+SLASH_DATE_RE = re.compile(r"\d{1,2}/\d{1,2}/\d{2,4}")
+HEADER_TIME_RANGE_RE = re.compile(
+    r"(\d{1,2}(?:[.:]\d{1,2})?\s*(?:am|pm)?)\s*-\s*(\d{1,2}(?:[.:]\d{1,2})?\s*(?:am|pm)?)"
+)
+AFTERNOON_START_RE = re.compile(r"^\s*[1-7](?:[.:]\d{1,2})?\s*$")
+SUFFIXED_TIME_RE = re.compile(r"(?<!\d)(\d{1,2}(?:[.:]\d{1,2})?\s*(?:am|pm))(?!\d)")
+
+
+@memoised()
 def parse_one_time(token: str, suffix_hint: Optional[str] = None) -> Optional[time]:
     text = token.strip().lower()
     text = text.replace("a.m.", "am").replace("p.m.", "pm")
     text = text.replace("a.m", "am").replace("p.m", "pm")
     text = text.replace(".", ":").replace(" ", "")
 
-    match = re.match(r"^(\d{1,2})(?::(\d{1,2}))?(am|pm)?$", text)
+    match = ONE_TIME_RE.match(text)
     if not match:
         return None
 
@@ -323,6 +343,7 @@ def parse_one_time(token: str, suffix_hint: Optional[str] = None) -> Optional[ti
     return time(hour, minute)
 
 
+@memoised()
 def parse_time_range(
     text_value: Any,
     default_start: time,
@@ -338,18 +359,15 @@ def parse_time_range(
         return default_start, default_end
 
     text = text.casefold()
-    text = re.sub(r"\d{4}-\d{1,2}-\d{1,2}", " ", text)
-    text = re.sub(r"\d{1,2}/\d{1,2}/\d{2,4}", " ", text)
+    text = ISO_DATE_RE.sub(" ", text)
+    text = SLASH_DATE_RE.sub(" ", text)
 
     text = text.replace("a.m.", "am").replace("p.m.", "pm")
     text = text.replace("a.m", "am").replace("p.m", "pm")
     text = text.replace("noon", "12pm")
-    text = text.replace("–", "-").replace("—", "-")
+    text = text.translate(DASH_TRANSLATION)
 
-    range_match = re.search(
-        r"(\d{1,2}(?:[.:]\d{1,2})?\s*(?:am|pm)?)\s*-\s*(\d{1,2}(?:[.:]\d{1,2})?\s*(?:am|pm)?)",
-        text,
-    )
+    range_match = HEADER_TIME_RANGE_RE.search(text)
 
     if range_match:
         left = range_match.group(1)
@@ -361,16 +379,14 @@ def parse_time_range(
         elif "am" in right:
             suffix_hint = "am"
 
-        start_hint = suffix_hint if suffix_hint == "pm" and re.search(r"^\s*[1-7](?:[.:]\d{1,2})?\s*$", left) else None
+        start_hint = suffix_hint if suffix_hint == "pm" and AFTERNOON_START_RE.search(left) else None
         start = parse_one_time(left, start_hint)
         end = parse_one_time(right, suffix_hint)
 
         if start and end:
             return start, end
 
-    single_time_matches = list(
-        re.finditer(r"(?<!\d)(\d{1,2}(?:[.:]\d{1,2})?\s*(?:am|pm))(?!\d)", text)
-    )
+    single_time_matches = list(SUFFIXED_TIME_RE.finditer(text))
 
     if single_time_matches:
         start = parse_one_time(single_time_matches[-1].group(1))
@@ -385,31 +401,59 @@ def parse_time_range(
 # WORKBOOK EXTRACTION
 # ============================================================
 
-def is_month_sheet(ws: Any) -> bool:
-    cell_text = clean_text(ws.cell(3, 1).value, zero_is_null=False)
+HEADER_ROWS_TO_READ = 3
+MAX_SHEET_COLUMNS = 300
+MAX_SHEET_ROW = 1200
+
+
+def sheet_value(values: tuple[Any, ...], col: int) -> Any:
+    return values[col - 1] if 0 < col <= len(values) else None
+
+
+def read_header_rows(ws: Any) -> list[tuple[Any, ...]]:
+    """Read only the top rows that hold dates, headers and the sheet marker."""
+    rows = [
+        tuple(values)
+        for values in ws.iter_rows(
+            min_row=1,
+            max_row=HEADER_ROWS_TO_READ,
+            max_col=MAX_SHEET_COLUMNS,
+            values_only=True,
+        )
+    ]
+
+    while len(rows) < HEADER_ROWS_TO_READ:
+        rows.append(())
+
+    return rows
+
+
+def is_month_sheet(header_rows: list[tuple[Any, ...]]) -> bool:
+    cell_text = clean_text(sheet_value(header_rows[2], 1), zero_is_null=False)
     return bool(cell_text and "sessions attended" in cell_text.casefold())
 
 
-def is_activity_sheet(ws: Any) -> bool:
-    cell_text = clean_text(ws.cell(2, 1).value, zero_is_null=False)
+def is_activity_sheet(header_rows: list[tuple[Any, ...]]) -> bool:
+    cell_text = clean_text(sheet_value(header_rows[1], 1), zero_is_null=False)
     return bool(cell_text and "sessions attended" in cell_text.casefold())
 
 
-def actual_max_col(ws: Any, rows: tuple[int, ...], max_cap: int = 300) -> int:
+def actual_max_col(header_rows: list[tuple[Any, ...]], rows: tuple[int, ...]) -> int:
     max_col = 0
+    width = max((len(header_rows[row - 1]) for row in rows), default=0)
 
-    for col in range(1, min(ws.max_column, max_cap) + 1):
-        if any(clean_text(ws.cell(row, col).value, zero_is_null=False) is not None for row in rows):
+    for col in range(1, min(width, MAX_SHEET_COLUMNS) + 1):
+        if any(clean_text(sheet_value(header_rows[row - 1], col), zero_is_null=False) is not None for row in rows):
             max_col = col
 
     return max_col
 
 
-def build_meta_map(ws: Any, header_row: int, start_col: int) -> dict[str, int]:
+def build_meta_map(header_values: tuple[Any, ...], start_col: int) -> dict[str, int]:
     mapping: dict[str, int] = {}
 
     for col in range(1, start_col):
-        header = clean_text(ws.cell(header_row, col).value, zero_is_null=False)
+        header = clean_text(sheet_value(header_values, col), zero_is_null=False)
         if not header:
             continue
 
@@ -439,10 +483,10 @@ def build_meta_map(ws: Any, header_row: int, start_col: int) -> dict[str, int]:
     return mapping
 
 
-def read_participant_from_row(ws: Any, row: int, meta_map: dict[str, int]) -> dict[str, Optional[str]]:
+def read_participant_from_row(values: tuple[Any, ...], meta_map: dict[str, int]) -> dict[str, Optional[str]]:
     def get_value(key: str) -> Any:
         col = meta_map.get(key)
-        return ws.cell(row, col).value if col else None
+        return sheet_value(values, col) if col else None
 
     return {
         "saheli_card_number": normalise_card(get_value("saheli_card_number")),
@@ -459,6 +503,45 @@ def read_participant_from_row(ws: Any, row: int, meta_map: dict[str, int]) -> di
     }
 
 
+def stream_attendance_markers(
+    ws: Any,
+    header_row: int,
+    max_col: int,
+    meta_map: dict[str, int],
+    session_columns: list[tuple[int, dict[str, Any]]],
+) -> dict[int, list[tuple[int, dict[str, Optional[str]], Any]]]:
+    """
+    Stream participant rows once and collect the attended markers per session column.
+
+    Only the current row is held as raw values; a participant dict is built only for
+    rows with at least one attended marker.
+    """
+    markers: dict[int, list[tuple[int, dict[str, Optional[str]], Any]]] = defaultdict(list)
+
+    rows = ws.iter_rows(
+        min_row=header_row + 1,
+        max_row=MAX_SHEET_ROW,
+        max_col=max_col,
+        values_only=True,
+    )
+
+    for row_number, values in enumerate(rows, start=header_row + 1):
+        person: Optional[dict[str, Optional[str]]] = None
+
+        for col, _session in session_columns:
+            marker = sheet_value(values, col)
+
+            if not is_attended(marker):
+                continue
+
+            if person is None:
+                person = read_participant_from_row(values, meta_map)
+
+            markers[col].append((row_number, person, marker))
+
+    return markers
+
+
 def participant_quality_score(row: dict[str, Any]) -> int:
     fields = [
         "member_name",
@@ -496,7 +579,7 @@ def merge_attendance(existing: dict[str, Any], incoming: dict[str, Any]) -> dict
 
 
 def parse_workbook(input_path: Path) -> tuple[list[ParsedAttendanceRow], Counter[str], list[dict[str, Any]]]:
-    workbook = load_workbook(input_path, data_only=True)
+    workbook = load_workbook(input_path, data_only=True, read_only=True)
 
     sessions: dict[tuple[str, str, str, str, str], dict[str, Any]] = {}
     attendance: dict[tuple[str, str, str, str, str, str], dict[str, Any]] = {}
@@ -547,136 +630,139 @@ def parse_workbook(input_path: Path) -> tuple[list[ParsedAttendanceRow], Counter
             attendance[attendance_key] = new_row
             sessions[session_key]["attendance_count"] += 1
 
-    for ws in workbook.worksheets:
-        sheet_title = ws.title.strip()
+    try:
+        for ws in workbook.worksheets:
+            sheet_title = ws.title.strip()
 
-        if sheet_title == "Sheet1":
-            continue
+            if sheet_title == "Sheet1":
+                continue
 
-        if is_month_sheet(ws):
-            header_row = 3
-            date_row = 2
-            max_col = actual_max_col(ws, (1, 2, 3))
+            header_rows = read_header_rows(ws)
+            session_columns: list[tuple[int, dict[str, Any]]] = []
 
-            start_col = None
-            for col in range(1, max_col + 1):
-                raw_date = ws.cell(date_row, col).value
-                raw_header = clean_text(ws.cell(header_row, col).value, zero_is_null=False)
+            if is_month_sheet(header_rows):
+                header_row = 3
+                date_row = 2
+                max_col = actual_max_col(header_rows, (1, 2, 3))
+                header_values = header_rows[header_row - 1]
+                date_values = header_rows[date_row - 1]
 
-                if col >= 7 and (parse_date_value(raw_date) or (raw_header and re.search(r"\d", raw_header))):
-                    start_col = col
-                    break
+                start_col = None
+                for col in range(1, max_col + 1):
+                    raw_date = sheet_value(date_values, col)
+                    raw_header = clean_text(sheet_value(header_values, col), zero_is_null=False)
 
-            if not start_col:
-                issues.append({"sheet": sheet_title, "issue": "No session columns detected"})
-                continue
+                    if col >= 7 and (parse_date_value(raw_date) or (raw_header and re.search(r"\d", raw_header))):
+                        start_col = col
+                        break
 
-            meta_map = build_meta_map(ws, header_row, start_col)
-            last_date: Optional[date] = None
+                if not start_col:
+                    issues.append({"sheet": sheet_title, "issue": "No session columns detected"})
+                    continue
 
-            for col in range(start_col, max_col + 1):
-                raw_header = clean_text(ws.cell(header_row, col).value, zero_is_null=False)
+                meta_map = build_meta_map(header_values, start_col)
+                last_date: Optional[date] = None
 
-                if not raw_header:
-                    continue
+                for col in range(start_col, max_col + 1):
+                    raw_header = clean_text(sheet_value(header_values, col), zero_is_null=False)
 
-                session_date = parse_date_value(ws.cell(date_row, col).value, last_date=last_date)
+                    if not raw_header:
+                        continue
 
-                # Some month sheets have a blank date in a repeated date group; carry forward the last date.
-                if session_date is None and last_date is not None:
-                    session_date = last_date
+                    session_date = parse_date_value(sheet_value(date_values, col), last_date=last_date)
 
-                if session_date is None:
-                    issues.append({
-                        "sheet": sheet_title,
-                        "col": col,
-                        "header": raw_header,
-                        "issue": "Missing or invalid date",
-                    })
-                    continue
+                    # Some month sheets have a blank date in a repeated date group; carry forward the last date.
+                    if session_date is None and last_date is not None:
+                        session_date = last_date
 
-                last_date = session_date
+                    if session_date is None:
+                        issues.append({
+                            "sheet": sheet_title,
+                            "col": col,
+                            "header": raw_header,
+                            "issue": "Missing or invalid date",
+                        })
+                        continue
 
-                if session_date.year != 2025:
-                    continue
+                    last_date = session_date
 
-                activity_name = canonical_activity(raw_header)
-                default_start, default_end = ACTIVITY_DEFAULTS.get(activity_name, (time(10, 0), time(11, 0)))
-                start_time, end_time = parse_time_range(raw_header, default_start, default_end)
-                category, sub_category, activity_category = category_for_activity(activity_name)
-
-                session = {
-                    "source_sheet": sheet_title,
-                    "source_col": col,
-                    "venue_name": DEFAULT_VENUE_NAME,
-                    "activity_name": activity_name,
-                    "raw_activity_header": raw_header,
-                    "category": category,
-                    "sub_category": sub_category,
-                    "activity_category": activity_category,
-                    "session_date": session_date,
-                    "start_time": start_time.strftime("%H:%M:%S"),
-                    "end_time": end_time.strftime("%H:%M:%S"),
-                }
-
-                for row in range(header_row + 1, min(ws.max_row, 1200) + 1):
-                    marker = ws.cell(row, col).value
-
-                    if not is_attended(marker):
+                    if session_date.year != 2025:
                         continue
 
-                    person = read_participant_from_row(ws, row, meta_map)
-                    add_attendance(session, person, marker, row)
+                    activity_name = canonical_activity(raw_header)
+                    default_start, default_end = ACTIVITY_DEFAULTS.get(activity_name, (time(10, 0), time(11, 0)))
+                    start_time, end_time = parse_time_range(raw_header, default_start, default_end)
+                    category, sub_category, activity_category = category_for_activity(activity_name)
+
+                    session_columns.append((col, {
+                        "source_sheet": sheet_title,
+                        "source_col": col,
+                        "venue_name": DEFAULT_VENUE_NAME,
+                        "activity_name": activity_name,
+                        "raw_activity_header": raw_header,
+                        "category": category,
+                        "sub_category": sub_category,
+                        "activity_category": activity_category,
+                        "session_date": session_date,
+                        "start_time": start_time.strftime("%H:%M:%S"),
+                        "end_time": end_time.strftime("%H:%M:%S"),
+                    }))
+
+            elif is_activity_sheet(header_rows):
+                header_row = 2
+                start_col = 7
+                max_col = actual_max_col(header_rows, (1, 2))
+                header_values = header_rows[header_row - 1]
+                meta_map = build_meta_map(header_values, start_col)
+
+                activity_name = canonical_activity(sheet_title=sheet_title)
+                default_start, default_end = ACTIVITY_DEFAULTS.get(activity_name, (time(10, 0), time(11, 0)))
+                last_date = None
 
-        elif is_activity_sheet(ws):
-            header_row = 2
-            start_col = 7
-            max_col = actual_max_col(ws, (1, 2))
-            meta_map = build_meta_map(ws, header_row, start_col)
+                for col in range(start_col, max_col + 1):
+                    raw_header = sheet_value(header_values, col)
+                    session_date = parse_date_value(raw_header, last_date=last_date)
 
-            activity_name = canonical_activity(sheet_title=sheet_title)
-            default_start, default_end = ACTIVITY_DEFAULTS.get(activity_name, (time(10, 0), time(11, 0)))
-            last_date = None
+                    if session_date is None:
+                        continue
 
-            for col in range(start_col, max_col + 1):
-                raw_header = ws.cell(header_row, col).value
-                session_date = parse_date_value(raw_header, last_date=last_date)
+                    if session_date.year != 2025:
+                        continue
 
-                if session_date is None:
-                    continue
+                    last_date = session_date
+                    start_time, end_time = parse_time_range(raw_header, default_start, default_end)
+                    category, sub_category, activity_category = category_for_activity(activity_name)
+
+                    session_columns.append((col, {
+                        "source_sheet": sheet_title,
+                        "source_col": col,
+                        "venue_name": DEFAULT_VENUE_NAME,
+                        "activity_name": activity_name,
+                        "raw_activity_header": clean_text(raw_header, zero_is_null=False) or activity_name,
+                        "category": category,
+                        "sub_category": sub_category,
+                        "activity_category": activity_category,
+                        "session_date": session_date,
+                        "start_time": start_time.strftime("%H:%M:%S"),
+                        "end_time": end_time.strftime("%H:%M:%S"),
+                    }))
 
-                if session_date.year != 2025:
-                    continue
+            else:
+                issues.append({"sheet": sheet_title, "issue": "Unrecognised sheet structure"})
+                continue
 
-                last_date = session_date
-                start_time, end_time = parse_time_range(raw_header, default_start, default_end)
-                category, sub_category, activity_category = category_for_activity(activity_name)
-
-                session = {
-                    "source_sheet": sheet_title,
-                    "source_col": col,
-                    "venue_name": DEFAULT_VENUE_NAME,
-                    "activity_name": activity_name,
-                    "raw_activity_header": clean_text(raw_header, zero_is_null=False) or activity_name,
-                    "category": category,
-                    "sub_category": sub_category,
-                    "activity_category": activity_category,
-                    "session_date": session_date,
-                    "start_time": start_time.strftime("%H:%M:%S"),
-                    "end_time": end_time.strftime("%H:%M:%S"),
-                }
-
-                for row in range(header_row + 1, min(ws.max_row, 1200) + 1):
-                    marker = ws.cell(row, col).value
-
-                    if not is_attended(marker):
-                        continue
+            if not session_columns:
+                continue
 
-                    person = read_participant_from_row(ws, row, meta_map)
-                    add_attendance(session, person, marker, row)
+            markers = stream_attendance_markers(ws, header_row, max_col, meta_map, session_columns)
 
-        else:
-            issues.append({"sheet": sheet_title, "issue": "Unrecognised sheet structure"})
+            # Replay column by column so merges and issues come out in the same order
+            # as a column-major scan of the sheet.
+            for col, session in session_columns:
+                for source_row, person, marker in markers.get(col, []):
+                    add_attendance(session, person, marker, source_row)
+    finally:
+        workbook.close()
 
     parsed_rows: list[ParsedAttendanceRow] = []
 
@@ -800,32 +886,6 @@ def is_identity_column(cursor: Any, table_name: str, column_name: str) -> bool:
     return bool(row and row.IsIdentity == 1)
 
 
-def get_next_manual_id(cursor: Any, table_name: str, column_name: str) -> int:
-    sql = f"SELECT ISNULL(MAX([{column_name}]), 0) + 1 AS NextId FROM dbo.[{table_name}];"
-    row = cursor.execute(sql).fetchone()
-    return int(row.NextId)
-
-
-def get_next_lite_display_number(cursor: Any) -> int:
-    sql = """
-    SELECT MemberDisplayId
-    FROM dbo.SessionAttendance
-    WHERE MemberDisplayId LIKE 'LITE-%';
-    """
-    max_number = 0
-
-    for row in cursor.execute(sql).fetchall():
-        value = clean_text(row.MemberDisplayId)
-        if not value:
-            continue
-
-        match = re.search(r"LITE-(\d+)", value, flags=re.IGNORECASE)
-        if match:
-            max_number = max(max_number, int(match.group(1)))
-
-    return max_number + 1
-
-
 def find_existing_session(cursor: Any, row: ParsedAttendanceRow) -> Optional[int]:
     sql = """
     SELECT TOP 1 SessionId
@@ -927,6 +987,203 @@ def create_session(
     return int(inserted.SessionId)
 
 
+def upsert_sessions_bulk(
+    cursor: Any,
+    session_rows: dict[tuple[str, str, str, str, str], ParsedAttendanceRow],
+    created_at: datetime,
+    session_identity: bool,
+    next_manual_session_id: Optional[int],
+) -> tuple[dict[tuple[str, str, str, str, str], int], dict[tuple[str, str, str, str, str], str]]:
+    """
+    Reuse or create every session with one set-based match and one MERGE
+    against dbo.Sessions.
+
+    session_rows maps each session key to the first parsed row for that session,
+    which is the row the per-row path would have used for create_session. Matching
+    follows find_existing_session (lowest SessionId wins). Reused sessions are only
+    read, never written; the MERGE inserts the rest.
+
+    Returns the SessionId and action ("INSERT" / "REUSE") per session key.
+    """
+    if not session_rows:
+        return {}, {}
+
+    keys = list(session_rows)
+
+    cursor.execute(
+        """
+        IF OBJECT_ID('tempdb..#SessionStage') IS NOT NULL
+            DROP TABLE #SessionStage;
+
+        CREATE TABLE #SessionStage (
+            SessionKeyNo int NOT NULL PRIMARY KEY,
+            Category nvarchar(200) COLLATE DATABASE_DEFAULT NULL,
+            SubCategory nvarchar(200) COLLATE DATABASE_DEFAULT NULL,
+            ActivityCategory nvarchar(200) COLLATE DATABASE_DEFAULT NULL,
+            VenueName nvarchar(200) COLLATE DATABASE_DEFAULT NOT NULL,
+            ActivityName nvarchar(200) COLLATE DATABASE_DEFAULT NOT NULL,
+            Notes nvarchar(max) COLLATE DATABASE_DEFAULT NULL,
+            SessionDate date NOT NULL,
+            StartTime varchar(8) COLLATE DATABASE_DEFAULT NOT NULL,
+            EndTime varchar(8) COLLATE DATABASE_DEFAULT NOT NULL,
+            ExistingSessionId int NULL
+        );
+        """
+    )
+
+    stage_rows = []
+    for key_no, key in enumerate(keys):
+        row = session_rows[key]
+        stage_rows.append((
+            key_no,
+            row.category,
+            row.sub_category,
+            row.activity_category,
+            row.venue_name,
+            row.activity_name,
+            (
+                f"Imported from {IMPORT_SOURCE_NAME}; "
+                f"Source sheets: {row.source_sheets}; "
+                f"Raw activity header: {row.raw_activity_header}"
+            ),
+            row.session_date.isoformat(),
+            row.start_time,
+            row.end_time,
+        ))
+
+    cursor.fast_executemany = True
+    cursor.executemany(
+        """
+        INSERT INTO #SessionStage (
+            SessionKeyNo, Category, SubCategory, ActivityCategory, VenueName, ActivityName,
+            Notes, SessionDate, StartTime, EndTime
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
+        """,
+        stage_rows,
+    )
+    cursor.fast_executemany = False
+
+    session_ids: dict[tuple[str, str, str, str, str], int] = {}
+    actions: dict[tuple[str, str, str, str, str], str] = {}
+
+    if REUSE_EXISTING_SESSIONS:
+        cursor.execute(
+            """
+            SET NOCOUNT ON;
+
+            UPDATE s
+            SET ExistingSessionId = m.SessionId
+            FROM #SessionStage s
+            CROSS APPLY (
+                SELECT TOP 1 x.SessionId
+                FROM dbo.Sessions x
+                WHERE LTRIM(RTRIM(ISNULL(x.VenueName, ''))) = LTRIM(RTRIM(s.VenueName))
+                  AND LTRIM(RTRIM(ISNULL(x.ActivityName, ''))) = LTRIM(RTRIM(s.ActivityName))
+                  AND CAST(x.SessionDate AS date) = s.SessionDate
+                  AND CONVERT(varchar(8), TRY_CONVERT(time, x.StartTime), 108) = s.StartTime
+                  AND CONVERT(varchar(8), TRY_CONVERT(time, x.EndTime), 108) = s.EndTime
+                ORDER BY x.SessionId
+            ) m;
+
+            SELECT SessionKeyNo, ExistingSessionId
+            FROM #SessionStage
+            WHERE ExistingSessionId IS NOT NULL;
+            """
+        )
+
+        for out in cursor.fetchall():
+            key = keys[int(out.SessionKeyNo)]
+            session_ids[key] = int(out.ExistingSessionId)
+            actions[key] = "REUSE"
+
+    insert_columns = [
+        "Frequency",
+        "Category",
+        "SubCategory",
+        "ActivityCategory",
+        "VenueName",
+        "ActivityName",
+        "Notes",
+        "IsRecurringWeekly",
+        "DayOfWeek",
+        "SessionDate",
+        "ArrivalTime",
+        "StartTime",
+        "EndTime",
+        "Capacity",
+        "IsBookingRequired",
+        "IsCancelled",
+        "CreatedAtUtc",
+        "AssignedStaffId",
+        "RecurringSeriesId",
+    ]
+    insert_values = [
+        "'WEEKLY'",
+        "src.Category",
+        "src.SubCategory",
+        "src.ActivityCategory",
+        "src.VenueName",
+        "src.ActivityName",
+        "src.Notes",
+        "0",
+        "NULL",
+        "src.SessionDate",
+        "NULL",
+        "src.StartTime",
+        "src.EndTime",
+        "NULL",
+        "0",
+        "0",
+        "?",
+        "NULL",
+        "NULL",
+    ]
+    first_new_session_id = 0
+
+    if not session_identity:
+        if next_manual_session_id is None:
+            raise RuntimeError("next_manual_session_id is required because SessionId is not IDENTITY.")
+        insert_columns.insert(0, "SessionId")
+        insert_values.insert(0, "src.NewSessionId")
+        first_new_session_id = next_manual_session_id
+
+    column_sql = ", ".join(f"[{column}]" for column in insert_columns)
+    value_sql = ", ".join(insert_values)
+
+    # New manual SessionIds are numbered only across the sessions that will be inserted,
+    # matching the per-row path where reused sessions do not consume an id. MERGE is
+    # used (rather than INSERT) so OUTPUT can return the staged SessionKeyNo.
+    sql = f"""
+    MERGE dbo.Sessions AS t
+    USING (
+        SELECT
+            s.*,
+            ? - 1 + ROW_NUMBER() OVER (ORDER BY s.SessionKeyNo) AS NewSessionId
+        FROM #SessionStage s
+        WHERE s.ExistingSessionId IS NULL
+    ) AS src
+    ON 1 = 0
+    WHEN NOT MATCHED BY TARGET THEN
+        INSERT ({column_sql})
+        VALUES ({value_sql})
+    OUTPUT src.SessionKeyNo, INSERTED.SessionId;
+    """
+
+    for out in cursor.execute(sql, first_new_session_id, created_at).fetchall():
+        key = keys[int(out.SessionKeyNo)]
+        session_ids[key] = int(out.SessionId)
+        actions[key] = "INSERT"
+
+    cursor.execute("DROP TABLE #SessionStage;")
+
+    missing = [key for key in keys if key not in session_ids]
+    if missing:
+        raise RuntimeError(f"Session MERGE did not return a SessionId for {len(missing)} session(s), e.g. {missing[0]}")
+
+    return session_ids, actions
+
+
 def find_participant_by_card(cursor: Any, card_number: Optional[str]) -> Optional[dict[str, Any]]:
     if not card_number:
         return None
@@ -1206,7 +1463,7 @@ def import_into_database(parsed_rows: list[ParsedAttendanceRow], *, apply_change
     session_id_cache: dict[tuple[str, str, str, str, str], int] = {}
     lite_member_cache: dict[str, dict[str, Any]] = {}
 
-    with pyodbc.connect(connection_string) as conn:
+    with crm_db.connect(connection_string) as conn:
         conn.autocommit = False
         cursor = conn.cursor()
 
@@ -1214,13 +1471,47 @@ def import_into_database(parsed_rows: list[ParsedAttendanceRow], *, apply_change
             session_identity = is_identity_column(cursor, "Sessions", "SessionId")
             attendance_identity = is_identity_column(cursor, "SessionAttendance", "AttendanceId")
 
-            next_manual_session_id = None if session_identity else get_next_manual_id(cursor, "Sessions", "SessionId")
-            next_manual_attendance_id = None if attendance_identity else get_next_manual_id(cursor, "SessionAttendance", "AttendanceId")
-            next_lite_display_number = get_next_lite_display_number(cursor)
+            session_ids = (
+                None
+                if session_identity
+                else id_allocator.session_id_allocator(cursor, connection_string=connection_string)
+            )
+            attendance_ids = (
+                None
+                if attendance_identity
+                else id_allocator.attendance_id_allocator(cursor, connection_string=connection_string)
+            )
+            lite_numbers = id_allocator.lite_number_allocator(cursor, connection_string=connection_string)
 
             print(f"SessionId IDENTITY: {session_identity}")
             print(f"AttendanceId IDENTITY: {attendance_identity}")
-            print(f"Next LITE MemberDisplayId: LITE-{next_lite_display_number}")
+            print(f"Next LITE MemberDisplayId: LITE-{lite_numbers.peek()}")
+
+            if BULK_SESSION_UPSERT:
+                session_rows: dict[tuple[str, str, str, str, str], ParsedAttendanceRow] = {}
+                for row in parsed_rows:
+                    session_rows.setdefault(row.session_key, row)
+
+                # Reserve enough SessionIds for every session to be new; the MERGE
+                # numbers only the inserted ones, and the rest is given back below.
+                new_session_ids = session_ids.take(len(session_rows)) if session_ids is not None else None
+
+                session_id_cache, session_actions = upsert_sessions_bulk(
+                    cursor=cursor,
+                    session_rows=session_rows,
+                    created_at=created_at,
+                    session_identity=session_identity,
+                    next_manual_session_id=new_session_ids.start if new_session_ids is not None else None,
+                )
+
+                for key, action in session_actions.items():
+                    counter_key = "sessions_created" if action == "INSERT" else "sessions_reused"
+                    counters[counter_key] += 1
+                    sheet_counters[session_rows[key].source_sheet][counter_key] += 1
+
+                if new_session_ids is not None:
+                    assert session_ids is not None
+                    session_ids.give_back_from(new_session_ids.start + counters["sessions_created"])
 
             for row in parsed_rows:
                 per_sheet = sheet_counters[row.source_sheet]
@@ -1237,9 +1528,8 @@ def import_into_database(parsed_rows: list[ParsedAttendanceRow], *, apply_change
                     else:
                         manual_session_id = None
                         if not session_identity:
-                            manual_session_id = next_manual_session_id
-                            assert next_manual_session_id is not None
-                            next_manual_session_id += 1
+                            assert session_ids is not None
+                            manual_session_id = session_ids.next()
 
                         session_id = create_session(
                             cursor=cursor,
@@ -1297,13 +1587,12 @@ def import_into_database(parsed_rows: list[ParsedAttendanceRow], *, apply_change
                     if lite_member is None:
                         lite_member = {
                             "LiteMemberId": str(uuid.uuid4()).upper(),
-                            "MemberDisplayId": f"LITE-{next_lite_display_number}",
+                            "MemberDisplayId": f"LITE-{lite_numbers.next()}",
                             "MemberName": member_name,
                             "Phone": None,
                             "EmergencyName": row.emergency_name,
                             "EmergencyPhone": row.emergency_phone,
                         }
-                        next_lite_display_number += 1
                         counters["lite_members_created"] += 1
                         per_sheet["lite_members_created"] += 1
                     else:
@@ -1334,9 +1623,8 @@ def import_into_database(parsed_rows: list[ParsedAttendanceRow], *, apply_change
 
                 manual_attendance_id = None
                 if not attendance_identity:
-                    manual_attendance_id = next_manual_attendance_id
-                    assert next_manual_attendance_id is not None
-                    next_manual_attendance_id += 1
+                    assert attendance_ids is not None
+                    manual_attendance_id = attendance_ids.next()
 
                 create_attendance(
                     cursor=cursor,
@@ -1360,6 +1648,7 @@ def import_into_database(parsed_rows: list[ParsedAttendanceRow], *, apply_change
                 per_sheet["attendance_created"] += 1
 
             if apply_changes:
+                id_allocator.release_all(session_ids, attendance_ids, lite_numbers)
                 conn.commit()
                 mode_message = "COMMITTED: database changes were saved."
             else:
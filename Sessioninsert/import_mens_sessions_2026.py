@@ -6,7 +6,8 @@ Import the workbook "Mens Sessions 2026 (1).xlsx" into:
     dbo.SessionAttendance
 
 Safety:
-    - The script runs as a dry run by default and rolls back all SQL changes.
+    - The script runs as a dry run by default. It reads a snapshot of the CRM,
+      prints the import plan and makes no SQL changes.
     - Add --apply only after checking the dry-run summary.
     - Add --inspect-only to check the Excel parsing without connecting to SQL Server.
 
@@ -41,6 +42,22 @@ except ModuleNotFoundError:
 
 from openpyxl import load_workbook
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from register_parsing import (  # noqa: E402
+    AM_SUFFIX_RE,
+    DASH_TRANSLATION,
+    PM_SUFFIX_RE,
+    WHITESPACE_RE,
+    expand_compact_clock,
+    memoised,
+    parse_clock,
+)
+from import_state import ImportState, fingerprint_rows  # noqa: E402
+import crm_db  # noqa: E402
+import id_allocator  # noqa: E402
+import bulk_load  # noqa: E402
+
 
 # ============================================================
 # CONFIGURATION
@@ -53,6 +70,12 @@ REUSE_EXISTING_SESSIONS = True
 SKIP_DUPLICATE_ATTENDANCE = True
 DEFAULT_SESSION_DURATION_MINUTES = 60
 
+# An apply run holds this application lock (sp_getapplock) until it commits,
+# so two runs of this importer cannot both plan the same new sessions. The
+# second run waits up to IMPORT_LOCK_TIMEOUT_MS for the first to finish.
+IMPORT_LOCK_RESOURCE = "import_mens_sessions_2026"
+IMPORT_LOCK_TIMEOUT_MS = 10 * 60 * 1000
+
 # IMPORTANT:
 # The workbook itself does not contain a dedicated VenueName column.
 # Review these mappings before using --apply.
@@ -205,6 +228,33 @@ class SheetStats:
     cancelled_or_no_attendance_rows: int = 0
 
 
+@dataclass
+class ImportSnapshot:
+    """Read-only copy of the CRM data the planner needs, loaded in a few queries."""
+    session_identity: bool
+    attendance_identity: bool
+    next_manual_session_id: Optional[int]
+    next_manual_attendance_id: Optional[int]
+    next_lite_display_number: int
+    session_ids: dict[tuple[str, str, str, str, str], int]
+    participants_by_card: dict[str, dict[str, Any]]
+    lite_by_original_card: LiteCardMarkers
+    lite_by_name_phone: dict[tuple[str, str], dict[str, Any]]
+    lite_by_name: dict[str, dict[str, Any]]
+    attendance_keys: set[tuple[int, str, str]]
+
+
+@dataclass
+class ImportPlan:
+    sessions_to_create: list[dict[str, Any]] = field(default_factory=list)
+    sessions_to_reuse: dict[tuple[str, str, str, str, str], int] = field(default_factory=dict)
+    sessions_to_cancel: list[int] = field(default_factory=list)
+    lite_members_to_create: list[dict[str, Any]] = field(default_factory=list)
+    attendance_to_insert: list[dict[str, Any]] = field(default_factory=list)
+    counters: Counter[str] = field(default_factory=Counter)
+    sheet_counters: dict[str, Counter[str]] = field(default_factory=lambda: defaultdict(Counter))
+
+
 # ============================================================
 # BASIC CLEANING
 # ============================================================
@@ -330,6 +380,12 @@ def sql_time_to_minutes(value: str) -> int:
     return int(value[0:2]) * 60 + int(value[3:5])
 
 
+NOON_RE = re.compile(r"(?:12\s*)?noon")
+MIDNIGHT_RE = re.compile(r"(?:12\s*)?midnight")
+RANGE_SPLIT_RE = re.compile(r"\s*(?:-|\bto\b)\s*")
+DIGIT_DOT_DIGIT_RE = re.compile(r"(?<=\d)\.(?=\d)")
+
+
 def _parse_one_time_token(token: str, fallback_suffix: Optional[str] = None) -> Optional[str]:
     text = token.strip().lower()
     text = text.strip(" .,-–—")
@@ -344,10 +400,10 @@ def _parse_one_time_token(token: str, fallback_suffix: Optional[str] = None) ->
         return "00:00:00"
 
     # Normalise am/pm variations such as a.m., a.m, a m, pm and p.m.
-    text = re.sub(r"a\s*\.?\s*m\.?", "am", text)
-    text = re.sub(r"p\s*\.?\s*m\.?", "pm", text)
-    text = re.sub(r"\s+", "", text)
-    text = re.sub(r"(?<=\d)\.(?=\d)", ":", text)
+    text = AM_SUFFIX_RE.sub("am", text)
+    text = PM_SUFFIX_RE.sub("pm", text)
+    text = WHITESPACE_RE.sub("", text)
+    text = DIGIT_DOT_DIGIT_RE.sub(":", text)
 
     suffix: Optional[str] = None
     if text.endswith("am"):
@@ -360,30 +416,10 @@ def _parse_one_time_token(token: str, fallback_suffix: Optional[str] = None) ->
         suffix = fallback_suffix
 
     # Handles compact forms such as 930 and 1030.
-    if ":" not in text and text.isdigit():
-        if len(text) == 4:
-            text = f"{text[:2]}:{text[2:]}"
-        elif len(text) == 3:
-            text = f"{text[0]}:{text[1:]}"
-
-    match = re.fullmatch(r"(\d{1,2})(?::(\d{1,2}))?", text)
-    if not match:
-        return None
-
-    hour = int(match.group(1))
-    minute = int(match.group(2) or 0)
-
-    if suffix == "pm" and hour != 12:
-        hour += 12
-    elif suffix == "am" and hour == 12:
-        hour = 0
-
-    if not (0 <= hour <= 23 and 0 <= minute <= 59):
-        return None
-
-    return f"{hour:02d}:{minute:02d}:00"
+    return parse_clock(expand_compact_clock(text), suffix)
 
 
+@memoised()
 def parse_time_or_range(value: Any) -> tuple[Optional[str], Optional[str], Optional[str]]:
     """Return (start_time, end_time, raw_time_text)."""
     if value is None:
@@ -410,28 +446,28 @@ def parse_time_or_range(value: Any) -> tuple[Optional[str], Optional[str], Optio
         return None, None, None
 
     text = raw.lower().strip()
-    text = text.replace("–", "-").replace("—", "-")
-    text = re.sub(r"\s+", " ", text)
+    text = text.translate(DASH_TRANSLATION)
+    text = WHITESPACE_RE.sub(" ", text)
 
     # Examples: 12 noon, noon, 12 midnight, midnight.
-    if re.fullmatch(r"(?:12\s*)?noon", text):
+    if NOON_RE.fullmatch(text):
         start = "12:00:00"
         return start, minutes_to_sql_time(sql_time_to_minutes(start) + DEFAULT_SESSION_DURATION_MINUTES), raw
 
-    if re.fullmatch(r"(?:12\s*)?midnight", text):
+    if MIDNIGHT_RE.fullmatch(text):
         start = "00:00:00"
         return start, minutes_to_sql_time(sql_time_to_minutes(start) + DEFAULT_SESSION_DURATION_MINUTES), raw
 
     # Split explicit ranges without using a regex character-class dash bug.
-    parts = re.split(r"\s*(?:-|\bto\b)\s*", text, maxsplit=1)
+    parts = RANGE_SPLIT_RE.split(text, maxsplit=1)
 
     if len(parts) == 2:
         start_token, end_token = parts
 
-        start_has_am = bool(re.search(r"a\s*\.?\s*m\.?", start_token))
-        start_has_pm = bool(re.search(r"p\s*\.?\s*m\.?", start_token))
-        end_has_am = bool(re.search(r"a\s*\.?\s*m\.?", end_token))
-        end_has_pm = bool(re.search(r"p\s*\.?\s*m\.?", end_token))
+        start_has_am = bool(AM_SUFFIX_RE.search(start_token))
+        start_has_pm = bool(PM_SUFFIX_RE.search(start_token))
+        end_has_am = bool(AM_SUFFIX_RE.search(end_token))
+        end_has_pm = bool(PM_SUFFIX_RE.search(end_token))
 
         start_suffix = "am" if start_has_am else "pm" if start_has_pm else None
         end_suffix = "am" if end_has_am else "pm" if end_has_pm else None
@@ -484,7 +520,10 @@ def normalise_numeric_card(value: Any) -> Optional[str]:
     return None
 
 
-def parse_workbook(input_file: Path) -> tuple[list[ParsedRow], dict[str, SheetStats]]:
+def parse_workbook(
+    input_file: Path,
+    import_state: Optional[ImportState] = None,
+) -> tuple[list[ParsedRow], dict[str, SheetStats]]:
     workbook = load_workbook(input_file, data_only=True, read_only=False)
 
     parsed_rows: list[ParsedRow] = []
@@ -500,6 +539,22 @@ def parse_workbook(input_file: Path) -> tuple[list[ParsedRow], dict[str, SheetSt
             print(f"Skipping worksheet without configuration: {sheet_name}")
             continue
 
+        # Rows up to this Excel row were imported by an earlier committed run.
+        imported_through_row = 0
+
+        if import_state is not None:
+            row_digests = fingerprint_rows(
+                worksheet.iter_rows(min_row=1, max_col=COL_RISK, values_only=True)
+            )
+            imported_through_row = import_state.plan_sheet(sheet_name, row_digests)
+
+            if imported_through_row is None:
+                print(f"Skipping unchanged worksheet: {sheet_name}")
+                continue
+
+            if imported_through_row:
+                print(f"Worksheet {sheet_name}: importing rows after row {imported_through_row}")
+
         config = SHEET_CONFIG[sheet_name]
         sheet_stats = SheetStats(
             worksheet=sheet_name,
@@ -550,6 +605,10 @@ def parse_workbook(input_file: Path) -> tuple[list[ParsedRow], dict[str, SheetSt
                 current_end_time = parsed_end
                 current_raw_time = raw_time_text
 
+            # Earlier rows are still read above so day/date/time carry forward into appended rows.
+            if source_row <= imported_through_row:
+                continue
+
             has_any_row_content = any(
                 value is not None
                 for value in (
@@ -688,21 +747,32 @@ def is_identity_column(cursor: pyodbc.Cursor, table_name: str, column_name: str)
     return bool(row.is_identity)
 
 
-def get_next_manual_id(cursor: pyodbc.Cursor, table_name: str, column_name: str) -> int:
-    sql = f"SELECT ISNULL(MAX([{column_name}]), 0) + 1 AS NextId FROM dbo.[{table_name}];"
-    row = cursor.execute(sql).fetchone()
-    return int(row.NextId)
-
+def acquire_import_lock(cursor: pyodbc.Cursor) -> None:
+    """Take IMPORT_LOCK_RESOURCE for the rest of the current transaction."""
+    if crm_db.CRM_BACKEND == "local":
+        # SQLite already allows one writer at a time.
+        return
 
-def get_next_lite_display_number(cursor: pyodbc.Cursor) -> int:
     sql = """
-    SELECT ISNULL(MAX(TRY_CONVERT(int, REPLACE(MemberDisplayId, 'LITE-', ''))), 0) + 1 AS NextLiteNumber
-    FROM dbo.SessionAttendance
-    WHERE AttendanceMemberKind = 'LITE'
-      AND MemberDisplayId LIKE 'LITE-%';
+    SET NOCOUNT ON;
+
+    DECLARE @result int;
+
+    EXEC @result = sp_getapplock
+        @Resource = ?,
+        @LockMode = 'Exclusive',
+        @LockOwner = 'Transaction',
+        @LockTimeout = ?;
+
+    SELECT @result AS LockResult;
     """
-    row = cursor.execute(sql).fetchone()
-    return int(row.NextLiteNumber)
+    row = cursor.execute(sql, IMPORT_LOCK_RESOURCE, IMPORT_LOCK_TIMEOUT_MS).fetchone()
+
+    if row is None or row.LockResult < 0:
+        raise RuntimeError(
+            f"Another {IMPORT_SOURCE_NAME} import is still running "
+            f"(sp_getapplock returned {None if row is None else row.LockResult})."
+        )
 
 
 def find_existing_session(cursor: pyodbc.Cursor, row: ParsedRow) -> Optional[int]:
@@ -728,13 +798,13 @@ def find_existing_session(cursor: pyodbc.Cursor, row: ParsedRow) -> Optional[int
     return int(found.SessionId) if found else None
 
 
-def create_session(
-    cursor: pyodbc.Cursor,
+def build_session_insert(
     row: ParsedRow,
     created_at: datetime,
     session_identity: bool,
     manual_session_id: Optional[int],
-) -> int:
+    is_cancelled: bool,
+) -> tuple[list[str], list[Any]]:
     columns = [
         "Frequency",
         "Category",
@@ -773,7 +843,7 @@ def create_session(
         row.end_time,
         None,
         0,
-        1 if row.status == "cancelled" else 0,
+        1 if is_cancelled else 0,
         created_at,
         None,
         None,
@@ -785,6 +855,24 @@ def create_session(
         columns.insert(0, "SessionId")
         values.insert(0, manual_session_id)
 
+    return columns, values
+
+
+def create_session(
+    cursor: pyodbc.Cursor,
+    row: ParsedRow,
+    created_at: datetime,
+    session_identity: bool,
+    manual_session_id: Optional[int],
+) -> int:
+    columns, values = build_session_insert(
+        row=row,
+        created_at=created_at,
+        session_identity=session_identity,
+        manual_session_id=manual_session_id,
+        is_cancelled=row.status == "cancelled",
+    )
+
     column_sql = ", ".join(f"[{column}]" for column in columns)
     placeholders = ", ".join("?" for _ in values)
 
@@ -802,7 +890,10 @@ def create_session(
 
 
 def update_session_cancelled(cursor: pyodbc.Cursor, session_id: int) -> None:
-    cursor.execute("UPDATE dbo.Sessions SET IsCancelled = 1 WHERE SessionId = ?;", session_id)
+    cursor.execute(
+        "UPDATE dbo.Sessions SET IsCancelled = 1, UpdatedAtUtc = SYSUTCDATETIME() WHERE SessionId = ?;",
+        session_id,
+    )
 
 
 def find_participant_by_card(cursor: pyodbc.Cursor, card_number: Optional[str]) -> Optional[dict[str, Any]]:
@@ -969,8 +1060,7 @@ def build_attendance_notes(row: ParsedRow, member_kind: str) -> str:
     return "; ".join(notes)
 
 
-def create_attendance(
-    cursor: pyodbc.Cursor,
+def build_attendance_insert(
     row: ParsedRow,
     session_id: int,
     participant_id: Optional[int],
@@ -985,7 +1075,7 @@ def create_attendance(
     created_at: datetime,
     attendance_identity: bool,
     manual_attendance_id: Optional[int],
-) -> int:
+) -> tuple[list[str], list[Any]]:
     columns = [
         "SessionId",
         "ParticipantId",
@@ -1052,6 +1142,43 @@ def create_attendance(
         columns.insert(0, "AttendanceId")
         values.insert(0, manual_attendance_id)
 
+    return columns, values
+
+
+def create_attendance(
+    cursor: pyodbc.Cursor,
+    row: ParsedRow,
+    session_id: int,
+    participant_id: Optional[int],
+    saheli_card_number: Optional[str],
+    attendance_member_kind: str,
+    lite_member_id: Optional[str],
+    member_display_id: str,
+    member_name: str,
+    phone: Optional[str],
+    emergency_name: Optional[str],
+    emergency_phone: Optional[str],
+    created_at: datetime,
+    attendance_identity: bool,
+    manual_attendance_id: Optional[int],
+) -> int:
+    columns, values = build_attendance_insert(
+        row=row,
+        session_id=session_id,
+        participant_id=participant_id,
+        saheli_card_number=saheli_card_number,
+        attendance_member_kind=attendance_member_kind,
+        lite_member_id=lite_member_id,
+        member_display_id=member_display_id,
+        member_name=member_name,
+        phone=phone,
+        emergency_name=emergency_name,
+        emergency_phone=emergency_phone,
+        created_at=created_at,
+        attendance_identity=attendance_identity,
+        manual_attendance_id=manual_attendance_id,
+    )
+
     column_sql = ", ".join(f"[{column}]" for column in columns)
     placeholders = ", ".join("?" for _ in values)
 
@@ -1072,7 +1199,7 @@ def create_attendance(
 # DATABASE IMPORT
 # ============================================================
 
-def import_into_database(parsed_rows: list[ParsedRow], *, apply_changes: bool) -> None:
+def import_into_database_row_by_row(parsed_rows: list[ParsedRow], *, apply_changes: bool) -> None:
     if pyodbc is None:
         raise RuntimeError("pyodbc is not installed. Run: pip install pyodbc")
 
@@ -1084,21 +1211,32 @@ def import_into_database(parsed_rows: list[ParsedRow], *, apply_changes: bool) -
     session_id_cache: dict[tuple[str, str, str, str, str], int] = {}
     lite_member_cache: dict[str, dict[str, Any]] = {}
 
-    with pyodbc.connect(connection_string) as conn:
+    with crm_db.connect(connection_string) as conn:
         conn.autocommit = False
         cursor = conn.cursor()
 
         try:
+            if apply_changes:
+                acquire_import_lock(cursor)
+
             session_identity = is_identity_column(cursor, "Sessions", "SessionId")
             attendance_identity = is_identity_column(cursor, "SessionAttendance", "AttendanceId")
 
-            next_manual_session_id = None if session_identity else get_next_manual_id(cursor, "Sessions", "SessionId")
-            next_manual_attendance_id = None if attendance_identity else get_next_manual_id(cursor, "SessionAttendance", "AttendanceId")
-            next_lite_display_number = get_next_lite_display_number(cursor)
+            session_ids = (
+                None
+                if session_identity
+                else id_allocator.session_id_allocator(cursor, connection_string=connection_string)
+            )
+            attendance_ids = (
+                None
+                if attendance_identity
+                else id_allocator.attendance_id_allocator(cursor, connection_string=connection_string)
+            )
+            lite_numbers = id_allocator.lite_number_allocator(cursor, connection_string=connection_string)
 
             print(f"SessionId IDENTITY: {session_identity}")
             print(f"AttendanceId IDENTITY: {attendance_identity}")
-            print(f"Next LITE MemberDisplayId: LITE-{next_lite_display_number}")
+            print(f"Next LITE MemberDisplayId: LITE-{lite_numbers.peek()}")
 
             for row in parsed_rows:
                 per_sheet = sheet_counters[row.source_sheet]
@@ -1118,9 +1256,8 @@ def import_into_database(parsed_rows: list[ParsedRow], *, apply_changes: bool) -
                     else:
                         manual_session_id = None
                         if not session_identity:
-                            manual_session_id = next_manual_session_id
-                            assert next_manual_session_id is not None
-                            next_manual_session_id += 1
+                            assert session_ids is not None
+                            manual_session_id = session_ids.next()
 
                         session_id = create_session(
                             cursor=cursor,
@@ -1192,13 +1329,12 @@ def import_into_database(parsed_rows: list[ParsedRow], *, apply_changes: bool) -
                     if lite_member is None:
                         lite_member = {
                             "LiteMemberId": str(uuid.uuid4()).upper(),
-                            "MemberDisplayId": f"LITE-{next_lite_display_number}",
+                            "MemberDisplayId": f"LITE-{lite_numbers.next()}",
                             "MemberName": member_name,
                             "Phone": None,
                             "EmergencyName": row.emergency_name,
                             "EmergencyPhone": row.emergency_phone,
                         }
-                        next_lite_display_number += 1
                         counters["lite_members_created"] += 1
                         per_sheet["lite_members_created"] += 1
                     else:
@@ -1232,9 +1368,8 @@ def import_into_database(parsed_rows: list[ParsedRow], *, apply_changes: bool) -
 
                 manual_attendance_id = None
                 if not attendance_identity:
-                    manual_attendance_id = next_manual_attendance_id
-                    assert next_manual_attendance_id is not None
-                    next_manual_attendance_id += 1
+                    assert attendance_ids is not None
+                    manual_attendance_id = attendance_ids.next()
 
                 create_attendance(
                     cursor=cursor,
@@ -1258,6 +1393,7 @@ def import_into_database(parsed_rows: list[ParsedRow], *, apply_changes: bool) -
                 per_sheet["attendance_created"] += 1
 
             if apply_changes:
+                id_allocator.release_all(session_ids, attendance_ids, lite_numbers)
                 conn.commit()
                 mode_message = "COMMITTED: database changes were saved."
             else:
@@ -1268,6 +1404,14 @@ def import_into_database(parsed_rows: list[ParsedRow], *, apply_changes: bool) -
             conn.rollback()
             raise
 
+    print_import_summary(mode_message, counters, sheet_counters)
+
+
+def print_import_summary(
+    mode_message: str,
+    counters: Counter[str],
+    sheet_counters: dict[str, Counter[str]],
+) -> None:
     print("\nDatabase import summary")
     print("=" * 100)
     print(mode_message)
@@ -1299,6 +1443,650 @@ def import_into_database(parsed_rows: list[ParsedRow], *, apply_changes: bool) -
                 print(f"  {key.replace('_', ' ').title():40}: {per_sheet[key]}")
 
 
+# ============================================================
+# PLAN-THEN-APPLY IMPORT
+# ============================================================
+
+ORIGINAL_CARD_PREFIX = "Original Excel card value: "
+
+
+def card_key(card_number: Optional[str]) -> str:
+    # Mirrors LTRIM(RTRIM(SaheliCardNumber)) = ? under the case-insensitive collation.
+    return (card_number or "").strip().casefold()
+
+
+def like_pattern_tokens(pattern: str) -> list[str]:
+    """SQL Server LIKE pattern (%, _, [set], [^set], [a-z]) as one regex per pattern element."""
+    tokens = []
+    position = 0
+
+    while position < len(pattern):
+        char = pattern[position]
+        close = pattern.find("]", position + 2) if char == "[" else -1
+
+        if char == "%":
+            tokens.append(".*")
+        elif char == "_":
+            tokens.append(".")
+        elif close != -1:
+            body = pattern[position + 1:close]
+            negate = body.startswith("^") and len(body) > 1
+            if negate:
+                body = body[1:]
+
+            members = []
+            index = 0
+            while index < len(body):
+                if index + 2 < len(body) and body[index + 1] == "-":
+                    members.append(f"{re.escape(body[index])}-{re.escape(body[index + 2])}")
+                    index += 3
+                else:
+                    members.append(re.escape(body[index]))
+                    index += 1
+
+            tokens.append(f"[{'^' if negate else ''}{''.join(members)}]")
+            position = close
+        else:
+            tokens.append(re.escape(char))
+
+        position += 1
+
+    return tokens
+
+
+def like_regex(tokens: list[str]) -> re.Pattern[str]:
+    # The CRM's collation is case-insensitive.
+    return re.compile("".join(tokens), re.IGNORECASE | re.DOTALL)
+
+
+class LiteCardMarkers:
+    """
+    LITE attendance rows that carry ORIGINAL_CARD_PREFIX in Notes, searched the way
+    find_existing_lite_member_by_original_card does: Notes LIKE '%' + marker + '%',
+    first match in ORDER BY UpdatedAtUtc DESC, CreatedAtUtc DESC, AttendanceId DESC.
+
+    The [card] in the marker is a LIKE character class, so a pattern only matches on
+    the single character after the prefix. Rows are indexed by that character, and
+    only rows whose character is in the class are tested against the full pattern.
+    """
+
+    def __init__(self) -> None:
+        self._rows_by_next_char: dict[str, list[tuple[int, str, dict[str, Any]]]] = defaultdict(list)
+        self._oldest = 0
+        self._newest = 0
+
+    def _add(self, order: int, notes: str, member: dict[str, Any]) -> None:
+        folded_notes = notes.casefold()
+        folded_prefix = ORIGINAL_CARD_PREFIX.casefold()
+        start = folded_notes.find(folded_prefix)
+        next_chars = set()
+
+        while start != -1:
+            end = start + len(folded_prefix)
+            if end < len(folded_notes):
+                next_chars.add(folded_notes[end])
+            start = folded_notes.find(folded_prefix, start + 1)
+
+        for next_char in next_chars:
+            self._rows_by_next_char[next_char].append((order, notes, member))
+
+    def add_oldest(self, notes: Optional[str], member: dict[str, Any]) -> None:
+        """Add a row from the snapshot query, which returns the most recent rows first."""
+        self._add(self._oldest, notes or "", member)
+        self._oldest += 1
+
+    def add_newest(self, notes: str, member: dict[str, Any]) -> None:
+        """Add a row planned in this run, newer than everything added before it."""
+        self._newest -= 1
+        self._add(self._newest, notes, member)
+
+    def find(self, original_card: Optional[str]) -> Optional[dict[str, Any]]:
+        if not original_card:
+            return None
+
+        tokens = like_pattern_tokens(f"%{ORIGINAL_CARD_PREFIX}[{original_card}]%")
+        regex = like_regex(tokens)
+        # The element straight after "%" and the prefix: what the next character must match.
+        next_char_regex = like_regex(tokens[1 + len(ORIGINAL_CARD_PREFIX):2 + len(ORIGINAL_CARD_PREFIX)])
+
+        best: Optional[tuple[int, dict[str, Any]]] = None
+        for next_char, rows in self._rows_by_next_char.items():
+            if not next_char_regex.fullmatch(next_char):
+                continue
+            for order, notes, member in rows:
+                if (best is None or order < best[0]) and regex.fullmatch(notes):
+                    best = (order, member)
+
+        return best[1] if best else None
+
+
+def lite_name_key(member_name: Optional[str]) -> str:
+    # Mirrors LOWER(LTRIM(RTRIM(ISNULL(MemberName, '')))) in find_existing_lite_member_by_name.
+    return (member_name or "").strip().lower()
+
+
+def lite_phone_key(emergency_phone: Optional[str]) -> str:
+    return (emergency_phone or "").strip()
+
+
+def attendance_key(session_id: int, participant_id: Optional[int], lite_member_id: Optional[str]) -> Optional[tuple[int, str, str]]:
+    # Same precedence as attendance_exists: ParticipantId first, then LiteMemberId.
+    if participant_id is not None:
+        return (session_id, "FULL", str(participant_id))
+
+    if lite_member_id:
+        return (session_id, "LITE", str(lite_member_id).upper())
+
+    return None
+
+
+def load_import_snapshot(cursor: pyodbc.Cursor, parsed_rows: list[ParsedRow]) -> ImportSnapshot:
+    session_identity = is_identity_column(cursor, "Sessions", "SessionId")
+    attendance_identity = is_identity_column(cursor, "SessionAttendance", "AttendanceId")
+
+    first_date = min((row.session_date for row in parsed_rows), default=date.today())
+    last_date = max((row.session_date for row in parsed_rows), default=date.today())
+
+    session_ids: dict[tuple[str, str, str, str, str], int] = {}
+    sessions_sql = """
+    SELECT
+        SessionId,
+        VenueName,
+        ActivityName,
+        CONVERT(varchar(10), CAST(SessionDate AS date), 23) AS SessionDateText,
+        CONVERT(varchar(8), StartTime, 108) AS StartTimeText,
+        CONVERT(varchar(8), EndTime, 108) AS EndTimeText
+    FROM dbo.Sessions
+    WHERE CAST(SessionDate AS date) BETWEEN CAST(? AS date) AND CAST(? AS date)
+    ORDER BY SessionId;
+    """
+    for found in cursor.execute(sessions_sql, first_date.isoformat(), last_date.isoformat()).fetchall():
+        key = (
+            (found.VenueName or "").strip().casefold(),
+            (found.ActivityName or "").strip().casefold(),
+            found.SessionDateText,
+            found.StartTimeText,
+            found.EndTimeText,
+        )
+        # Ordered by SessionId, so setdefault keeps the TOP 1 find_existing_session returns.
+        session_ids.setdefault(key, int(found.SessionId))
+
+    participants_by_card: dict[str, dict[str, Any]] = {}
+    participants_sql = """
+    SELECT
+        ParticipantId,
+        CONVERT(varchar(100), SaheliCardNumber) AS SaheliCardNumber,
+        FullName,
+        MobileNumber
+    FROM dbo.Participants
+    WHERE SaheliCardNumber IS NOT NULL
+    ORDER BY ParticipantId;
+    """
+    for found in cursor.execute(participants_sql).fetchall():
+        card = str(found.SaheliCardNumber).strip()
+        participants_by_card.setdefault(card_key(card), {
+            "ParticipantId": int(found.ParticipantId),
+            "SaheliCardNumber": card,
+            "FullName": clean_text(found.FullName),
+            "MobileNumber": normalise_phone(found.MobileNumber),
+        })
+
+    lite_by_original_card = LiteCardMarkers()
+    lite_by_name_phone: dict[tuple[str, str], dict[str, Any]] = {}
+    lite_by_name: dict[str, dict[str, Any]] = {}
+    lite_sql = """
+    SELECT
+        LiteMemberId,
+        MemberDisplayId,
+        MemberName,
+        Phone,
+        EmergencyName,
+        EmergencyPhone,
+        Notes
+    FROM dbo.SessionAttendance
+    WHERE AttendanceMemberKind = 'LITE'
+      AND LiteMemberId IS NOT NULL
+    ORDER BY UpdatedAtUtc DESC, CreatedAtUtc DESC, AttendanceId DESC;
+    """
+    # Most recent rows first, matching the ORDER BY of the per-row LITE lookups.
+    for found in cursor.execute(lite_sql).fetchall():
+        member = {
+            "LiteMemberId": str(found.LiteMemberId),
+            "MemberDisplayId": clean_text(found.MemberDisplayId),
+            "MemberName": clean_text(found.MemberName),
+            "Phone": normalise_phone(found.Phone),
+            "EmergencyName": clean_text(found.EmergencyName),
+            "EmergencyPhone": normalise_phone(found.EmergencyPhone),
+        }
+
+        lite_by_original_card.add_oldest(found.Notes, member)
+
+        name_key = lite_name_key(found.MemberName)
+        lite_by_name_phone.setdefault((name_key, lite_phone_key(found.EmergencyPhone)), member)
+        lite_by_name.setdefault(name_key, member)
+
+    attendance_keys: set[tuple[int, str, str]] = set()
+    attendance_sql = """
+    SELECT sa.SessionId, sa.ParticipantId, sa.LiteMemberId
+    FROM dbo.SessionAttendance sa
+    JOIN dbo.Sessions s
+      ON s.SessionId = sa.SessionId
+    WHERE CAST(s.SessionDate AS date) BETWEEN CAST(? AS date) AND CAST(? AS date);
+    """
+    for found in cursor.execute(attendance_sql, first_date.isoformat(), last_date.isoformat()).fetchall():
+        session_id = int(found.SessionId)
+        if found.ParticipantId is not None:
+            attendance_keys.add((session_id, "FULL", str(found.ParticipantId)))
+        if found.LiteMemberId:
+            attendance_keys.add((session_id, "LITE", str(found.LiteMemberId).upper()))
+
+    return ImportSnapshot(
+        session_identity=session_identity,
+        attendance_identity=attendance_identity,
+        next_manual_session_id=None if session_identity else id_allocator.floor_value(cursor, "Sessions.SessionId"),
+        next_manual_attendance_id=(
+            None if attendance_identity else id_allocator.floor_value(cursor, "SessionAttendance.AttendanceId")
+        ),
+        next_lite_display_number=id_allocator.floor_value(cursor, "LITE.MemberDisplayId"),
+        session_ids=session_ids,
+        participants_by_card=participants_by_card,
+        lite_by_original_card=lite_by_original_card,
+        lite_by_name_phone=lite_by_name_phone,
+        lite_by_name=lite_by_name,
+        attendance_keys=attendance_keys,
+    )
+
+
+def plan_import(
+    parsed_rows: list[ParsedRow],
+    snapshot: ImportSnapshot,
+    *,
+    session_ids: Any = None,
+    attendance_ids: Any = None,
+    lite_numbers: Any = None,
+) -> ImportPlan:
+    """
+    Decide every session, LITE member and attendance row without writing to SQL.
+
+    The decisions follow import_into_database_row_by_row; rows planned earlier in the
+    run are visible to later rows exactly as inserted rows were in the per-row path.
+
+    Manual ids and LITE numbers are filled in once the plan is complete, with one
+    take() per kind from the given id_allocator allocators, in the order the per-row
+    path would have handed them out. Without allocators the plan counts up from the
+    snapshot's MAX()+1 values, which is only safe for a dry run.
+    """
+    plan = ImportPlan()
+    counters = plan.counters
+    planned_sessions: dict[tuple[str, str, str, str, str], dict[str, Any]] = {}
+    cancelled_reused: set[int] = set()
+    lite_member_cache: dict[str, dict[str, Any]] = {}
+    attendance_keys = set(snapshot.attendance_keys)
+
+    if session_ids is None and snapshot.next_manual_session_id is not None:
+        session_ids = id_allocator.PreviewAllocator(snapshot.next_manual_session_id)
+    if attendance_ids is None and snapshot.next_manual_attendance_id is not None:
+        attendance_ids = id_allocator.PreviewAllocator(snapshot.next_manual_attendance_id)
+    if lite_numbers is None:
+        lite_numbers = id_allocator.PreviewAllocator(snapshot.next_lite_display_number)
+
+    for row in parsed_rows:
+        per_sheet = plan.sheet_counters[row.source_sheet]
+        key = row.session_key
+
+        # --------------------------------------------------------
+        # Create or reuse the session
+        # --------------------------------------------------------
+        if key not in plan.sessions_to_reuse and key not in planned_sessions:
+            existing_session_id = snapshot.session_ids.get(key) if REUSE_EXISTING_SESSIONS else None
+
+            if existing_session_id is not None:
+                plan.sessions_to_reuse[key] = existing_session_id
+                counters["sessions_reused"] += 1
+                per_sheet["sessions_reused"] += 1
+            else:
+                planned = {
+                    "plan_no": len(plan.sessions_to_create),
+                    "session_key": key,
+                    "row": row,
+                    "is_cancelled": False,
+                    "manual_session_id": None,
+                }
+                planned_sessions[key] = planned
+                plan.sessions_to_create.append(planned)
+                counters["sessions_created"] += 1
+                per_sheet["sessions_created"] += 1
+
+        if row.status == "cancelled":
+            if key in planned_sessions:
+                planned_sessions[key]["is_cancelled"] = True
+            elif plan.sessions_to_reuse[key] not in cancelled_reused:
+                cancelled_reused.add(plan.sessions_to_reuse[key])
+                plan.sessions_to_cancel.append(plan.sessions_to_reuse[key])
+            counters["sessions_marked_cancelled"] += 1
+            per_sheet["sessions_marked_cancelled"] += 1
+            continue
+
+        if row.status == "no_attendance" or not row.has_attendance_person:
+            counters["non_attendance_rows_skipped"] += 1
+            per_sheet["non_attendance_rows_skipped"] += 1
+            continue
+
+        # --------------------------------------------------------
+        # Resolve FULL or LITE member key
+        # --------------------------------------------------------
+        participant = snapshot.participants_by_card.get(card_key(row.card_number)) if row.card_number else None
+
+        if participant:
+            participant_id = participant["ParticipantId"]
+            saheli_card_number = participant["SaheliCardNumber"]
+            attendance_member_kind = "FULL"
+            lite_member_id = None
+            member_display_id = saheli_card_number
+            member_name = row.member_name or participant["FullName"] or f"Card {saheli_card_number}"
+            phone = participant["MobileNumber"]
+            emergency_name = row.emergency_name
+            emergency_phone = row.emergency_phone
+            counters["full_rows"] += 1
+            per_sheet["full_rows"] += 1
+        else:
+            participant_id = None
+            saheli_card_number = None
+            attendance_member_kind = "LITE"
+
+            member_name = row.member_name
+            if not member_name:
+                if row.original_card_value:
+                    member_name = f"Card {row.original_card_value}"
+                else:
+                    counters["attendance_rows_skipped_no_name"] += 1
+                    per_sheet["attendance_rows_skipped_no_name"] += 1
+                    continue
+
+            if row.original_card_value:
+                lite_cache_key = f"CARD|{row.original_card_value.casefold()}"
+            else:
+                lite_cache_key = f"NAME|{member_name.casefold()}|{row.emergency_phone or ''}"
+
+            lite_member = lite_member_cache.get(lite_cache_key)
+
+            if lite_member is None and row.original_card_value:
+                lite_member = snapshot.lite_by_original_card.find(row.original_card_value)
+
+            if lite_member is None:
+                name_key = lite_name_key(member_name)
+                if row.emergency_phone:
+                    lite_member = snapshot.lite_by_name_phone.get((name_key, lite_phone_key(row.emergency_phone)))
+                if lite_member is None:
+                    lite_member = snapshot.lite_by_name.get(name_key)
+
+            if lite_member is None:
+                lite_member = {
+                    "LiteMemberId": str(uuid.uuid4()).upper(),
+                    "MemberDisplayId": None,
+                    "MemberName": member_name,
+                    "Phone": None,
+                    "EmergencyName": row.emergency_name,
+                    "EmergencyPhone": row.emergency_phone,
+                }
+                plan.lite_members_to_create.append(lite_member)
+                counters["lite_members_created"] += 1
+                per_sheet["lite_members_created"] += 1
+            else:
+                counters["lite_members_reused"] += 1
+                per_sheet["lite_members_reused"] += 1
+
+            lite_member_cache[lite_cache_key] = lite_member
+
+            lite_member_id = lite_member["LiteMemberId"]
+            member_display_id = lite_member["MemberDisplayId"]
+            member_name = member_name or lite_member["MemberName"]
+            phone = lite_member.get("Phone")
+            emergency_name = row.emergency_name or lite_member.get("EmergencyName")
+            emergency_phone = row.emergency_phone or lite_member.get("EmergencyPhone")
+
+            counters["lite_rows"] += 1
+            per_sheet["lite_rows"] += 1
+
+        # --------------------------------------------------------
+        # Avoid duplicate attendance rows
+        # --------------------------------------------------------
+        # Planned sessions have no SessionId yet, so key them by their position in the plan.
+        session_ref = plan.sessions_to_reuse.get(key)
+        if session_ref is None:
+            session_ref = -1 - planned_sessions[key]["plan_no"]
+
+        duplicate_key = attendance_key(session_ref, participant_id, lite_member_id)
+
+        if SKIP_DUPLICATE_ATTENDANCE and duplicate_key in attendance_keys:
+            counters["duplicate_attendance_skipped"] += 1
+            per_sheet["duplicate_attendance_skipped"] += 1
+            continue
+
+        plan.attendance_to_insert.append({
+            "session_key": key,
+            "row": row,
+            "participant_id": participant_id,
+            "saheli_card_number": saheli_card_number,
+            "attendance_member_kind": attendance_member_kind,
+            "lite_member_id": lite_member_id,
+            "member_display_id": member_display_id,
+            "member_name": member_name,
+            "phone": phone,
+            "emergency_name": emergency_name,
+            "emergency_phone": emergency_phone,
+            "lite_member": lite_member if attendance_member_kind == "LITE" else None,
+            "manual_attendance_id": None,
+        })
+
+        if duplicate_key is not None:
+            attendance_keys.add(duplicate_key)
+
+        # Later rows can find this LITE member by name or by the card marker written to Notes.
+        if attendance_member_kind == "LITE":
+            snapshot.lite_by_name_phone[(lite_name_key(member_name), lite_phone_key(emergency_phone))] = lite_member
+            snapshot.lite_by_name[lite_name_key(member_name)] = lite_member
+            snapshot.lite_by_original_card.add_newest(build_attendance_notes(row, "LITE"), lite_member)
+
+        counters["attendance_created"] += 1
+        per_sheet["attendance_created"] += 1
+
+    # --------------------------------------------------------
+    # Assign manual ids and LITE numbers, one block per kind
+    # --------------------------------------------------------
+    if not snapshot.session_identity:
+        assert session_ids is not None
+        new_session_ids = session_ids.take(len(plan.sessions_to_create))
+        for planned, session_id in zip(plan.sessions_to_create, new_session_ids):
+            planned["manual_session_id"] = session_id
+
+    new_lite_numbers = lite_numbers.take(len(plan.lite_members_to_create))
+    for lite_member, number in zip(plan.lite_members_to_create, new_lite_numbers):
+        lite_member["MemberDisplayId"] = f"LITE-{number}"
+
+    new_attendance_ids = None
+    if not snapshot.attendance_identity:
+        assert attendance_ids is not None
+        new_attendance_ids = iter(attendance_ids.take(len(plan.attendance_to_insert)))
+
+    for item in plan.attendance_to_insert:
+        if item["lite_member"] is not None:
+            item["member_display_id"] = item["lite_member"]["MemberDisplayId"]
+        if new_attendance_ids is not None:
+            item["manual_attendance_id"] = next(new_attendance_ids)
+
+    return plan
+
+
+def apply_import_plan(cursor: pyodbc.Cursor, plan: ImportPlan, snapshot: ImportSnapshot, created_at: datetime) -> None:
+    """Write a computed plan with one batched statement per table."""
+    session_ids = dict(plan.sessions_to_reuse)
+
+    if plan.sessions_to_create:
+        session_rows = []
+        for planned in plan.sessions_to_create:
+            columns, values = build_session_insert(
+                row=planned["row"],
+                created_at=created_at,
+                session_identity=snapshot.session_identity,
+                manual_session_id=planned["manual_session_id"],
+                is_cancelled=planned["is_cancelled"],
+            )
+            session_rows.append(values)
+
+        column_sql = ", ".join(f"[{column}]" for column in columns)
+
+        # The staging table copies the dbo.Sessions column types. MERGE ... ON 1 = 0 is used
+        # because a plain INSERT ... OUTPUT cannot return the source PlanNo.
+        cursor.execute(
+            f"""
+            IF OBJECT_ID('tempdb..#PlannedSessions') IS NOT NULL
+                DROP TABLE #PlannedSessions;
+
+            SELECT TOP 0 {column_sql} INTO #PlannedSessions FROM dbo.Sessions;
+            ALTER TABLE #PlannedSessions ADD PlanNo int NULL;
+            """
+        )
+
+        placeholders = ", ".join("?" for _ in range(len(columns) + 1))
+
+        cursor.fast_executemany = True
+        cursor.executemany(
+            f"INSERT INTO #PlannedSessions ({column_sql}, [PlanNo]) VALUES ({placeholders});",
+            [values + [plan_no] for plan_no, values in enumerate(session_rows)],
+        )
+        cursor.fast_executemany = False
+
+        source_sql = ", ".join(f"s.[{column}]" for column in columns)
+        merge_sql = f"""
+        MERGE dbo.Sessions AS t
+        USING #PlannedSessions AS s
+        ON 1 = 0
+        WHEN NOT MATCHED BY TARGET THEN
+            INSERT ({column_sql})
+            VALUES ({source_sql})
+        OUTPUT s.PlanNo, INSERTED.SessionId;
+        """
+
+        for inserted in cursor.execute(merge_sql).fetchall():
+            planned = plan.sessions_to_create[int(inserted.PlanNo)]
+            session_ids[planned["session_key"]] = int(inserted.SessionId)
+
+        cursor.execute("DROP TABLE #PlannedSessions;")
+
+        if len(session_ids) != len(plan.sessions_to_reuse) + len(plan.sessions_to_create):
+            raise RuntimeError("Session MERGE did not return a SessionId for every planned session.")
+
+    if plan.sessions_to_cancel:
+        cursor.executemany(
+            "UPDATE dbo.Sessions SET IsCancelled = 1, UpdatedAtUtc = SYSUTCDATETIME() WHERE SessionId = ?;",
+            [(session_id,) for session_id in plan.sessions_to_cancel],
+        )
+
+    if plan.attendance_to_insert:
+        attendance_rows = []
+        for item in plan.attendance_to_insert:
+            columns, values = build_attendance_insert(
+                row=item["row"],
+                session_id=session_ids[item["session_key"]],
+                participant_id=item["participant_id"],
+                saheli_card_number=item["saheli_card_number"],
+                attendance_member_kind=item["attendance_member_kind"],
+                lite_member_id=item["lite_member_id"],
+                member_display_id=item["member_display_id"],
+                member_name=item["member_name"],
+                phone=item["phone"],
+                emergency_name=item["emergency_name"],
+                emergency_phone=item["emergency_phone"],
+                created_at=created_at,
+                attendance_identity=snapshot.attendance_identity,
+                manual_attendance_id=item["manual_attendance_id"],
+            )
+            attendance_rows.append(values)
+
+        bulk_load.bulk_insert(cursor, "dbo.SessionAttendance", columns, attendance_rows)
+
+
+def import_into_database(parsed_rows: list[ParsedRow], *, apply_changes: bool) -> None:
+    if pyodbc is None:
+        raise RuntimeError("pyodbc is not installed. Run: pip install pyodbc")
+
+    connection_string = build_connection_string()
+    created_at = datetime.now(timezone.utc).replace(microsecond=0, tzinfo=None)
+
+    with crm_db.connect(connection_string) as conn:
+        # A dry run only reads the snapshot, so it needs no transaction. An apply run
+        # reads and writes in one transaction under the import lock: the snapshot
+        # reads themselves take no lasting locks under READ COMMITTED, so the lock
+        # is what stops another run of this importer from inserting the same
+        # sessions between plan and apply. Other scripts are not held back by it.
+        conn.autocommit = not apply_changes
+        cursor = conn.cursor()
+
+        try:
+            if apply_changes:
+                acquire_import_lock(cursor)
+
+            snapshot = load_import_snapshot(cursor, parsed_rows)
+
+            print(f"SessionId IDENTITY: {snapshot.session_identity}")
+            print(f"AttendanceId IDENTITY: {snapshot.attendance_identity}")
+            print(f"Next LITE MemberDisplayId: LITE-{snapshot.next_lite_display_number}")
+            print(
+                f"Snapshot: {len(snapshot.session_ids)} sessions, "
+                f"{len(snapshot.participants_by_card)} participant cards, "
+                f"{len(snapshot.lite_by_name)} LITE names, "
+                f"{len(snapshot.attendance_keys)} attendance keys"
+            )
+
+            # An apply run reserves real ids; a dry run only previews them.
+            if apply_changes:
+                session_ids = (
+                    None
+                    if snapshot.session_identity
+                    else id_allocator.session_id_allocator(cursor, connection_string=connection_string)
+                )
+                attendance_ids = (
+                    None
+                    if snapshot.attendance_identity
+                    else id_allocator.attendance_id_allocator(cursor, connection_string=connection_string)
+                )
+                lite_numbers = id_allocator.lite_number_allocator(cursor, connection_string=connection_string)
+            else:
+                session_ids = attendance_ids = lite_numbers = None
+
+            plan = plan_import(
+                parsed_rows,
+                snapshot,
+                session_ids=session_ids,
+                attendance_ids=attendance_ids,
+                lite_numbers=lite_numbers,
+            )
+
+            print(
+                f"Plan: {len(plan.sessions_to_create)} sessions to create, "
+                f"{len(plan.sessions_to_reuse)} to reuse, "
+                f"{len(plan.sessions_to_cancel)} to mark cancelled, "
+                f"{len(plan.lite_members_to_create)} LITE members to create, "
+                f"{len(plan.attendance_to_insert)} attendance rows to insert"
+            )
+
+            if apply_changes:
+                apply_import_plan(cursor, plan, snapshot, created_at)
+                id_allocator.release_all(session_ids, attendance_ids, lite_numbers)
+                conn.commit()
+                mode_message = "COMMITTED: database changes were saved."
+            else:
+                mode_message = "DRY RUN: plan computed from a read-only snapshot. No database changes were made."
+
+        except Exception:
+            if apply_changes:
+                conn.rollback()
+            raise
+
+    print_import_summary(mode_message, plan.counters, plan.sheet_counters)
+
+
 # ============================================================
 # COMMAND-LINE ENTRY POINT
 # ============================================================
@@ -1319,7 +2107,20 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument(
         "--apply",
         action="store_true",
-        help="Commit inserts and updates. Without this option the SQL transaction is rolled back.",
+        help="Commit inserts and updates. Without this option no database changes are made.",
+    )
+    parser.add_argument(
+        "--row-by-row",
+        action="store_true",
+        help="Use the original per-row import inside a transaction instead of plan-then-apply.",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help=(
+            "Skip worksheets unchanged since the last --apply run and import only rows appended "
+            "since then. Watermarks are recorded after every --apply run."
+        ),
     )
     return parser.parse_args()
 
@@ -1331,8 +2132,10 @@ def main() -> None:
     if not input_file.exists():
         raise FileNotFoundError(f"Input workbook not found: {input_file}")
 
+    import_state = ImportState(IMPORT_SOURCE_NAME, incremental=args.incremental)
+
     print(f"Reading workbook: {input_file}")
-    parsed_rows, stats = parse_workbook(input_file)
+    parsed_rows, stats = parse_workbook(input_file, import_state)
     print_excel_inspection(stats)
 
     print("Venue mappings used")
@@ -1345,9 +2148,15 @@ def main() -> None:
         print("Inspection complete. No SQL connection was made.")
         return
 
-    import_into_database(parsed_rows, apply_changes=args.apply)
+    if args.row_by_row:
+        import_into_database_row_by_row(parsed_rows, apply_changes=args.apply)
+    else:
+        import_into_database(parsed_rows, apply_changes=args.apply)
 
-    if not args.apply:
+    if args.apply:
+        # Both import paths raise before this point unless the transaction committed.
+        import_state.save()
+    else:
         print("\nReview the summary. To save the records, run the same command with --apply.")
 
 
@@ -1,16 +1,21 @@
 import pandas as pd
 from collections import defaultdict
 
+from register_cache import RegisterReader
+
 excel_file = r'C:\Users\shonk\Downloads\Tennis Register 2025.xlsx'
 
 # Find all valid rows and group by name
 name_counts = defaultdict(list)
 
-for sheet_name in pd.ExcelFile(excel_file).sheet_names:
+# Parsed sheets are shared with tennis.py through the Parquet cache
+reader = RegisterReader(excel_file)
+
+for sheet_name in reader.sheet_names:
     if sheet_name.strip() in ['Sheet1', 'Template', 'Full Register', '[1]Full Register']:
         continue
         
-    df = pd.read_excel(excel_file, sheet_name=sheet_name, header=0, dtype=object)
+    df = reader.read_sheet(sheet_name)
     
     for idx, row in df.iterrows():
         activity = row.iloc[0] if len(row) > 0 else None
@@ -2,9 +2,17 @@ import pandas as pd
 import pyodbc
 import os
 import re
-from datetime import datetime, date
+import sys
+from datetime import date
+from pathlib import Path
 from typing import Optional, Tuple
 
+from register_cache import RegisterReader
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from register_parsing import describe_unparsed_dates, normalise_date_column  # noqa: E402
+
 # Excel data extraction
 excel_file = r'C:\Users\shonk\Downloads\Tennis Register 2025.xlsx'
 
@@ -16,46 +24,34 @@ def clean_text(value):
         return None
     return text
 
-def excel_date_to_date(value):
-    value = clean_text(value) if isinstance(value, str) else value
-    if value is None:
-        return None
-    if isinstance(value, datetime):
-        return value.date()
-    if isinstance(value, date):
-        return value
-    if isinstance(value, (int, float)):
-        try:
-            return pd.Timestamp(value, unit='D', origin='1899-12-30').date()
-        except:
-            return None
-    try:
-        parsed = pd.to_datetime(value, dayfirst=True, errors='coerce')
-        if pd.isna(parsed):
-            return None
-        return parsed.date()
-    except:
-        return None
-
 # Collect all valid Excel rows
 excel_rows = []
 
-for sheet_name in pd.ExcelFile(excel_file).sheet_names:
+# Parsed sheets are shared with tennis.py through the Parquet cache
+reader = RegisterReader(excel_file)
+
+for sheet_name in reader.sheet_names:
     if sheet_name.strip() in ['Sheet1', 'Template', 'Full Register', '[1]Full Register']:
         continue
         
-    df = pd.read_excel(excel_file, sheet_name=sheet_name, header=0, dtype=object)
+    df = reader.read_sheet(sheet_name)
+
+    # Whole Date column in one pass instead of one pd.to_datetime call per cell
+    date_column = df.iloc[:, 2] if df.shape[1] > 2 else pd.Series(None, index=df.index, dtype=object)
+    session_dates, unparsed_dates = normalise_date_column(date_column, prepare_text=clean_text)
+
+    if unparsed_dates:
+        print(f'Unrecognised dates on sheet {sheet_name}: {describe_unparsed_dates(unparsed_dates)}')
     
     for idx, row in df.iterrows():
         activity = row.iloc[0] if len(row) > 0 else None
-        date_val = row.iloc[2] if len(row) > 2 else None
         time = row.iloc[4] if len(row) > 4 else None
         card = row.iloc[5] if len(row) > 5 else None
         name = row.iloc[6] if len(row) > 6 else None
         
         # Is this a valid row?
         if (clean_text(activity) and clean_text(activity).lower() == 'tennis' and
-            excel_date_to_date(date_val) and clean_text(time)):
+            session_dates[idx] and clean_text(time)):
             
             card_clean = clean_text(card)
             name_clean = clean_text(name)
@@ -64,7 +60,7 @@ for sheet_name in pd.ExcelFile(excel_file).sheet_names:
                 excel_rows.append({
                     'sheet': sheet_name,
                     'row': idx + 2,
-                    'date': excel_date_to_date(date_val),
+                    'date': session_dates[idx],
                     'time': clean_text(time),
                     'card': card_clean,
                     'name': name_clean
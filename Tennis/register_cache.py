@@ -0,0 +1,306 @@
+"""
+Shared reader for the Tennis register workbook.
+
+tennis.py and the diagnostic scripts in this folder all read the same
+"Tennis Register 2025.xlsx". RegisterReader parses each sheet once with
+pd.read_excel(header=0, dtype=object) and caches the result as Parquet,
+keyed by the workbook's SHA-256 and the sheet name. A re-run on an
+unchanged workbook does not open the Excel file at all; editing the
+workbook changes the hash, so stale sheets are never reused.
+
+Cache layout:
+
+    <cache dir>/<workbook sha256>/manifest.json   sheet names in workbook order
+    <cache dir>/<workbook sha256>/<sheet key>.parquet
+
+Excel columns mix strings, numbers, dates and times, which Parquet cannot
+store in one column. Each sheet is therefore stored as one row per non-empty
+cell (row, col, kind, typed value) and rebuilt into the same object-dtype
+DataFrame that pandas would have returned.
+
+The cache needs pyarrow. Without it, RegisterReader just reads Excel.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ModuleNotFoundError:
+    pa = None  # type: ignore[assignment]
+    pq = None  # type: ignore[assignment]
+
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+DEFAULT_CACHE_DIR = Path(
+    os.getenv("TENNIS_REGISTER_CACHE_DIR", Path(__file__).resolve().parent / ".register_cache")
+)
+
+# Bump when the cell encoding changes so old cache files are ignored.
+CACHE_FORMAT_VERSION = 1
+
+HEADER_ROW = -1
+
+KIND_TEXT = 0
+KIND_BOOL = 1
+KIND_INT = 2
+KIND_FLOAT = 3
+KIND_DATETIME = 4
+KIND_TIMESTAMP = 5
+KIND_DATE = 6
+KIND_TIME = 7
+KIND_TIMEDELTA = 8
+
+CELL_SCHEMA = (
+    pa.schema(
+        [
+            ("row", pa.int32()),
+            ("col", pa.int32()),
+            ("kind", pa.int8()),
+            ("text", pa.string()),
+            ("integer", pa.int64()),
+            ("number", pa.float64()),
+        ]
+    )
+    if pa is not None
+    else None
+)
+
+
+# ============================================================
+# CELL ENCODING
+# ============================================================
+
+def is_empty_cell(value: Any) -> bool:
+    if value is None or value is pd.NaT:
+        return True
+    return isinstance(value, float) and value != value
+
+
+def encode_cell(value: Any) -> Optional[tuple[int, Optional[str], Optional[int], Optional[float]]]:
+    """Return (kind, text, integer, number), or None for a type the cache cannot store."""
+    # Order matters: bool is an int, Timestamp and datetime are dates.
+    if isinstance(value, str):
+        return KIND_TEXT, value, None, None
+    if isinstance(value, bool):
+        return KIND_BOOL, None, int(value), None
+    if isinstance(value, int):
+        return KIND_INT, None, value, None
+    if isinstance(value, float):
+        return KIND_FLOAT, None, None, value
+    if isinstance(value, pd.Timestamp):
+        return KIND_TIMESTAMP, value.isoformat(), None, None
+    if isinstance(value, datetime):
+        return KIND_DATETIME, value.isoformat(), None, None
+    if isinstance(value, date):
+        return KIND_DATE, value.isoformat(), None, None
+    if isinstance(value, time):
+        return KIND_TIME, value.isoformat(), None, None
+    if isinstance(value, timedelta):
+        return KIND_TIMEDELTA, None, value // timedelta(microseconds=1), None
+    return None
+
+
+def decode_cell(kind: int, text: Optional[str], integer: Optional[int], number: Optional[float]) -> Any:
+    if kind == KIND_TEXT:
+        return text
+    if kind == KIND_BOOL:
+        return bool(integer)
+    if kind == KIND_INT:
+        return int(integer)
+    if kind == KIND_FLOAT:
+        return float(number)
+    if kind == KIND_TIMESTAMP:
+        return pd.Timestamp(text)
+    if kind == KIND_DATETIME:
+        return datetime.fromisoformat(text)
+    if kind == KIND_DATE:
+        return date.fromisoformat(text)
+    if kind == KIND_TIME:
+        return time.fromisoformat(text)
+    if kind == KIND_TIMEDELTA:
+        return timedelta(microseconds=integer)
+    raise ValueError(f"Unknown cached cell kind: {kind}")
+
+
+def frame_to_table(df: pd.DataFrame) -> Optional["pa.Table"]:
+    """Encode a sheet as one Parquet row per non-empty cell (headers use row -1)."""
+    columns: dict[str, list] = {name: [] for name in CELL_SCHEMA.names}
+
+    def add(row: int, col: int, value: Any) -> bool:
+        encoded = encode_cell(value)
+        if encoded is None:
+            return False
+        kind, text, integer, number = encoded
+        columns["row"].append(row)
+        columns["col"].append(col)
+        columns["kind"].append(kind)
+        columns["text"].append(text)
+        columns["integer"].append(integer)
+        columns["number"].append(number)
+        return True
+
+    for col_idx, header in enumerate(df.columns):
+        if not add(HEADER_ROW, col_idx, header):
+            return None
+
+        for row_idx, value in enumerate(df.iloc[:, col_idx].tolist()):
+            if is_empty_cell(value):
+                continue
+            if not add(row_idx, col_idx, value):
+                return None
+
+    table = pa.Table.from_pydict(columns, schema=CELL_SCHEMA)
+    return table.replace_schema_metadata(
+        {"rows": str(len(df)), "cols": str(len(df.columns))}
+    )
+
+
+def table_to_frame(table: "pa.Table") -> pd.DataFrame:
+    metadata = table.schema.metadata or {}
+    n_rows = int(metadata[b"rows"])
+    n_cols = int(metadata[b"cols"])
+
+    headers: list[Any] = [None] * n_cols
+    data = [[float("nan")] * n_rows for _ in range(n_cols)]
+
+    cells = table.to_pydict()
+    for row, col, kind, text, integer, number in zip(
+        cells["row"], cells["col"], cells["kind"], cells["text"], cells["integer"], cells["number"]
+    ):
+        value = decode_cell(kind, text, integer, number)
+        if row == HEADER_ROW:
+            headers[col] = value
+        else:
+            data[col][row] = value
+
+    df = pd.DataFrame({col_idx: values for col_idx, values in enumerate(data)}, dtype=object)
+    df.columns = headers
+    return df
+
+
+# ============================================================
+# READER
+# ============================================================
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def sheet_cache_key(sheet_name: str) -> str:
+    # Sheet names can contain characters that are not valid in file names.
+    return hashlib.sha1(sheet_name.encode("utf-8")).hexdigest()[:16]
+
+
+def write_atomically(path: Path, write) -> None:
+    temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        write(temp_path)
+        os.replace(temp_path, path)
+    finally:
+        if temp_path.exists():
+            temp_path.unlink()
+
+
+class RegisterReader:
+    """
+    Read register sheets through the Parquet cache.
+
+    The workbook is only opened (once) when a sheet or the sheet list is
+    missing from the cache. Safe to use from several processes at once:
+    every cache file is written to a temp name and renamed into place.
+    """
+
+    def __init__(self, excel_file: Path | str, use_cache: bool = True, cache_dir: Path | str | None = None):
+        self.excel_file = Path(excel_file)
+        self.use_cache = use_cache and pa is not None
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else DEFAULT_CACHE_DIR
+        self._excel: Optional[pd.ExcelFile] = None
+        self._workbook_dir: Optional[Path] = None
+        self._sheet_names: Optional[list[str]] = None
+
+    @property
+    def excel(self) -> pd.ExcelFile:
+        if self._excel is None:
+            self._excel = pd.ExcelFile(self.excel_file)
+        return self._excel
+
+    @property
+    def workbook_dir(self) -> Path:
+        if self._workbook_dir is None:
+            self._workbook_dir = self.cache_dir / f"v{CACHE_FORMAT_VERSION}" / file_sha256(self.excel_file)
+        return self._workbook_dir
+
+    @property
+    def sheet_names(self) -> list[str]:
+        if self._sheet_names is not None:
+            return self._sheet_names
+
+        if not self.use_cache:
+            self._sheet_names = list(self.excel.sheet_names)
+            return self._sheet_names
+
+        manifest_path = self.workbook_dir / "manifest.json"
+
+        if manifest_path.exists():
+            with open(manifest_path, encoding="utf-8") as handle:
+                self._sheet_names = json.load(handle)["sheet_names"]
+            return self._sheet_names
+
+        self._sheet_names = list(self.excel.sheet_names)
+        self.workbook_dir.mkdir(parents=True, exist_ok=True)
+
+        def write_manifest(path: Path) -> None:
+            with open(path, "w", encoding="utf-8") as handle:
+                json.dump(
+                    {"workbook": self.excel_file.name, "sheet_names": self._sheet_names},
+                    handle,
+                    indent=2,
+                )
+
+        write_atomically(manifest_path, write_manifest)
+        return self._sheet_names
+
+    def read_sheet(self, sheet_name: str) -> pd.DataFrame:
+        """Same result as pd.read_excel(excel_file, sheet_name=..., header=0, dtype=object)."""
+        if not self.use_cache:
+            return self.excel.parse(sheet_name, header=0, dtype=object)
+
+        sheet_path = self.workbook_dir / f"{sheet_cache_key(sheet_name)}.parquet"
+
+        if sheet_path.exists():
+            return table_to_frame(pq.read_table(sheet_path))
+
+        df = self.excel.parse(sheet_name, header=0, dtype=object)
+        table = frame_to_table(df)
+
+        if table is not None:
+            self.workbook_dir.mkdir(parents=True, exist_ok=True)
+            write_atomically(sheet_path, lambda path: pq.write_table(table, path))
+
+        return df
+
+    def iter_sheets(self, skip_sheets: Iterable[str] = ()) -> Iterator[tuple[str, pd.DataFrame]]:
+        """Yield (sheet name, DataFrame) in workbook order, skipping names in skip_sheets (stripped)."""
+        skip = set(skip_sheets)
+
+        for sheet_name in self.sheet_names:
+            if sheet_name.strip() in skip:
+                continue
+            yield sheet_name, self.read_sheet(sheet_name)
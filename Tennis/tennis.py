@@ -1,15 +1,38 @@
 from __future__ import annotations
 
+import argparse
 import os
+import queue
 import re
+import sys
+import threading
 import uuid
-from datetime import datetime, date, timedelta, timezone
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, date, timezone
 from pathlib import Path
-from typing import Any, Optional, Tuple
+from typing import Any, Iterator, Optional, Tuple
 
 import pandas as pd
 import pyodbc
 
+from register_cache import RegisterReader
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from register_parsing import (  # noqa: E402
+    DASH_TRANSLATION,
+    describe_unparsed_dates,
+    expand_compact_clock,
+    memoised,
+    normalise_date_column,
+    parse_clock,
+    parse_column,
+)
+from import_state import ImportState, fingerprint_rows  # noqa: E402
+import crm_db  # noqa: E402
+import id_allocator  # noqa: E402
+from person_matching import PersonIndex  # noqa: E402
+
 
 # ============================================================
 # CONFIG
@@ -40,6 +63,35 @@ IMPORT_SOURCE_NAME = "Tennis Register 2025"
 REUSE_EXISTING_SESSIONS = True
 SKIP_DUPLICATE_ATTENDANCE = True  # RE-ENABLED
 
+# Load the FULL / LITE member directory once per run and resolve members in memory,
+# instead of running SELECT TOP 1 lookups against SessionAttendance for every row.
+USE_MEMBER_SNAPSHOT = True
+
+# When a LITE name has no exact match in the member directory, look for a close
+# spelling ("Fatima Begam" for "Fatima Begum") with person_matching. A clear match
+# is reused only when the emergency phone also agrees; other near misses are
+# written to tennis_lite_match_review_<timestamp>.csv
+# and a new LITE member is created as before. Needs USE_MEMBER_SNAPSHOT.
+FUZZY_LITE_MATCHING = True
+
+# Parse sheets on a background thread while the main thread does the SQL work.
+# The bounded queue keeps at most PIPELINE_QUEUE_BATCHES parsed batches in memory.
+PIPELINE_PARSE = True
+PIPELINE_BATCH_ROWS = 500
+PIPELINE_QUEUE_BATCHES = 4
+
+# Reuse parsed sheets from the Parquet cache shared with the diagnostic scripts
+# (see register_cache.py). Keyed by workbook content, so edits are picked up.
+USE_REGISTER_CACHE = True
+
+# Sheets parsed in parallel worker processes (1 = no pool). Override with --workers.
+SHEET_WORKERS = 1
+
+# Skip sheets unchanged since the last committed run and import only rows appended
+# after each sheet's watermark. Override with --incremental. Watermarks are recorded
+# after every successful run either way.
+INCREMENTAL_IMPORT = False
+
 DEFAULT_FREQUENCY = "WEEKLY"
 DEFAULT_CATEGORY = "Fitness"
 DEFAULT_SUBCATEGORY = None
@@ -122,28 +174,14 @@ def normalise_venue(sheet_name: str) -> str:
     return VENUE_NAME_MAP.get(cleaned, cleaned)
 
 
-def excel_date_to_date(value: Any) -> Optional[date]:
-    value = clean_value(value)
+def date_cell_text(text: str) -> Optional[str]:
+    """Clean a text Date cell before the dayfirst parse (typed dates and Excel serials never get here)."""
+    cleaned = clean_value(text)
 
-    if value is None:
+    if cleaned is None:
         return None
 
-    if isinstance(value, datetime):
-        return value.date()
-
-    if isinstance(value, date):
-        return value
-
-    if isinstance(value, (int, float)) and not isinstance(value, bool):
-        return (datetime(1899, 12, 30) + timedelta(days=int(value))).date()
-
-    text = str(value).strip().replace("//", "/")
-    parsed = pd.to_datetime(text, dayfirst=True, errors="coerce")
-
-    if pd.isna(parsed):
-        return None
-
-    return parsed.date()
+    return cleaned.strip().replace("//", "/")
 
 
 def month_name(value: Any, fallback_date: Optional[date]) -> Optional[str]:
@@ -219,30 +257,10 @@ def parse_time_token(token: str, fallback_suffix: Optional[str] = None) -> Optio
     token = token.replace("-", ":")
 
     # Handles 1230 as 12:30 and 930 as 9:30.
-    if ":" not in token and len(token) == 4 and token.isdigit():
-        token = f"{token[:2]}:{token[2:]}"
-    elif ":" not in token and len(token) == 3 and token.isdigit():
-        token = f"{token[0]}:{token[1:]}"
-
-    match = re.match(r"^(\d{1,2})(?::(\d{1,2}))?$", token)
-
-    if not match:
-        return None
-
-    hour = int(match.group(1))
-    minute = int(match.group(2) or 0)
-
-    if suffix == "pm" and hour != 12:
-        hour += 12
-    elif suffix == "am" and hour == 12:
-        hour = 0
-
-    if not (0 <= hour <= 23 and 0 <= minute <= 59):
-        return None
-
-    return f"{hour:02d}:{minute:02d}:00"
+    return parse_clock(expand_compact_clock(token), suffix)
 
 
+@memoised()
 def split_time_range(raw_time: Any) -> Tuple[Optional[str], Optional[str], Optional[str]]:
     raw = clean_text(raw_time)
 
@@ -251,13 +269,12 @@ def split_time_range(raw_time: Any) -> Tuple[Optional[str], Optional[str], Optio
 
     text = (
         raw.lower()
-        .replace("–", "-")
-        .replace("—", "-")
+        .translate(DASH_TRANSLATION)
         .replace("to", "-")
         .replace(" ", "")
     )
 
-    parts = re.split(r"-", text, maxsplit=1)
+    parts = text.split("-", 1)
 
     if len(parts) != 2:
         return None, None, raw
@@ -400,6 +417,211 @@ def get_first_16_columns_as_standard(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+# ============================================================
+# SHEET READING / PARSE PIPELINE
+# ============================================================
+
+def parse_time_cell(value: Any) -> tuple[Optional[str], Optional[str], Optional[str], Optional[str]]:
+    """Return (raw time text, start time, end time, raw time for notes) for one Time cell."""
+    raw_time = clean_text(value)
+    return (raw_time, *split_time_range(raw_time))
+
+
+def normalise_register_row(
+    source_row: int,
+    row: dict,
+    session_date: Optional[date],
+    time_parts: tuple,
+) -> dict:
+    """Do the per-row parsing that needs no database access."""
+    raw_time, start_time, end_time, raw_time_for_notes = time_parts
+
+    return {
+        "source_row": source_row,
+        "row": row,
+        "activity_name": normalise_activity(row.get("Session")) or DEFAULT_ACTIVITY_NAME,
+        "session_date": session_date,
+        "raw_time": raw_time,
+        "start_time": start_time,
+        "end_time": end_time,
+        "raw_time_for_notes": raw_time_for_notes,
+        "day_of_week": normalise_day(row.get("Day"), session_date),
+        "session_month": month_name(row.get("Month"), session_date),
+    }
+
+
+def parse_register_sheet(reader: RegisterReader, sheet_name: str) -> tuple[str, list[dict], list[str]]:
+    """Return (source sheet name, normalised rows in row order, row digests from Excel row 1)."""
+    source_sheet_name = sheet_name.strip()
+    raw_df = reader.read_sheet(sheet_name)
+    row_digests = fingerprint_rows([list(raw_df.columns), *raw_df.itertuples(index=False, name=None)])
+
+    if raw_df.empty:
+        return source_sheet_name, [], row_digests
+
+    df = get_first_16_columns_as_standard(raw_df)
+
+    # Dates and times are parsed per column, each distinct string once.
+    session_dates, unparsed_dates = normalise_date_column(df["Date"], prepare_text=date_cell_text)
+    time_parts = parse_column(df["Time"], parse_time_cell)
+
+    if unparsed_dates:
+        print(
+            f"Warning: Date not recognised on sheet {source_sheet_name}: "
+            f"{describe_unparsed_dates(unparsed_dates)}"
+        )
+
+    return source_sheet_name, [
+        normalise_register_row(int(idx) + 2, row_series.to_dict(), session_dates[idx], time_parts[idx])
+        for idx, row_series in df.iterrows()
+    ], row_digests
+
+
+def select_rows_to_import(
+    import_state: Optional[ImportState],
+    source_sheet_name: str,
+    rows: list[dict],
+    row_digests: list[str],
+) -> list[dict]:
+    """Drop the rows already covered by the sheet's watermark (all of them if the sheet is unchanged)."""
+    if import_state is None:
+        return rows
+
+    imported_through_row = import_state.plan_sheet(source_sheet_name, row_digests)
+
+    if imported_through_row is None:
+        print(f"Skipping unchanged sheet: {source_sheet_name}")
+        return []
+
+    if imported_through_row:
+        print(f"Sheet {source_sheet_name}: importing rows after row {imported_through_row}")
+
+    return [parsed for parsed in rows if parsed["source_row"] > imported_through_row]
+
+
+def split_into_batches(
+    source_sheet_name: str,
+    rows: list[dict],
+) -> Iterator[tuple[str, list[dict]]]:
+    for start in range(0, len(rows), PIPELINE_BATCH_ROWS):
+        yield source_sheet_name, rows[start:start + PIPELINE_BATCH_ROWS]
+
+
+def iter_register_batches(
+    input_file: Path,
+    import_state: Optional[ImportState] = None,
+) -> Iterator[tuple[str, list[dict]]]:
+    """Yield (source sheet name, batch of normalised rows) in workbook order."""
+    reader = RegisterReader(input_file, use_cache=USE_REGISTER_CACHE)
+
+    for sheet_name in reader.sheet_names:
+        if sheet_name.strip() in SKIP_SHEETS:
+            continue
+
+        source_sheet_name, rows, row_digests = parse_register_sheet(reader, sheet_name)
+        rows = select_rows_to_import(import_state, source_sheet_name, rows, row_digests)
+        yield from split_into_batches(source_sheet_name, rows)
+
+
+# Each pool worker keeps one reader (and so at most one open workbook) for every sheet it is given.
+_worker_reader: Optional[RegisterReader] = None
+
+
+def _init_sheet_worker(input_file: str) -> None:
+    global _worker_reader
+    _worker_reader = RegisterReader(input_file, use_cache=USE_REGISTER_CACHE)
+
+
+def _parse_sheet_in_worker(sheet_name: str) -> tuple[str, list[dict], list[str]]:
+    return parse_register_sheet(_worker_reader, sheet_name)
+
+
+def iter_register_batches_parallel(
+    input_file: Path,
+    workers: int,
+    import_state: Optional[ImportState] = None,
+) -> Iterator[tuple[str, list[dict]]]:
+    """
+    Same batches as iter_register_batches, with sheets parsed in a process pool.
+
+    Results come back in workbook order and each sheet's rows stay in row
+    order, so the database stage sees the same (sheet, row) sequence as a
+    single-process run.
+    """
+    sheet_names = [
+        sheet_name
+        for sheet_name in RegisterReader(input_file, use_cache=USE_REGISTER_CACHE).sheet_names
+        if sheet_name.strip() not in SKIP_SHEETS
+    ]
+
+    if not sheet_names:
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(sheet_names)),
+        initializer=_init_sheet_worker,
+        initargs=(str(input_file),),
+    ) as executor:
+        # map() returns results in submission order, whichever worker finishes first.
+        for source_sheet_name, rows, row_digests in executor.map(_parse_sheet_in_worker, sheet_names):
+            rows = select_rows_to_import(import_state, source_sheet_name, rows, row_digests)
+            yield from split_into_batches(source_sheet_name, rows)
+
+
+_PIPELINE_DONE = object()
+
+
+def iter_register_batches_pipelined(
+    input_file: Path,
+    import_state: Optional[ImportState] = None,
+) -> Iterator[tuple[str, list[dict]]]:
+    """
+    Same batches as iter_register_batches, parsed on a producer thread.
+
+    The bounded queue gives backpressure: the parser blocks once
+    PIPELINE_QUEUE_BATCHES batches are waiting for the database writer.
+    """
+    batches: queue.Queue = queue.Queue(maxsize=PIPELINE_QUEUE_BATCHES)
+    stop = threading.Event()
+
+    def put(item: Any) -> bool:
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            for item in iter_register_batches(input_file, import_state):
+                if not put(item):
+                    return
+            put(_PIPELINE_DONE)
+        except BaseException as exc:
+            put(exc)
+
+    producer = threading.Thread(target=produce, name="register-parser", daemon=True)
+    producer.start()
+
+    try:
+        while True:
+            item = batches.get()
+
+            if item is _PIPELINE_DONE:
+                break
+
+            if isinstance(item, BaseException):
+                raise item
+
+            yield item
+    finally:
+        # Unblocks the producer if the writer stopped early (error or rollback).
+        stop.set()
+        producer.join(timeout=5)
+
+
 # ============================================================
 # SQL HELPERS
 # ============================================================
@@ -420,24 +642,6 @@ def is_identity_column(cursor: pyodbc.Cursor, table_name: str, column_name: str)
     return bool(row.is_identity)
 
 
-def get_next_manual_id(cursor: pyodbc.Cursor, table_name: str, column_name: str) -> int:
-    sql = f"SELECT ISNULL(MAX({column_name}), 0) + 1 AS NextId FROM dbo.{table_name};"
-    row = cursor.execute(sql).fetchone()
-    return int(row.NextId)
-
-
-def get_next_lite_display_number(cursor: pyodbc.Cursor) -> int:
-    sql = """
-    SELECT ISNULL(MAX(TRY_CONVERT(int, REPLACE(MemberDisplayId, 'LITE-', ''))), 0) + 1 AS NextLiteNumber
-    FROM dbo.SessionAttendance
-    WHERE AttendanceMemberKind = 'LITE'
-      AND MemberDisplayId LIKE 'LITE-%';
-    """
-
-    row = cursor.execute(sql).fetchone()
-    return int(row.NextLiteNumber)
-
-
 def find_existing_session(
     cursor: pyodbc.Cursor,
     venue_name: str,
@@ -574,7 +778,8 @@ def create_session(
 def update_session_cancelled(cursor: pyodbc.Cursor, session_id: int) -> None:
     sql = """
     UPDATE dbo.Sessions
-    SET IsCancelled = 1
+    SET IsCancelled = 1,
+        UpdatedAtUtc = SYSUTCDATETIME()
     WHERE SessionId = ?;
     """
 
@@ -692,6 +897,211 @@ def find_existing_lite_member(
     }
 
 
+# ============================================================
+# MEMBER DIRECTORY SNAPSHOT
+# ============================================================
+
+def lite_name_key(member_name: Optional[str]) -> str:
+    # Mirrors LOWER(LTRIM(RTRIM(ISNULL(MemberName, '')))) used by find_existing_lite_member.
+    return (member_name or "").strip().lower()
+
+
+def lite_phone_key(emergency_phone: Optional[str]) -> str:
+    return (emergency_phone or "").strip()
+
+
+def load_member_directory(cursor: pyodbc.Cursor) -> dict:
+    """
+    Load FULL and LITE members from dbo.SessionAttendance once and index them.
+
+    Each index keeps the same row the per-row SELECT TOP 1 lookups would have
+    returned, so answers match find_existing_full_member_from_attendance and
+    find_existing_lite_member.
+    """
+    full_sql = """
+    SELECT
+        ParticipantId,
+        SaheliCardNumber,
+        MemberDisplayId,
+        MemberName,
+        Phone,
+        EmergencyName,
+        EmergencyPhone,
+        AttendanceMemberKind
+    FROM (
+        SELECT
+            *,
+            ROW_NUMBER() OVER (
+                PARTITION BY SaheliCardNumber
+                ORDER BY
+                    CASE WHEN ParticipantId IS NOT NULL THEN 0 ELSE 1 END,
+                    UpdatedAtUtc DESC,
+                    CreatedAtUtc DESC,
+                    AttendanceId DESC
+            ) AS rn
+        FROM dbo.SessionAttendance
+        WHERE AttendanceMemberKind = 'FULL'
+          AND SaheliCardNumber IS NOT NULL
+    ) x
+    WHERE rn = 1;
+    """
+
+    lite_sql = """
+    SELECT
+        LiteMemberId,
+        MemberDisplayId,
+        MemberName,
+        Phone,
+        EmergencyName,
+        EmergencyPhone
+    FROM (
+        SELECT
+            *,
+            ROW_NUMBER() OVER (
+                PARTITION BY
+                    LOWER(LTRIM(RTRIM(ISNULL(MemberName, '')))),
+                    LTRIM(RTRIM(ISNULL(EmergencyPhone, '')))
+                ORDER BY UpdatedAtUtc DESC, CreatedAtUtc DESC, AttendanceId DESC
+            ) AS rn
+        FROM dbo.SessionAttendance
+        WHERE AttendanceMemberKind = 'LITE'
+          AND LiteMemberId IS NOT NULL
+    ) x
+    WHERE rn = 1
+    ORDER BY UpdatedAtUtc DESC, CreatedAtUtc DESC, AttendanceId DESC;
+    """
+
+    full_by_card: dict[str, dict] = {}
+
+    for row in cursor.execute(full_sql).fetchall():
+        full_by_card[str(row.SaheliCardNumber).strip()] = {
+            "ParticipantId": row.ParticipantId,
+            "SaheliCardNumber": row.SaheliCardNumber,
+            "MemberDisplayId": row.MemberDisplayId,
+            "MemberName": row.MemberName,
+            "Phone": row.Phone,
+            "EmergencyName": row.EmergencyName,
+            "EmergencyPhone": row.EmergencyPhone,
+            "AttendanceMemberKind": row.AttendanceMemberKind or "FULL",
+        }
+
+    lite_by_name_phone: dict[tuple[str, str], dict] = {}
+    lite_by_name: dict[str, dict] = {}
+    lite_index = PersonIndex()
+
+    # Rows arrive most recent first, so setdefault keeps the same row TOP 1 would pick.
+    for row in cursor.execute(lite_sql).fetchall():
+        member = {
+            "LiteMemberId": row.LiteMemberId,
+            "MemberDisplayId": row.MemberDisplayId,
+            "MemberName": row.MemberName,
+            "Phone": row.Phone,
+            "EmergencyName": row.EmergencyName,
+            "EmergencyPhone": row.EmergencyPhone,
+        }
+        name_key = lite_name_key(row.MemberName)
+        lite_by_name_phone.setdefault((name_key, lite_phone_key(row.EmergencyPhone)), member)
+        if name_key not in lite_by_name:
+            lite_by_name[name_key] = member
+            lite_index.add(member, row.MemberName, row.EmergencyPhone)
+
+    print(
+        f"Member directory loaded: {len(full_by_card)} FULL cards, "
+        f"{len(lite_by_name)} LITE names"
+    )
+
+    return {
+        "full_by_card": full_by_card,
+        "lite_by_name_phone": lite_by_name_phone,
+        "lite_by_name": lite_by_name,
+        "lite_index": lite_index,
+        "lite_fuzzy_linked": 0,
+        "lite_fuzzy_review": [],
+    }
+
+
+def directory_find_full_member(directory: dict, saheli_card_number: Optional[str]) -> Optional[dict]:
+    if not saheli_card_number:
+        return None
+
+    return directory["full_by_card"].get(saheli_card_number.strip())
+
+
+def directory_find_lite_member(
+    directory: dict,
+    member_name: Optional[str],
+    emergency_phone: Optional[str],
+) -> Optional[dict]:
+    if not member_name:
+        return None
+
+    name_key = lite_name_key(member_name)
+
+    if emergency_phone:
+        member = directory["lite_by_name_phone"].get((name_key, lite_phone_key(emergency_phone)))
+
+        if member:
+            return member
+
+    member = directory["lite_by_name"].get(name_key)
+
+    if member or not FUZZY_LITE_MATCHING:
+        return member
+
+    result = directory["lite_index"].match(member_name, emergency_phone)
+
+    if result.decision == "linked":
+        directory["lite_fuzzy_linked"] += 1
+        return result.record
+
+    if result.decision == "review":
+        directory["lite_fuzzy_review"].append(
+            {
+                "MemberName": member_name,
+                "EmergencyPhone": emergency_phone,
+                "BestScore": round(result.score, 3),
+                "Candidates": "; ".join(
+                    f"{candidate.record['MemberDisplayId']} {candidate.record['MemberName']} ({candidate.score:.2f})"
+                    for candidate in result.candidates[:3]
+                ),
+            }
+        )
+
+    return None
+
+
+def directory_register_lite_member(directory: dict, member: dict) -> None:
+    """Make a LITE member created during this run visible to later rows."""
+    name_key = lite_name_key(member.get("MemberName"))
+    directory["lite_by_name_phone"][(name_key, lite_phone_key(member.get("EmergencyPhone")))] = member
+    if name_key not in directory["lite_by_name"]:
+        directory["lite_index"].add(member, member.get("MemberName"), member.get("EmergencyPhone"))
+    directory["lite_by_name"][name_key] = member
+
+
+def resolve_full_member(
+    cursor: pyodbc.Cursor,
+    directory: Optional[dict],
+    saheli_card_number: Optional[str],
+) -> Optional[dict]:
+    if directory is not None:
+        return directory_find_full_member(directory, saheli_card_number)
+
+    return find_existing_full_member_from_attendance(cursor, saheli_card_number)
+
+
+def resolve_lite_member(
+    cursor: pyodbc.Cursor,
+    directory: Optional[dict],
+    member_name: Optional[str],
+    emergency_phone: Optional[str],
+) -> Optional[dict]:
+    if directory is not None:
+        return directory_find_lite_member(directory, member_name, emergency_phone)
+
+    return find_existing_lite_member(cursor, member_name, emergency_phone)
+
+
 def attendance_exists(
     cursor: pyodbc.Cursor,
     session_id: int,
@@ -859,7 +1269,7 @@ def create_attendance(
 # MAIN IMPORT
 # ============================================================
 
-def main() -> None:
+def main(workers: int = SHEET_WORKERS, incremental: bool = INCREMENTAL_IMPORT) -> None:
     if not INPUT_FILE.exists():
         raise FileNotFoundError(f"Input file not found: {INPUT_FILE}")
 
@@ -870,8 +1280,7 @@ def main() -> None:
         )
 
     created_at = datetime.now(timezone.utc).replace(microsecond=0, tzinfo=None)
-
-    excel = pd.ExcelFile(INPUT_FILE)
+    import_state = ImportState(IMPORT_SOURCE_NAME, incremental=incremental)
 
     sessions_created = 0
     sessions_reused = 0
@@ -879,6 +1288,7 @@ def main() -> None:
     attendance_created = 0
     attendance_skipped_duplicate = 0
     attendance_failed = 0
+    failed_sheets: set[str] = set()
     rows_skipped = 0
     invalid_time_rows = 0
     lite_created = 0
@@ -898,7 +1308,7 @@ def main() -> None:
     # Track all skipped rows for debugging
     skipped_rows_log: list[tuple] = []
 
-    with pyodbc.connect(SQL_CONNECTION_STRING) as conn:
+    with crm_db.connect(SQL_CONNECTION_STRING) as conn:
         conn.autocommit = False
         cursor = conn.cursor()
 
@@ -906,56 +1316,54 @@ def main() -> None:
             session_identity = is_identity_column(cursor, "Sessions", "SessionId")
             attendance_identity = is_identity_column(cursor, "SessionAttendance", "AttendanceId")
 
-            next_manual_session_id = None
-            next_manual_attendance_id = None
+            session_ids = None
+            attendance_ids = None
 
             if not session_identity:
-                next_manual_session_id = get_next_manual_id(cursor, "Sessions", "SessionId")
-                print(f"SessionId is not IDENTITY. Starting manual SessionId from {next_manual_session_id}")
+                session_ids = id_allocator.session_id_allocator(cursor, connection_string=SQL_CONNECTION_STRING)
+                print(f"SessionId is not IDENTITY. Starting manual SessionId from {session_ids.peek()}")
             else:
                 print("SessionId is IDENTITY. SQL Server will generate SessionId.")
 
             if not attendance_identity:
-                next_manual_attendance_id = get_next_manual_id(cursor, "SessionAttendance", "AttendanceId")
-                print(f"AttendanceId is not IDENTITY. Starting manual AttendanceId from {next_manual_attendance_id}")
+                attendance_ids = id_allocator.attendance_id_allocator(cursor, connection_string=SQL_CONNECTION_STRING)
+                print(f"AttendanceId is not IDENTITY. Starting manual AttendanceId from {attendance_ids.peek()}")
             else:
                 print("AttendanceId is IDENTITY. SQL Server will generate AttendanceId.")
 
-            next_lite_number = get_next_lite_display_number(cursor)
-            print(f"Next LITE MemberDisplayId starts from: LITE-{next_lite_number}")
-
-            for sheet_name in excel.sheet_names:
-                if sheet_name.strip() in SKIP_SHEETS:
-                    continue
+            lite_numbers = id_allocator.lite_number_allocator(cursor, connection_string=SQL_CONNECTION_STRING)
+            print(f"Next LITE MemberDisplayId starts from: LITE-{lite_numbers.peek()}")
 
-                source_sheet_name = sheet_name.strip()
-                venue_name = normalise_venue(source_sheet_name)
-
-                print(f"Processing sheet: {source_sheet_name} -> VenueName: {venue_name}")
+            member_directory = load_member_directory(cursor) if USE_MEMBER_SNAPSHOT else None
 
-                raw_df = pd.read_excel(
-                    INPUT_FILE,
-                    sheet_name=sheet_name,
-                    header=0,
-                    dtype=object,
-                )
+            if workers > 1:
+                register_batches = iter_register_batches_parallel(INPUT_FILE, workers, import_state)
+            elif PIPELINE_PARSE:
+                register_batches = iter_register_batches_pipelined(INPUT_FILE, import_state)
+            else:
+                register_batches = iter_register_batches(INPUT_FILE, import_state)
+            current_sheet_name = None
 
-                if raw_df.empty:
-                    continue
+            for source_sheet_name, batch in register_batches:
+                venue_name = normalise_venue(source_sheet_name)
 
-                df = get_first_16_columns_as_standard(raw_df)
+                if source_sheet_name != current_sheet_name:
+                    current_sheet_name = source_sheet_name
+                    print(f"Processing sheet: {source_sheet_name} -> VenueName: {venue_name}")
 
-                for idx, row_series in df.iterrows():
-                    source_row = int(idx) + 2
-                    row = row_series.to_dict()
+                for parsed in batch:
+                    source_row = parsed["source_row"]
+                    row = parsed["row"]
 
-                    activity_name = normalise_activity(row.get("Session")) or DEFAULT_ACTIVITY_NAME
-                    session_date = excel_date_to_date(row.get("Date"))
-                    raw_time = clean_text(row.get("Time"))
+                    activity_name = parsed["activity_name"]
+                    session_date = parsed["session_date"]
+                    raw_time = parsed["raw_time"]
 
-                    start_time, end_time, raw_time_for_notes = split_time_range(raw_time)
-                    day_of_week = normalise_day(row.get("Day"), session_date)
-                    session_month = month_name(row.get("Month"), session_date)
+                    start_time = parsed["start_time"]
+                    end_time = parsed["end_time"]
+                    raw_time_for_notes = parsed["raw_time_for_notes"]
+                    day_of_week = parsed["day_of_week"]
+                    session_month = parsed["session_month"]
 
                     # Be more lenient with missing fields - try harder to extract data
                     # Session date is required for attendance
@@ -1022,8 +1430,7 @@ def main() -> None:
                             manual_session_id_to_use = None
 
                             if not session_identity:
-                                manual_session_id_to_use = next_manual_session_id
-                                next_manual_session_id += 1
+                                manual_session_id_to_use = session_ids.next()
 
                             session_id = create_session(
                                 cursor=cursor,
@@ -1060,8 +1467,9 @@ def main() -> None:
                     # to get their name. If not found, use the card number as a placeholder.
                     if card_number and not member_name:
                         # Check if this is an existing FULL member
-                        existing_full = find_existing_full_member_from_attendance(
+                        existing_full = resolve_full_member(
                             cursor=cursor,
+                            directory=member_directory,
                             saheli_card_number=card_number,
                         )
                         
@@ -1088,8 +1496,9 @@ def main() -> None:
                     attendance_member_kind = "LITE"
                     saheli_card_number_to_insert = None
 
-                    existing_full_member = find_existing_full_member_from_attendance(
+                    existing_full_member = resolve_full_member(
                         cursor=cursor,
+                        directory=member_directory,
                         saheli_card_number=card_number,
                     )
 
@@ -1128,8 +1537,7 @@ def main() -> None:
 
                         # Generate display ID if we don't have a card number
                         if not member_display_id:
-                            member_display_id = f"LITE-{next_lite_number}"
-                            next_lite_number += 1
+                            member_display_id = f"LITE-{lite_numbers.next()}"
 
                         lite_cache_key = (
                             f"{member_name.strip().lower()}|"
@@ -1140,8 +1548,9 @@ def main() -> None:
                             existing_lite = lite_member_cache[lite_cache_key]
                             lite_reused += 1
                         else:
-                            existing_lite = find_existing_lite_member(
+                            existing_lite = resolve_lite_member(
                                 cursor=cursor,
+                                directory=member_directory,
                                 member_name=member_name,
                                 emergency_phone=emergency_phone_from_excel,
                             )
@@ -1151,16 +1560,18 @@ def main() -> None:
                             else:
                                 existing_lite = {
                                     "LiteMemberId": str(uuid.uuid4()).upper(),
-                                    "MemberDisplayId": f"LITE-{next_lite_number}",
+                                    "MemberDisplayId": f"LITE-{lite_numbers.next()}",
                                     "MemberName": member_name,
                                     "Phone": None,
                                     "EmergencyName": emergency_name_from_excel,
                                     "EmergencyPhone": emergency_phone_from_excel,
                                 }
 
-                                next_lite_number += 1
                                 lite_created += 1
 
+                                if member_directory is not None:
+                                    directory_register_lite_member(member_directory, existing_lite)
+
                             lite_member_cache[lite_cache_key] = existing_lite
 
                         lite_member_id = existing_lite.get("LiteMemberId")
@@ -1210,8 +1621,7 @@ def main() -> None:
                     manual_attendance_id_to_use = None
 
                     if not attendance_identity:
-                        manual_attendance_id_to_use = next_manual_attendance_id
-                        next_manual_attendance_id += 1
+                        manual_attendance_id_to_use = attendance_ids.next()
 
                     try:
                         create_attendance(
@@ -1242,7 +1652,13 @@ def main() -> None:
                         attendance_created += 1
 
                     except Exception as e:
+                        # A deadlock victim or dropped connection has lost the transaction:
+                        # let retry_transient() start the import again instead of carrying on.
+                        if crm_db.is_transient_error(e):
+                            raise
+
                         attendance_failed += 1
+                        failed_sheets.add(source_sheet_name)
                         print(
                             f"Warning: Could not insert attendance. "
                             f"Sheet={source_sheet_name}, Row={source_row}, "
@@ -1252,12 +1668,25 @@ def main() -> None:
                         )
                         continue
 
+            # Hand back the unused end of each reserved id block before committing.
+            id_allocator.release_all(session_ids, attendance_ids, lite_numbers)
             conn.commit()
 
         except Exception:
             conn.rollback()
             raise
 
+    # Only after the commit: a failed run must not advance the watermarks, and
+    # neither may a sheet with failed rows, or --incremental would never retry them.
+    for sheet_name in failed_sheets:
+        import_state.discard(sheet_name)
+    import_state.save()
+
+    fuzzy_review_path = None
+    if member_directory is not None and member_directory["lite_fuzzy_review"]:
+        fuzzy_review_path = Path.cwd() / f"tennis_lite_match_review_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        pd.DataFrame(member_directory["lite_fuzzy_review"]).to_csv(fuzzy_review_path, index=False, encoding="utf-8-sig")
+
     print()
     print("Import completed successfully.")
     print("====================================")
@@ -1273,12 +1702,19 @@ def main() -> None:
     print(f"Attendance rows created: {attendance_created}")
     print(f"Duplicate attendance rows skipped: {attendance_skipped_duplicate}")
     print(f"Attendance rows failed: {attendance_failed}")
+    if failed_sheets:
+        print(f"Sheets kept at their previous watermark (retried next run): {', '.join(sorted(failed_sheets))}")
     print()
     print("MEMBER KINDS")
     print("-" * 40)
     print(f"FULL members reused: {full_reused}")
     print(f"LITE members created: {lite_created}")
     print(f"LITE members reused: {lite_reused}")
+    if member_directory is not None and FUZZY_LITE_MATCHING:
+        print(f"LITE members matched by close spelling: {member_directory['lite_fuzzy_linked']}")
+        print(f"LITE near matches left for review: {len(member_directory['lite_fuzzy_review'])}")
+        if fuzzy_review_path is not None:
+            print(f"LITE review file: {fuzzy_review_path}")
     print()
     print(f"ROWS SKIPPED (Total: {rows_skipped})")
     print("-" * 40)
@@ -1290,5 +1726,25 @@ def main() -> None:
     print(f"LITE with no name: {skip_lite_no_name}")
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Import the Tennis register into CRM Sessions and SessionAttendance.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=SHEET_WORKERS,
+        help=f"Number of processes used to parse sheets before the database stage. Default: {SHEET_WORKERS}",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        default=INCREMENTAL_IMPORT,
+        help="Skip sheets unchanged since the last run and import only rows appended since then.",
+    )
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    args = parse_args()
+    # Transient faults are re-raised out of the row loop, so the whole import is
+    # rolled back and run again.
+    crm_db.retry_transient(main, workers=args.workers, incremental=args.incremental)
\ No newline at end of file
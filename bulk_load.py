@@ -0,0 +1,215 @@
+"""
+Bulk loading for large CRM inserts.
+
+pyodbc's executemany, even with fast_executemany, sends parameter arrays
+that SQL Server still runs as one INSERT per row. bulk_insert() sends
+large row sets as a table-valued parameter instead: the rows travel as one
+TVP stream and a single INSERT ... SELECT applies them to the target table.
+
+    inserted = bulk_load.bulk_insert(cursor, "dbo.Participants", columns, rows)
+
+* below BULK_THRESHOLD rows, or on the local SQLite backend, it is plain
+  fast_executemany, exactly as before
+* the TVP's table type (dbo.BulkLoad_<table>_<hash>) is generated once from
+  the target's column definitions and reused by later runs; a change to the
+  columns gives a new hash and so a new type
+* where the login cannot create types (and no matching type exists yet),
+  has no EXECUTE permission on the type, or pyodbc is too old to name a
+  TVP type in a plain statement, it falls back to fast_executemany
+
+Checks run before anything is sent, so a fallback never leaves a failed
+statement in the caller's transaction (which SET XACT_ABORT ON would doom).
+
+BULK INSERT / bcp were not used: they read a file the database server itself
+can open, which the Azure SQL database cannot do for a file on this machine.
+
+Scripts outside the repo root import this with:
+
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+from typing import Any, Optional, Sequence
+
+import crm_db
+
+try:
+    import pyodbc
+except ModuleNotFoundError:
+    pyodbc = None  # type: ignore[assignment]
+
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+# Row count from which bulk_insert() uses a table-valued parameter.
+BULK_THRESHOLD = int(os.getenv("CRM_BULK_THRESHOLD", "1000"))
+
+# Rows per TVP round trip.
+BULK_BATCH_ROWS = int(os.getenv("CRM_BULK_BATCH_ROWS", "50000"))
+
+# "tvp" (default) or "executemany" to switch bulk loading off.
+BULK_METHOD = os.getenv("CRM_BULK_METHOD", "tvp").strip().lower()
+
+TYPE_PREFIX = "BulkLoad_"
+
+# First pyodbc release that accepts a TVP type name in an ad-hoc statement.
+MIN_PYODBC_VERSION = (4, 0, 32)
+
+
+# ============================================================
+# TABLE TYPES
+# ============================================================
+
+COLUMN_DEFINITIONS_SQL = """
+SELECT
+    c.name AS ColumnName,
+    TYPE_NAME(c.system_type_id) AS TypeName,
+    c.max_length AS MaxLength,
+    c.precision AS NumericPrecision,
+    c.scale AS NumericScale
+FROM sys.columns c
+WHERE c.object_id = OBJECT_ID(?);
+"""
+
+# (table, columns) -> (table type name, column definitions).
+_type_definitions: dict[tuple[str, tuple[str, ...]], tuple[str, str]] = {}
+
+
+def split_table_name(table: str) -> tuple[str, str]:
+    """("dbo", "Participants") from dbo.Participants, dbo.[Participants] or Participants."""
+    parts = [part.strip("[]") for part in table.split(".")]
+    return (parts[-2] if len(parts) > 1 else "dbo"), parts[-1]
+
+
+def column_type_sql(row: Any) -> str:
+    type_name = str(row.TypeName).lower()
+
+    if type_name in {"nvarchar", "nchar"}:
+        return f"{type_name}({'max' if row.MaxLength == -1 else row.MaxLength // 2})"
+    if type_name in {"varchar", "char", "varbinary", "binary"}:
+        return f"{type_name}({'max' if row.MaxLength == -1 else row.MaxLength})"
+    if type_name in {"decimal", "numeric"}:
+        return f"{type_name}({row.NumericPrecision}, {row.NumericScale})"
+    if type_name in {"datetime2", "time", "datetimeoffset"}:
+        return f"{type_name}({row.NumericScale})"
+    return type_name
+
+
+def pyodbc_supports_named_tvps() -> bool:
+    if pyodbc is None:
+        return False
+    numbers = [int(part) for part in re.findall(r"\d+", getattr(pyodbc, "version", ""))[:3]]
+    return tuple(numbers) >= MIN_PYODBC_VERSION
+
+
+def table_type_for(cursor: Any, table: str, columns: Sequence[str]) -> Optional[str]:
+    """The dbo table type matching these target columns, created if needed; None to fall back."""
+    if not pyodbc_supports_named_tvps():
+        return None
+
+    cache_key = (table.lower(), tuple(column.lower() for column in columns))
+
+    if cache_key not in _type_definitions:
+        definitions = {
+            str(row.ColumnName).lower(): row
+            for row in cursor.execute(COLUMN_DEFINITIONS_SQL, table).fetchall()
+        }
+        missing = [column for column in columns if column.lower() not in definitions]
+        if missing:
+            raise KeyError(f"{table} has no column(s): {', '.join(missing)}")
+
+        column_sql = ",\n    ".join(
+            f"[{column}] {column_type_sql(definitions[column.lower()])} NULL" for column in columns
+        )
+        digest = hashlib.sha1(column_sql.encode("utf-8")).hexdigest()[:10]
+        _type_definitions[cache_key] = (f"{TYPE_PREFIX}{split_table_name(table)[1]}_{digest}", column_sql)
+
+    type_name, column_sql = _type_definitions[cache_key]
+
+    # Checked every time: a CREATE TYPE in a rolled-back transaction is gone again.
+    if cursor.execute("SELECT TYPE_ID(?) AS TypeId;", f"dbo.{type_name}").fetchone().TypeId is not None:
+        return type_name if can_execute_type(cursor, type_name) else None
+
+    permissions = cursor.execute(
+        """
+        SELECT
+            HAS_PERMS_BY_NAME(DB_NAME(), 'DATABASE', 'CREATE TYPE') AS CanCreateType,
+            HAS_PERMS_BY_NAME('dbo', 'SCHEMA', 'ALTER') AS CanAlterSchema;
+        """
+    ).fetchone()
+
+    if permissions.CanCreateType != 1 or permissions.CanAlterSchema != 1:
+        return None
+
+    cursor.execute(f"CREATE TYPE dbo.[{type_name}] AS TABLE (\n    {column_sql}\n);")
+    return type_name if can_execute_type(cursor, type_name) else None
+
+
+def can_execute_type(cursor: Any, type_name: str) -> bool:
+    """A table type can only be used as a parameter with EXECUTE permission on it."""
+    row = cursor.execute(
+        "SELECT HAS_PERMS_BY_NAME(?, 'TYPE', 'EXECUTE') AS CanExecute;",
+        f"dbo.[{type_name}]",
+    ).fetchone()
+    return row.CanExecute == 1
+
+
+# ============================================================
+# BULK INSERT
+# ============================================================
+
+def executemany_insert(cursor: Any, table: str, columns: Sequence[str], rows: Sequence[Sequence[Any]]) -> int:
+    column_sql = ", ".join(f"[{column}]" for column in columns)
+    placeholders = ", ".join("?" for _ in columns)
+    previous = getattr(cursor, "fast_executemany", False)
+
+    cursor.fast_executemany = True
+    try:
+        cursor.executemany(f"INSERT INTO {table} ({column_sql}) VALUES ({placeholders});", rows)
+    finally:
+        cursor.fast_executemany = previous
+
+    return len(rows)
+
+
+def bulk_insert(
+    cursor: Any,
+    table: str,
+    columns: Sequence[str],
+    rows: Sequence[Sequence[Any]],
+    *,
+    threshold: int = BULK_THRESHOLD,
+    like: Optional[str] = None,
+) -> int:
+    """
+    Insert rows (value sequences in `columns` order) into `table` and return
+    how many were sent. Runs on the caller's cursor and transaction.
+
+    `like` names a permanent table with the same column definitions, for
+    #temp staging tables that sys.columns in this database cannot see.
+    """
+    rows = [tuple(row) for row in rows]
+    if not rows:
+        return 0
+
+    if len(rows) < threshold or BULK_METHOD != "tvp" or crm_db.CRM_BACKEND == "local":
+        return executemany_insert(cursor, table, columns, rows)
+
+    type_name = table_type_for(cursor, like or table, columns)
+    if type_name is None:
+        return executemany_insert(cursor, table, columns, rows)
+
+    column_sql = ", ".join(f"[{column}]" for column in columns)
+    sql = f"INSERT INTO {table} ({column_sql}) SELECT {column_sql} FROM ?;"
+
+    for start in range(0, len(rows), BULK_BATCH_ROWS):
+        # One parameter holding the whole TVP: [type name, schema, *rows].
+        cursor.execute(sql, ([type_name, "dbo", *rows[start:start + BULK_BATCH_ROWS]],))
+
+    return len(rows)
@@ -0,0 +1,107 @@
+"""
+One-off migration: create dbo.IdAllocations for id_allocator.py.
+
+The importers reserve SessionId, AttendanceId and LITE-n blocks from this
+table but do not create it themselves, because they run without DDL rights
+and a CREATE TABLE inside an import transaction would hold schema locks
+for the whole run. Run this once per database, as a user that may create
+tables:
+
+    python create_id_allocations.py
+    python create_id_allocations.py --dry-run
+
+The table gets one row per allocation name, seeded with MAX()+1 of the
+column behind it. Running it again is harmless: an existing table is left
+alone and existing rows are not changed.
+"""
+
+from __future__ import annotations
+
+import argparse
+from typing import Any
+
+import crm_db
+import id_allocator
+
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+ALLOCATION_TABLE = id_allocator.ALLOCATION_TABLE
+
+CREATE_TABLE_SQL = f"""
+CREATE TABLE {ALLOCATION_TABLE} (
+    Name nvarchar(100) NOT NULL PRIMARY KEY,
+    NextValue bigint NOT NULL
+);
+"""
+
+
+# ============================================================
+# MIGRATION
+# ============================================================
+
+def table_exists(cursor: Any) -> bool:
+    row = cursor.execute("SELECT OBJECT_ID(?) AS ObjectId;", ALLOCATION_TABLE).fetchone()
+    return bool(row and row.ObjectId is not None)
+
+
+def seed_rows(cursor: Any, has_table: bool, dry_run: bool) -> None:
+    for name in id_allocator.FLOOR_QUERIES:
+        floor = id_allocator.floor_value(cursor, name)
+        existing = None
+        if has_table:
+            existing = cursor.execute(
+                f"SELECT NextValue FROM {ALLOCATION_TABLE} WHERE Name = ?;", name
+            ).fetchone()
+
+        if existing is not None:
+            print(f"{name}: already at {existing.NextValue} (column floor {floor}), left alone")
+            continue
+
+        print(f"{name}: {'would seed' if dry_run else 'seeding'} NextValue = {floor}")
+        if not dry_run:
+            cursor.execute(
+                f"INSERT INTO {ALLOCATION_TABLE} (Name, NextValue) VALUES (?, ?);",
+                name,
+                floor,
+            )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=f"Create and seed {ALLOCATION_TABLE} for id_allocator.py.")
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Show what would be created and seeded, then roll back.",
+    )
+    return parser.parse_args()
+
+
+def main(dry_run: bool = False) -> None:
+    with crm_db.connect() as conn:
+        cursor = conn.cursor()
+
+        has_table = table_exists(cursor)
+        if has_table:
+            print(f"{ALLOCATION_TABLE} already exists")
+        else:
+            print(f"{'Would create' if dry_run else 'Creating'} {ALLOCATION_TABLE}")
+            if not dry_run:
+                cursor.execute(CREATE_TABLE_SQL)
+                has_table = True
+
+        seed_rows(cursor, has_table, dry_run)
+
+        if dry_run:
+            conn.rollback()
+            print("Dry run: nothing written")
+        else:
+            conn.commit()
+            print("Done")
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    main(args.dry_run)
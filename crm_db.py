@@ -0,0 +1,1656 @@
+"""
+Connection factory for the CRM database, with a local SQLite stand-in.
+
+Every importer opens its connection through connect(), which normally just
+calls pyodbc.connect(). Setting the environment variable
+
+    CRM_BACKEND=local
+
+switches all of them to LocalCrmConnection instead: a pyodbc-compatible
+connection over a SQLite file (CRM_LOCAL_DATABASE, default
+.local_crm.sqlite3 next to this file) that emulates dbo.Sessions,
+dbo.SessionAttendance, dbo.LiteMembers, dbo.Participants,
+dbo.ParticipantEmergencyContacts, the Assessment_* tables and
+dbo.IdAllocations (see id_allocator.py). Imports can then
+be run, profiled and benchmarked on a laptop with no network.
+
+What the stand-in emulates:
+
+* IDENTITY columns (INTEGER PRIMARY KEY AUTOINCREMENT) and
+  INSERT ... OUTPUT INSERTED.col (rewritten to RETURNING col)
+* dbo.<table>, sys.tables / sys.columns / sys.types / sys.schemas,
+  INFORMATION_SCHEMA.COLUMNS, OBJECT_ID() and COLUMNPROPERTY(..., 'IsIdentity')
+* SELECT TOP n, ISNULL, LEN, CAST / CONVERT / TRY_CONVERT (including style 108),
+  GETDATE / SYSUTCDATETIME / NEWID, N'...' literals, SET XACT_ABORT / NOCOUNT
+* case-insensitive text comparison, like the CRM's default collation
+* pyodbc behaviour the scripts rely on: rows with attribute access,
+  cursor.execute(sql, *params) or (sql, [params]), fetchval(), rowcount,
+  fast_executemany, autocommit, and commit-on-exit for "with connect() as conn"
+* date, time, datetime2 and bit columns come back as date, time, datetime and
+  bool; decimal columns come back as float
+
+Batches that need T-SQL control flow (IF ..., MERGE, #temp tables) raise
+LocalBackendUnsupported; the importers that use them have a per-row fallback
+(e.g. BULK_SESSION_UPSERT = False).
+
+Connections to SQL Server are opened with retry: transient Azure SQL faults
+(failover, throttling, a serverless database resuming, dropped links) are
+retried with exponential backoff and jitter, and an optional warm-up query
+(CRM_SQL_WARMUP_QUERY) runs before the connection is handed out.
+retry_transient() re-runs a whole unit of work the same way, so an import
+whose transaction was lost to a brief outage starts again by itself (and
+resumes from its checkpoint where it has one). get_pool() keeps up to
+CRM_SQL_POOL_SIZE connections per connection string for scripts that
+connect once per phase or per table: each checkout is pinged first and each
+return is rolled back. connect() with no connection string builds one from
+CRM_SQL_* variables.
+
+SQL profiling (either backend): with CRM_SQL_PROFILE=1, connect() wraps the
+connection so every execute / executemany / fetch / commit is counted per
+statement template (the SQL text with whitespace and placeholder lists
+collapsed). At exit the top CRM_SQL_PROFILE_TOP templates by total time are
+printed with round trips, a latency histogram, rows fetched and the function
+that issued them; CRM_SQL_PROFILE_FILE also writes the full profile as JSON.
+
+Create or reset the local database with:
+
+    python crm_db.py --reset
+
+Scripts outside the repo root import this with:
+
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+"""
+
+from __future__ import annotations
+
+import argparse
+import atexit
+import json
+import os
+import random
+import re
+import sqlite3
+import sys
+import threading
+import time as timer
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timezone
+from decimal import Decimal
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+try:
+    import pyodbc
+except ModuleNotFoundError:
+    pyodbc = None  # type: ignore[assignment]
+
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+# "sqlserver" (pyodbc, the default) or "local" (SQLite stand-in).
+CRM_BACKEND = os.getenv("CRM_BACKEND", "sqlserver").strip().lower()
+
+LOCAL_DATABASE_FILE = Path(
+    os.getenv("CRM_LOCAL_DATABASE", Path(__file__).resolve().parent / ".local_crm.sqlite3")
+)
+
+BACKENDS = {"sqlserver", "local"}
+
+# Transient-fault retry for connecting (connect) and for whole units of work (retry_transient).
+RETRY_ATTEMPTS = int(os.getenv("CRM_SQL_RETRY_ATTEMPTS", "5"))
+RETRY_BASE_DELAY_SECONDS = float(os.getenv("CRM_SQL_RETRY_BASE_DELAY", "1.0"))
+RETRY_MAX_DELAY_SECONDS = float(os.getenv("CRM_SQL_RETRY_MAX_DELAY", "30"))
+
+# Run on every new connection before it is used, e.g. "SELECT 1" to wake a paused serverless database.
+WARMUP_QUERY = os.getenv("CRM_SQL_WARMUP_QUERY") or None
+
+# Connections open at once per pool, and how long connection() waits for one to come back.
+POOL_SIZE = int(os.getenv("CRM_SQL_POOL_SIZE", "4"))
+POOL_TIMEOUT_SECONDS = float(os.getenv("CRM_SQL_POOL_TIMEOUT", "60"))
+
+# Wrap connections in ProfiledConnection and report per-statement SQL costs at exit.
+SQL_PROFILE = os.getenv("CRM_SQL_PROFILE", "").strip().lower() in {"1", "true", "yes", "on"}
+SQL_PROFILE_TOP_N = int(os.getenv("CRM_SQL_PROFILE_TOP", "15"))
+SQL_PROFILE_FILE = os.getenv("CRM_SQL_PROFILE_FILE") or None
+
+# Upper bounds of the latency histogram buckets, in milliseconds; the last bucket is open.
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+# ============================================================
+# LOCAL SCHEMA
+# ============================================================
+# Column types are written as in SQL Server. The importers only rely on the
+# columns listed here; lengths follow the live CRM where the scripts check them.
+
+ASSESSMENT_KEY_COLUMNS = [
+    ("Id", "int identity"),
+    ("SaheliCardNumber", "nvarchar(50)"),
+    ("AssessmentNumber", "int"),
+    ("AssessmentDate", "date"),
+]
+
+SCHEMA: dict[str, list[tuple[str, str]]] = {
+    "Sessions": [
+        ("SessionId", "int identity"),
+        ("Frequency", "nvarchar(50)"),
+        ("Category", "nvarchar(100)"),
+        ("SubCategory", "nvarchar(100)"),
+        ("ActivityCategory", "nvarchar(100)"),
+        ("VenueName", "nvarchar(200)"),
+        ("ActivityName", "nvarchar(200)"),
+        ("Notes", "nvarchar(max)"),
+        ("IsRecurringWeekly", "bit"),
+        ("DayOfWeek", "nvarchar(20)"),
+        ("SessionDate", "date"),
+        ("ArrivalTime", "time"),
+        ("StartTime", "time"),
+        ("EndTime", "time"),
+        ("Capacity", "int"),
+        ("IsBookingRequired", "bit"),
+        ("IsCancelled", "bit"),
+        ("CreatedAtUtc", "datetime2 default now"),
+        ("UpdatedAtUtc", "datetime2"),
+        ("AssignedStaffId", "int"),
+        ("RecurringSeriesId", "int"),
+        ("SessionProviderId", "int"),
+    ],
+    "SessionAttendance": [
+        ("AttendanceId", "int identity"),
+        ("SessionId", "int not null"),
+        ("ParticipantId", "int"),
+        ("SessionName", "nvarchar(200)"),
+        ("SessionDay", "nvarchar(20)"),
+        ("SessionDate", "date"),
+        ("SessionMonth", "nvarchar(20)"),
+        ("SessionStartTime", "time"),
+        ("SessionEndTime", "time"),
+        ("SaheliCardNumber", "nvarchar(50)"),
+        ("RiskStratification", "nvarchar(50)"),
+        ("Attended", "bit"),
+        ("CheckInTime", "time"),
+        ("CheckOutTime", "time"),
+        ("Notes", "nvarchar(max)"),
+        ("CreatedAtUtc", "datetime2 default now"),
+        ("UpdatedAtUtc", "datetime2"),
+        ("AttendanceMemberKind", "nvarchar(10)"),
+        ("LiteMemberId", "uniqueidentifier"),
+        ("MemberDisplayId", "nvarchar(50)"),
+        ("MemberName", "nvarchar(200)"),
+        ("Phone", "nvarchar(50)"),
+        ("EmergencyName", "nvarchar(200)"),
+        ("EmergencyPhone", "nvarchar(50)"),
+        ("AF", "nvarchar(50)"),
+        ("BP", "nvarchar(50)"),
+        ("HeightCm", "decimal(6,2)"),
+        ("WeightKg", "decimal(6,2)"),
+    ],
+    "LiteMembers": [
+        ("Id", "uniqueidentifier primary key"),
+        ("MembershipId", "nvarchar(50)"),
+        ("FirstName", "nvarchar(100)"),
+        ("LastName", "nvarchar(100)"),
+        ("DateOfBirth", "date"),
+        ("Phone", "nvarchar(50)"),
+        ("Email", "nvarchar(256)"),
+        ("Address", "nvarchar(500)"),
+        ("Postcode", "nvarchar(20)"),
+        ("EmergencyName", "nvarchar(200)"),
+        ("EmergencyPhone", "nvarchar(50)"),
+        ("EmergencyRelation", "nvarchar(100)"),
+        ("HealthConditions", "nvarchar(max)"),
+        ("Gender", "nvarchar(50)"),
+        ("Ethnicity", "nvarchar(100)"),
+        ("CreatedByUserId", "int"),
+        ("CreatedAtUtc", "datetime2 default now"),
+    ],
+    "Participants": [
+        ("ParticipantID", "int identity"),
+        ("SaheliCardNumber", "nvarchar(50)"),
+        ("FullName", "nvarchar(255)"),
+        ("DateOfBirth", "date"),
+        ("Age", "int"),
+        ("Address", "nvarchar(500)"),
+        ("Postcode", "nvarchar(20)"),
+        ("Email", "nvarchar(256)"),
+        ("MobileNumber", "nvarchar(50)"),
+        ("Gender", "nvarchar(50)"),
+        ("GenderSameAsBirth", "nvarchar(50)"),
+        ("Ethnicity", "nvarchar(100)"),
+        ("PreferredLanguage", "nvarchar(100)"),
+        ("Religion", "nvarchar(100)"),
+        ("Sexuality", "nvarchar(100)"),
+        ("Occupation", "nvarchar(200)"),
+        ("LivingAlone", "nvarchar(50)"),
+        ("CaringResponsibilities", "nvarchar(50)"),
+        ("ReferralReason", "nvarchar(max)"),
+        ("HeardAboutSaheli", "nvarchar(max)"),
+        ("GPSurgeryName", "nvarchar(200)"),
+        ("Site", "nvarchar(200)"),
+        ("Notes", "nvarchar(max)"),
+        ("RegistrationDate", "date"),
+        ("CreatedAt", "datetime2 default now"),
+    ],
+    "ParticipantEmergencyContacts": [
+        ("Id", "int identity"),
+        ("SaheliCardNumber", "nvarchar(50)"),
+        ("ContactName", "nvarchar(200)"),
+        ("ContactNumber", "nvarchar(50)"),
+        ("Relationship", "nvarchar(100)"),
+        ("ParticipantID", "int"),
+    ],
+    "Assessment_Master": [
+        ("Id", "int identity"),
+        ("SaheliCardNumber", "nvarchar(50)"),
+        ("AssessmentNumber", "int"),
+        ("AssessmentDate", "datetime2"),
+        ("CreatedAtUtc", "datetime2"),
+        ("CreatedByUserId", "nvarchar(100)"),
+    ],
+    "Assessments": [
+        *ASSESSMENT_KEY_COLUMNS,
+        ("StaffMember", "nvarchar(200)"),
+        ("Site", "nvarchar(200)"),
+        ("RiskStratificationScore", "int"),
+        ("NextReviewDate", "date"),
+        ("CreatedAt", "datetime2"),
+    ],
+    "Assessment_AimsGoals": [
+        *ASSESSMENT_KEY_COLUMNS,
+        ("AimsGoals", "nvarchar(max)"),
+        ("AimsDescription", "nvarchar(max)"),
+    ],
+    "Assessment_Barriers": [
+        *ASSESSMENT_KEY_COLUMNS,
+        ("Barriers", "nvarchar(max)"),
+        ("BarrierComments", "nvarchar(max)"),
+    ],
+    "Assessment_BodyComposition": [
+        *ASSESSMENT_KEY_COLUMNS,
+        ("WeightKg", "float"),
+        ("HeightCm", "float"),
+        ("Bmicategory", "nvarchar(100)"),
+        ("Bmivalue", "float"),
+        ("WaistCm", "float"),
+        ("HipCm", "float"),
+        ("WaistHipRatio", "float"),
+        ("BodyFatCategory", "nvarchar(100)"),
+        ("BodyFatScore", "float"),
+        ("VisceralFatCategory", "nvarchar(100)"),
+        ("VisceralFatScore", "float"),
+        ("SkeletalMuscleCategory", "nvarchar(100)"),
+        ("SkeletalMuscleScore", "float"),
+        ("RestingMetabolism", "float"),
+    ],
+    "Assessment_CommunityConfidence": [
+        *ASSESSMENT_KEY_COLUMNS,
+        ("ConfidenceToJoin", "float"),
+        ("NumberOfHobbies", "float"),
+        ("CommunityInvolvement", "float"),
+        ("ServiceAwareness", "float"),
+    ],
+    "Assessment_HealthScreening": [
+        *ASSESSMENT_KEY_COLUMNS,
+        ("HasHealthCondition", "bit"),
+        ("LastBpmeasurementDate", "date"),
+        ("BprecordedWithGp", "bit"),
+        ("KnowledgeHealthyBp", "nvarchar(200)"),
+        ("KnowledgeBprisk", "nvarchar(200)"),
+        ("KnowledgeBpreduction", "nvarchar(200)"),
+        ("SystolicBp", "int"),
+        ("DiastolicBp", "int"),
+        ("Bplevel", "nvarchar(100)"),
+        ("HeartConditionTypes", "nvarchar(max)"),
+        ("HeartRateBpm", "float"),
+        ("AtrialFibrillationResult", "int"),
+        ("HeartAge", "float"),
+        ("DoctorAdvisedNoExercise", "bit"),
+        ("ChestPain", "bit"),
+        ("ShortnessOfBreath", "bit"),
+        ("DiabetesType", "nvarchar(100)"),
+        ("DiabetesRisk", "nvarchar(100)"),
+        ("GlucoseLevel", "float"),
+        ("HbA1c", "float"),
+        ("SugaryDrinkIntake", "bit"),
+        ("HighCholesterol", "bit"),
+        ("OtherHealthIssues", "nvarchar(max)"),
+        ("BoneJointConditions", "nvarchar(max)"),
+        ("TakesPrescribedMedication", "bit"),
+        ("ReferredToDoctor", "bit"),
+        ("RiskStratification", "nvarchar(50)"),
+        ("HealthComments", "nvarchar(max)"),
+        ("SelfManagementScore", "float"),
+    ],
+    "Assessment_Lifestyle": [
+        *ASSESSMENT_KEY_COLUMNS,
+        ("Nourishment", "float"),
+        ("Movement", "float"),
+        ("Connectedness", "float"),
+        ("SleepQuality", "float"),
+        ("HappySelf", "float"),
+        ("Resilience", "float"),
+        ("GreenBlueSpace", "float"),
+        ("ScreenTime", "float"),
+        ("SubstanceUse", "float"),
+        ("Purpose", "float"),
+        ("LifestyleComments", "nvarchar(max)"),
+    ],
+    "Assessment_PhysicalActivity": [
+        *ASSESSMENT_KEY_COLUMNS,
+        ("ActiveDaysPerWeek", "float"),
+        ("ActivityLevel", "nvarchar(100)"),
+        ("ActivityComments", "nvarchar(max)"),
+    ],
+    "Assessment_PreferredActivities": [
+        *ASSESSMENT_KEY_COLUMNS,
+        ("PreferredActivities", "nvarchar(max)"),
+        ("ActivityComments", "nvarchar(max)"),
+        ("NextReviewDate", "date"),
+    ],
+    "Assessment_SocialIsolation": [
+        *ASSESSMENT_KEY_COLUMNS,
+        ("LackCompanionship", "float"),
+        ("FeelLeftOut", "float"),
+        ("FeelIsolated", "float"),
+        ("SocialIsolationComments", "nvarchar(max)"),
+    ],
+    "Assessment_WEMWBS": [
+        *ASSESSMENT_KEY_COLUMNS,
+        ("FeelingOptimistic", "int"),
+        ("FeelingUseful", "int"),
+        ("FeelingRelaxed", "int"),
+        ("FeelingInterestedInPeople", "int"),
+        ("EnergyToSpare", "int"),
+        ("DealingWithProblems", "int"),
+        ("ThinkingClearly", "int"),
+        ("FeelingGoodAboutSelf", "int"),
+        ("FeelingCloseToOthers", "int"),
+        ("FeelingConfident", "int"),
+        ("MakingOwnMindUp", "int"),
+        ("FeelingLoved", "int"),
+        ("InterestedInNewThings", "int"),
+        ("FeelingCheerful", "int"),
+        ("Wemwbscomments", "nvarchar(max)"),
+    ],
+    "IdAllocations": [
+        ("Name", "nvarchar(100) primary key"),
+        ("NextValue", "bigint not null"),
+    ],
+}
+
+# SQL Server type -> (sys.types user_type_id, storage bytes for fixed-size types).
+SQL_SERVER_TYPES = {
+    "bit": (104, 1),
+    "int": (56, 4),
+    "bigint": (127, 8),
+    "float": (62, 8),
+    "decimal": (106, 9),
+    "date": (40, 3),
+    "time": (41, 5),
+    "datetime2": (42, 8),
+    "uniqueidentifier": (36, 16),
+    "varchar": (167, None),
+    "nvarchar": (231, None),
+}
+
+# Declared SQLite types; the CRM_* names select the converters registered below.
+SQLITE_DECLARED_TYPES = {
+    "bit": "CRM_BIT",
+    "int": "INTEGER",
+    "bigint": "INTEGER",
+    "float": "REAL",
+    "decimal": "REAL",
+    "date": "CRM_DATE",
+    "time": "CRM_TIME",
+    "datetime2": "CRM_DATETIME2",
+    "uniqueidentifier": "TEXT COLLATE NOCASE",
+    "varchar": "TEXT COLLATE NOCASE",
+    "nvarchar": "TEXT COLLATE NOCASE",
+}
+
+COLUMN_TYPE_RE = re.compile(r"(\w+)(?:\((max|\d+)(?:,\s*\d+)?\))?(.*)", re.IGNORECASE)
+
+
+def parse_column_type(column_type: str) -> tuple[str, Optional[int], str]:
+    """"nvarchar(200) not null" -> ("nvarchar", 200, "not null"); a max length is -1."""
+    match = COLUMN_TYPE_RE.fullmatch(column_type.strip())
+    if not match:
+        raise ValueError(f"Cannot parse column type: {column_type!r}")
+    length = match.group(2)
+    return (
+        match.group(1).lower(),
+        -1 if length and length.lower() == "max" else int(length) if length else None,
+        match.group(3).strip().lower(),
+    )
+
+
+def column_ddl(name: str, column_type: str) -> str:
+    base, _length, options = parse_column_type(column_type)
+
+    if "identity" in options:
+        return f"[{name}] INTEGER PRIMARY KEY AUTOINCREMENT"
+
+    ddl = f"[{name}] {SQLITE_DECLARED_TYPES[base]}"
+
+    if "primary key" in options:
+        ddl += " PRIMARY KEY NOT NULL"
+    if "not null" in options:
+        ddl += " NOT NULL"
+    if "default now" in options:
+        ddl += " DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now'))"
+
+    return ddl
+
+
+# ============================================================
+# VALUE CONVERSION
+# ============================================================
+
+def to_sqlite_value(value: Any) -> Any:
+    """Bind a Python value the way pyodbc would send it to SQL Server."""
+    if value is None or isinstance(value, (str, bytes)):
+        return value
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, datetime):
+        # Covers pandas.Timestamp, which subclasses datetime.
+        return value.replace(tzinfo=None).isoformat(" ")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, time):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, uuid.UUID):
+        return str(value).upper()
+    if hasattr(value, "item"):
+        # NumPy scalars.
+        return to_sqlite_value(value.item())
+    raise TypeError(f"Unsupported parameter type for the local CRM backend: {type(value).__name__}")
+
+
+def parse_datetime_text(value: Any) -> datetime:
+    if isinstance(value, (int, float)):
+        raise ValueError(f"Not a date/time value: {value!r}")
+
+    text = str(value).strip().replace("T", " ")
+
+    if ":" in text and "-" not in text:
+        return datetime.combine(date(1900, 1, 1), time.fromisoformat(text))
+
+    return datetime.fromisoformat(text)
+
+
+def _convert_bytes(decode):
+    def convert(raw: bytes) -> Any:
+        text = raw.decode("utf-8")
+        try:
+            return decode(text)
+        except ValueError:
+            return text
+    return convert
+
+
+sqlite3.register_converter("CRM_DATE", _convert_bytes(lambda text: parse_datetime_text(text).date()))
+sqlite3.register_converter("CRM_TIME", _convert_bytes(lambda text: parse_datetime_text(text).time()))
+sqlite3.register_converter("CRM_DATETIME2", _convert_bytes(parse_datetime_text))
+sqlite3.register_converter("CRM_BIT", _convert_bytes(lambda text: bool(int(float(text)))))
+
+
+def sql_convert(type_name: str, value: Any, style: Optional[int] = None, strict: bool = True) -> Any:
+    """CONVERT / TRY_CONVERT / CAST on a stored value; returns SQLite-storable values."""
+    if value is None:
+        return None
+
+    base, length, _options = parse_column_type(type_name)
+
+    try:
+        if base in {"int", "bigint", "smallint", "tinyint"}:
+            if isinstance(value, float):
+                return int(value)
+            return int(str(value).strip())
+
+        if base == "bit":
+            return 1 if float(value) else 0
+
+        if base in {"float", "real", "decimal", "numeric", "money"}:
+            return float(value)
+
+        if base == "date":
+            return parse_datetime_text(value).date().isoformat()
+
+        if base == "time":
+            return parse_datetime_text(value).time().isoformat()
+
+        if base in {"datetime", "datetime2", "smalldatetime"}:
+            return parse_datetime_text(value).isoformat(" ")
+
+        if base in {"varchar", "nvarchar", "char", "nchar"}:
+            if style == 108:
+                text = parse_datetime_text(value).time().isoformat()
+            elif isinstance(value, float) and value.is_integer():
+                text = str(int(value))
+            else:
+                text = str(value)
+            return text[:length] if length and length > 0 else text
+
+        if base == "uniqueidentifier":
+            return str(uuid.UUID(str(value))).upper()
+
+    except (TypeError, ValueError):
+        if strict:
+            raise
+        return None
+
+    raise ValueError(f"Unsupported conversion type for the local CRM backend: {type_name}")
+
+
+# ============================================================
+# T-SQL TRANSLATION
+# ============================================================
+
+class LocalBackendUnsupported(NotImplementedError):
+    """The statement uses T-SQL the local stand-in does not emulate."""
+
+
+NO_OP_STATEMENT_RE = re.compile(r"^\s*SET\s+(XACT_ABORT|NOCOUNT|ANSI_\w+|IDENTITY_INSERT)\b", re.IGNORECASE)
+UNSUPPORTED_RE = re.compile(r"^\s*(IF|BEGIN|DECLARE|WHILE)\b|\bMERGE\b|#\w|\bOUTPUT\s+DELETED\b", re.IGNORECASE)
+NATIONAL_LITERAL_RE = re.compile(r"\bN'")
+ISNULL_RE = re.compile(r"\bISNULL\s*\(", re.IGNORECASE)
+TYPED_FUNCTION_RE = re.compile(r"\b(TRY_CONVERT|CONVERT|CAST)\s*\(", re.IGNORECASE)
+TOP_RE = re.compile(r"\bTOP\s*(?:\(\s*(\d+)\s*\)|(\d+))", re.IGNORECASE)
+TOP_ANY_RE = re.compile(r"\bTOP\b", re.IGNORECASE)
+OUTPUT_INSERTED_RE = re.compile(
+    r"\bOUTPUT\s+(INSERTED\.\[?\w+\]?(?:\s*,\s*INSERTED\.\[?\w+\]?)*)",
+    re.IGNORECASE,
+)
+CAST_AS_RE = re.compile(r"\s+AS\s+", re.IGNORECASE)
+
+
+def _matching_paren(sql: str, open_index: int) -> int:
+    depth = 0
+    in_string = False
+    index = open_index
+
+    while index < len(sql):
+        char = sql[index]
+        if in_string:
+            if char == "'":
+                in_string = False
+        elif char == "'":
+            in_string = True
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                return index
+        index += 1
+
+    raise LocalBackendUnsupported(f"Unbalanced parentheses in SQL: {sql[open_index:open_index + 60]!r}")
+
+
+def _split_top_level(text: str, pattern: re.Pattern, last: bool = False) -> Optional[tuple[str, str]]:
+    """Split at the first (or last) match of pattern outside brackets and strings."""
+    depth = 0
+    in_string = False
+    boundaries: list[tuple[int, int]] = []
+    index = 0
+
+    while index < len(text):
+        char = text[index]
+        if in_string:
+            if char == "'":
+                in_string = False
+        elif char == "'":
+            in_string = True
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif depth == 0:
+            match = pattern.match(text, index)
+            if match:
+                boundaries.append((match.start(), match.end()))
+                index = match.end()
+                continue
+        index += 1
+
+    if not boundaries:
+        return None
+
+    start, end = boundaries[-1] if last else boundaries[0]
+    return text[:start], text[end:]
+
+
+def _rewrite_typed_functions(sql: str) -> str:
+    """CAST(x AS t), CONVERT(t, x[, style]), TRY_CONVERT(t, x) -> crm_convert('t', x, style, strict)."""
+    output: list[str] = []
+    position = 0
+
+    while True:
+        match = TYPED_FUNCTION_RE.search(sql, position)
+        if not match:
+            output.append(sql[position:])
+            return "".join(output)
+
+        open_index = match.end() - 1
+        close_index = _matching_paren(sql, open_index)
+        inner = _rewrite_typed_functions(sql[open_index + 1:close_index])
+        function_name = match.group(1).upper()
+
+        if function_name == "CAST":
+            parts = _split_top_level(inner, CAST_AS_RE, last=True)
+            if not parts:
+                raise LocalBackendUnsupported(f"Cannot parse CAST({inner})")
+            expression, type_name = parts[0], parts[1].strip()
+            style = "NULL"
+        else:
+            parts = _split_top_level(inner, re.compile(r"\s*,\s*"))
+            if not parts:
+                raise LocalBackendUnsupported(f"Cannot parse {function_name}({inner})")
+            type_name = parts[0].strip()
+            style_parts = _split_top_level(parts[1], re.compile(r"\s*,\s*"))
+            expression, style = style_parts if style_parts else (parts[1], "NULL")
+
+        strict = 0 if function_name == "TRY_CONVERT" else 1
+        output.append(sql[position:match.start()])
+        output.append(f"crm_convert('{type_name.lower()}', {expression}, {style}, {strict})")
+        position = close_index + 1
+
+
+def translate_sql(sql: str) -> Optional[str]:
+    """Rewrite one T-SQL statement for SQLite. Returns None for statements that are no-ops locally."""
+    if NO_OP_STATEMENT_RE.match(sql):
+        return None
+
+    if UNSUPPORTED_RE.search(sql):
+        raise LocalBackendUnsupported(
+            "The local CRM backend does not emulate T-SQL batches with IF / MERGE / #temp tables. "
+            f"Use the importer's per-row path for this statement: {sql.strip()[:80]!r}"
+        )
+
+    translated = NATIONAL_LITERAL_RE.sub("'", sql)
+    translated = _rewrite_typed_functions(translated)
+    translated = ISNULL_RE.sub("IFNULL(", translated)
+    translated = translated.strip().rstrip(";").rstrip()
+
+    top_matches = TOP_ANY_RE.findall(translated)
+    if top_matches:
+        match = TOP_RE.search(translated)
+        if len(top_matches) > 1 or not match or not re.match(r"\s*SELECT\b", translated, re.IGNORECASE):
+            raise LocalBackendUnsupported(f"Only one literal TOP n in the outer SELECT is supported: {sql.strip()[:80]!r}")
+        translated = f"{translated[:match.start()]}{translated[match.end():]} LIMIT {match.group(1) or match.group(2)}"
+
+    match = OUTPUT_INSERTED_RE.search(translated)
+    if match:
+        columns = re.sub(r"INSERTED\.", "", match.group(1), flags=re.IGNORECASE)
+        translated = f"{translated[:match.start()]}{translated[match.end():]} RETURNING {columns}"
+
+    return translated
+
+
+# ============================================================
+# CATALOG
+# ============================================================
+
+def catalog_rows() -> tuple[list[tuple], list[tuple]]:
+    """(sys.tables rows, sys.columns rows) for SCHEMA; object_id is 1000 + table position."""
+    tables: list[tuple] = []
+    columns: list[tuple] = []
+
+    for table_index, (table_name, table_columns) in enumerate(SCHEMA.items()):
+        object_id = 1000 + table_index
+        tables.append((object_id, table_name, 1))
+
+        for column_id, (column_name, column_type) in enumerate(table_columns, start=1):
+            base, length, options = parse_column_type(column_type)
+            type_id, fixed_size = SQL_SERVER_TYPES[base]
+
+            if length == -1:
+                max_length = -1
+            elif length is not None and base in {"varchar", "nvarchar"}:
+                max_length = length * (2 if base == "nvarchar" else 1)
+            else:
+                max_length = fixed_size or 0
+
+            is_identity = 1 if "identity" in options else 0
+            is_nullable = 0 if is_identity or "not null" in options or "primary key" in options else 1
+
+            columns.append(
+                (object_id, column_name, column_id, type_id, type_id, max_length, is_nullable, is_identity, base, length)
+            )
+
+    return tables, columns
+
+
+def _build_catalog(sqlite_connection: sqlite3.Connection) -> dict[str, int]:
+    tables, columns = catalog_rows()
+
+    sqlite_connection.execute("ATTACH DATABASE ':memory:' AS sys")
+    sqlite_connection.execute("ATTACH DATABASE ':memory:' AS INFORMATION_SCHEMA")
+    sqlite_connection.executescript(
+        """
+        CREATE TABLE sys.schemas (schema_id INTEGER, name TEXT COLLATE NOCASE);
+        CREATE TABLE sys.tables (object_id INTEGER, name TEXT COLLATE NOCASE, schema_id INTEGER);
+        CREATE TABLE sys.types (user_type_id INTEGER, system_type_id INTEGER, name TEXT COLLATE NOCASE);
+        CREATE TABLE sys.columns (
+            object_id INTEGER, name TEXT COLLATE NOCASE, column_id INTEGER, user_type_id INTEGER,
+            system_type_id INTEGER, max_length INTEGER, is_nullable INTEGER, is_identity INTEGER
+        );
+        CREATE TABLE INFORMATION_SCHEMA.COLUMNS (
+            TABLE_SCHEMA TEXT COLLATE NOCASE, TABLE_NAME TEXT COLLATE NOCASE, COLUMN_NAME TEXT COLLATE NOCASE,
+            ORDINAL_POSITION INTEGER, DATA_TYPE TEXT, CHARACTER_MAXIMUM_LENGTH INTEGER, IS_NULLABLE TEXT
+        );
+        INSERT INTO sys.schemas VALUES (1, 'dbo');
+        """
+    )
+    sqlite_connection.executemany("INSERT INTO sys.tables VALUES (?, ?, ?)", tables)
+    sqlite_connection.executemany(
+        "INSERT INTO sys.types VALUES (?, ?, ?)",
+        [(type_id, type_id, name) for name, (type_id, _size) in SQL_SERVER_TYPES.items()],
+    )
+    sqlite_connection.executemany(
+        "INSERT INTO sys.columns VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        [row[:8] for row in columns],
+    )
+
+    table_names = {object_id: name for object_id, name, _schema in tables}
+    sqlite_connection.executemany(
+        "INSERT INTO INFORMATION_SCHEMA.COLUMNS VALUES ('dbo', ?, ?, ?, ?, ?, ?)",
+        [
+            (
+                table_names[object_id],
+                name,
+                column_id,
+                base,
+                length if base in {"varchar", "nvarchar"} else None,
+                "YES" if is_nullable else "NO",
+            )
+            for object_id, name, column_id, _t, _s, _m, is_nullable, _i, base, length in columns
+        ],
+    )
+    sqlite_connection.commit()
+
+    return {name.lower(): object_id for object_id, name, _schema in tables}
+
+
+# ============================================================
+# PYODBC-COMPATIBLE CONNECTION
+# ============================================================
+
+if pyodbc is not None:
+    class LocalDatabaseError(pyodbc.Error):
+        pass
+
+    class LocalIntegrityError(pyodbc.IntegrityError):
+        pass
+else:
+    class LocalDatabaseError(Exception):  # type: ignore[no-redef]
+        pass
+
+    class LocalIntegrityError(LocalDatabaseError):  # type: ignore[no-redef]
+        pass
+
+
+class Row:
+    """pyodbc.Row look-alike: index, unpack or use column names as attributes."""
+
+    __slots__ = ("_values", "_columns")
+
+    def __init__(self, values: tuple, columns: dict[str, int]):
+        self._values = values
+        self._columns = columns
+
+    def __getattr__(self, name: str) -> Any:
+        columns = object.__getattribute__(self, "_columns")
+        index = columns.get(name)
+        if index is None:
+            index = columns.get(name.lower())
+        if index is None:
+            raise AttributeError(name)
+        return object.__getattribute__(self, "_values")[index]
+
+    def __getitem__(self, index: Any) -> Any:
+        return self._values[index]
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __eq__(self, other: Any) -> bool:
+        return tuple(self) == tuple(other)
+
+    def __repr__(self) -> str:
+        return repr(self._values)
+
+
+def _flatten_params(params: tuple) -> list[Any]:
+    # pyodbc accepts execute(sql, a, b) and execute(sql, [a, b]).
+    if len(params) == 1 and isinstance(params[0], (list, tuple)):
+        params = tuple(params[0])
+    return [to_sqlite_value(value) for value in params]
+
+
+class LocalCursor:
+    def __init__(self, connection: "LocalCrmConnection"):
+        self.connection = connection
+        self._cursor = connection._sqlite.cursor()
+        self._columns: dict[str, int] = {}
+        self.description: Optional[tuple] = None
+        self.rowcount = -1
+        self.fast_executemany = False
+
+    def _run(self, method, sql: str, params: Any) -> "LocalCursor":
+        translated = translate_sql(sql)
+
+        if translated is None:
+            self.description = None
+            self.rowcount = -1
+            return self
+
+        try:
+            method(translated, params)
+        except sqlite3.IntegrityError as exc:
+            raise LocalIntegrityError(str(exc)) from exc
+        except sqlite3.Error as exc:
+            raise LocalDatabaseError(f"{exc} | SQL: {translated.strip()[:200]}") from exc
+
+        description = self._cursor.description
+        self.description = (
+            tuple((column[0], None, None, None, None, None, True) for column in description)
+            if description
+            else None
+        )
+        self._columns = {}
+        for index, column in enumerate(description or ()):
+            self._columns.setdefault(column[0], index)
+            self._columns.setdefault(column[0].lower(), index)
+        self.rowcount = self._cursor.rowcount
+        return self
+
+    def execute(self, sql: str, *params: Any) -> "LocalCursor":
+        return self._run(self._cursor.execute, sql, _flatten_params(params))
+
+    def executemany(self, sql: str, seq_of_params: Iterable[Iterable[Any]]) -> None:
+        rows = [[to_sqlite_value(value) for value in row] for row in seq_of_params]
+        self._run(self._cursor.executemany, sql, rows)
+
+    def _wrap(self, values: Optional[tuple]) -> Optional[Row]:
+        return None if values is None else Row(values, self._columns)
+
+    def fetchone(self) -> Optional[Row]:
+        return self._wrap(self._cursor.fetchone())
+
+    def fetchall(self) -> list[Row]:
+        return [Row(values, self._columns) for values in self._cursor.fetchall()]
+
+    def fetchmany(self, size: int = 1) -> list[Row]:
+        return [Row(values, self._columns) for values in self._cursor.fetchmany(size)]
+
+    def fetchval(self) -> Any:
+        row = self._cursor.fetchone()
+        return None if row is None else row[0]
+
+    def nextset(self) -> bool:
+        return False
+
+    def __iter__(self) -> Iterator[Row]:
+        for values in self._cursor:
+            yield Row(values, self._columns)
+
+    def close(self) -> None:
+        self._cursor.close()
+
+    def __enter__(self) -> "LocalCursor":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class LocalCrmConnection:
+    """
+    pyodbc.Connection look-alike over the local SQLite file.
+
+    The CRM tables live in an attached database named dbo, so both dbo.Sessions
+    and Sessions resolve. sys and INFORMATION_SCHEMA are in-memory catalogs
+    built from SCHEMA.
+    """
+
+    def __init__(self, database_file: Path | str = LOCAL_DATABASE_FILE, autocommit: bool = False):
+        self.database_file = Path(database_file)
+        self.database_file.parent.mkdir(parents=True, exist_ok=True)
+
+        self._sqlite = sqlite3.connect(
+            ":memory:",
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False,
+        )
+        self._sqlite.execute("ATTACH DATABASE ? AS dbo", (str(self.database_file),))
+        self._object_ids = _build_catalog(self._sqlite)
+        self._register_functions()
+        create_local_schema(self._sqlite)
+        self.autocommit = autocommit
+
+    def _register_functions(self) -> None:
+        def object_id(name: Optional[str], _object_type: Optional[str] = None) -> Optional[int]:
+            if not name or name.lower().startswith("tempdb"):
+                return None
+            table_name = name.replace("[", "").replace("]", "").split(".")[-1]
+            return self._object_ids.get(table_name.lower())
+
+        def column_property(object_id_value: Optional[int], column_name: str, property_name: str) -> Optional[int]:
+            if object_id_value is None or str(property_name).lower() != "isidentity":
+                return None
+            row = self._sqlite.execute(
+                "SELECT is_identity FROM sys.columns WHERE object_id = ? AND name = ?",
+                (object_id_value, column_name),
+            ).fetchone()
+            return None if row is None else row[0]
+
+        def now_utc() -> str:
+            return datetime.now(timezone.utc).replace(tzinfo=None).isoformat(" ")
+
+        self._sqlite.create_function("OBJECT_ID", -1, object_id)
+        self._sqlite.create_function("COLUMNPROPERTY", 3, column_property)
+        self._sqlite.create_function("crm_convert", 4, lambda t, v, s, strict: sql_convert(t, v, s, bool(strict)))
+        self._sqlite.create_function("LEN", 1, lambda value: None if value is None else len(str(value).rstrip()))
+        self._sqlite.create_function("GETDATE", 0, lambda: datetime.now().isoformat(" "))
+        self._sqlite.create_function("GETUTCDATE", 0, now_utc)
+        self._sqlite.create_function("SYSUTCDATETIME", 0, now_utc)
+        self._sqlite.create_function("SYSDATETIME", 0, lambda: datetime.now().isoformat(" "))
+        self._sqlite.create_function("NEWID", 0, lambda: str(uuid.uuid4()).upper())
+
+    @property
+    def autocommit(self) -> bool:
+        return self._sqlite.isolation_level is None
+
+    @autocommit.setter
+    def autocommit(self, value: bool) -> None:
+        if value and self._sqlite.in_transaction:
+            self._sqlite.commit()
+        self._sqlite.isolation_level = None if value else ""
+
+    def cursor(self) -> LocalCursor:
+        return LocalCursor(self)
+
+    def execute(self, sql: str, *params: Any) -> LocalCursor:
+        return self.cursor().execute(sql, *params)
+
+    def commit(self) -> None:
+        self._sqlite.commit()
+
+    def rollback(self) -> None:
+        self._sqlite.rollback()
+
+    def close(self) -> None:
+        self._sqlite.close()
+
+    def __enter__(self) -> "LocalCrmConnection":
+        return self
+
+    def __exit__(self, exc_type: Any, _exc: Any, _traceback: Any) -> None:
+        # Same as pyodbc: commit on a clean exit, leave the connection open.
+        if exc_type is None and not self.autocommit:
+            self.commit()
+
+
+# ============================================================
+# SQL PROFILING
+# ============================================================
+
+PLACEHOLDER_LIST_RE = re.compile(r"\?(?:\s*,\s*\?)+")
+VALUES_ROWS_RE = re.compile(r"(\([^()]*\?[^()]*\))(?:\s*,\s*\([^()]*\?[^()]*\))+")
+LINE_COMMENT_RE = re.compile(r"--[^\n]*")
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def statement_template(sql: str) -> str:
+    """
+    The profiling key for a statement: comments dropped, whitespace collapsed,
+    and variable-length placeholder lists ("IN (?, ?, ?)", multi-row VALUES)
+    collapsed, so statements built per batch share one template.
+    """
+    text = WHITESPACE_RE.sub(" ", LINE_COMMENT_RE.sub(" ", sql)).strip()
+    text = VALUES_ROWS_RE.sub(r"\1, ...", text)
+    return PLACEHOLDER_LIST_RE.sub("?, ...", text)
+
+
+@dataclass
+class StatementStats:
+    template: str
+    calls: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+    rows_fetched: int = 0
+    rows_sent: int = 0
+    buckets: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS_MS) + 1))
+    callers: dict[str, int] = field(default_factory=dict)
+
+    def percentile_ms(self, fraction: float) -> Optional[float]:
+        """Upper bound of the histogram bucket holding the given fraction of calls."""
+        target = fraction * self.calls
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= target:
+                return LATENCY_BUCKETS_MS[index] if index < len(LATENCY_BUCKETS_MS) else round(self.max_seconds * 1000, 1)
+        return None
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "template": self.template,
+            "calls": self.calls,
+            "total_ms": round(self.seconds * 1000, 3),
+            "mean_ms": round(self.seconds * 1000 / self.calls, 3) if self.calls else None,
+            "p95_ms_upper_bound": self.percentile_ms(0.95),
+            "max_ms": round(self.max_seconds * 1000, 3),
+            "rows_fetched": self.rows_fetched,
+            "rows_sent": self.rows_sent,
+            "latency_histogram_ms": {
+                (f"<{bound}" if index < len(LATENCY_BUCKETS_MS) else f">={LATENCY_BUCKETS_MS[-1]}"): count
+                for index, (bound, count) in enumerate(
+                    zip((*LATENCY_BUCKETS_MS, LATENCY_BUCKETS_MS[-1]), self.buckets)
+                )
+            },
+            "callers": dict(sorted(self.callers.items(), key=lambda item: -item[1])),
+        }
+
+
+def calling_function() -> str:
+    """file:function of the first frame outside this module."""
+    frame = sys._getframe(2)
+    while frame is not None and frame.f_code.co_filename == __file__:
+        frame = frame.f_back
+    if frame is None:
+        return "?"
+    return f"{Path(frame.f_code.co_filename).name}:{frame.f_code.co_name}"
+
+
+class SqlProfiler:
+    """Per-template round trips, latency histogram and row counts for every profiled connection."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.statements: dict[str, StatementStats] = {}
+        self.started = timer.perf_counter()
+
+    def record(
+        self,
+        template: str,
+        seconds: float,
+        *,
+        caller: Optional[str] = None,
+        rows_fetched: int = 0,
+        rows_sent: int = 0,
+        round_trip: bool = True,
+    ) -> None:
+        with self._lock:
+            stats = self.statements.get(template)
+            if stats is None:
+                stats = self.statements[template] = StatementStats(template)
+
+            stats.seconds += seconds
+            stats.rows_fetched += rows_fetched
+            stats.rows_sent += rows_sent
+
+            if round_trip:
+                stats.calls += 1
+                stats.max_seconds = max(stats.max_seconds, seconds)
+                milliseconds = seconds * 1000
+                bucket = next(
+                    (index for index, bound in enumerate(LATENCY_BUCKETS_MS) if milliseconds < bound),
+                    len(LATENCY_BUCKETS_MS),
+                )
+                stats.buckets[bucket] += 1
+
+            if caller:
+                stats.callers[caller] = stats.callers.get(caller, 0) + 1
+
+    def as_dict(self, top_n: Optional[int] = None) -> dict[str, Any]:
+        statements = sorted(self.statements.values(), key=lambda stats: -stats.seconds)
+        return {
+            "wall_seconds": round(timer.perf_counter() - self.started, 3),
+            "round_trips": sum(stats.calls for stats in statements),
+            "sql_seconds": round(sum(stats.seconds for stats in statements), 3),
+            "rows_fetched": sum(stats.rows_fetched for stats in statements),
+            "statements": [stats.as_dict() for stats in statements[:top_n]],
+        }
+
+    def report(self, top_n: int = SQL_PROFILE_TOP_N, file: Any = None) -> None:
+        file = file or sys.stdout
+        summary = self.as_dict(top_n)
+
+        if not summary["round_trips"]:
+            return
+
+        print("", file=file)
+        print("SQL PROFILE", file=file)
+        print("=" * 110, file=file)
+        print(
+            f"Round trips: {summary['round_trips']}   SQL time: {summary['sql_seconds']:.3f}s "
+            f"of {summary['wall_seconds']:.3f}s   Rows fetched: {summary['rows_fetched']}",
+            file=file,
+        )
+        print(f"Top {len(summary['statements'])} statement templates by total time:", file=file)
+        print(
+            f"{'Calls':>8} {'Total ms':>10} {'Mean ms':>8} {'p95 ms<=':>9} {'Max ms':>8} {'Rows':>8}  Caller / SQL",
+            file=file,
+        )
+        print("-" * 110, file=file)
+
+        for stats in summary["statements"]:
+            caller = next(iter(stats["callers"]), "?")
+            print(
+                f"{stats['calls']:>8} {stats['total_ms']:>10.1f} {stats['mean_ms'] or 0:>8.2f} "
+                f"{stats['p95_ms_upper_bound'] or 0:>9} {stats['max_ms']:>8.1f} {stats['rows_fetched']:>8}  {caller}",
+                file=file,
+            )
+            print(f"{'':>57}{stats['template'][:150]}", file=file)
+
+        print("", file=file)
+
+    def export(self, path: Path | str) -> None:
+        Path(path).write_text(json.dumps(self.as_dict(), indent=2), encoding="utf-8")
+
+
+SQL_PROFILER = SqlProfiler()
+
+
+class ProfiledCursor:
+    """Cursor wrapper that times every call and charges it to the statement's template."""
+
+    def __init__(self, cursor: Any, profiler: SqlProfiler):
+        object.__setattr__(self, "_cursor", cursor)
+        object.__setattr__(self, "_profiler", profiler)
+        object.__setattr__(self, "_template", "(no statement)")
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        # fast_executemany and friends belong to the real cursor.
+        setattr(self._cursor, name, value)
+
+    def _timed(self, template: str, func: Any, *args: Any, rows_sent: int = 0) -> Any:
+        caller = calling_function()
+        started = timer.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self._profiler.record(template, timer.perf_counter() - started, caller=caller, rows_sent=rows_sent)
+
+    def execute(self, sql: str, *params: Any) -> "ProfiledCursor":
+        template = statement_template(sql)
+        object.__setattr__(self, "_template", template)
+        self._timed(template, self._cursor.execute, sql, *params)
+        return self
+
+    def executemany(self, sql: str, seq_of_params: Any) -> None:
+        template = statement_template(sql)
+        object.__setattr__(self, "_template", template)
+        rows = seq_of_params if isinstance(seq_of_params, (list, tuple)) else list(seq_of_params)
+        self._timed(template, self._cursor.executemany, sql, rows, rows_sent=len(rows))
+
+    def _fetch(self, func: Any, *args: Any) -> Any:
+        # Fetches are charged to the statement but not counted as extra round trips.
+        started = timer.perf_counter()
+        result = func(*args)
+        fetched = 0 if result is None else len(result) if isinstance(result, list) else 1
+        self._profiler.record(self._template, timer.perf_counter() - started, rows_fetched=fetched, round_trip=False)
+        return result
+
+    def fetchone(self) -> Any:
+        return self._fetch(self._cursor.fetchone)
+
+    def fetchall(self) -> list:
+        return self._fetch(self._cursor.fetchall)
+
+    def fetchmany(self, size: int = 1) -> list:
+        return self._fetch(self._cursor.fetchmany, size)
+
+    def fetchval(self) -> Any:
+        started = timer.perf_counter()
+        value = self._cursor.fetchval()
+        self._profiler.record(self._template, timer.perf_counter() - started, rows_fetched=1, round_trip=False)
+        return value
+
+    def __iter__(self) -> Iterator[Any]:
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+
+    def __enter__(self) -> "ProfiledCursor":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._cursor.close()
+
+
+class ProfiledConnection:
+    """Connection wrapper whose cursors are profiled; commit and rollback are timed too."""
+
+    def __init__(self, connection: Any, profiler: SqlProfiler):
+        object.__setattr__(self, "_connection", connection)
+        object.__setattr__(self, "_profiler", profiler)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._connection, name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        # autocommit and timeout belong to the real connection.
+        setattr(self._connection, name, value)
+
+    def cursor(self) -> ProfiledCursor:
+        return ProfiledCursor(self._connection.cursor(), self._profiler)
+
+    def execute(self, sql: str, *params: Any) -> ProfiledCursor:
+        return self.cursor().execute(sql, *params)
+
+    def _timed(self, template: str, func: Any) -> None:
+        caller = calling_function()
+        started = timer.perf_counter()
+        try:
+            func()
+        finally:
+            self._profiler.record(template, timer.perf_counter() - started, caller=caller)
+
+    def commit(self) -> None:
+        self._timed("COMMIT", self._connection.commit)
+
+    def rollback(self) -> None:
+        self._timed("ROLLBACK", self._connection.rollback)
+
+    def __enter__(self) -> "ProfiledConnection":
+        self._connection.__enter__()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> Any:
+        started = timer.perf_counter()
+        try:
+            return self._connection.__exit__(*exc_info)
+        finally:
+            if exc_info[0] is None:
+                self._profiler.record("COMMIT (end of with block)", timer.perf_counter() - started)
+
+
+_profile_report_registered = False
+
+
+def report_sql_profile() -> None:
+    """Print the top-N report and write CRM_SQL_PROFILE_FILE if set; registered at exit by connect()."""
+    SQL_PROFILER.report(SQL_PROFILE_TOP_N)
+
+    if SQL_PROFILE_FILE:
+        SQL_PROFILER.export(SQL_PROFILE_FILE)
+        print(f"SQL profile written to {SQL_PROFILE_FILE}")
+
+
+def profiled(connection: Any) -> ProfiledConnection:
+    global _profile_report_registered
+
+    if not _profile_report_registered:
+        atexit.register(report_sql_profile)
+        _profile_report_registered = True
+
+    return ProfiledConnection(connection, SQL_PROFILER)
+
+
+# ============================================================
+# CONNECTION STRING / TRANSIENT FAULTS
+# ============================================================
+
+# SQLSTATEs for lost links, login failures and timeouts.
+TRANSIENT_SQLSTATES = {"08S01", "08S02", "08001", "08004", "HYT00", "HYT01", "40001"}
+
+# SQL Server / Azure SQL error numbers documented as transient (failover, throttling,
+# database paused or moving, deadlock victim, connection reset).
+TRANSIENT_ERROR_NUMBERS = {
+    64, 121, 233, 1205, 4060, 4221, 10053, 10054, 10060, 10928, 10929,
+    40143, 40197, 40501, 40540, 40613, 42108, 42109, 49918, 49919, 49920,
+}
+
+ERROR_NUMBER_RE = re.compile(r"\((\d{2,5})\)")
+
+PREFERRED_ODBC_DRIVERS = ["ODBC Driver 18 for SQL Server", "ODBC Driver 17 for SQL Server", "SQL Server"]
+
+
+def build_connection_string() -> str:
+    """
+    Connection string from the environment, as the Sessioninsert importers build it:
+    CRM_SQL_CONNECTION_STRING as a full override, otherwise CRM_SQL_SERVER,
+    CRM_SQL_DATABASE and CRM_SQL_USER / CRM_SQL_PASSWORD (or
+    CRM_SQL_TRUSTED_CONNECTION=1), with CRM_SQL_DRIVER or the newest installed driver.
+    """
+    override = os.getenv("CRM_SQL_CONNECTION_STRING")
+    if override:
+        return override
+
+    server = os.getenv("CRM_SQL_SERVER", "tcp:sahelihub.database.windows.net,1433")
+    database = os.getenv("CRM_SQL_DATABASE", "SahelihubCRM")
+    trusted = os.getenv("CRM_SQL_TRUSTED_CONNECTION", "").strip().lower() in {"1", "true", "yes", "y"}
+
+    driver = os.getenv("CRM_SQL_DRIVER")
+    if not driver and pyodbc is not None:
+        installed = set(pyodbc.drivers())
+        driver = next((name for name in PREFERRED_ODBC_DRIVERS if name in installed), None)
+    driver = driver or PREFERRED_ODBC_DRIVERS[0]
+
+    if trusted:
+        auth = "Trusted_Connection=yes;"
+    else:
+        sql_user = os.getenv("CRM_SQL_USER")
+        sql_password = os.getenv("CRM_SQL_PASSWORD")
+
+        if not sql_user or not sql_password:
+            raise RuntimeError(
+                "Missing SQL credentials. Set CRM_SQL_USER and CRM_SQL_PASSWORD environment variables, "
+                "or set CRM_SQL_CONNECTION_STRING."
+            )
+
+        auth = f"UID={sql_user};PWD={sql_password};"
+
+    return (
+        f"DRIVER={{{driver}}};"
+        f"SERVER={server};"
+        f"DATABASE={database};"
+        f"{auth}"
+        "Encrypt=yes;"
+        "TrustServerCertificate=yes;"
+    )
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    """True for database errors worth retrying: see TRANSIENT_SQLSTATES / TRANSIENT_ERROR_NUMBERS."""
+    while exc is not None:
+        if isinstance(exc, LocalDatabaseError) and "database is locked" in str(exc):
+            return True
+
+        if pyodbc is not None and isinstance(exc, pyodbc.Error):
+            sqlstate = exc.args[0] if exc.args and isinstance(exc.args[0], str) else ""
+            if sqlstate in TRANSIENT_SQLSTATES:
+                return True
+            if any(int(number) in TRANSIENT_ERROR_NUMBERS for number in ERROR_NUMBER_RE.findall(str(exc))):
+                return True
+
+        exc = exc.__cause__
+
+    return False
+
+
+def retry_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter for the given 1-based attempt."""
+    ceiling = min(RETRY_MAX_DELAY_SECONDS, RETRY_BASE_DELAY_SECONDS * 2 ** (attempt - 1))
+    return random.uniform(ceiling / 2, ceiling)
+
+
+def retry_transient(func: Callable[..., Any], *args: Any, attempts: Optional[int] = None, **kwargs: Any) -> Any:
+    """
+    Call func(*args, **kwargs), calling it again after a transient database error.
+
+    func must be a whole unit of work that opens its own connection and either
+    commits or rolls back everything, so a retry never sees half a transaction.
+    """
+    attempts = attempts or RETRY_ATTEMPTS
+
+    for attempt in range(1, attempts + 1):
+        try:
+            return func(*args, **kwargs)
+        except Exception as exc:
+            if attempt == attempts or not is_transient_error(exc):
+                raise
+
+            delay = retry_delay(attempt)
+            print(
+                f"Transient database error ({attempt}/{attempts}): {exc}. "
+                f"Retrying {getattr(func, '__name__', 'operation')} in {delay:.1f}s.",
+                file=sys.stderr,
+            )
+            timer.sleep(delay)
+
+
+def warm_up(connection: Any) -> None:
+    if not WARMUP_QUERY:
+        return
+
+    cursor = connection.cursor()
+    try:
+        cursor.execute(WARMUP_QUERY)
+        if cursor.description:
+            cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+# ============================================================
+# CONNECTION POOL
+# ============================================================
+
+class ConnectionPool:
+    """
+    Reuses connections between the phases of a script.
+
+    At most size connections are open at once; connection() waits up to
+    POOL_TIMEOUT_SECONDS for one to be returned, then raises. An idle
+    connection is pinged with SELECT 1 before it is handed out and replaced
+    if the ping fails. On return the connection is rolled back and its
+    autocommit setting restored; one that raised a transient error, or
+    cannot be reset, is closed instead of kept.
+    """
+
+    def __init__(self, connection_string: str = "", *, size: int = POOL_SIZE, **connect_kwargs: Any):
+        if size < 1:
+            raise ValueError(f"size must be at least 1, not {size}")
+
+        self.connection_string = connection_string
+        self.size = size
+        self.connect_kwargs = connect_kwargs
+        self._idle: list[tuple[Any, bool]] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _take_idle(self) -> tuple[Any, bool] | None:
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                connection, autocommit = self._idle.pop()
+
+            try:
+                cursor = connection.cursor()
+                cursor.execute("SELECT 1").fetchall()
+                cursor.close()
+                return connection, autocommit
+            except Exception:
+                _close_quietly(connection)
+
+    def _open(self) -> tuple[Any, bool]:
+        connection = connect(self.connection_string, **self.connect_kwargs)
+        return connection, bool(connection.autocommit)
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        if not self._slots.acquire(timeout=POOL_TIMEOUT_SECONDS):
+            raise RuntimeError(
+                f"No pooled connection came back within {POOL_TIMEOUT_SECONDS:g}s "
+                f"({self.size} in use). Raise CRM_SQL_POOL_SIZE or return connections sooner."
+            )
+
+        try:
+            connection, autocommit = self._take_idle() or self._open()
+        except BaseException:
+            self._slots.release()
+            raise
+
+        try:
+            yield connection
+        except Exception as exc:
+            if is_transient_error(exc):
+                _close_quietly(connection)
+            else:
+                self._reset_and_keep(connection, autocommit)
+            raise
+        else:
+            self._reset_and_keep(connection, autocommit)
+        finally:
+            self._slots.release()
+
+    def _reset_and_keep(self, connection: Any, autocommit: bool) -> None:
+        try:
+            connection.rollback()
+            if bool(connection.autocommit) != autocommit:
+                connection.autocommit = autocommit
+        except Exception:
+            _close_quietly(connection)
+            return
+
+        with self._lock:
+            self._idle.append((connection, autocommit))
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, _autocommit in idle:
+            _close_quietly(connection)
+
+
+def _close_quietly(connection: Any) -> None:
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+_pools: dict[tuple, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(connection_string: str = "", *, size: int = POOL_SIZE, **connect_kwargs: Any) -> ConnectionPool:
+    """
+    The process-wide pool for this connection string and connect() options.
+    size only applies when the pool is first created.
+    """
+    key = (connection_string, tuple(sorted(connect_kwargs.items())))
+
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            if not _pools:
+                atexit.register(close_pools)
+            pool = _pools[key] = ConnectionPool(connection_string, size=size, **connect_kwargs)
+
+    return pool
+
+
+def close_pools() -> None:
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+# ============================================================
+# FACTORY
+# ============================================================
+
+def create_local_schema(sqlite_connection: sqlite3.Connection) -> None:
+    for table_name, columns in SCHEMA.items():
+        column_sql = ",\n    ".join(column_ddl(name, column_type) for name, column_type in columns)
+        sqlite_connection.execute(f"CREATE TABLE IF NOT EXISTS dbo.[{table_name}] (\n    {column_sql}\n)")
+    sqlite_connection.commit()
+
+
+def connect(connection_string: str = "", **kwargs: Any) -> Any:
+    """
+    pyodbc.connect() for the configured backend.
+
+    With CRM_BACKEND=local the connection string is ignored and the local
+    SQLite stand-in is opened instead; autocommit is honoured. Otherwise an
+    empty connection string is built from the environment, transient
+    connection failures are retried (RETRY_ATTEMPTS, exponential backoff) and
+    WARMUP_QUERY is run on the new connection. With SQL_PROFILE the connection
+    comes back wrapped in ProfiledConnection.
+    """
+    if CRM_BACKEND not in BACKENDS:
+        raise ValueError(f"CRM_BACKEND must be one of {sorted(BACKENDS)}, not {CRM_BACKEND!r}")
+
+    if CRM_BACKEND == "local":
+        connection = LocalCrmConnection(LOCAL_DATABASE_FILE, autocommit=bool(kwargs.get("autocommit", False)))
+    elif pyodbc is None:
+        raise RuntimeError("pyodbc is not installed. Run: pip install pyodbc")
+    else:
+        connection = retry_transient(_open_sql_server, connection_string or build_connection_string(), kwargs)
+
+    return profiled(connection) if SQL_PROFILE else connection
+
+
+def raw_connect(connection_string: str = "", **kwargs: Any) -> Any:
+    """
+    A plain pyodbc connection to SQL Server, with connect()'s retry and warm-up.
+
+    For SQLAlchemy's create_engine(creator=...), whose mssql dialect and pool
+    expect the real pyodbc connection: it is never the local stand-in and
+    never wrapped for profiling, whatever CRM_BACKEND and CRM_SQL_PROFILE say.
+    """
+    if pyodbc is None:
+        raise RuntimeError("pyodbc is not installed. Run: pip install pyodbc")
+
+    return retry_transient(_open_sql_server, connection_string or build_connection_string(), kwargs)
+
+
+def _open_sql_server(connection_string: str, kwargs: dict[str, Any]) -> Any:
+    connection = pyodbc.connect(connection_string, **kwargs)
+
+    try:
+        warm_up(connection)
+    except Exception:
+        _close_quietly(connection)
+        raise
+
+    return connection
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Create or inspect the local CRM stand-in database.")
+    parser.add_argument(
+        "--database",
+        type=Path,
+        default=LOCAL_DATABASE_FILE,
+        help=f"SQLite file. Default: {LOCAL_DATABASE_FILE}",
+    )
+    parser.add_argument("--reset", action="store_true", help="Delete the file and create empty tables.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+
+    if args.reset and args.database.exists():
+        args.database.unlink()
+
+    connection = LocalCrmConnection(args.database)
+    try:
+        print(f"Local CRM database: {args.database}")
+        for table_name in SCHEMA:
+            count = connection.execute(f"SELECT COUNT(*) FROM dbo.[{table_name}]").fetchval()
+            print(f"  dbo.{table_name:34} {count:>8} rows")
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
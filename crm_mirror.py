@@ -0,0 +1,388 @@
+"""
+Local mirror of the CRM lookup tables.
+
+The migrations and importers start by reading the same reference data from
+the CRM: every Participant and LiteMember for matching people, every Session
+(with its attendance count) for matching sessions. Over the WAN that is the
+slowest part of a small import, and it is mostly the same rows every time.
+
+CrmMirror keeps the columns those lookups use in a local SQLite file laid out
+like the CRM (it is a crm_db.LocalCrmConnection database), so the scripts'
+own lookup queries run against it unchanged:
+
+    lookups = crm_mirror.lookup_cursor(cursor, "Participants", "LiteMembers")
+    participants_by_card, full_by_name = fetch_full_participants(lookups)
+
+lookup_cursor() first refreshes the named tables through the caller's cursor:
+
+* incremental   - only rows whose watermark columns (CreatedAtUtc /
+                  UpdatedAtUtc; CreatedAt for Participants) are at or after
+                  the stored watermark, less WATERMARK_OVERLAP, are fetched
+                  and upserted by primary key
+* row counts    - the local and remote COUNT(*) (and MAX of integer keys)
+                  are then compared. Rows deleted in the CRM, or written
+                  without a timestamp or with a back-dated one, make them
+                  differ and the table is reloaded in full
+* full reload   - also on the first run, with --full, and once the last full
+                  load is older than FULL_REFRESH_HOURS. Participants and
+                  LiteMembers have no update timestamp, so edits to existing
+                  rows are only picked up then
+
+The refresh reads through the caller's cursor, so it includes rows the
+caller's transaction has just written. If that transaction is rolled back,
+the next refresh finds the row counts differ and reloads.
+
+Only the columns in MIRROR_TABLES are copied; other columns are NULL in the
+mirror. With CRM_BACKEND=local or CRM_MIRROR=off, lookup_cursor() and
+lookup_connection() hand back the caller's own cursor or connection.
+
+    python crm_mirror.py            # refresh every mirrored table
+    python crm_mirror.py --full     # reload them
+
+Scripts outside the repo root import this with:
+
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+"""
+
+from __future__ import annotations
+
+import argparse
+import atexit
+import os
+import time as timer
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+import crm_db
+
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+MIRROR_FILE = Path(os.getenv("CRM_MIRROR_FILE", Path(__file__).resolve().parent / ".crm_mirror.sqlite3"))
+
+# "off" makes every script read its lookups from the CRM again.
+MIRROR_ENABLED = os.getenv("CRM_MIRROR", "on").strip().lower() not in {"0", "false", "no", "off"}
+
+# Re-fetch rows stamped this long before the watermark, for transactions that
+# committed after a later-stamped row had already been mirrored.
+WATERMARK_OVERLAP = timedelta(minutes=float(os.getenv("CRM_MIRROR_OVERLAP_MINUTES", "10")))
+
+FULL_REFRESH_HOURS = float(os.getenv("CRM_MIRROR_FULL_REFRESH_HOURS", "24"))
+
+FETCH_BATCH_SIZE = 5000
+
+STATE_TABLE = "dbo.MirrorState"
+
+
+@dataclass(frozen=True)
+class MirrorTable:
+    key: str
+    columns: tuple[str, ...]
+    watermarks: tuple[str, ...]
+    # MAX(key) is only comparable between SQL Server and SQLite for integers.
+    integer_key: bool = True
+
+
+MIRROR_TABLES: dict[str, MirrorTable] = {
+    "Participants": MirrorTable(
+        key="ParticipantID",
+        columns=(
+            "ParticipantID",
+            "SaheliCardNumber",
+            "FullName",
+            "DateOfBirth",
+            "MobileNumber",
+            "Postcode",
+            "CreatedAt",
+        ),
+        watermarks=("CreatedAt",),
+    ),
+    "LiteMembers": MirrorTable(
+        key="Id",
+        columns=(
+            "Id",
+            "MembershipId",
+            "FirstName",
+            "LastName",
+            "DateOfBirth",
+            "Phone",
+            "Postcode",
+            "EmergencyName",
+            "EmergencyPhone",
+            "CreatedAtUtc",
+        ),
+        watermarks=("CreatedAtUtc",),
+        integer_key=False,
+    ),
+    # The importers set UpdatedAtUtc when they cancel a session, so a change to
+    # IsCancelled alone is still picked up by the incremental refresh.
+    "Sessions": MirrorTable(
+        key="SessionId",
+        columns=(
+            "SessionId",
+            "VenueName",
+            "ActivityName",
+            "ActivityCategory",
+            "SessionDate",
+            "StartTime",
+            "EndTime",
+            "IsCancelled",
+            "CreatedAtUtc",
+            "UpdatedAtUtc",
+        ),
+        watermarks=("CreatedAtUtc", "UpdatedAtUtc"),
+    ),
+    # Only what the session lookups need to count attendance per session.
+    "SessionAttendance": MirrorTable(
+        key="AttendanceId",
+        columns=("AttendanceId", "SessionId", "CreatedAtUtc", "UpdatedAtUtc"),
+        watermarks=("CreatedAtUtc", "UpdatedAtUtc"),
+    ),
+}
+
+
+# ============================================================
+# MIRROR
+# ============================================================
+
+@dataclass
+class RefreshResult:
+    table: str
+    mode: str  # "incremental", "full" or "full (row counts differed)"
+    rows_fetched: int
+    local_rows: int
+    seconds: float
+
+    def describe(self) -> str:
+        return (
+            f"Mirror dbo.{self.table}: {self.mode}, {self.rows_fetched} row(s) fetched, "
+            f"{self.local_rows} local ({self.seconds:.1f}s)"
+        )
+
+
+def as_datetime(value: Any) -> Optional[datetime]:
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value
+    return crm_db.parse_datetime_text(value)
+
+
+class CrmMirror:
+    def __init__(self, mirror_file: Path | str = MIRROR_FILE):
+        self.mirror_file = Path(mirror_file)
+        self.connection = crm_db.LocalCrmConnection(self.mirror_file)
+        self.connection.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+                TableName TEXT PRIMARY KEY,
+                Watermark TEXT,
+                FullLoadAt TEXT NOT NULL,
+                RefreshedAt TEXT NOT NULL
+            )
+            """
+        )
+        self.connection.commit()
+
+    def cursor(self) -> Any:
+        return self.connection.cursor()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def _state(self, table: str) -> Optional[Any]:
+        return self.connection.execute(
+            f"SELECT Watermark, FullLoadAt FROM {STATE_TABLE} WHERE TableName = ?",
+            table,
+        ).fetchone()
+
+    def _copy_rows(self, remote: Any, table: str, spec: MirrorTable, since: Optional[datetime]) -> tuple[int, Optional[datetime]]:
+        """Upsert rows changed since `since` (all rows when None); returns (rows, newest watermark)."""
+        sql = f"SELECT {', '.join(spec.columns)} FROM dbo.{table}"
+        params: list[Any] = []
+
+        if since is not None:
+            sql += " WHERE " + " OR ".join(f"{column} >= ?" for column in spec.watermarks)
+            params = [since] * len(spec.watermarks)
+
+        remote.execute(sql, *params)
+
+        insert_sql = (
+            f"INSERT OR REPLACE INTO dbo.[{table}] ({', '.join(spec.columns)}) "
+            f"VALUES ({', '.join('?' for _ in spec.columns)})"
+        )
+        watermark_positions = [spec.columns.index(column) for column in spec.watermarks]
+        local = self.connection.cursor()
+        fetched = 0
+        newest: Optional[datetime] = None
+
+        while True:
+            rows = remote.fetchmany(FETCH_BATCH_SIZE)
+            if not rows:
+                break
+
+            values = [tuple(row) for row in rows]
+            local.executemany(insert_sql, values)
+            fetched += len(values)
+
+            for row in values:
+                for position in watermark_positions:
+                    stamp = as_datetime(row[position])
+                    if stamp is not None and (newest is None or stamp > newest):
+                        newest = stamp
+
+        return fetched, newest
+
+    @staticmethod
+    def _summary(source: Any, table: str, spec: MirrorTable) -> tuple[int, Optional[int]]:
+        max_key = f"MAX({spec.key})" if spec.integer_key else "NULL"
+        row = source.execute(f"SELECT COUNT(*) AS TotalRows, {max_key} AS MaxKey FROM dbo.{table}").fetchone()
+        return int(row[0]), None if row[1] is None else int(row[1])
+
+    def refresh_table(self, remote: Any, table: str, *, full: bool = False) -> RefreshResult:
+        spec = MIRROR_TABLES[table]
+        started = timer.perf_counter()
+        now = datetime.now()
+        state = self._state(table)
+        watermark = as_datetime(state.Watermark) if state else None
+        full_load_at = as_datetime(state.FullLoadAt) if state else None
+        mode = "full"
+
+        if state is None or watermark is None:
+            full = True
+        elif full_load_at is None or now - full_load_at > timedelta(hours=FULL_REFRESH_HOURS):
+            full = True
+
+        fetched = 0
+
+        if not full:
+            mode = "incremental"
+            fetched, newest = self._copy_rows(remote, table, spec, watermark - WATERMARK_OVERLAP)
+            watermark = max(watermark, newest) if newest else watermark
+
+            if self._summary(remote, table, spec) != self._summary(self.connection, table, spec):
+                full = True
+                mode = "full (row counts differed)"
+
+        if full:
+            self.connection.execute(f"DELETE FROM dbo.[{table}]")
+            fetched, watermark = self._copy_rows(remote, table, spec, None)
+            full_load_at = now
+
+        self.connection.execute(
+            f"INSERT OR REPLACE INTO {STATE_TABLE} (TableName, Watermark, FullLoadAt, RefreshedAt) VALUES (?, ?, ?, ?)",
+            table,
+            watermark.isoformat(" ") if watermark else None,
+            full_load_at.isoformat(" "),
+            now.isoformat(" "),
+        )
+        self.connection.commit()
+
+        local_rows = self.connection.execute(f"SELECT COUNT(*) FROM dbo.[{table}]").fetchval()
+        return RefreshResult(table, mode, fetched, int(local_rows), timer.perf_counter() - started)
+
+    def refresh(self, remote: Any, tables: Iterable[str] = MIRROR_TABLES, *, full: bool = False) -> list[RefreshResult]:
+        unknown = [table for table in tables if table not in MIRROR_TABLES]
+        if unknown:
+            raise KeyError(f"Not mirrored: {', '.join(unknown)}")
+
+        results = []
+        for table in tables:
+            try:
+                results.append(self.refresh_table(remote, table, full=full))
+            except Exception:
+                self.connection.rollback()
+                raise
+        return results
+
+
+# ============================================================
+# SCRIPT HELPERS
+# ============================================================
+
+_mirrors: dict[Path, CrmMirror] = {}
+
+
+def mirror_in_use() -> bool:
+    return MIRROR_ENABLED and crm_db.CRM_BACKEND != "local"
+
+
+def open_mirror(mirror_file: Path | str = MIRROR_FILE) -> CrmMirror:
+    """One CrmMirror per file for the whole run."""
+    path = Path(mirror_file).resolve()
+    if path not in _mirrors:
+        _mirrors[path] = CrmMirror(path)
+    return _mirrors[path]
+
+
+@atexit.register
+def close_mirrors() -> None:
+    for mirror in _mirrors.values():
+        mirror.close()
+    _mirrors.clear()
+
+
+def refresh_for_lookups(cursor: Any, tables: tuple[str, ...], full: bool) -> CrmMirror:
+    mirror = open_mirror()
+    for result in mirror.refresh(cursor, tables or tuple(MIRROR_TABLES), full=full):
+        print(result.describe())
+    return mirror
+
+
+def lookup_cursor(cursor: Any, *tables: str, full: bool = False) -> Any:
+    """
+    A cursor over the refreshed mirror for reading the named tables, or
+    `cursor` itself when the mirror is not in use.
+    """
+    if not mirror_in_use():
+        return cursor
+    return refresh_for_lookups(cursor, tables, full).cursor()
+
+
+def lookup_connection(connection: Any, *tables: str, full: bool = False) -> Any:
+    """lookup_cursor() for code that reads through a connection (e.g. pandas.read_sql)."""
+    if not mirror_in_use():
+        return connection
+    return refresh_for_lookups(connection.cursor(), tables, full).connection
+
+
+# ============================================================
+# MAIN
+# ============================================================
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Refresh the local mirror of the CRM lookup tables.")
+    parser.add_argument(
+        "--tables",
+        nargs="+",
+        choices=list(MIRROR_TABLES),
+        default=list(MIRROR_TABLES),
+        help="Tables to refresh. Default: all of them.",
+    )
+    parser.add_argument("--full", action="store_true", help="Reload the tables instead of fetching changes.")
+    parser.add_argument(
+        "--mirror",
+        type=Path,
+        default=MIRROR_FILE,
+        help=f"Mirror SQLite file. Default: {MIRROR_FILE}",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+
+    with crm_db.connect() as conn:
+        mirror = open_mirror(args.mirror)
+        for result in mirror.refresh(conn.cursor(), args.tables, full=args.full):
+            print(result.describe())
+
+    print(f"Mirror: {mirror.mirror_file}")
+
+
+if __name__ == "__main__":
+    main()
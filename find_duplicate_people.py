@@ -0,0 +1,335 @@
+"""
+Find people recorded more than once across the CRM.
+
+Tennis/analyze_duplicates.py only groups identical lower-cased names inside
+one register. This looks at everyone the registers have been imported as,
+together:
+
+* dbo.Participants          FULL members (card, name, DOB, mobile, postcode)
+* dbo.LiteMembers           LITE members created by the migrations
+* dbo.SessionAttendance     LITE identities that only exist on attendance rows
+                            (Tennis, Men's and ARCC create these), with the
+                            registers each person attended
+
+and runs a blocked similarity join over them with person_matching.PersonIndex
+(phonetic and name-token blocks, then pairwise scoring of name, phone,
+postcode and date of birth). Only pairs that share a block are scored, so tens
+of thousands of people take well under a minute rather than an n-squared
+comparison (much less with rapidfuzz installed).
+
+Pairs scoring at least --min-score are written to a CSV with their score and
+the evidence behind it, and grouped: people connected through candidate pairs
+share a GroupId, so a person entered three ways appears as one group to merge.
+
+Nothing is changed in the database.
+
+    python find_duplicate_people.py
+    python find_duplicate_people.py --min-score 0.85 --sources participants lite_members
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import time as timer
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional
+
+import crm_db
+import person_matching
+from person_matching import PersonEntry, PersonIndex
+
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+SOURCES = ("participants", "lite_members", "attendance")
+
+MIN_SCORE = person_matching.REVIEW_SCORE
+
+OUTPUT_FOLDER = Path.cwd()
+
+
+# ============================================================
+# PEOPLE
+# ============================================================
+
+@dataclass
+class Person:
+    source: str
+    source_id: str
+    name: str
+    card: str = ""
+    phone: str = ""
+    postcode: str = ""
+    dob: Any = None
+    registers: set[str] = field(default_factory=set)
+
+
+def clean(value: Any) -> str:
+    return "" if value is None else " ".join(str(value).split())
+
+
+def load_attendance_registers(cursor: Any) -> tuple[dict[str, Person], dict[str, set[str]]]:
+    """
+    LITE identities from attendance rows (latest name and phone per LiteMemberId)
+    and, for every person, the registers they attended, keyed by LiteMemberId or
+    card number.
+    """
+    sql = """
+    SELECT
+        a.AttendanceMemberKind,
+        a.LiteMemberId,
+        a.SaheliCardNumber,
+        a.MemberName,
+        a.EmergencyPhone,
+        s.ActivityName,
+        s.VenueName
+    FROM dbo.SessionAttendance a
+    LEFT JOIN dbo.Sessions s
+        ON s.SessionId = a.SessionId
+    ORDER BY a.AttendanceId DESC;
+    """
+
+    lite_people: dict[str, Person] = {}
+    registers: dict[str, set[str]] = defaultdict(set)
+
+    for row in cursor.execute(sql).fetchall():
+        register = " @ ".join(part for part in (clean(row.ActivityName), clean(row.VenueName)) if part)
+
+        if row.LiteMemberId:
+            key = str(row.LiteMemberId).upper()
+            if key not in lite_people:
+                lite_people[key] = Person(
+                    source="attendance",
+                    source_id=key,
+                    name=clean(row.MemberName),
+                    phone=clean(row.EmergencyPhone),
+                )
+        elif row.SaheliCardNumber:
+            key = clean(row.SaheliCardNumber)
+        else:
+            continue
+
+        if register:
+            registers[key].add(register)
+
+    return lite_people, registers
+
+
+def load_participants(cursor: Any) -> list[Person]:
+    sql = """
+    SELECT ParticipantID, SaheliCardNumber, FullName, DateOfBirth, MobileNumber, Postcode
+    FROM dbo.Participants;
+    """
+
+    return [
+        Person(
+            source="participants",
+            source_id=str(row.ParticipantID),
+            name=clean(row.FullName),
+            card=clean(row.SaheliCardNumber),
+            phone=clean(row.MobileNumber),
+            postcode=clean(row.Postcode),
+            dob=row.DateOfBirth,
+        )
+        for row in cursor.execute(sql).fetchall()
+    ]
+
+
+def load_lite_members(cursor: Any) -> list[Person]:
+    sql = """
+    SELECT Id, MembershipId, FirstName, LastName, DateOfBirth, Phone, EmergencyPhone, Postcode
+    FROM dbo.LiteMembers;
+    """
+
+    return [
+        Person(
+            source="lite_members",
+            source_id=str(row.Id).upper(),
+            name=clean(f"{clean(row.FirstName)} {clean(row.LastName)}"),
+            card=clean(row.MembershipId),
+            phone=clean(row.Phone) or clean(row.EmergencyPhone),
+            postcode=clean(row.Postcode),
+            dob=row.DateOfBirth,
+        )
+        for row in cursor.execute(sql).fetchall()
+    ]
+
+
+def load_people(cursor: Any, sources: tuple[str, ...]) -> list[Person]:
+    lite_from_attendance, registers = load_attendance_registers(cursor)
+    people: list[Person] = []
+
+    if "participants" in sources:
+        people.extend(load_participants(cursor))
+
+    if "lite_members" in sources:
+        people.extend(load_lite_members(cursor))
+
+    if "attendance" in sources:
+        # A LiteMember that also appears on attendance rows is one person, not a pair.
+        known_lite_ids = {person.source_id for person in people if person.source == "lite_members"}
+        people.extend(person for key, person in lite_from_attendance.items() if key not in known_lite_ids)
+
+    for person in people:
+        key = person.source_id if person.source != "participants" else person.card
+        person.registers = registers.get(key, set())
+
+    return people
+
+
+# ============================================================
+# SIMILARITY JOIN
+# ============================================================
+
+def evidence(left: PersonEntry, right: PersonEntry) -> str:
+    notes = []
+
+    if left.name == right.name:
+        notes.append("same name")
+    if left.phone and left.phone == right.phone:
+        notes.append("same phone")
+    if left.postcode and left.postcode == right.postcode:
+        notes.append("same postcode")
+    if left.dob and left.dob == right.dob:
+        notes.append("same DOB")
+    if left.dob and right.dob and left.dob != right.dob:
+        notes.append("different DOB")
+
+    return ", ".join(notes)
+
+
+def find_candidate_pairs(people: list[Person], min_score: float) -> tuple[list[tuple[Person, Person, float, str]], PersonIndex]:
+    index = PersonIndex(token_blocking=True)
+
+    for person in people:
+        index.add(person, person.name, person.phone, person.postcode, person.dob)
+
+    pairs = [
+        (left.record, right.record, score, evidence(left, right))
+        for left, right, score in index.similar_pairs(min_score)
+    ]
+    pairs.sort(key=lambda pair: pair[2], reverse=True)
+    return pairs, index
+
+
+def group_pairs(pairs: list[tuple[Person, Person, float, str]]) -> dict[int, int]:
+    """Connected components over the candidate pairs: id(person) -> group number."""
+    parent: dict[int, int] = {}
+
+    def find(item: int) -> int:
+        parent.setdefault(item, item)
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    for left, right, _score, _evidence in pairs:
+        root_left, root_right = find(id(left)), find(id(right))
+        if root_left != root_right:
+            parent[root_right] = root_left
+
+    group_numbers: dict[int, int] = {}
+    groups: dict[int, int] = {}
+
+    for left, right, _score, _evidence in pairs:
+        for person in (left, right):
+            root = find(id(person))
+            groups[id(person)] = group_numbers.setdefault(root, len(group_numbers) + 1)
+
+    return groups
+
+
+def write_pairs(path: Path, pairs: list[tuple[Person, Person, float, str]], groups: dict[int, int]) -> None:
+    def side(prefix: str, person: Person) -> dict[str, Any]:
+        return {
+            f"{prefix}Source": person.source,
+            f"{prefix}Id": person.source_id,
+            f"{prefix}Name": person.name,
+            f"{prefix}Card": person.card,
+            f"{prefix}Phone": person.phone,
+            f"{prefix}Postcode": person.postcode,
+            f"{prefix}DateOfBirth": person.dob or "",
+            f"{prefix}Registers": "; ".join(sorted(person.registers)),
+        }
+
+    rows = [
+        {
+            "GroupId": groups[id(left)],
+            "Score": round(score, 3),
+            "Evidence": notes,
+            **side("Left", left),
+            **side("Right", right),
+        }
+        for left, right, score, notes in pairs
+    ]
+    rows.sort(key=lambda row: (row["GroupId"], -row["Score"]))
+
+    with path.open("w", newline="", encoding="utf-8-sig") as handle:
+        writer = csv.DictWriter(handle, fieldnames=list(rows[0]) if rows else ["GroupId", "Score", "Evidence"])
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+# ============================================================
+# MAIN
+# ============================================================
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Find likely duplicate people across Participants, LiteMembers and registers.")
+    parser.add_argument(
+        "--sources",
+        nargs="+",
+        choices=SOURCES,
+        default=list(SOURCES),
+        help="Where to look for people. Default: all of them.",
+    )
+    parser.add_argument(
+        "--min-score",
+        type=float,
+        default=MIN_SCORE,
+        help=f"Lowest pair score to report, 0-1. Default: {MIN_SCORE}",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="CSV to write. Default: duplicate_people_<timestamp>.csv in the current folder.",
+    )
+    return parser.parse_args()
+
+
+def main(sources: tuple[str, ...] = SOURCES, min_score: float = MIN_SCORE, output: Optional[Path] = None) -> Path:
+    started = timer.perf_counter()
+
+    with crm_db.connect() as conn:
+        people = load_people(conn.cursor(), sources)
+
+    loaded = timer.perf_counter()
+    pairs, index = find_candidate_pairs(people, min_score)
+    groups = group_pairs(pairs)
+    joined = timer.perf_counter()
+
+    output = output or OUTPUT_FOLDER / f"duplicate_people_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    write_pairs(output, pairs, groups)
+
+    by_source = defaultdict(int)
+    for person in people:
+        by_source[person.source] += 1
+
+    print("People loaded: " + ", ".join(f"{source} {count}" for source, count in sorted(by_source.items())))
+    print(f"Blocks: {len(index.blocks)} ({len(index.oversized_blocks())} over {person_matching.MAX_BLOCK_SIZE} skipped)")
+    print(f"Candidate pairs (score >= {min_score}): {len(pairs)} in {len(set(groups.values()))} groups")
+    print(f"Load {loaded - started:.1f}s, similarity join {joined - loaded:.1f}s")
+    print(f"Written to {output}")
+    return output
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    main(tuple(args.sources), args.min_score, args.output)
@@ -0,0 +1,335 @@
+"""
+Block reservation for manually assigned CRM keys.
+
+Where dbo.Sessions.SessionId or dbo.SessionAttendance.AttendanceId is not an
+IDENTITY column, and for LITE-n member display ids, the importers used to read
+MAX(id) once and count up in Python. Two importers running at the same time
+then hand out the same ids, and every insert has to wait for the counter.
+
+IdAllocator instead reserves a contiguous block of values from one row of
+dbo.IdAllocations (Name, NextValue) with a single UPDATE ... OUTPUT:
+
+    allocator = session_id_allocator(cursor)
+    session_id = allocator.next()             # one id, from the current block
+    ids = allocator.take(len(new_sessions))   # a whole batch, for executemany
+
+Each reservation also looks at MAX() of the real column, so ids written by
+scripts that do not use the allocator are never handed out again. That
+read runs on the importer's own cursor with a READUNCOMMITTED table hint:
+it sees the importer's own pending rows, and it never waits on rows another
+import has not committed yet. A dirty row that is later rolled back only
+raises the floor, which costs a gap, never a duplicate.
+
+Given the importer's connection string, the allocator reserves on a
+connection of its own in autocommit mode, so each reservation is a short
+transaction of its own and the allocation row is locked for one UPDATE,
+not for the whole import. Concurrent importers then interleave their
+blocks instead of running one after another. The price is gaps: ids
+reserved by an import that rolls back are not reused. release() hands back
+the unused tail of the last block (if nobody has reserved after it) and
+closes the connection.
+
+Without a connection string (and always on the local SQLite backend, which
+allows one writer at a time) reservations run on the importer's cursor and
+belong to its transaction: ids stay gap-free, but a second importer waits
+on the allocation row until the first commits, so such imports are
+serialised.
+
+The table is created by the one-off create_id_allocations.py migration;
+importers do not run DDL and stop with a clear error if it is missing.
+CRM_ID_ALLOCATION=max keeps the old behaviour (MAX()+1 per reservation, no
+allocation table), for databases where the table cannot be created.
+
+Scripts outside the repo root import this with:
+
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Any, Optional
+
+import crm_db
+
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+ALLOCATION_TABLE = "dbo.IdAllocations"
+
+# Values reserved per round trip by next(); take(n) reserves at least n.
+ID_BLOCK_SIZE = int(os.getenv("CRM_ID_BLOCK_SIZE", "100"))
+
+# "table" reserves from ALLOCATION_TABLE; "max" is the old MAX()+1 scan.
+ID_ALLOCATION_MODE = os.getenv("CRM_ID_ALLOCATION", "table").strip().lower()
+
+# Lowest value that is still free, per allocation name. {hint} is the table
+# hint from floor_value().
+FLOOR_QUERIES = {
+    "Sessions.SessionId": (
+        "SELECT ISNULL(MAX(SessionId), 0) + 1 AS NextValue FROM dbo.Sessions{hint};"
+    ),
+    "SessionAttendance.AttendanceId": (
+        "SELECT ISNULL(MAX(AttendanceId), 0) + 1 AS NextValue FROM dbo.SessionAttendance{hint};"
+    ),
+    "LITE.MemberDisplayId": """
+    SELECT ISNULL(MAX(TRY_CONVERT(int, REPLACE(MemberDisplayId, 'LITE-', ''))), 0) + 1 AS NextValue
+    FROM dbo.SessionAttendance{hint}
+    WHERE MemberDisplayId LIKE 'LITE-%';
+    """,
+}
+
+
+# ============================================================
+# ALLOCATION TABLE
+# ============================================================
+
+def ensure_allocation_table(cursor: Any) -> None:
+    """Fail early if the allocation table has not been created by the migration."""
+    row = cursor.execute("SELECT OBJECT_ID(?) AS ObjectId;", ALLOCATION_TABLE).fetchone()
+    if row and row.ObjectId is not None:
+        return
+
+    raise RuntimeError(
+        f"{ALLOCATION_TABLE} does not exist. Create it once with "
+        "python create_id_allocations.py (needs CREATE TABLE rights), "
+        "or set CRM_ID_ALLOCATION=max to use MAX()+1 without it."
+    )
+
+
+def floor_value(cursor: Any, name: str) -> int:
+    """
+    MAX()+1 of the column behind name: the lowest value no row uses yet.
+
+    Reads uncommitted rows on SQL Server, so it neither blocks on nor misses
+    ids another import has inserted but not committed. The local backend
+    has one writer at a time and no table hints.
+    """
+    hint = "" if crm_db.CRM_BACKEND == "local" else " WITH (READUNCOMMITTED)"
+    return int(cursor.execute(FLOOR_QUERIES[name].format(hint=hint)).fetchone().NextValue)
+
+
+def seed_allocation_row(cursor: Any, name: str) -> None:
+    """
+    Add the row for name if it is missing. HOLDLOCK keeps the range locked
+    between the existence check and the insert, so two importers seeding the
+    same name at once cannot both insert it. The local backend has one
+    writer at a time and no MERGE.
+    """
+    if crm_db.CRM_BACKEND == "local":
+        cursor.execute(
+            f"""
+            INSERT INTO {ALLOCATION_TABLE} (Name, NextValue)
+            SELECT ?, 0
+            WHERE NOT EXISTS (SELECT 1 FROM {ALLOCATION_TABLE} WHERE Name = ?);
+            """,
+            name,
+            name,
+        )
+        return
+
+    cursor.execute(
+        f"""
+        MERGE {ALLOCATION_TABLE} WITH (HOLDLOCK) AS target
+        USING (SELECT ? AS Name) AS source
+        ON target.Name = source.Name
+        WHEN NOT MATCHED THEN
+            INSERT (Name, NextValue) VALUES (source.Name, 0);
+        """,
+        name,
+    )
+
+
+def reserve_block(cursor: Any, name: str, count: int, floor_cursor: Any = None) -> int:
+    """
+    Reserve count consecutive values for name and return the first.
+
+    The floor is read on floor_cursor (default: cursor), which should be the
+    connection that inserts the rows; cursor only runs the reservation.
+    """
+    if count < 1:
+        raise ValueError(f"count must be at least 1, not {count}")
+
+    floor = floor_value(floor_cursor if floor_cursor is not None else cursor, name)
+
+    if ID_ALLOCATION_MODE == "max":
+        return floor
+
+    seed_allocation_row(cursor, name)
+
+    row = cursor.execute(
+        f"""
+        UPDATE {ALLOCATION_TABLE}
+        SET NextValue = CASE WHEN NextValue >= ? THEN NextValue ELSE ? END + ?
+        OUTPUT INSERTED.NextValue
+        WHERE Name = ?;
+        """,
+        floor,
+        floor,
+        count,
+        name,
+    ).fetchone()
+
+    return int(row.NextValue) - count
+
+
+def release_block(cursor: Any, name: str, next_unused: int, block_end: int) -> None:
+    """Hand back [next_unused, block_end) if nothing was reserved after it."""
+    if ID_ALLOCATION_MODE == "max" or next_unused >= block_end:
+        return
+
+    cursor.execute(
+        f"""
+        UPDATE {ALLOCATION_TABLE}
+        SET NextValue = ?
+        WHERE Name = ?
+          AND NextValue = ?;
+        """,
+        next_unused,
+        name,
+        block_end,
+    )
+
+
+# ============================================================
+# ALLOCATOR
+# ============================================================
+
+class IdAllocator:
+    """
+    Hands out values for one allocation name from reserved blocks.
+
+    With connection_string, blocks are reserved on a separate autocommit
+    connection (see the module docstring); otherwise on cursor, inside the
+    caller's transaction. The MAX() floor is always read on cursor. Not thread-safe; use one allocator per cursor.
+    """
+
+    def __init__(
+        self,
+        cursor: Any,
+        name: str,
+        *,
+        block_size: int = ID_BLOCK_SIZE,
+        connection_string: Optional[str] = None,
+    ):
+        if name not in FLOOR_QUERIES:
+            raise KeyError(f"Unknown allocation name: {name}")
+
+        self.cursor = cursor
+        self.name = name
+        self.block_size = block_size
+        self.connection_string = connection_string if crm_db.CRM_BACKEND != "local" else None
+        self._connection: Any = None
+        self._start = self._next = self._end = 0
+
+        if ID_ALLOCATION_MODE != "max":
+            ensure_allocation_table(self._reservation_cursor())
+
+    def _reservation_cursor(self) -> Any:
+        if self.connection_string is None or ID_ALLOCATION_MODE == "max":
+            return self.cursor
+
+        if self._connection is None:
+            self._connection = crm_db.connect(self.connection_string)
+            self._connection.autocommit = True
+        return self._connection.cursor()
+
+    def _reserve(self, count: int) -> None:
+        # Values already handed out may not be inserted yet, so MAX() alone can be behind.
+        handed_out = self._next
+        self._release_tail()
+        start = reserve_block(self._reservation_cursor(), self.name, count, floor_cursor=self.cursor)
+        self._start = self._next = max(start, handed_out)
+        self._end = self._next + count
+
+    def _release_tail(self) -> None:
+        if self._next < self._end:
+            release_block(self._reservation_cursor(), self.name, self._next, self._end)
+        self._start = self._next = self._end = 0
+
+    def peek(self) -> int:
+        """The value next() will return, reserving a block if needed."""
+        if self._next >= self._end:
+            self._reserve(self.block_size)
+        return self._next
+
+    def next(self) -> int:
+        value = self.peek()
+        self._next += 1
+        return value
+
+    def take(self, count: int) -> range:
+        """count consecutive values, e.g. to pre-assign ids for a batch insert."""
+        if count <= 0:
+            return range(0)
+
+        if self._end - self._next < count:
+            self._reserve(max(count, self.block_size))
+
+        values = range(self._next, self._next + count)
+        self._next += count
+        return values
+
+    def give_back_from(self, value: int) -> None:
+        """Make value and everything after it from the last take() available again."""
+        if not self._start <= value <= self._next:
+            raise ValueError(f"{value} was not handed out from the current {self.name} block")
+        self._next = value
+
+    def release(self) -> None:
+        """
+        Return the unused rest of the current block and close the reservation
+        connection, if any. Call before committing.
+        """
+        try:
+            self._release_tail()
+        finally:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+class PreviewAllocator:
+    """
+    IdAllocator stand-in for dry runs: counts up from start and reserves
+    nothing, so the values shown are what an apply run would probably get.
+    """
+
+    def __init__(self, start: int):
+        self._next = start
+
+    def peek(self) -> int:
+        return self._next
+
+    def next(self) -> int:
+        value = self._next
+        self._next += 1
+        return value
+
+    def take(self, count: int) -> range:
+        values = range(self._next, self._next + max(count, 0))
+        self._next = values.stop
+        return values
+
+    def release(self) -> None:
+        pass
+
+
+def session_id_allocator(cursor: Any, **kwargs: Any) -> IdAllocator:
+    return IdAllocator(cursor, "Sessions.SessionId", **kwargs)
+
+
+def attendance_id_allocator(cursor: Any, **kwargs: Any) -> IdAllocator:
+    return IdAllocator(cursor, "SessionAttendance.AttendanceId", **kwargs)
+
+
+def lite_number_allocator(cursor: Any, **kwargs: Any) -> IdAllocator:
+    return IdAllocator(cursor, "LITE.MemberDisplayId", **kwargs)
+
+
+def release_all(*allocators: IdAllocator | PreviewAllocator | None) -> None:
+    for allocator in allocators:
+        if allocator is not None:
+            allocator.release()
@@ -0,0 +1,234 @@
+"""
+Per-sheet watermarks for incremental register imports.
+
+A register workbook grows by a few rows a month, but every importer used to
+re-process every sheet. ImportState remembers, per importer and sheet, a
+hash of the rows that were imported and the last Excel row they covered.
+On the next run each sheet falls into one of three cases:
+
+* unchanged       - same content hash, the sheet is skipped entirely
+* rows appended   - the first row_count rows still hash to the stored value,
+                    so only rows after last_source_row are imported
+* anything else   - earlier rows were edited, deleted or re-ordered, so the
+                    whole sheet is imported again (the importers' duplicate
+                    checks keep that safe)
+
+Rows are hashed cell by cell with type and repr, so 1 and "1" differ.
+Trailing blank rows and cells are ignored, so pre-formatted empty rows at the
+bottom of a sheet do not count as content.
+
+Watermarks are staged by plan_sheet() and only written by save(), which the
+importers call after the database transaction has committed. The store is a
+small SQLite file shared by all importers (one row per importer and sheet).
+
+Scripts outside the repo root import this with:
+
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+from register_parsing import is_nan
+
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+DEFAULT_STATE_FILE = Path(
+    os.getenv("REGISTER_IMPORT_STATE_FILE", Path(__file__).resolve().parent / ".import_state.sqlite3")
+)
+
+CELL_SEPARATOR = "\x1f"
+
+
+# ============================================================
+# ROW FINGERPRINTS
+# ============================================================
+
+def is_blank_cell(value: Any) -> bool:
+    if value is None or is_nan(value):
+        return True
+    return isinstance(value, str) and not value.strip()
+
+
+def row_digest(values: Iterable[Any]) -> str:
+    """SHA-1 of one row's cells; "" for a row with no content."""
+    tokens = ["" if is_blank_cell(value) else f"{type(value).__name__}:{value!r}" for value in values]
+
+    while tokens and not tokens[-1]:
+        tokens.pop()
+
+    if not tokens:
+        return ""
+
+    return hashlib.sha1(CELL_SEPARATOR.join(tokens).encode("utf-8")).hexdigest()
+
+
+def fingerprint_rows(rows: Iterable[Iterable[Any]]) -> list[str]:
+    """Row digests in sheet order, with trailing blank rows dropped."""
+    digests = [row_digest(values) for values in rows]
+
+    while digests and not digests[-1]:
+        digests.pop()
+
+    return digests
+
+
+def content_hash(row_digests: list[str]) -> str:
+    return hashlib.sha256("\n".join(row_digests).encode("ascii")).hexdigest()
+
+
+# ============================================================
+# STATE STORE
+# ============================================================
+
+@dataclass(frozen=True)
+class SheetWatermark:
+    content_hash: str
+    row_count: int
+    last_source_row: int
+
+
+class ImportState:
+    """
+    Watermarks for one importer, loaded once and written back by save().
+
+    With incremental=False every sheet is planned for a full import, but the
+    new watermarks are still recorded so a later incremental run can use them.
+    plan_sheet() does no I/O, so it is safe to call from a parser thread.
+    """
+
+    def __init__(self, importer: str, *, incremental: bool = True, path: Path | str | None = None):
+        self.importer = importer
+        self.incremental = incremental
+        self.path = Path(path) if path is not None else DEFAULT_STATE_FILE
+        self._stored = self._load()
+        self._pending: dict[str, SheetWatermark] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path)
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sheet_watermarks (
+                importer TEXT NOT NULL,
+                sheet_name TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                row_count INTEGER NOT NULL,
+                last_source_row INTEGER NOT NULL,
+                updated_at TEXT NOT NULL,
+                PRIMARY KEY (importer, sheet_name)
+            )
+            """
+        )
+        return conn
+
+    def _load(self) -> dict[str, SheetWatermark]:
+        if not self.path.exists():
+            return {}
+
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                """
+                SELECT sheet_name, content_hash, row_count, last_source_row
+                FROM sheet_watermarks
+                WHERE importer = ?
+                """,
+                (self.importer,),
+            ).fetchall()
+        finally:
+            conn.close()
+
+        return {
+            sheet_name: SheetWatermark(stored_hash, row_count, last_source_row)
+            for sheet_name, stored_hash, row_count, last_source_row in rows
+        }
+
+    def plan_sheet(self, sheet_name: str, row_digests: list[str], first_source_row: int = 1) -> Optional[int]:
+        """
+        Stage the new watermark for a sheet and return the last Excel row that
+        is already imported: rows after it need importing, 0 means all of them.
+        None means the sheet is unchanged and can be skipped.
+
+        row_digests comes from fingerprint_rows() over the sheet's rows starting
+        at Excel row first_source_row (header rows included).
+        """
+        new_hash = content_hash(row_digests)
+        previous = self._stored.get(sheet_name)
+
+        if self.incremental and previous is not None and previous.content_hash == new_hash:
+            return None
+
+        self._pending[sheet_name] = SheetWatermark(
+            content_hash=new_hash,
+            row_count=len(row_digests),
+            last_source_row=first_source_row + len(row_digests) - 1,
+        )
+
+        if not self.incremental or previous is None:
+            return 0
+
+        if (
+            previous.row_count <= len(row_digests)
+            and content_hash(row_digests[:previous.row_count]) == previous.content_hash
+        ):
+            return previous.last_source_row
+
+        return 0
+
+    def discard(self, sheet_name: str) -> None:
+        """
+        Drop the staged watermark for a sheet, e.g. one with rows that failed to
+        import, so the next incremental run tries its new rows again.
+        """
+        self._pending.pop(sheet_name, None)
+
+    def save(self) -> None:
+        """Write the staged watermarks. Call only after the database commit."""
+        if not self._pending:
+            return
+
+        updated_at = datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    """
+                    INSERT INTO sheet_watermarks (
+                        importer, sheet_name, content_hash, row_count, last_source_row, updated_at
+                    )
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (importer, sheet_name) DO UPDATE SET
+                        content_hash = excluded.content_hash,
+                        row_count = excluded.row_count,
+                        last_source_row = excluded.last_source_row,
+                        updated_at = excluded.updated_at
+                    """,
+                    [
+                        (
+                            self.importer,
+                            sheet_name,
+                            watermark.content_hash,
+                            watermark.row_count,
+                            watermark.last_source_row,
+                            updated_at,
+                        )
+                        for sheet_name, watermark in self._pending.items()
+                    ],
+                )
+        finally:
+            conn.close()
+
+        self._stored.update(self._pending)
+        self._pending.clear()
@@ -0,0 +1,459 @@
+"""
+Fuzzy person matching for LITE members and duplicate detection.
+
+Exact name keys treat "Fatima Begum" and "Fatima  Begam" as two people, and
+comparing every new name against every stored one does not scale once there
+are tens of thousands of LiteMembers. PersonIndex does both jobs:
+
+* blocking  - each name is filed under a few cheap keys: its phonetic
+              signature (a Soundex-style code per name token, order-free) and
+              initial + phonetic code of the first and last tokens. A lookup
+              only scores the people that share at least one key with it.
+* scoring   - within the block, name similarity (edit distance over the
+              normalised and the token-sorted name) adjusted by phone and
+              postcode agreement, in [0, 1].
+* decision  - one clear candidate at or above AUTO_LINK_SCORE is "linked",
+              provided its name is identical after normalisation or its
+              phone, postcode or DOB agrees: a one-letter difference alone
+              (Aisha / Asha Khan) is often a different person. A weaker or
+              uncorroborated best candidate, or two candidates within
+              AMBIGUITY_MARGIN of each other, is "review": the caller should
+              record it for a person to check rather than link it.
+
+Callers keep their own exact lookups and only ask PersonIndex when those miss.
+
+similar_pairs() is the same idea as a self-join: every pair of people that
+shares a block is scored once, so finding duplicates costs the sum of the
+squared block sizes instead of n squared. An index built with
+token_blocking=True also blocks on each whole name token, which finds more
+pairs at the cost of larger blocks.
+
+Scripts outside the repo root import this with:
+
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from collections import defaultdict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Iterator, Optional
+
+try:
+    from rapidfuzz.distance import Levenshtein as rapidfuzz_levenshtein
+except ModuleNotFoundError:
+    rapidfuzz_levenshtein = None
+
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+AUTO_LINK_SCORE = 0.90
+REVIEW_SCORE = 0.75
+
+# Two candidates this close to each other are ambiguous, however high they score.
+AMBIGUITY_MARGIN = 0.05
+
+DOB_MATCH_BONUS = 0.05
+DOB_MISMATCH_PENALTY = 0.15
+PHONE_MATCH_BONUS = 0.08
+PHONE_MISMATCH_PENALTY = 0.10
+POSTCODE_MATCH_BONUS = 0.04
+POSTCODE_MISMATCH_PENALTY = 0.04
+
+# Blocks larger than this (e.g. initial + a very common surname) are not used
+# on their own; the other keys of the name still find its candidates.
+MAX_BLOCK_SIZE = 500
+
+# Honorifics that registers add inconsistently. Bibi / Bi are surnames in
+# these registers, so they stay part of the name.
+NAME_STOP_WORDS = {"mr", "mrs", "ms", "miss", "dr"}
+
+
+# ============================================================
+# NORMALISATION
+# ============================================================
+
+NAME_JUNK_RE = re.compile(r"[^a-z0-9 ]+")
+WHITESPACE_RE = re.compile(r"\s+")
+DIGITS_RE = re.compile(r"\d+")
+
+# Spellings that sound the same in transliterated names.
+PHONETIC_DIGRAPHS = [
+    ("ph", "f"),
+    ("kh", "k"),
+    ("gh", "g"),
+    ("bh", "b"),
+    ("dh", "d"),
+    ("th", "t"),
+    ("sh", "s"),
+    ("ck", "k"),
+    ("q", "k"),
+    ("w", "v"),
+]
+
+SOUNDEX_CODES = {
+    **dict.fromkeys("bfpv", "1"),
+    **dict.fromkeys("cgjkqsxz", "2"),
+    **dict.fromkeys("dt", "3"),
+    "l": "4",
+    **dict.fromkeys("mn", "5"),
+    "r": "6",
+}
+
+
+@lru_cache(maxsize=65536)
+def normalise_person_name(value: Optional[str]) -> str:
+    """Lower-case ASCII letters, digits and single spaces, without honorifics."""
+    if not value:
+        return ""
+
+    text = unicodedata.normalize("NFKD", str(value)).encode("ascii", "ignore").decode("ascii").lower()
+    text = NAME_JUNK_RE.sub(" ", text.replace("&", " and "))
+    tokens = [token for token in WHITESPACE_RE.split(text) if token and token not in NAME_STOP_WORDS]
+    return " ".join(tokens)
+
+
+def normalise_phone(value: Optional[str]) -> str:
+    """The last 10 digits, so 07700 900123 and +44 7700 900123 agree."""
+    digits = re.sub(r"\D", "", str(value or ""))
+    return digits[-10:] if len(digits) >= 10 else ""
+
+
+def normalise_postcode(value: Optional[str]) -> str:
+    return re.sub(r"[^A-Z0-9]", "", str(value or "").upper())
+
+
+@lru_cache(maxsize=65536)
+def phonetic_code(token: str) -> str:
+    """
+    Soundex-style code for one name token: first letter (any vowel as "A")
+    and up to three consonant-class digits, after folding common
+    transliteration digraphs. Begum / Begam and Fatima / Fathima agree.
+    """
+    if not token:
+        return ""
+
+    for spelling, sound in PHONETIC_DIGRAPHS:
+        token = token.replace(spelling, sound)
+
+    first = "A" if token[0] in "aeiouy" else token[0].upper()
+    digits: list[str] = []
+    previous = SOUNDEX_CODES.get(token[0], "")
+
+    for char in token[1:]:
+        code = SOUNDEX_CODES.get(char, "")
+        if code and code != previous:
+            digits.append(code)
+            if len(digits) == 3:
+                break
+        # h and y do not separate equal codes; vowels do.
+        if char not in "hy":
+            previous = code
+
+    return first + "".join(digits).ljust(3, "0")
+
+
+def normalise_dob(value: Any) -> str:
+    if value is None or value == "":
+        return ""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()[:10]
+    return str(value).strip()[:10]
+
+
+def block_keys(normalised_name: str, *, token_blocking: bool = False) -> set[str]:
+    tokens = normalised_name.split()
+    if not tokens:
+        return set()
+
+    codes = [phonetic_code(token) for token in tokens]
+    keys = {"P:" + "+".join(sorted(codes))}
+
+    if len(tokens) > 1:
+        keys.add(f"F:{codes[0]}:{tokens[-1][0]}")
+        keys.add(f"L:{codes[-1]}:{tokens[0][0]}")
+
+    if token_blocking:
+        keys.update(f"T:{token}" for token in tokens if len(token) >= 3)
+
+    return keys
+
+
+# ============================================================
+# SCORING
+# ============================================================
+
+def levenshtein(a: str, b: str, max_distance: Optional[int] = None) -> int:
+    """
+    Edit distance. With max_distance, anything further apart comes back as
+    max_distance + 1 as soon as that is certain, which is most pairs in a block.
+    """
+    if max_distance is not None and abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    if rapidfuzz_levenshtein is not None:
+        return rapidfuzz_levenshtein.distance(a, b, score_cutoff=max_distance)
+
+    if len(a) < len(b):
+        a, b = b, a
+
+    if max_distance is not None:
+        return bounded_levenshtein(a, b, max_distance)
+
+    previous = list(range(len(b) + 1))
+
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            ))
+        previous = current
+
+    return previous[-1]
+
+
+def bounded_levenshtein(a: str, b: str, max_distance: int) -> int:
+    """
+    Edit distance capped at max_distance + 1. Only the diagonal band of
+    width 2 * max_distance + 1 can stay under the cap, so only it is filled in.
+    """
+    over = max_distance + 1
+    length_b = len(b)
+    previous = [j if j <= max_distance else over for j in range(length_b + 1)]
+
+    for i, char_a in enumerate(a, start=1):
+        current = [over] * (length_b + 1)
+        if i <= max_distance:
+            current[0] = i
+        row_best = current[0]
+
+        for j in range(max(1, i - max_distance), min(length_b, i + max_distance) + 1):
+            value = previous[j - 1] + (char_a != b[j - 1])
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            if current[j - 1] + 1 < value:
+                value = current[j - 1] + 1
+            if value > over:
+                value = over
+            current[j] = value
+            if value < row_best:
+                row_best = value
+
+        if row_best > max_distance:
+            return over
+        previous = current
+
+    return previous[length_b]
+
+
+def name_similarity(a: str, b: str, min_similarity: float = 0.0) -> float:
+    """
+    1 - edit distance / length, best of as-written and token-sorted order.
+    Anything below min_similarity scores 0.0, which is cheaper to establish.
+    """
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+    if min_similarity > 1.0:
+        return 0.0
+    # "Guest 1" and "Guest 2" are different people however close the spelling.
+    if DIGITS_RE.findall(a) != DIGITS_RE.findall(b):
+        return 0.0
+
+    def ratio(x: str, y: str) -> float:
+        length = max(len(x), len(y))
+        max_distance = int((1.0 - min_similarity) * length + 1e-9)
+        distance = levenshtein(x, y, max_distance)
+        return 0.0 if distance > max_distance else 1.0 - distance / length
+
+    sorted_a = " ".join(sorted(a.split()))
+    sorted_b = " ".join(sorted(b.split()))
+    best = ratio(a, b)
+    if sorted_a != a or sorted_b != b:
+        best = max(best, ratio(sorted_a, sorted_b))
+    return best
+
+
+@dataclass(frozen=True)
+class PersonEntry:
+    record: Any
+    name: str
+    phone: str
+    postcode: str
+    dob: str = ""
+
+
+def score_pair(left: PersonEntry, right: PersonEntry, min_score: float = 0.0) -> float:
+    """
+    Name similarity adjusted by phone, postcode and DOB agreement. Pairs that
+    cannot reach min_score score 0.0 without a full edit distance.
+    """
+    adjustment = 0.0
+
+    if left.phone and right.phone:
+        adjustment += PHONE_MATCH_BONUS if left.phone == right.phone else -PHONE_MISMATCH_PENALTY
+
+    if left.postcode and right.postcode:
+        adjustment += POSTCODE_MATCH_BONUS if left.postcode == right.postcode else -POSTCODE_MISMATCH_PENALTY
+
+    if left.dob and right.dob:
+        adjustment += DOB_MATCH_BONUS if left.dob == right.dob else -DOB_MISMATCH_PENALTY
+
+    similarity = name_similarity(left.name, right.name, min_score - adjustment)
+    if similarity == 0.0:
+        return 0.0
+
+    return max(0.0, min(1.0, similarity + adjustment))
+
+
+def corroborated(probe: PersonEntry, entry: PersonEntry) -> bool:
+    """Same normalised name, or a phone, postcode or DOB both sides have and agree on."""
+    return (
+        probe.name == entry.name
+        or bool(probe.phone and probe.phone == entry.phone)
+        or bool(probe.postcode and probe.postcode == entry.postcode)
+        or bool(probe.dob and probe.dob == entry.dob)
+    )
+
+
+# ============================================================
+# INDEX
+# ============================================================
+
+@dataclass(frozen=True)
+class ScoredCandidate:
+    record: Any
+    name: str
+    score: float
+
+
+@dataclass
+class MatchResult:
+    decision: str  # "linked", "review" or "none"
+    record: Any = None
+    score: float = 0.0
+    candidates: list[ScoredCandidate] = field(default_factory=list)
+
+    def describe(self, limit: int = 3) -> str:
+        return "; ".join(f"{candidate.name} ({candidate.score:.2f})" for candidate in self.candidates[:limit])
+
+
+class PersonIndex:
+    """Blocked index of people; records are whatever the caller wants back."""
+
+    def __init__(self, *, token_blocking: bool = False) -> None:
+        self.token_blocking = token_blocking
+        self.entries: list[PersonEntry] = []
+        self.blocks: dict[str, list[int]] = defaultdict(list)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(
+        self,
+        record: Any,
+        name: Optional[str],
+        phone: Optional[str] = None,
+        postcode: Optional[str] = None,
+        dob: Any = None,
+    ) -> None:
+        normalised = normalise_person_name(name)
+        if not normalised:
+            return
+
+        position = len(self.entries)
+        self.entries.append(
+            PersonEntry(record, normalised, normalise_phone(phone), normalise_postcode(postcode), normalise_dob(dob))
+        )
+
+        for key in block_keys(normalised, token_blocking=self.token_blocking):
+            self.blocks[key].append(position)
+
+    def candidate_positions(self, normalised_name: str) -> set[int]:
+        positions: set[int] = set()
+        oversized: list[list[int]] = []
+
+        for key in block_keys(normalised_name, token_blocking=self.token_blocking):
+            block = self.blocks.get(key)
+            if not block:
+                continue
+            if len(block) > MAX_BLOCK_SIZE:
+                oversized.append(block)
+            else:
+                positions.update(block)
+
+        # Fall back to the smallest oversized block rather than finding nothing.
+        if not positions and oversized:
+            positions.update(min(oversized, key=len))
+
+        return positions
+
+    def match(
+        self,
+        name: Optional[str],
+        phone: Optional[str] = None,
+        postcode: Optional[str] = None,
+        dob: Any = None,
+    ) -> MatchResult:
+        probe = PersonEntry(
+            None, normalise_person_name(name), normalise_phone(phone), normalise_postcode(postcode), normalise_dob(dob)
+        )
+        if not probe.name:
+            return MatchResult("none")
+
+        scored_entries = sorted(
+            (
+                (score_pair(probe, entry, REVIEW_SCORE), entry)
+                for entry in (self.entries[position] for position in self.candidate_positions(probe.name))
+            ),
+            key=lambda item: item[0],
+            reverse=True,
+        )
+        scored_entries = [(score, entry) for score, entry in scored_entries if score >= REVIEW_SCORE]
+        scored = [ScoredCandidate(entry.record, entry.name, score) for score, entry in scored_entries]
+
+        if not scored:
+            return MatchResult("none")
+
+        best = scored[0]
+        clear = len(scored) == 1 or scored[1].score < best.score - AMBIGUITY_MARGIN
+
+        if best.score >= AUTO_LINK_SCORE and clear and corroborated(probe, scored_entries[0][1]):
+            return MatchResult("linked", best.record, best.score, scored)
+
+        return MatchResult("review", None, best.score, scored)
+
+    def similar_pairs(self, min_score: float = REVIEW_SCORE) -> Iterator[tuple[PersonEntry, PersonEntry, float]]:
+        """
+        Every pair of entries that shares a block and scores at least
+        min_score, each pair once. Blocks over MAX_BLOCK_SIZE are skipped;
+        see oversized_blocks().
+        """
+        seen: set[tuple[int, int]] = set()
+
+        for block in self.blocks.values():
+            if len(block) < 2 or len(block) > MAX_BLOCK_SIZE:
+                continue
+
+            for index, left in enumerate(block):
+                for right in block[index + 1:]:
+                    pair = (left, right) if left < right else (right, left)
+                    if pair in seen:
+                        continue
+                    seen.add(pair)
+
+                    score = score_pair(self.entries[pair[0]], self.entries[pair[1]], min_score)
+                    if score >= min_score:
+                        yield self.entries[pair[0]], self.entries[pair[1]], score
+
+    def oversized_blocks(self) -> dict[str, int]:
+        return {key: len(block) for key, block in self.blocks.items() if len(block) > MAX_BLOCK_SIZE}
@@ -0,0 +1,322 @@
+"""
+Shared parsing helpers for the register importers.
+
+Registers repeat the same few dozen time strings ("10am-11am", "9.30 - 10.30")
+thousands of times, so the per-cell parsers in the importers are wrapped with
+an LRU memo and can be run over a whole column with parse_column(), which
+parses each distinct value once and maps the results back. Date columns go
+through normalise_date_column(), which converts a whole column at once.
+
+Each importer keeps its own time-range rules (they differ on edge cases and
+changing them would change imported data). What is shared here:
+
+* memoised()      - LRU memo for per-cell parsers, typed so 1, 1.0 and True stay distinct
+* parse_column()  - vectorised entry point, O(unique values) parser calls
+* parse_clock()   - the common "h[:mm]" + am/pm tail used by several parsers
+* precompiled patterns for the regexes every parser runs
+* normalise_date_column() - column-level Excel date conversion with a batch
+  report of the cells that did not parse
+
+Scripts outside the repo root import this with:
+
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime
+from functools import lru_cache, wraps
+import re
+from typing import Any, Callable, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+# Distinct cell values remembered per parser. Registers rarely have more than
+# a few hundred distinct time strings, so this never evicts in practice.
+PARSER_MEMO_SIZE = 4096
+
+
+# ============================================================
+# PRECOMPILED PATTERNS
+# ============================================================
+
+WHITESPACE_RE = re.compile(r"\s+")
+DASH_TRANSLATION = str.maketrans({"–": "-", "—": "-"})
+
+# "9", "09:30", "9:5" after am/pm has been stripped.
+CLOCK_RE = re.compile(r"(\d{1,2})(?::(\d{1,2}))?")
+
+AM_SUFFIX_RE = re.compile(r"a\s*\.?\s*m\.?")
+PM_SUFFIX_RE = re.compile(r"p\s*\.?\s*m\.?")
+ENDS_WITH_AM_PM_RE = re.compile(r"(am|pm)$")
+
+# Tokens handled by the Sessioninsert standardize_time_token helpers: "930pm", "10am".
+COMPACT_CLOCK_TOKEN_RE = re.compile(r"\d{3,4}(am|pm)?")
+HOUR_ONLY_TOKEN_RE = re.compile(r"\d{1,2}(am|pm)?")
+
+# Dates that sometimes land in time columns: 04/12/2025, 4-12-25, 2025-12-04.
+DMY_DATE_RE = re.compile(r"\d{1,2}[/-]\d{1,2}[/-]\d{2,4}")
+ISO_DATE_RE = re.compile(r"\d{4}-\d{1,2}-\d{1,2}")
+
+
+# ============================================================
+# MEMO / VECTORISED ENTRY POINT
+# ============================================================
+
+def is_nan(value: Any) -> bool:
+    return isinstance(value, float) and value != value
+
+
+def memoised(maxsize: int = PARSER_MEMO_SIZE) -> Callable[[Callable], Callable]:
+    """
+    LRU memo for pure per-cell parsers.
+
+    Keys are typed, so an Excel 1 (int), 1.0 (float) and True are parsed
+    separately. NaN and unhashable arguments skip the memo: NaN never
+    compares equal to itself, so caching it would only fill the LRU.
+    The wrapped parser must return immutable values (str, time, tuples).
+    """
+    def decorate(func: Callable) -> Callable:
+        cached = lru_cache(maxsize=maxsize, typed=True)(func)
+
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if any(is_nan(arg) for arg in args):
+                return func(*args, **kwargs)
+
+            try:
+                hash((args, tuple(kwargs.items())))
+            except TypeError:
+                return func(*args, **kwargs)
+
+            return cached(*args, **kwargs)
+
+        wrapper.cache_info = cached.cache_info  # type: ignore[attr-defined]
+        wrapper.cache_clear = cached.cache_clear  # type: ignore[attr-defined]
+        wrapper.uncached = func  # type: ignore[attr-defined]
+        return wrapper
+
+    return decorate
+
+
+_NAN_KEY = object()
+
+
+def parse_column(values: Iterable[Any], parser: Callable[[Any], Any]) -> Any:
+    """
+    Apply parser to every value, calling it once per distinct value.
+
+    Returns a Series with the same index when given a Series, otherwise a list.
+    Distinct means same type and equal value, matching memoised().
+    """
+    results_by_key: dict[Any, Any] = {}
+    results: list[Any] = []
+
+    for value in values:
+        if is_nan(value):
+            key = _NAN_KEY
+        else:
+            key = (type(value), value)
+            try:
+                hash(key)
+            except TypeError:
+                results.append(parser(value))
+                continue
+
+        if key not in results_by_key:
+            results_by_key[key] = parser(value)
+
+        results.append(results_by_key[key])
+
+    if isinstance(values, pd.Series):
+        return pd.Series(results, index=values.index, dtype=object)
+
+    return results
+
+
+# ============================================================
+# CLOCK TOKENS
+# ============================================================
+
+def expand_compact_clock(text: str) -> str:
+    """1230 -> 12:30 and 930 -> 9:30; anything else is returned unchanged."""
+    if ":" not in text and text.isdigit():
+        if len(text) == 4:
+            return f"{text[:2]}:{text[2:]}"
+        if len(text) == 3:
+            return f"{text[0]}:{text[1:]}"
+    return text
+
+
+def parse_clock(text: str, suffix: Optional[str]) -> Optional[str]:
+    """
+    Turn "h[:mm]" plus an optional am/pm suffix into "HH:MM:00".
+
+    The caller strips the suffix and normalises separators first. 12am is
+    midnight, 12pm is noon; out-of-range hours or minutes return None.
+    """
+    match = CLOCK_RE.fullmatch(text)
+
+    if not match:
+        return None
+
+    hour = int(match.group(1))
+    minute = int(match.group(2) or 0)
+
+    if suffix == "pm" and hour != 12:
+        hour += 12
+    elif suffix == "am" and hour == 12:
+        hour = 0
+
+    if not (0 <= hour <= 23 and 0 <= minute <= 59):
+        return None
+
+    return f"{hour:02d}:{minute:02d}:00"
+
+
+# ============================================================
+# DATES
+# ============================================================
+
+EXCEL_EPOCH = np.datetime64("1899-12-30", "D")
+
+# Serial day numbers that stay inside datetime.date's range (0001-01-01 .. 9999-12-31).
+MIN_EXCEL_SERIAL = -693593
+MAX_EXCEL_SERIAL = 2958465
+
+_DATE_KIND_TEXT = 0
+_DATE_KIND_DATETIME = 1
+_DATE_KIND_DATE = 2
+_DATE_KIND_SERIAL = 3
+
+# pandas 2 infers one format for a whole array unless told otherwise;
+# format="mixed" parses each string the way a scalar pd.to_datetime call does.
+_PANDAS_HAS_MIXED_FORMAT = int(pd.__version__.split(".")[0]) >= 2
+
+
+def to_datetime_dayfirst(texts: list[str]) -> list[Any]:
+    """pd.to_datetime(text, dayfirst=True, errors="coerce") for many strings in one call."""
+    series = pd.Series(texts, dtype=object)
+
+    try:
+        if _PANDAS_HAS_MIXED_FORMAT:
+            parsed = pd.to_datetime(series, dayfirst=True, errors="coerce", format="mixed")
+        else:
+            parsed = pd.to_datetime(series, dayfirst=True, errors="coerce")
+        return list(parsed)
+    except (TypeError, ValueError):
+        # Mixed time zone offsets cannot share one column; fall back to one call per string.
+        return [pd.to_datetime(text, dayfirst=True, errors="coerce") for text in texts]
+
+
+def _date_cell_kind(value: Any, excel_serials: bool) -> int:
+    if isinstance(value, datetime):
+        return _DATE_KIND_DATETIME
+    if isinstance(value, date):
+        return _DATE_KIND_DATE
+    if excel_serials and isinstance(value, (int, float)) and not isinstance(value, bool):
+        return _DATE_KIND_SERIAL
+    return _DATE_KIND_TEXT
+
+
+def normalise_date_column(
+    values: Iterable[Any],
+    *,
+    excel_serials: bool = True,
+    text_formats: tuple[str, ...] = (),
+    prepare_text: Optional[Callable[[str], Optional[str]]] = None,
+) -> tuple[pd.Series, list[tuple[Any, Any]]]:
+    """
+    Column version of the importers' per-cell Excel date helpers.
+
+    * blank cells (None, NaN, NaT) -> None
+    * datetime / Timestamp -> .date(), date -> unchanged
+    * int / float (not bool) -> Excel serial day number, all converted in one
+      NumPy operation (only when excel_serials is True, otherwise parsed as text)
+    * anything else -> str(value), passed through prepare_text (None or "" means
+      blank), tried against text_formats with strptime, then every distinct
+      remaining string goes through one pd.to_datetime(dayfirst=True) call
+
+    Returns (dates, unparsed). dates has the input's index and holds
+    datetime.date or None. unparsed lists (index, raw value) for the non-blank
+    cells that did not become a date, so callers can report them in one go.
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(list(values), dtype=object)
+    series = series.astype(object)
+
+    results = np.full(len(series), None, dtype=object)
+    blank = series.isna().to_numpy().copy()
+
+    kinds = np.fromiter(
+        (_date_cell_kind(value, excel_serials) for value in series),
+        dtype=np.int8,
+        count=len(series),
+    )
+    raw_values = series.to_numpy()
+
+    for kind, convert in ((_DATE_KIND_DATETIME, datetime.date), (_DATE_KIND_DATE, None)):
+        positions = np.flatnonzero((kinds == kind) & ~blank)
+        for position in positions:
+            value = raw_values[position]
+            results[position] = convert(value) if convert else value
+
+    serial_positions = np.flatnonzero((kinds == _DATE_KIND_SERIAL) & ~blank)
+    if len(serial_positions):
+        days = np.trunc(raw_values[serial_positions].astype("float64"))
+        in_range = np.isfinite(days) & (days >= MIN_EXCEL_SERIAL) & (days <= MAX_EXCEL_SERIAL)
+        valid_positions = serial_positions[in_range]
+        results[valid_positions] = (
+            EXCEL_EPOCH + days[in_range].astype("int64").astype("timedelta64[D]")
+        ).astype(object)
+
+    text_positions = np.flatnonzero((kinds == _DATE_KIND_TEXT) & ~blank)
+    if len(text_positions):
+        raw_texts = [str(raw_values[position]) for position in text_positions]
+        prepared_by_raw = {
+            raw: (prepare_text(raw) if prepare_text else raw)
+            for raw in dict.fromkeys(raw_texts)
+        }
+
+        parsed_by_text: dict[str, Optional[date]] = {}
+        remaining: list[str] = []
+
+        for text in dict.fromkeys(text for text in prepared_by_raw.values() if text):
+            for fmt in text_formats:
+                try:
+                    parsed_by_text[text] = datetime.strptime(text, fmt).date()
+                    break
+                except ValueError:
+                    pass
+            else:
+                remaining.append(text)
+
+        if remaining:
+            for text, stamp in zip(remaining, to_datetime_dayfirst(remaining)):
+                parsed_by_text[text] = None if pd.isna(stamp) else stamp.date()
+
+        for position, raw in zip(text_positions, raw_texts):
+            text = prepared_by_raw[raw]
+            if text:
+                results[position] = parsed_by_text[text]
+            else:
+                blank[position] = True
+
+    unparsed = [
+        (series.index[position], raw_values[position])
+        for position in np.flatnonzero(~blank & (results == None))  # noqa: E711
+    ]
+
+    return pd.Series(results, index=series.index, dtype=object), unparsed
+
+
+def describe_unparsed_dates(unparsed: list[tuple[Any, Any]], row_offset: int = 2, limit: int = 5) -> str:
+    """Short summary such as "3 cells, e.g. row 14='TBC', row 15='Cancelled'"."""
+    examples = ", ".join(f"row {index + row_offset}={value!r}" for index, value in unparsed[:limit])
+    more = f" and {len(unparsed) - limit} more" if len(unparsed) > limit else ""
+    return f"{len(unparsed)} cells, e.g. {examples}{more}"
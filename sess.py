@@ -2,6 +2,9 @@ import os
 import pyodbc
 import pandas as pd
 from pathlib import Path
+from openpyxl import load_workbook
+
+import bulk_load
 
 # ============================================================
 # CONFIG
@@ -16,6 +19,12 @@ FILES_TO_IMPORT = [
 SKIP_SHEETS = {"Template"}
 TARGET_TABLE = "dbo.ActivityRegisterImport"
 
+# Files are streamed: READ_CHUNK_ROWS source rows are read at a time and
+# prepared rows are inserted and committed every INSERT_CHUNK_ROWS, so memory
+# stays flat however large the registers and exports are.
+READ_CHUNK_ROWS = 5000
+INSERT_CHUNK_ROWS = 5000
+
 SQL_SERVER = r"20.68.160.100"   # e.g. localhost\SQLEXPRESS
 SQL_DATABASE = "SahelihubCRM"
 SQL_USERNAME = "saheli_app"                # None = Windows auth
@@ -180,7 +189,6 @@ def map_columns(df):
     }
 
 def prepare_rows(df, source_file, source_type, source_sheet):
-    rows = []
     colmap = map_columns(df)
 
     for idx, row in df.iterrows():
@@ -203,7 +211,7 @@ def prepare_rows(df, source_file, source_type, source_sheet):
         ]):
             continue
 
-        rows.append((
+        yield (
             source_file,
             source_type,
             source_sheet,
@@ -218,32 +226,117 @@ def prepare_rows(df, source_file, source_type, source_sheet):
             emergency_contact_name,
             emergency_number,
             risk_stratification,
-        ))
-    return rows
+        )
+
+def sheet_frames(path, sheet_name):
+    """
+    One worksheet as DataFrames of READ_CHUNK_ROWS rows, read in openpyxl's
+    read-only mode. Values are strings, like read_excel(dtype=str), and the
+    index is the Excel row number minus 2, so prepare_rows() reports the same
+    row numbers as before.
+    """
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook[sheet_name].iter_rows(values_only=True)
+        header_row = next(rows, None)
+        if header_row is None:
+            return
+
+        header = []
+        for position, name in enumerate(header_row):
+            name = f"Unnamed: {position}" if name is None else str(name)
+            repeats = sum(1 for existing in header if existing == name or existing.startswith(f"{name}."))
+            header.append(f"{name}.{repeats}" if repeats else name)
+
+        chunk = []
+        start = 0
+        for values in rows:
+            values = list(values[:len(header)]) + [None] * (len(header) - len(values))
+            chunk.append([None if v is None else str(v) for v in values])
+            if len(chunk) >= READ_CHUNK_ROWS:
+                yield pd.DataFrame(chunk, columns=header, index=range(start, start + len(chunk)))
+                start += len(chunk)
+                chunk = []
+
+        if chunk:
+            yield pd.DataFrame(chunk, columns=header, index=range(start, start + len(chunk)))
+    finally:
+        workbook.close()
+
+def file_frames(path):
+    """(source type, sheet, DataFrame chunk) for every part of one input file."""
+    ext = path.suffix.lower()
+
+    if ext == ".csv":
+        for df in pd.read_csv(path, dtype=str, chunksize=READ_CHUNK_ROWS):
+            yield "CSV", None, df.dropna(how="all")
+
+    elif ext in [".xlsx", ".xlsm", ".xls"]:
+        workbook = load_workbook(path, read_only=True)
+        sheet_names = workbook.sheetnames
+        workbook.close()
+
+        for sheet_name in sheet_names:
+            if sheet_name in SKIP_SHEETS:
+                continue
+            for df in sheet_frames(path, sheet_name):
+                yield "XLSX", sheet_name, df.dropna(how="all")
+
+    else:
+        print(f"Skipped unsupported file: {path.name}")
+
+# ============================================================
+# INSERT COLUMNS
+# ============================================================
+# In the order prepare_rows() builds each row. Large imports are sent as a
+# table-valued parameter by bulk_load.bulk_insert().
+INSERT_COLUMNS = [
+    "SourceFile",
+    "SourceType",
+    "SourceSheet",
+    "SourceRowNumber",
+    "SessionName",
+    "DayName",
+    "SessionDate",
+    "MonthName",
+    "SessionTime",
+    "SaheliCardNumber",
+    "MemberName",
+    "EmergencyContactName",
+    "EmergencyNumber",
+    "RiskStratification",
+]
 
 # ============================================================
-# INSERT SQL
+# SAVE TO SQL
 # ============================================================
-insert_sql = f"""
-INSERT INTO {TARGET_TABLE}
-(
-    SourceFile,
-    SourceType,
-    SourceSheet,
-    SourceRowNumber,
-    SessionName,
-    DayName,
-    SessionDate,
-    MonthName,
-    SessionTime,
-    SaheliCardNumber,
-    MemberName,
-    EmergencyContactName,
-    EmergencyNumber,
-    RiskStratification
+INSERT_SQL = (
+    f"INSERT INTO {TARGET_TABLE} ({', '.join(INSERT_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in INSERT_COLUMNS)})"
 )
-VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-"""
+
+def flush_rows(cursor, rows):
+    """
+    Insert and commit one chunk; returns (inserted, rejected rows). If the
+    chunk fails it is retried row by row so one bad row only loses itself.
+    """
+    try:
+        bulk_load.bulk_insert(cursor, TARGET_TABLE, INSERT_COLUMNS, rows)
+        conn.commit()
+        return len(rows), []
+    except pyodbc.Error:
+        conn.rollback()
+
+    inserted = 0
+    rejected = []
+    for row in rows:
+        try:
+            cursor.execute(INSERT_SQL, row)
+            inserted += 1
+        except pyodbc.Error as exc:
+            rejected.append((row, exc))
+    conn.commit()
+    return inserted, rejected
 
 # ============================================================
 # IMPORT FILES
@@ -251,42 +344,45 @@ VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
 ensure_target_table(cursor, TARGET_TABLE)
 conn.commit()
 
-all_rows = []
+total_inserted = 0
+all_rejected = []
 
 for file_path in FILES_TO_IMPORT:
     path = resolve_input_file(file_path)
-    ext = path.suffix.lower()
     source_file = path.name
 
     print(f"Reading: {source_file}")
 
-    if ext == ".csv":
-        df = pd.read_csv(path, dtype=str)
-        df = df.dropna(how="all")
-        rows = prepare_rows(df, source_file, "CSV", None)
-        all_rows.extend(rows)
+    counts = {}
+    chunk = []
 
-    elif ext in [".xlsx", ".xlsm", ".xls"]:
-        excel_file = pd.ExcelFile(path, engine="openpyxl")
-        for sheet_name in excel_file.sheet_names:
-            if sheet_name in SKIP_SHEETS:
-                continue
+    for source_type, sheet_name, df in file_frames(path):
+        for row in prepare_rows(df, source_file, source_type, sheet_name):
+            chunk.append(row)
+            if len(chunk) >= INSERT_CHUNK_ROWS:
+                inserted, rejected = flush_rows(cursor, chunk)
+                total_inserted += inserted
+                all_rejected.extend(rejected)
+                chunk = []
+            counts[sheet_name] = counts.get(sheet_name, 0) + 1
 
-            df = pd.read_excel(path, sheet_name=sheet_name, dtype=str, engine="openpyxl")
-            df = df.dropna(how="all")
-            rows = prepare_rows(df, source_file, "XLSX", sheet_name)
-            all_rows.extend(rows)
+    if chunk:
+        inserted, rejected = flush_rows(cursor, chunk)
+        total_inserted += inserted
+        all_rejected.extend(rejected)
 
-    else:
-        print(f"Skipped unsupported file: {source_file}")
+    for sheet_name, count in counts.items():
+        print(f"  {sheet_name or source_file}: {count} rows")
 
-# ============================================================
-# SAVE TO SQL
-# ============================================================
-if all_rows:
-    cursor.executemany(insert_sql, all_rows)
-    conn.commit()
-    print(f"Inserted {len(all_rows)} rows into {TARGET_TABLE}")
+    print(f"  Inserted so far: {total_inserted}")
+
+if all_rejected:
+    print(f"Rejected {len(all_rejected)} rows:")
+    for row, exc in all_rejected[:20]:
+        print(f"  {row[0]} {row[2] or ''} row {row[3]}: {exc}")
+
+if total_inserted:
+    print(f"Inserted {total_inserted} rows into {TARGET_TABLE}")
 else:
     print("No rows found to import.")
 